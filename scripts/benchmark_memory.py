@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Memory Database Benchmark for CursorBot
+
+Compares conversation-history writes and reads before and after the
+pooled WAL connections in MemoryManager:
+- before: one aiosqlite connection and commit per message, rollback journal
+- after: MemoryManager.add_message, sequential and concurrent (batched)
+
+History queries are timed with and without the (user_id, chat_id,
+created_at) index, and history search with LIKE against the FTS5 index.
+
+Usage:
+    python scripts/benchmark_memory.py [--messages 2000] [--chats 50]
+                                       [--queries 500]
+"""
+
+import asyncio
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import aiosqlite
+
+from src.core.memory import MemoryManager
+
+
+INSERT_SQL = """INSERT INTO conversation_history
+                (user_id, chat_id, role, content, metadata, created_at)
+                VALUES (?, ?, ?, ?, ?, ?)"""
+
+def message_text(i: int) -> str:
+    """Synthetic message mentioning one of a thousand topics."""
+    return f"message {i} about topic{(i * 7919) % 1000:04d}x"
+
+
+HISTORY_SQL = """SELECT role, content, metadata, created_at
+                 FROM conversation_history
+                 WHERE user_id = ? AND chat_id = ?
+                 ORDER BY created_at DESC LIMIT 20"""
+
+
+async def write_per_connection(db_path: Path, messages: int, chats: int) -> float:
+    """Previous behaviour: connect, insert and commit for every message."""
+    async with aiosqlite.connect(db_path) as db:
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS conversation_history (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id INTEGER, chat_id INTEGER, role TEXT NOT NULL,
+                content TEXT NOT NULL, metadata TEXT, created_at TEXT
+            )
+        """)
+        await db.commit()
+
+    start = time.perf_counter()
+    for i in range(messages):
+        async with aiosqlite.connect(db_path) as db:
+            await db.execute(INSERT_SQL, (1, i % chats, "user", message_text(i), None, datetime.now().isoformat()))
+            await db.commit()
+    return time.perf_counter() - start
+
+
+async def write_manager(db_path: Path, messages: int, chats: int, concurrent: bool) -> float:
+    manager = MemoryManager(db_path=db_path)
+    await manager.initialize()
+    try:
+        start = time.perf_counter()
+        if concurrent:
+            await asyncio.gather(*(
+                manager.add_message(1, i % chats, "user", message_text(i)) for i in range(messages)
+            ))
+        else:
+            for i in range(messages):
+                await manager.add_message(1, i % chats, "user", message_text(i))
+        return time.perf_counter() - start
+    finally:
+        await manager.close()
+
+
+async def query_history(db_path: Path, queries: int, chats: int, indexed: bool) -> float:
+    async with aiosqlite.connect(db_path) as db:
+        if indexed:
+            await db.execute(
+                "CREATE INDEX IF NOT EXISTS idx_conversation_history_chat "
+                "ON conversation_history (user_id, chat_id, created_at)"
+            )
+        else:
+            await db.execute("DROP INDEX IF EXISTS idx_conversation_history_chat")
+        await db.commit()
+
+        start = time.perf_counter()
+        for i in range(queries):
+            cursor = await db.execute(HISTORY_SQL, (1, i % chats))
+            await cursor.fetchall()
+        return time.perf_counter() - start
+
+
+async def search_like(db_path: Path, terms: list[str]) -> float:
+    """Previous behaviour: substring scan of every history row."""
+    async with aiosqlite.connect(db_path) as db:
+        start = time.perf_counter()
+        for term in terms:
+            cursor = await db.execute(
+                """SELECT content FROM conversation_history WHERE user_id = ? AND content LIKE ?
+                   ORDER BY created_at DESC LIMIT 10""",
+                (1, f"%{term}%")
+            )
+            await cursor.fetchall()
+        return time.perf_counter() - start
+
+
+async def search_fts(db_path: Path, terms: list[str]) -> float:
+    manager = MemoryManager(db_path=db_path)
+    await manager.initialize()
+    try:
+        start = time.perf_counter()
+        for term in terms:
+            await manager.search_history(1, term)
+        return time.perf_counter() - start
+    finally:
+        await manager.close()
+
+
+async def run(args) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+
+        print(f"Writing {args.messages} messages across {args.chats} chats")
+        print()
+        print(f"{'mode':<28} {'seconds':>10} {'msgs/s':>10}")
+
+        rows = [
+            ("connect per message", await write_per_connection(tmp / "before.db", args.messages, args.chats)),
+            ("pooled, sequential", await write_manager(tmp / "sequential.db", args.messages, args.chats, False)),
+            ("pooled, concurrent", await write_manager(tmp / "concurrent.db", args.messages, args.chats, True)),
+        ]
+        for name, elapsed in rows:
+            print(f"{name:<28} {elapsed:>10.3f} {args.messages / max(elapsed, 1e-9):>10.0f}")
+
+        print()
+        print(f"{'history query':<28} {'seconds':>10} {'queries/s':>10}")
+        for indexed in (False, True):
+            elapsed = await query_history(tmp / "concurrent.db", args.queries, args.chats, indexed)
+            name = "with index" if indexed else "full scan"
+            print(f"{name:<28} {elapsed:>10.3f} {args.queries / max(elapsed, 1e-9):>10.0f}")
+
+        terms = [f"topic{i % 1000:04d}x" for i in range(args.queries)]
+        print()
+        print(f"{'history search':<28} {'seconds':>10} {'queries/s':>10}")
+        for name, search in (("LIKE scan", search_like), ("FTS5 + BM25", search_fts)):
+            elapsed = await search(tmp / "concurrent.db", terms)
+            print(f"{name:<28} {elapsed:>10.3f} {len(terms) / max(elapsed, 1e-9):>10.0f}")
+
+
+def main():
+    """Main entry point."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="CursorBot Memory Database Benchmark")
+    parser.add_argument("--messages", type=int, default=2000, help="Messages to write")
+    parser.add_argument("--chats", type=int, default=50, help="Distinct chats")
+    parser.add_argument("--queries", type=int, default=500, help="History queries and searches to run")
+
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
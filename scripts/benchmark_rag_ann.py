@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+RAG ANN Benchmark for CursorBot
+
+Compares IVF approximate search against brute force on synthetic,
+clustered embeddings and reports recall@k and latency per nprobe, so
+RAG_ANN_NLIST / RAG_ANN_NPROBE can be chosen safely.
+
+Usage:
+    python scripts/benchmark_rag_ann.py [--documents 50000] [--dimensions 384]
+                                        [--queries 200] [--top-k 10]
+                                        [--nlist 0] [--nprobe 1,2,4,8,16,32]
+"""
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import numpy as np
+
+from src.core.rag import Document, IVFIndex, NumpyVectorStore
+
+
+def make_embeddings(count: int, dimensions: int, clusters: int, rng) -> np.ndarray:
+    """Generate clustered vectors, which resemble real embedding spaces."""
+    centers = rng.standard_normal((clusters, dimensions)).astype(np.float32)
+    labels = rng.integers(clusters, size=count)
+    noise = rng.standard_normal((count, dimensions)).astype(np.float32) * 0.6
+    return centers[labels] + noise
+
+
+async def run(args) -> None:
+    rng = np.random.default_rng(args.seed)
+    vectors = make_embeddings(args.documents, args.dimensions, args.clusters, rng)
+    queries = make_embeddings(args.queries, args.dimensions, args.clusters, rng)
+
+    store = NumpyVectorStore(
+        dimensions=args.dimensions,
+        initial_capacity=args.documents,
+        ann_index=IVFIndex(nlist=args.nlist, min_train_size=0),
+    )
+
+    start = time.perf_counter()
+    batch = 5000
+    for i in range(0, args.documents, batch):
+        await store.add([
+            Document(id=f"doc{j}", content="", embedding=vectors[j])
+            for j in range(i, min(i + batch, args.documents))
+        ])
+    print(f"Loaded {store.count()} vectors in {time.perf_counter() - start:.2f}s")
+
+    start = time.perf_counter()
+    await store.train_index()
+    print(f"Trained {len(store.ann_index.centroids)} partitions in {time.perf_counter() - start:.2f}s")
+
+    nprobe_values = [int(v) for v in args.nprobe.split(",")]
+    report = await store.benchmark_recall(list(queries), top_k=args.top_k, nprobe_values=nprobe_values)
+
+    print()
+    print(f"{'nprobe':>8} {'recall@' + str(args.top_k):>10} {'ann ms':>10} {'brute ms':>10} {'speedup':>8}")
+    for row in report:
+        speedup = row["brute_force_latency_ms"] / max(row["avg_latency_ms"], 1e-9)
+        print(
+            f"{row['nprobe']:>8} {row['recall']:>10.3f} {row['avg_latency_ms']:>10.3f} "
+            f"{row['brute_force_latency_ms']:>10.3f} {speedup:>7.1f}x"
+        )
+
+
+def main():
+    """Main entry point."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="CursorBot RAG ANN Benchmark")
+    parser.add_argument("--documents", type=int, default=50000, help="Number of vectors")
+    parser.add_argument("--dimensions", type=int, default=384, help="Embedding dimensions")
+    parser.add_argument("--clusters", type=int, default=200, help="Synthetic topic clusters")
+    parser.add_argument("--queries", type=int, default=200, help="Number of queries")
+    parser.add_argument("--top-k", type=int, default=10, help="Neighbours per query")
+    parser.add_argument("--nlist", type=int, default=0, help="IVF partitions (0 = sqrt(N))")
+    parser.add_argument("--nprobe", default="1,2,4,8,16,32", help="Comma-separated nprobe values")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
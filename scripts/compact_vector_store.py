@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Compact the memory-mapped RAG vector store for CursorBot
+
+Rewrites the mmap store without the rows left behind by deleted and
+re-indexed documents. The bot compacts on its own once
+RAG_MMAP_COMPACT_RATIO of the rows are dead; run this to reclaim space
+sooner or when automatic compaction is disabled. Stop the bot first;
+the store is not shared between processes.
+
+Usage:
+    python scripts/compact_vector_store.py [--directory data/rag/mmap/default]
+"""
+
+import asyncio
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.core.rag import MmapVectorStore
+
+
+async def run(args) -> None:
+    directory = Path(args.directory)
+    if not (directory / MmapVectorStore.HEADER_FILE).exists():
+        print(f"No mmap vector store in {directory}")
+        return
+
+    store = MmapVectorStore(str(directory), compact_ratio=0)
+    print(f"{store.count()} documents, {store.tombstone_count()} dead rows")
+
+    reclaimed = await store.compact()
+    print(f"Reclaimed {reclaimed} rows")
+
+
+def main():
+    """Main entry point."""
+    import argparse
+
+    default_directory = os.path.join(
+        os.getenv("RAG_PERSIST_DIR", "data/rag"), "mmap", os.getenv("RAG_COLLECTION", "default")
+    )
+
+    parser = argparse.ArgumentParser(description="CursorBot mmap vector store compaction")
+    parser.add_argument("--directory", default=default_directory, help="Store directory")
+
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -53,7 +53,8 @@ async def memory_handler(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
         /memory add <key> <value> - Add memory
         /memory get <key> - Get memory
         /memory del <key> - Delete memory
-        /memory search <query> - Search memories
+        /memory search [-f] <query> - Search memories (-f: fuzzy)
+        /memory history [-f] <query> - Search conversation history
     """
     user_id = update.effective_user.id
     args = context.args or []
@@ -71,7 +72,8 @@ async def memory_handler(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
                 "• <code>/memory add key value</code> - 新增記憶\n"
                 "• <code>/memory get key</code> - 取得記憶\n"
                 "• <code>/memory del key</code> - 刪除記憶\n"
-                "• <code>/memory search query</code> - 搜尋",
+                "• <code>/memory search query</code> - 搜尋\n"
+                "• <code>/memory history query</code> - 搜尋對話紀錄",
                 parse_mode="HTML",
             )
             return
@@ -111,18 +113,36 @@ async def memory_handler(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
         else:
             await update.message.reply_text(f"❌ 找不到記憶: {key}")
 
-    elif args[0] == "search" and len(args) >= 2:
-        query = " ".join(args[1:])
-        results = await memory.search_memories(user_id, query)
+    elif args[0] in ("search", "history") and len(args) >= 2:
+        fuzzy = args[1] == "-f"
+        query = " ".join(args[2:] if fuzzy else args[1:])
+        if not query:
+            await update.message.reply_text("❌ 請提供搜尋關鍵字")
+            return
+
+        # Control characters mark matches so the snippet can be escaped first
+        highlight = ("\x02", "\x03")
+        if args[0] == "search":
+            results = await memory.search_memories(user_id, query, fuzzy=fuzzy, highlight=highlight)
+        else:
+            results = await memory.search_history(
+                user_id, query, chat_id=update.effective_chat.id, fuzzy=fuzzy, highlight=highlight
+            )
 
         if not results:
             await update.message.reply_text(f"❌ 找不到符合的記憶: {query}")
             return
 
-        text = f"🔍 <b>搜尋結果:</b> {query}\n\n"
+        def render(snippet: str) -> str:
+            return _escape_html(snippet).replace("\x02", "<b>").replace("\x03", "</b>")
+
+        text = f"🔍 <b>搜尋結果:</b> {_escape_html(query)}\n\n"
         for m in results:
-            value = m['value'][:50] + "..." if len(m['value']) > 50 else m['value']
-            text += f"• <code>{m['key']}</code>: {value}\n"
+            if args[0] == "search":
+                text += f"• <code>{_escape_html(m['key'])}</code>: {render(m['snippet'])}\n"
+            else:
+                role = "👤" if m["role"] == "user" else "🤖"
+                text += f"{role} <i>{m['created_at'][:10]}</i> {render(m['snippet'])}\n"
 
         await update.message.reply_text(text, parse_mode="HTML")
 
@@ -553,6 +573,21 @@ async def status_handler(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
         else:
             cli_status = "✅ 可用"
     
+    # Provider health from the router (only providers that have served requests)
+    circuit_icons = {"closed": "🟢", "half_open": "🟡", "open": "🔴"}
+    provider_lines = []
+    for name, route in llm_mgr.get_router_status().get("by_provider", {}).items():
+        latency = f"p50 {route['p50_ms']}ms / p95 {route['p95_ms']}ms" if route["p50_ms"] is not None else "無延遲資料"
+        provider_lines.append(
+            f"{circuit_icons.get(route['state'], '⚪')} {escape(name)}: {latency}, 錯誤率 {route['error_rate']:.0%}"
+        )
+    provider_section = ""
+    if provider_lines:
+        provider_section = (
+            "━━━━━━━━━━━━━━━━━━━━━━\n<b>AI 提供者健康</b>\n━━━━━━━━━━━━━━━━━━━━━━\n"
+            + "\n".join(provider_lines) + "\n\n"
+        )
+    
     text = f"""📊 <b>狀態總覽</b>
 
 ━━━━━━━━━━━━━━━━━━━━━━
@@ -576,7 +611,7 @@ async def status_handler(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
 約 {context_tokens:,} / {max_tokens:,} tokens
 {f'⚠️ 建議使用 /compact 壓縮' if context_pct > 70 else ''}
 
-━━━━━━━━━━━━━━━━━━━━━━
+{provider_section}━━━━━━━━━━━━━━━━━━━━━━
 <b>快捷指令</b>
 ━━━━━━━━━━━━━━━━━━━━━━
 /new - 開始新對話
@@ -665,10 +700,7 @@ async def compact_handler(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
         # Update session stats
         session_mgr = get_session_manager()
         session_key = f"agent:default:telegram:dm:{user_id}" if chat_type == "private" else f"agent:default:telegram:group:{chat_id}"
-        session = session_mgr.get_session_by_key(session_key)
-        if session:
-            session.compaction_count += 1
-            session.context_tokens = after_tokens
+        session_mgr.record_compaction(session_key, after_tokens)
         
         saved_tokens = before_tokens - after_tokens
         saved_messages = before_messages - after_messages
@@ -533,22 +533,27 @@ async def search_handler(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     Handle /search command.
     Search code in workspace.
     """
-    if not context.args:
+    args = list(context.args or [])
+    regex = bool(args) and args[0] in ("-r", "--regex")
+    if regex:
+        args = args[1:]
+
+    if not args:
         await update.message.reply_text(
-            "⚠️ 請提供搜尋關鍵字!\n\n用法: /search <關鍵字>"
+            "⚠️ 請提供搜尋關鍵字!\n\n用法: /search <關鍵字>\n正規表示式: /search -r <pattern>"
         )
         return
 
-    query = " ".join(context.args)
+    query = " ".join(args)
     logger.info(f"User {update.effective_user.id} searching: {query}")
 
     await update.message.chat.send_action("typing")
 
     agent = get_cursor_agent()
-    results = await agent.search_code(query)
+    results = await agent.search_code(query, regex=regex)
 
     await update.message.reply_text(
-        f"🔍 <b>搜尋結果: {query}</b>\n\n{results}",
+        f"🔍 <b>搜尋結果: {_escape_html(query)}</b>\n\n{results}",
         parse_mode="HTML",
     )
 
@@ -929,49 +934,71 @@ async def _handle_async_agent_mode(
     """
     Handle message using Async Agent mode (non-blocking).
     
-    Submits task to background and pushes result when complete.
-    User receives immediate confirmation and can continue chatting.
+    Runs the agent in the background and streams its response into a
+    reply that is edited as tokens arrive. Text past the message length
+    limit continues in follow-up messages. User can continue chatting.
     """
     from ..core.async_tasks import get_task_manager
+    from ..core.draft_streaming import TelegramDraftStreamer
     from telegram import InlineKeyboardButton, InlineKeyboardMarkup
     
     try:
         manager = get_task_manager()
         
-        # Submit task to background
-        task_id = await manager.submit_agent_task(
-            user_id=str(user_id),
-            chat_id=str(chat_id),
-            platform="telegram",
-            prompt=message_text,
-            timeout=300.0,
-            metadata={
-                "username": username,
-                "source": "message",
-            },
-        )
+        # The placeholder becomes the response as it streams in
+        placeholder = await update.message.reply_text("🤖 思考中…")
+        message_id = placeholder.message_id
         
-        # Send confirmation with task ID
+        # Raw model text is sent as plain text, so no HTML parsing
+        streamer = TelegramDraftStreamer(update.get_bot(), parse_mode=None)
+        draft = await streamer.start_stream(chat_id, message_id)
+        
+        async def on_token(text: str) -> None:
+            await streamer.append(chat_id, message_id, text)
+        
+        async def on_complete(task) -> None:
+            await streamer.complete(chat_id, message_id, final_content=str(task.result))
+        
+        async def on_error(task) -> None:
+            # Failed, timed out or cancelled: keep what was streamed; the
+            # outcome itself is pushed as a notification
+            await streamer.complete(chat_id, message_id)
+        
+        try:
+            task_id = await manager.submit_agent_task(
+                user_id=str(user_id),
+                chat_id=str(chat_id),
+                platform="telegram",
+                prompt=message_text,
+                timeout=300.0,
+                on_complete=on_complete,
+                on_error=on_error,
+                on_token=on_token,
+                metadata={
+                    "username": username,
+                    "source": "message",
+                },
+            )
+        except Exception:
+            await streamer.complete(chat_id, message_id)
+            raise
+        
+        # Task ID with status/cancel buttons on the placeholder; streamed
+        # edits keep the buttons until the reply is final
         keyboard = InlineKeyboardMarkup([
             [
                 InlineKeyboardButton("查看狀態", callback_data=f"task_status:{task_id}"),
                 InlineKeyboardButton("取消", callback_data=f"task_cancel:{task_id}"),
             ]
         ])
+        draft.reply_markup = keyboard
         
-        # Truncate message for display
-        preview = message_text[:50] + "..." if len(message_text) > 50 else message_text
-        safe_preview = _escape_html(preview)
-        
-        await update.message.reply_text(
-            f"🤖 <b>Agent 任務已提交</b>\n\n"
-            f"📝 <code>{safe_preview}</code>\n\n"
-            f"🆔 <code>{task_id}</code>\n\n"
-            f"⏳ 背景執行中，完成後自動通知\n\n"
-            f"💡 <code>/tasks</code> 查看所有任務",
-            parse_mode="HTML",
-            reply_markup=keyboard,
-        )
+        if draft.update_count == 0:
+            await placeholder.edit_text(
+                f"🤖 思考中…\n\n🆔 <code>{task_id}</code>",
+                parse_mode="HTML",
+                reply_markup=keyboard,
+            )
         
     except Exception as e:
         logger.error(f"Async agent mode error: {e}")
@@ -992,9 +1019,12 @@ async def _handle_async_cli_mode(
     """
     Handle message using Async CLI mode (non-blocking).
     
-    Submits CLI task to background and pushes result when complete.
+    Submits CLI task to background and streams its output into a reply
+    that is edited live: response text, tool calls and file edits, then
+    the diff summary when the run ends.
     """
     from ..core.async_tasks import get_task_manager
+    from ..core.draft_streaming import TelegramDraftStreamer
     from telegram import InlineKeyboardButton, InlineKeyboardMarkup
     
     try:
@@ -1004,20 +1034,50 @@ async def _handle_async_cli_mode(
         workspace_agent = get_cursor_agent()
         working_dir = workspace_agent.get_current_workspace()
         
+        # The placeholder becomes the live CLI output
+        placeholder = await update.message.reply_text("⌨️ Cursor CLI 處理中…")
+        message_id = placeholder.message_id
+        
+        # CLI output is sent as plain text, so no HTML parsing
+        streamer = TelegramDraftStreamer(update.get_bot(), parse_mode=None)
+        await streamer.start_stream(chat_id, message_id)
+        streamed = False
+        
+        async def on_token(text: str) -> None:
+            nonlocal streamed
+            streamed = True
+            await streamer.append(chat_id, message_id, text)
+        
+        async def on_complete(task) -> None:
+            # Streamed text already ends with the diff summary
+            await streamer.complete(chat_id, message_id, final_content=None if streamed else str(task.result))
+        
+        async def on_error(task) -> None:
+            # Failed, timed out or cancelled: keep what was streamed; the
+            # outcome itself is pushed as a notification
+            await streamer.complete(chat_id, message_id)
+        
         # Submit CLI task to background
-        task_id = await manager.submit_cli_task(
-            user_id=str(user_id),
-            chat_id=str(chat_id),
-            platform="telegram",
-            prompt=message_text,
-            working_directory=working_dir,
-            timeout=None,  # No timeout, use CLI's own setting
-            metadata={
-                "username": username,
-                "source": "message",
-                "workspace": working_dir,
-            },
-        )
+        try:
+            task_id = await manager.submit_cli_task(
+                user_id=str(user_id),
+                chat_id=str(chat_id),
+                platform="telegram",
+                prompt=message_text,
+                working_directory=working_dir,
+                timeout=None,  # No timeout, use CLI's own setting
+                on_complete=on_complete,
+                on_error=on_error,
+                on_token=on_token,
+                metadata={
+                    "username": username,
+                    "source": "message",
+                    "workspace": working_dir,
+                },
+            )
+        except Exception:
+            await streamer.complete(chat_id, message_id)
+            raise
         
         # Send confirmation with task ID
         keyboard = InlineKeyboardMarkup([
@@ -1037,7 +1097,7 @@ async def _handle_async_cli_mode(
             f"📝 <code>{safe_preview}</code>\n"
             f"📂 <code>{workspace_name}</code>\n\n"
             f"🆔 <code>{task_id}</code>\n\n"
-            f"⏳ 背景執行中，完成後自動通知\n\n"
+            f"⏳ 背景執行中，輸出即時顯示於上方\n\n"
             f"💡 <code>/tasks</code> 查看所有任務",
             parse_mode="HTML",
             reply_markup=keyboard,
@@ -1128,10 +1188,14 @@ async def _handle_cli_mode(
             output_text = _escape_html(result.output) if result.output else "任務完成"
             response = output_text
             
-            # Add file modification info if any
-            if result.files_modified:
+            # Add file modification info if any (line counts in stream mode)
+            if result.diff_summary:
+                response += f"\n\n{_escape_html(result.diff_summary)}"
+            elif result.files_modified:
                 files_info = "\n".join(f"• {_escape_html(f)}" for f in result.files_modified[:5])
                 response += f"\n\n📁 <b>修改的檔案:</b>\n{files_info}"
+            if result.output_truncated:
+                response += "\n📄 輸出過長，完整輸出已保存於伺服器"
             
             # Add duration
             response += f"\n\n⏱️ 耗時: {result.duration:.1f}s"
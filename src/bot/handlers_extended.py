@@ -507,6 +507,19 @@ async def queue_stats_handler(update: Update, context: ContextTypes.DEFAULT_TYPE
         if count > 0:
             lines.append(f"• {status}: {count}")
 
+    # Histogram upper bounds; overflow ones are lower bounds
+    if stats["wait_ms"]["count"]:
+        lines.append("\n<b>延遲 (p50 / p95):</b>")
+        for label, key in (("等待", "wait_ms"), ("執行", "run_ms")):
+            hist = stats[key]
+            if not hist["count"]:
+                continue
+            p50, p95 = (
+                f">{hist[p]:.0f}ms" if p in hist["overflow"] else f"≤{hist[p]:.0f}ms"
+                for p in ("p50_ms", "p95_ms")
+            )
+            lines.append(f"• {label}: {p50} / {p95}")
+
     await update.message.reply_text("\n".join(lines), parse_mode="HTML")
 
 
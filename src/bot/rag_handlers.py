@@ -16,6 +16,7 @@ Usage:
 """
 
 import os
+import time
 from pathlib import Path
 
 from telegram import Update
@@ -357,11 +358,30 @@ async def index_dir_command(update: Update, context: ContextTypes.DEFAULT_TYPE)
     
     try:
         rag = get_rag_manager()
-        chunks = await rag.index_directory(dir_path)
+        last_update = 0.0
+        
+        async def report_progress(progress) -> None:
+            # Throttle edits to stay under Telegram's edit rate limit
+            nonlocal last_update
+            now = time.monotonic()
+            if now - last_update < 3:
+                return
+            last_update = now
+            done = progress.files_indexed + progress.files_unchanged + progress.files_failed
+            await processing_msg.edit_text(
+                f"Indexing directory `{os.path.basename(dir_path)}`...\n"
+                f"Files: {done}/{progress.files_scanned}, chunks: {progress.chunks_indexed}",
+                parse_mode="Markdown"
+            )
+        
+        result = await rag.index_directory(dir_path, progress_callback=report_progress)
         
         await processing_msg.edit_text(
             f"Successfully indexed directory `{os.path.basename(dir_path)}`\n"
-            f"Created {chunks} chunks total.",
+            f"Created {result.chunks_indexed} chunks from {result.files_indexed} files "
+            f"({result.chunks_per_second:.1f} chunks/s).\n"
+            f"Unchanged: {result.files_unchanged}, removed: {result.files_removed}, "
+            f"failed: {result.files_failed}",
             parse_mode="Markdown"
         )
         
@@ -10,8 +10,10 @@ Telegram command handlers for v0.4 features:
 - Auto-Documentation
 """
 
+import asyncio
 import os
 from datetime import datetime, timedelta
+from pathlib import Path
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes, CommandHandler, CallbackQueryHandler
 
@@ -313,19 +315,26 @@ async def analytics_command(update: Update, context: ContextTypes.DEFAULT_TYPE)
         analytics = get_analytics()
         
         if not args or args[0] == "overview":
-            stats = analytics.get_overall_stats() if hasattr(analytics, 'get_overall_stats') else {}
+            # Served from rollup tables; run off the event loop
+            summary = await asyncio.to_thread(analytics.get_summary)
+            last_30 = summary["last_30_days"]
+            latency = last_30["latency"]
             
             text = (
-                "📊 <b>Analytics Overview</b>\n\n"
-                f"Total Events: {stats.get('total_events', 0)}\n"
-                f"Total Users: {stats.get('total_users', 0)}\n"
-                f"Today's Events: {stats.get('today_events', 0)}\n"
+                "📊 <b>Analytics Overview</b> (30 days)\n\n"
+                f"Total Events: {last_30['total_events']}\n"
+                f"Total Users: {last_30['total_users']}\n"
+                f"Tokens: {last_30['total_tokens']:,}\n"
+                f"Est. Cost: ${last_30['total_cost']:.4f}\n"
+                f"Today's Events: {summary['today']['events']}\n"
             )
-            
-            if 'top_commands' in stats:
-                text += "\n<b>Top Commands:</b>\n"
-                for cmd, count in stats['top_commands'][:5]:
-                    text += f"• <code>{_escape_html(cmd)}</code>: {count}\n"
+            if latency["total"]:
+                # Histogram upper bounds; overflow ones are lower bounds
+                p50, p95 = (
+                    f">{latency[key]:.0f}" if key in latency["overflow"] else f"≤{latency[key]:.0f}"
+                    for key in ("p50_ms", "p95_ms")
+                )
+                text += f"Latency p50/p95: {p50} / {p95} ms\n"
             
             text += (
                 "\n<b>Commands:</b>\n"
@@ -337,7 +346,10 @@ async def analytics_command(update: Update, context: ContextTypes.DEFAULT_TYPE)
             await update.message.reply_text(text, parse_mode="HTML")
         
         elif args[0] == "me":
-            user_stats = analytics.get_user_stats(user_id) if hasattr(analytics, 'get_user_stats') else None
+            user_stats = (
+                await asyncio.to_thread(analytics.get_user_stats, user_id)
+                if hasattr(analytics, 'get_user_stats') else None
+            )
             
             if user_stats:
                 text = (
@@ -353,23 +365,22 @@ async def analytics_command(update: Update, context: ContextTypes.DEFAULT_TYPE)
                 await update.message.reply_text("No usage data found for your account.")
         
         elif args[0] == "daily":
-            daily = analytics.get_daily_stats() if hasattr(analytics, 'get_daily_stats') else None
+            daily = await asyncio.to_thread(analytics.get_daily_stats, 7)
             
             if daily:
-                text = (
-                    f"📊 <b>Daily Statistics</b> ({daily.date})\n\n"
-                    f"Events: {daily.total_events}\n"
-                    f"Active Users: {daily.active_users}\n"
-                    f"LLM Requests: {daily.llm_requests}\n"
-                    f"Tokens Used: {daily.total_tokens}\n"
-                    f"Est. Cost: ${daily.estimated_cost:.4f}\n"
-                )
+                text = "📊 <b>Daily Statistics</b> (7 days)\n\n"
+                for day in daily:
+                    text += (
+                        f"<b>{day.date}</b>: {day.total_events} events, "
+                        f"{day.unique_users} users, {day.total_llm_requests} LLM, "
+                        f"{day.total_tokens:,} tokens, ${day.total_cost:.4f}\n"
+                    )
                 await update.message.reply_text(text, parse_mode="HTML")
             else:
                 await update.message.reply_text("No daily statistics available.")
         
         elif args[0] == "export":
-            format_type = args[1] if len(args) > 1 else "json"
+            format_type = args[1].lower() if len(args) > 1 else "json"
             
             await update.message.reply_text("Exporting analytics data...")
             
@@ -378,7 +389,7 @@ async def analytics_command(update: Update, context: ContextTypes.DEFAULT_TYPE)
             if file_path:
                 await update.message.reply_document(
                     document=open(file_path, 'rb'),
-                    filename=f"analytics_export.{format_type}",
+                    filename=Path(file_path).name,
                     caption="📊 Analytics Export"
                 )
             else:
@@ -390,7 +401,7 @@ async def analytics_command(update: Update, context: ContextTypes.DEFAULT_TYPE)
                 "<code>/analytics</code> - Overview\n"
                 "<code>/analytics me</code> - Your stats\n"
                 "<code>/analytics daily</code> - Daily stats\n"
-                "<code>/analytics export [json|csv]</code> - Export",
+                "<code>/analytics export [json|csv|parquet|arrow]</code> - Export",
                 parse_mode="HTML"
             )
             
@@ -508,6 +519,7 @@ async def export_command(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
         /export - Export in Markdown
         /export json - Export as JSON
         /export html - Export as HTML
+        /export parquet|arrow - Columnar export for analysis
     """
     user_id = str(update.effective_user.id)
     chat_id = str(update.effective_chat.id)
@@ -531,6 +543,8 @@ async def export_command(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
             "html": ExportFormat.HTML,
             "txt": ExportFormat.TXT,
             "csv": ExportFormat.CSV,
+            "parquet": ExportFormat.PARQUET,
+            "arrow": ExportFormat.ARROW,
         }
         
         export_format = format_map.get(format_type.lower(), ExportFormat.MARKDOWN)
@@ -551,6 +565,8 @@ async def export_command(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
                 ExportFormat.HTML: "html",
                 ExportFormat.TXT: "txt",
                 ExportFormat.CSV: "csv",
+                ExportFormat.PARQUET: "parquet",
+                ExportFormat.ARROW: "arrow",
             }
             ext = ext_map.get(export_format, "txt")
             
@@ -12,6 +12,7 @@ from .skills import (
     AgentSkill, AgentSkillInfo,
 )
 from .context import ContextManager, ConversationContext, get_context_manager
+from .token_counter import TokenCounter, get_token_counter, register_token_counter
 from .scheduler import Scheduler, ScheduledJob, get_scheduler
 from .webhooks import WebhookManager, WebhookType, get_webhook_manager
 from .tools import Tool, ToolResult, ToolRegistry, get_tool_registry
@@ -27,9 +28,13 @@ from .heartbeat import (
     get_heartbeat_monitor, get_retry_handler,
 )
 from .queue import (
-    TaskQueue, TaskStatus, TaskPriority, Task, QueueConfig,
+    TaskQueue, TaskStatus, TaskPriority, TaskLane, Task, QueueConfig,
     QueueManager, get_queue_manager, get_task_queue,
 )
+from .process_pool import (
+    ProcessLane, ProcessLaneConfig, ProcessTimeoutError,
+    get_process_lane,
+)
 from .tts import (
     TTSManager, TTSConfig, TTSResult, TTSProvider,
     get_tts_manager, text_to_speech,
@@ -78,6 +83,10 @@ from .llm_task import (
     LLMTaskManager, TaskType, TaskTemplate, TaskResult,
     get_llm_task_manager,
 )
+from .response_cache import (
+    ResponseCache, ResponseCacheConfig, CacheMode, CacheRequest,
+    get_response_cache,
+)
 from .channel_routing import (
     ChannelRouter, ChannelConfig, ChannelType, RouteRule,
     get_channel_router,
@@ -202,12 +211,14 @@ from .tailscale import (
     TailscaleStatus, get_tailscale_manager,
 )
 from .rag import (
-    RAGManager, RAGConfig, RAGResponse,
+    RAGManager, RAGConfig, RAGResponse, IndexingResult,
     Document, SearchResult,
     ChunkingStrategy, EmbeddingProvider,
     TextChunker, DocumentLoader,
-    VectorStore, InMemoryVectorStore, ChromaVectorStore,
+    VectorStore, InMemoryVectorStore, NumpyVectorStore, MmapVectorStore,
+    ChromaVectorStore, IVFIndex,
     OpenAIEmbedding, GoogleEmbedding, OllamaEmbedding,
+    EmbeddingCache, CachedEmbedding, get_embedding_cache,
     get_rag_manager, reset_rag_manager,
 )
 from .async_tasks import (
@@ -243,7 +254,7 @@ from .code_review import (
 from .conversation_export import (
     ExportFormat, ExportMessage, ExportConfig, ExportResult,
     PrivacyRedactor, BaseExporter, JSONExporter, MarkdownExporter,
-    HTMLExporter, TxtExporter, CSVExporter, ConversationExporter,
+    HTMLExporter, TxtExporter, CSVExporter, ColumnarExporter, ConversationExporter,
     get_exporter, reset_exporter,
 )
 from .auto_docs import (
@@ -355,6 +366,10 @@ __all__ = [
     "ContextManager",
     "ConversationContext",
     "get_context_manager",
+    # Token Counting
+    "TokenCounter",
+    "get_token_counter",
+    "register_token_counter",
     # Scheduler
     "Scheduler",
     "ScheduledJob",
@@ -399,11 +414,17 @@ __all__ = [
     "TaskQueue",
     "TaskStatus",
     "TaskPriority",
+    "TaskLane",
     "Task",
     "QueueConfig",
     "QueueManager",
     "get_queue_manager",
     "get_task_queue",
+    # Process Lane
+    "ProcessLane",
+    "ProcessLaneConfig",
+    "ProcessTimeoutError",
+    "get_process_lane",
     # TTS
     "TTSManager",
     "TTSConfig",
@@ -487,6 +508,12 @@ __all__ = [
     "TaskTemplate",
     "TaskResult",
     "get_llm_task_manager",
+    # Response Cache
+    "ResponseCache",
+    "ResponseCacheConfig",
+    "CacheMode",
+    "CacheRequest",
+    "get_response_cache",
     # Channel Routing
     "ChannelRouter",
     "ChannelConfig",
@@ -560,6 +587,7 @@ __all__ = [
     "RAGManager",
     "RAGConfig",
     "RAGResponse",
+    "IndexingResult",
     "Document",
     "SearchResult",
     "ChunkingStrategy",
@@ -568,10 +596,16 @@ __all__ = [
     "DocumentLoader",
     "VectorStore",
     "InMemoryVectorStore",
+    "NumpyVectorStore",
+    "MmapVectorStore",
+    "IVFIndex",
     "ChromaVectorStore",
     "OpenAIEmbedding",
     "GoogleEmbedding",
     "OllamaEmbedding",
+    "EmbeddingCache",
+    "CachedEmbedding",
+    "get_embedding_cache",
     "get_rag_manager",
     "reset_rag_manager",
     # Async Tasks
@@ -661,6 +695,7 @@ __all__ = [
     "HTMLExporter",
     "TxtExporter",
     "CSVExporter",
+    "ColumnarExporter",
     "ConversationExporter",
     "get_exporter",
     "reset_exporter",
@@ -7,9 +7,11 @@ Provides:
 - Multi-step task handling
 - Tool orchestration
 - Conversation management
+- Token streaming of responses
 """
 
 import asyncio
+import time
 from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
@@ -81,6 +83,7 @@ class AgentContext:
     # Results
     final_response: Optional[str] = None
     error: Optional[str] = None
+    first_token_ms: Optional[int] = None  # Time to first streamed token
 
     @property
     def step_count(self) -> int:
@@ -118,6 +121,10 @@ class AgentLoop:
             prompt="Help me refactor this code",
             user_id="123",
         )
+    
+    Pass on_token to run() to receive response text as it is generated;
+    this needs llm_stream_provider, an async generator function taking
+    the conversation and yielding text chunks.
     """
 
     def __init__(
@@ -125,8 +132,10 @@ class AgentLoop:
         llm_provider: Callable = None,
         tools: dict[str, Callable] = None,
         system_prompt: str = None,
+        llm_stream_provider: Callable = None,
     ):
         self.llm_provider = llm_provider
+        self.llm_stream_provider = llm_stream_provider
         self.tools = tools or {}
         self.system_prompt = system_prompt or self._default_system_prompt()
         
@@ -207,6 +216,8 @@ Always explain your reasoning and actions.
         context: dict = None,
         max_steps: int = 20,
         timeout: int = 300,
+        on_token: Callable = None,
+        llm_stream: Callable = None,
     ) -> AgentContext:
         """
         Run the agent loop.
@@ -218,6 +229,8 @@ Always explain your reasoning and actions.
             context: Additional context
             max_steps: Maximum execution steps
             timeout: Timeout in seconds
+            on_token: Called with each chunk of response text as it streams
+            llm_stream: Streaming function to use instead of llm_stream_provider
             
         Returns:
             AgentContext with results
@@ -259,11 +272,11 @@ Always explain your reasoning and actions.
                     break
 
                 # Get next action from LLM
-                action = await self._get_next_action(ctx)
+                action = await self._get_next_action(ctx, on_token, llm_stream)
 
                 if action is None:
                     ctx.state = AgentState.ERROR
-                    ctx.error = "Failed to determine next action"
+                    ctx.error = ctx.error or "Failed to determine next action"
                     break
 
                 # Execute action
@@ -303,14 +316,22 @@ Always explain your reasoning and actions.
 
         return ctx
 
-    async def _get_next_action(self, ctx: AgentContext) -> Optional[AgentAction]:
+    async def _get_next_action(
+        self,
+        ctx: AgentContext,
+        on_token: Callable = None,
+        llm_stream: Callable = None,
+    ) -> Optional[AgentAction]:
         """
         Get the next action from the LLM.
         
         This is a simplified implementation. In production, you would
         use function calling or a more sophisticated prompting strategy.
         """
-        if not self.llm_provider:
+        llm_stream = llm_stream or self.llm_stream_provider
+        streaming = on_token is not None and llm_stream is not None
+        
+        if not self.llm_provider and not streaming:
             # Without LLM, just respond with the prompt
             return AgentAction(
                 action_type=ActionType.RESPOND,
@@ -319,7 +340,10 @@ Always explain your reasoning and actions.
 
         try:
             # Call LLM to determine next action
-            response = await self.llm_provider(ctx.conversation)
+            if streaming:
+                response = await self._stream_response(ctx, llm_stream, on_token)
+            else:
+                response = await self.llm_provider(ctx.conversation)
 
             # Parse response to determine action
             # This would typically use function calling or structured output
@@ -330,8 +354,31 @@ Always explain your reasoning and actions.
 
         except Exception as e:
             logger.error(f"LLM call error: {e}")
+            ctx.error = f"LLM call failed: {e}"
             return None
 
+    async def _stream_response(self, ctx: AgentContext, llm_stream: Callable, on_token: Callable) -> str:
+        """Stream a response, passing each chunk to on_token, and return the full text."""
+        started = time.monotonic()
+        chunks = []
+        
+        async for chunk in llm_stream(ctx.conversation):
+            if not chunk:
+                continue
+            if ctx.first_token_ms is None:
+                ctx.first_token_ms = int((time.monotonic() - started) * 1000)
+                logger.debug(f"Agent first token after {ctx.first_token_ms}ms")
+            chunks.append(chunk)
+            try:
+                if asyncio.iscoroutinefunction(on_token):
+                    await on_token(chunk)
+                else:
+                    on_token(chunk)
+            except Exception as e:
+                logger.error(f"Token handler error: {e}")
+        
+        return "".join(chunks)
+
     async def _execute_action(self, ctx: AgentContext, action: AgentAction) -> tuple[Any, Optional[str]]:
         """Execute an agent action."""
         ctx.state = AgentState.EXECUTING
@@ -414,6 +461,16 @@ def _get_llm_provider():
         return None
 
 
+def _get_llm_stream_provider():
+    """Get the streaming LLM function from LLMProviderManager."""
+    try:
+        from .llm_providers import get_llm_manager
+        return get_llm_manager().get_llm_stream_function()
+    except Exception as e:
+        logger.error(f"Failed to initialize streaming LLM provider: {e}")
+        return None
+
+
 def _get_agent_tools() -> dict:
     """Get tools from skill manager."""
     try:
@@ -470,6 +527,7 @@ If the user writes in Traditional Chinese, respond in Traditional Chinese.
             llm_provider=_get_llm_provider(),
             tools=tools,
             system_prompt=system_prompt,
+            llm_stream_provider=_get_llm_stream_provider(),
         )
         
         if tools:
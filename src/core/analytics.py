@@ -10,6 +10,7 @@ Features:
 - Performance metrics
 - Cost estimation
 - Export capabilities
+- Background batched ingestion (tracking never touches the database)
 
 Usage:
     from src.core.analytics import get_analytics, track_event, EventType
@@ -26,20 +27,25 @@ Usage:
     
     # Export data
     analytics.export_to_json("analytics.json")
+    analytics.export_to_columnar("analytics.parquet")  # requires pyarrow
 """
 
+import atexit
 import json
 import os
 import sqlite3
-from collections import defaultdict
+import threading
+import time
+from collections import defaultdict, deque
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta
 from enum import Enum
 from pathlib import Path
-from typing import Any, Optional, Union
+from typing import Any, Iterator, Optional, Union
 import asyncio
 
 from ..utils.logger import logger
+from .histogram import bucket_index, bucket_percentiles
 
 
 # ============================================
@@ -215,11 +221,74 @@ class CostEstimator:
 # Analytics Storage
 # ============================================
 
+# Upper bounds (ms) of the latency histogram buckets kept in rollups; the
+# last bucket counts everything slower
+LATENCY_BUCKETS_MS = (100, 250, 500, 1000, 2500, 5000, 10000)
+_LATENCY_COLUMNS = [f"lat_{i}" for i in range(len(LATENCY_BUCKETS_MS) + 1)]
+
+# Rollup dimensions; missing values are stored as '' so they can be part
+# of the primary key
+_ROLLUP_KEYS = ["bucket", "user_id", "platform", "model", "type"]
+_ROLLUP_SUMS = [
+    "events", "tokens_in", "tokens_out", "cost",
+    "duration_sum", "duration_count", *_LATENCY_COLUMNS,
+]
+
+# Rollup table -> strftime format / length of the ISO timestamp prefix
+_ROLLUP_GRAINS = {
+    "rollup_hourly": ("%Y-%m-%dT%H", 13),
+    "rollup_daily": ("%Y-%m-%d", 10),
+}
+
+# Columns of the Parquet / Arrow analytics export
+ANALYTICS_EXPORT_COLUMNS = [
+    ("id", "string"),
+    ("type", "string"),
+    ("timestamp", "timestamp"),
+    ("user_id", "string"),
+    ("chat_id", "string"),
+    ("platform", "string"),
+    ("model", "string"),
+    ("duration_ms", "int64"),
+    ("tokens_in", "int64"),
+    ("tokens_out", "int64"),
+    ("cost", "float64"),
+    ("data", "string"),  # JSON
+]
+
+
+@dataclass
+class RollupConfig:
+    """Retention for raw events and rollups (0 days = keep forever)."""
+    raw_retention_days: int = 90
+    hourly_retention_days: int = 60
+    retention_interval: float = 3600.0
+    
+    @classmethod
+    def from_env(cls) -> "RollupConfig":
+        return cls(
+            raw_retention_days=int(os.getenv("ANALYTICS_RAW_RETENTION_DAYS", "90")),
+            hourly_retention_days=int(os.getenv("ANALYTICS_HOURLY_RETENTION_DAYS", "60")),
+            retention_interval=float(os.getenv("ANALYTICS_RETENTION_INTERVAL", "3600")),
+        )
+
+
 class AnalyticsStorage:
-    """SQLite-based storage for analytics data."""
+    """
+    SQLite-based storage for analytics data.
     
-    def __init__(self, db_path: str = "data/analytics.db"):
+    Besides raw events, hourly and daily rollups per (user, platform,
+    model, event type) hold counts, tokens, cost and a latency histogram.
+    They are updated in the same transaction as the events, so dashboard
+    queries read a few rows per day instead of grouping raw events. Raw
+    events and hourly rollups are pruned after their retention period;
+    daily rollups are kept.
+    """
+    
+    def __init__(self, db_path: str = "data/analytics.db", rollup: RollupConfig = None):
         self.db_path = db_path
+        self.rollup = rollup or RollupConfig()
+        self._last_retention = 0.0
         self._ensure_db()
     
     def _ensure_db(self) -> None:
@@ -251,19 +320,78 @@ class AnalyticsStorage:
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_events_user_id ON events(user_id)")
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_events_type ON events(type)")
         
+        # Rollup tables
+        columns = ",\n".join(
+            [f"{key} TEXT NOT NULL DEFAULT ''" for key in _ROLLUP_KEYS]
+            + [f"{name} {'REAL' if name == 'cost' else 'INTEGER'} NOT NULL DEFAULT 0" for name in _ROLLUP_SUMS]
+            + ["first_ts TEXT", "last_ts TEXT"]
+        )
+        for table in _ROLLUP_GRAINS:
+            cursor.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)
+            )
+            exists = cursor.fetchone() is not None
+            cursor.execute(f"""
+                CREATE TABLE IF NOT EXISTS {table} (
+                    {columns},
+                    PRIMARY KEY ({", ".join(_ROLLUP_KEYS)})
+                )
+            """)
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_user ON {table}(user_id, bucket)")
+            if not exists:
+                self._backfill_rollup(cursor, table)
+        
         conn.commit()
         conn.close()
     
-    def save_event(self, event: Event) -> None:
-        """Save an event to storage."""
+    @staticmethod
+    def _latency_case(column: str) -> list[str]:
+        """SQL expressions counting a duration column into histogram buckets."""
+        cases = []
+        lower = None
+        for bound in LATENCY_BUCKETS_MS:
+            low = f"{column} >= {lower} AND " if lower is not None else ""
+            cases.append(f"SUM(CASE WHEN {low}{column} < {bound} THEN 1 ELSE 0 END)")
+            lower = bound
+        cases.append(f"SUM(CASE WHEN {column} >= {lower} THEN 1 ELSE 0 END)")
+        return cases
+    
+    def _backfill_rollup(self, cursor: sqlite3.Cursor, table: str) -> None:
+        """Build a new rollup table from existing raw events."""
+        _, prefix = _ROLLUP_GRAINS[table]
+        cursor.execute(f"""
+            INSERT INTO {table} ({", ".join(_ROLLUP_KEYS + _ROLLUP_SUMS)}, first_ts, last_ts)
+            SELECT
+                substr(timestamp, 1, {prefix}),
+                COALESCE(user_id, ''),
+                COALESCE(platform, ''),
+                COALESCE(CASE WHEN json_valid(data) THEN json_extract(data, '$.model') END, ''),
+                type,
+                COUNT(*),
+                SUM(COALESCE(tokens_in, 0)),
+                SUM(COALESCE(tokens_out, 0)),
+                SUM(COALESCE(cost, 0)),
+                SUM(COALESCE(duration_ms, 0)),
+                COUNT(duration_ms),
+                {", ".join(self._latency_case("duration_ms"))},
+                MIN(timestamp),
+                MAX(timestamp)
+            FROM events
+            GROUP BY 1, 2, 3, 4, 5
+        """)
+        if cursor.rowcount:
+            logger.info(f"Backfilled {cursor.rowcount} rows into {table}")
+    
+    def connect(self) -> sqlite3.Connection:
+        """Open a connection in WAL mode so writes do not block readers."""
         conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            INSERT INTO events (id, type, timestamp, user_id, chat_id, platform, data, 
-                               duration_ms, tokens_in, tokens_out, cost)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+    
+    @staticmethod
+    def _event_row(event: Event) -> tuple:
+        return (
             event.id,
             event.type.value,
             event.timestamp.isoformat(),
@@ -275,10 +403,139 @@ class AnalyticsStorage:
             event.tokens_in,
             event.tokens_out,
             event.cost,
-        ))
+        )
+    
+    def save_event(self, event: Event) -> None:
+        """Save an event to storage."""
+        conn = self.connect()
+        try:
+            self.save_events([event], conn)
+        finally:
+            conn.close()
+    
+    def save_events(self, events: list[Event], conn: sqlite3.Connection) -> int:
+        """
+        Insert events and update rollups in one transaction.
         
-        conn.commit()
-        conn.close()
+        If the batch hits a constraint violation it is retried row by row
+        so one bad event does not lose the rest.
+        
+        Returns:
+            Number of events written
+        """
+        sql = """
+            INSERT INTO events (id, type, timestamp, user_id, chat_id, platform, data, 
+                               duration_ms, tokens_in, tokens_out, cost)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """
+        
+        try:
+            with conn:
+                conn.executemany(sql, [self._event_row(event) for event in events])
+                self._update_rollups(conn, events)
+            written = len(events)
+        except sqlite3.IntegrityError:
+            saved = []
+            for event in events:
+                try:
+                    with conn:
+                        conn.execute(sql, self._event_row(event))
+                    saved.append(event)
+                except sqlite3.IntegrityError as e:
+                    logger.warning(f"Skipping analytics event {event.id}: {e}")
+            with conn:
+                self._update_rollups(conn, saved)
+            written = len(saved)
+        
+        self._maybe_apply_retention(conn)
+        return written
+    
+    @staticmethod
+    def _update_rollups(conn: sqlite3.Connection, events: list[Event]) -> None:
+        """Add a batch of events to the hourly and daily rollups."""
+        for table, (fmt, _) in _ROLLUP_GRAINS.items():
+            groups: dict[tuple, list] = {}
+            for event in events:
+                model = event.data.get("model") if isinstance(event.data, dict) else None
+                key = (
+                    event.timestamp.strftime(fmt),
+                    event.user_id or "",
+                    event.platform or "",
+                    model or "",
+                    event.type.value,
+                )
+                ts = event.timestamp.isoformat()
+                row = groups.get(key)
+                if row is None:
+                    row = groups[key] = [0] * len(_ROLLUP_SUMS) + [ts, ts]
+                row[0] += 1
+                row[1] += event.tokens_in or 0
+                row[2] += event.tokens_out or 0
+                row[3] += event.cost or 0.0
+                if event.duration_ms is not None:
+                    row[4] += event.duration_ms
+                    row[5] += 1
+                    row[6 + bucket_index(LATENCY_BUCKETS_MS, event.duration_ms)] += 1
+                row[-2] = min(row[-2], ts)
+                row[-1] = max(row[-1], ts)
+            
+            if not groups:
+                continue
+            
+            columns = _ROLLUP_KEYS + _ROLLUP_SUMS + ["first_ts", "last_ts"]
+            updates = ", ".join(
+                [f"{name} = {name} + excluded.{name}" for name in _ROLLUP_SUMS]
+                + [
+                    "first_ts = MIN(COALESCE(first_ts, excluded.first_ts), excluded.first_ts)",
+                    "last_ts = MAX(COALESCE(last_ts, excluded.last_ts), excluded.last_ts)",
+                ]
+            )
+            conn.executemany(
+                f"""INSERT INTO {table} ({", ".join(columns)})
+                    VALUES ({", ".join("?" * len(columns))})
+                    ON CONFLICT({", ".join(_ROLLUP_KEYS)}) DO UPDATE SET {updates}""",
+                [(*key, *row) for key, row in groups.items()],
+            )
+    
+    def _maybe_apply_retention(self, conn: sqlite3.Connection) -> None:
+        if time.monotonic() - self._last_retention >= self.rollup.retention_interval:
+            self.apply_retention(conn)
+    
+    def apply_retention(self, conn: sqlite3.Connection = None) -> dict:
+        """
+        Delete raw events and hourly rollups past their retention period.
+        
+        Daily rollups keep the aggregated history of pruned events.
+        
+        Returns:
+            dict with the number of events and hourly rows deleted
+        """
+        self._last_retention = time.monotonic()
+        own_conn = conn is None
+        conn = conn or self.connect()
+        deleted = {"events": 0, "hourly": 0}
+        try:
+            with conn:
+                if self.rollup.raw_retention_days > 0:
+                    cutoff = datetime.now() - timedelta(days=self.rollup.raw_retention_days)
+                    deleted["events"] = conn.execute(
+                        "DELETE FROM events WHERE timestamp < ?", (cutoff.isoformat(),)
+                    ).rowcount
+                if self.rollup.hourly_retention_days > 0:
+                    cutoff = datetime.now() - timedelta(days=self.rollup.hourly_retention_days)
+                    deleted["hourly"] = conn.execute(
+                        "DELETE FROM rollup_hourly WHERE bucket < ?", (cutoff.strftime("%Y-%m-%dT%H"),)
+                    ).rowcount
+        finally:
+            if own_conn:
+                conn.close()
+        
+        if deleted["events"] or deleted["hourly"]:
+            logger.info(
+                f"Analytics retention: removed {deleted['events']} events, "
+                f"{deleted['hourly']} hourly rollup rows"
+            )
+        return deleted
     
     def get_events(
         self,
@@ -318,46 +575,105 @@ class AnalyticsStorage:
         rows = cursor.fetchall()
         conn.close()
         
-        events = []
-        for row in rows:
-            events.append(Event(
-                id=row[0],
-                type=EventType(row[1]),
-                timestamp=datetime.fromisoformat(row[2]),
-                user_id=row[3],
-                chat_id=row[4],
-                platform=row[5],
-                data=json.loads(row[6]) if row[6] else {},
-                duration_ms=row[7],
-                tokens_in=row[8],
-                tokens_out=row[9],
-                cost=row[10],
-            ))
-        
-        return events
+        return [self._row_event(row) for row in rows]
+    
+    @staticmethod
+    def _row_event(row: tuple) -> Event:
+        return Event(
+            id=row[0],
+            type=EventType(row[1]),
+            timestamp=datetime.fromisoformat(row[2]),
+            user_id=row[3],
+            chat_id=row[4],
+            platform=row[5],
+            data=json.loads(row[6]) if row[6] else {},
+            duration_ms=row[7],
+            tokens_in=row[8],
+            tokens_out=row[9],
+            cost=row[10],
+        )
+    
+    def iter_events(
+        self,
+        start_date: datetime = None,
+        end_date: datetime = None,
+        event_type: EventType = None,
+        user_id: str = None,
+        batch_size: int = 5000,
+    ) -> Iterator[Event]:
+        """
+        Yield matching events oldest first.
+        
+        Pages are fetched by keyset on (timestamp, id) rather than OFFSET,
+        so each page is an index seek and at most batch_size events are
+        held in memory.
+        """
+        where = []
+        params: list = []
+        
+        if start_date:
+            where.append("timestamp >= ?")
+            params.append(start_date.isoformat())
+        
+        if end_date:
+            where.append("timestamp <= ?")
+            params.append(end_date.isoformat())
+        
+        if event_type:
+            where.append("type = ?")
+            params.append(event_type.value)
+        
+        if user_id:
+            where.append("user_id = ?")
+            params.append(user_id)
+        
+        conn = sqlite3.connect(self.db_path)
+        try:
+            last = None
+            while True:
+                clauses = list(where)
+                page_params = list(params)
+                if last is not None:
+                    clauses.append("(timestamp > ? OR (timestamp = ? AND id > ?))")
+                    page_params.extend([last[0], last[0], last[1]])
+                
+                rows = conn.execute(
+                    f"""SELECT * FROM events
+                        {"WHERE " + " AND ".join(clauses) if clauses else ""}
+                        ORDER BY timestamp, id LIMIT ?""",
+                    (*page_params, batch_size),
+                ).fetchall()
+                
+                for row in rows:
+                    yield self._row_event(row)
+                if len(rows) < batch_size:
+                    return
+                last = (rows[-1][2], rows[-1][0])
+        finally:
+            conn.close()
     
     def get_daily_aggregates(self, days: int = 30) -> list[dict]:
-        """Get daily aggregated statistics."""
+        """Get daily aggregated statistics (from the daily rollup)."""
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
         
-        start_date = (datetime.now() - timedelta(days=days)).isoformat()
+        start_date = (datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d")
         
         cursor.execute("""
             SELECT 
-                date(timestamp) as date,
-                COUNT(*) as total_events,
-                COUNT(CASE WHEN type = 'message' THEN 1 END) as messages,
-                COUNT(CASE WHEN type = 'command' THEN 1 END) as commands,
-                COUNT(CASE WHEN type = 'llm_request' THEN 1 END) as llm_requests,
-                SUM(COALESCE(tokens_in, 0) + COALESCE(tokens_out, 0)) as total_tokens,
-                SUM(COALESCE(cost, 0)) as total_cost,
-                COUNT(DISTINCT user_id) as unique_users,
-                AVG(duration_ms) as avg_duration,
-                COUNT(CASE WHEN type = 'error' THEN 1 END) as errors
-            FROM events
-            WHERE timestamp >= ?
-            GROUP BY date(timestamp)
+                bucket as date,
+                SUM(events) as total_events,
+                SUM(CASE WHEN type = 'message' THEN events ELSE 0 END) as messages,
+                SUM(CASE WHEN type = 'command' THEN events ELSE 0 END) as commands,
+                SUM(CASE WHEN type = 'llm_request' THEN events ELSE 0 END) as llm_requests,
+                SUM(tokens_in + tokens_out) as total_tokens,
+                SUM(cost) as total_cost,
+                COUNT(DISTINCT NULLIF(user_id, '')) as unique_users,
+                CAST(SUM(duration_sum) AS REAL) / NULLIF(SUM(duration_count), 0) as avg_duration,
+                SUM(CASE WHEN type = 'error' THEN events ELSE 0 END) as errors
+            FROM rollup_daily
+            WHERE bucket >= ?
+            GROUP BY bucket
             ORDER BY date DESC
         """, (start_date,))
         
@@ -381,22 +697,22 @@ class AnalyticsStorage:
         ]
     
     def get_user_aggregates(self, limit: int = 100) -> list[dict]:
-        """Get per-user aggregated statistics."""
+        """Get per-user aggregated statistics (from the daily rollup)."""
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
         
         cursor.execute("""
             SELECT 
                 user_id,
-                COUNT(*) as total_events,
-                COUNT(CASE WHEN type = 'message' THEN 1 END) as messages,
-                COUNT(CASE WHEN type = 'command' THEN 1 END) as commands,
-                SUM(COALESCE(tokens_in, 0) + COALESCE(tokens_out, 0)) as total_tokens,
-                SUM(COALESCE(cost, 0)) as total_cost,
-                MIN(timestamp) as first_seen,
-                MAX(timestamp) as last_seen
-            FROM events
-            WHERE user_id IS NOT NULL
+                SUM(events) as total_events,
+                SUM(CASE WHEN type = 'message' THEN events ELSE 0 END) as messages,
+                SUM(CASE WHEN type = 'command' THEN events ELSE 0 END) as commands,
+                SUM(tokens_in + tokens_out) as total_tokens,
+                SUM(cost) as total_cost,
+                MIN(first_ts) as first_seen,
+                MAX(last_ts) as last_seen
+            FROM rollup_daily
+            WHERE user_id != ''
             GROUP BY user_id
             ORDER BY total_events DESC
             LIMIT ?
@@ -418,6 +734,243 @@ class AnalyticsStorage:
             }
             for row in rows
         ]
+    
+    def get_user_count(self, days: int = None) -> int:
+        """Number of distinct users, optionally within the last N days."""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            query = "SELECT COUNT(DISTINCT user_id) FROM rollup_daily WHERE user_id != ''"
+            params = []
+            if days:
+                query += " AND bucket >= ?"
+                params.append((datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d"))
+            return conn.execute(query, params).fetchone()[0]
+        finally:
+            conn.close()
+    
+    def get_latency_histogram(self, days: int = 30, event_type: EventType = None) -> dict:
+        """
+        Merge rollup latency histograms over the last N days.
+        
+        Returns:
+            dict with bucket bounds, counts and estimated p50/p95/p99 (ms).
+            A percentile is the upper bound of its bucket; one that falls in
+            the overflow bucket is its lower bound (the last bound) and is
+            listed in "overflow". Percentiles are None only without data.
+        """
+        conn = sqlite3.connect(self.db_path)
+        try:
+            query = f"SELECT {', '.join(f'SUM({c})' for c in _LATENCY_COLUMNS)} FROM rollup_daily WHERE bucket >= ?"
+            params = [(datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d")]
+            if event_type:
+                query += " AND type = ?"
+                params.append(event_type.value)
+            counts = [c or 0 for c in conn.execute(query, params).fetchone()]
+        finally:
+            conn.close()
+        
+        return {
+            "bounds_ms": list(LATENCY_BUCKETS_MS),
+            "counts": counts,
+            "total": sum(counts),
+            **bucket_percentiles(LATENCY_BUCKETS_MS, counts),
+        }
+
+
+# ============================================
+# Background Ingestion
+# ============================================
+
+class DropPolicy(Enum):
+    """What to do with new events when the ingestion buffer is full."""
+    DROP_OLDEST = "drop_oldest"
+    DROP_NEWEST = "drop_newest"
+    BLOCK = "block"  # Wait up to block_timeout, then drop the new event
+
+
+@dataclass
+class IngestionConfig:
+    """Configuration for background analytics ingestion."""
+    enabled: bool = True
+    max_queue: int = 10000
+    batch_size: int = 500
+    flush_interval: float = 1.0
+    drop_policy: DropPolicy = DropPolicy.DROP_OLDEST
+    block_timeout: float = 0.05
+    
+    @classmethod
+    def from_env(cls) -> "IngestionConfig":
+        return cls(
+            enabled=os.getenv("ANALYTICS_ASYNC", "true").lower() in ("true", "1", "yes"),
+            max_queue=int(os.getenv("ANALYTICS_QUEUE_SIZE", "10000")),
+            batch_size=int(os.getenv("ANALYTICS_BATCH_SIZE", "500")),
+            flush_interval=float(os.getenv("ANALYTICS_FLUSH_INTERVAL", "1.0")),
+            drop_policy=DropPolicy(os.getenv("ANALYTICS_DROP_POLICY", "drop_oldest")),
+            block_timeout=float(os.getenv("ANALYTICS_BLOCK_TIMEOUT", "0.05")),
+        )
+
+
+class EventIngestor:
+    """
+    Buffers events and writes them from a dedicated thread.
+    
+    submit() only appends to a bounded in-memory buffer. The writer thread
+    wakes when a batch is full or flush_interval has passed and inserts
+    the batch in a single transaction on its own long-lived connection.
+    When producers outpace the writer the buffer applies the drop policy
+    instead of growing without bound.
+    """
+    
+    def __init__(self, storage: AnalyticsStorage, config: IngestionConfig = None):
+        self.storage = storage
+        self.config = config or IngestionConfig()
+        self._buffer: deque[Event] = deque()
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+        
+        # Events are numbered on submit; _done counts those written or lost
+        self._submitted = 0
+        self._done = 0
+        # Highest event number a flush() is waiting for; partial batches up
+        # to it are written at once instead of after flush_interval
+        self._flush_target = 0
+        self._stats = {
+            "written": 0,
+            "dropped": 0,
+            "failed": 0,
+            "batches": 0,
+            "max_batch": 0,
+            "last_batch_ms": 0.0,
+        }
+    
+    def _ensure_thread(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._stopping = False
+            self._thread = threading.Thread(
+                target=self._run, name="analytics-ingest", daemon=True
+            )
+            self._thread.start()
+    
+    def submit(self, event: Event) -> bool:
+        """
+        Queue an event for writing.
+        
+        Returns:
+            False if the event was dropped because the buffer was full
+        """
+        with self._cond:
+            if len(self._buffer) >= self.config.max_queue:
+                policy = self.config.drop_policy
+                if policy == DropPolicy.BLOCK:
+                    self._cond.wait_for(
+                        lambda: len(self._buffer) < self.config.max_queue,
+                        timeout=self.config.block_timeout,
+                    )
+                if len(self._buffer) >= self.config.max_queue:
+                    self._stats["dropped"] += 1
+                    if policy != DropPolicy.DROP_OLDEST:
+                        return False
+                    self._buffer.popleft()
+                    self._done += 1
+            
+            self._buffer.append(event)
+            self._submitted += 1
+            self._ensure_thread()
+            if len(self._buffer) >= self.config.batch_size:
+                self._cond.notify_all()
+            return True
+    
+    def _run(self) -> None:
+        conn = None
+        try:
+            conn = self.storage.connect()
+            while True:
+                with self._cond:
+                    if not self._buffer and not self._stopping:
+                        self._cond.wait(self.config.flush_interval)
+                    elif len(self._buffer) < self.config.batch_size and not self._stopping:
+                        # Let a partial batch fill up, but never past the interval
+                        self._cond.wait_for(
+                            lambda: (
+                                len(self._buffer) >= self.config.batch_size
+                                or self._stopping
+                                or self._flush_target > self._done
+                            ),
+                            timeout=self.config.flush_interval,
+                        )
+                    if not self._buffer:
+                        if self._stopping:
+                            return
+                        continue
+                    batch = [
+                        self._buffer.popleft()
+                        for _ in range(min(self.config.batch_size, len(self._buffer)))
+                    ]
+                    # Room in the buffer for blocked producers
+                    self._cond.notify_all()
+                
+                self._write(conn, batch)
+        except Exception as e:
+            logger.error(f"Analytics ingestion thread stopped: {e}")
+        finally:
+            if conn is not None:
+                conn.close()
+    
+    def _write(self, conn: sqlite3.Connection, batch: list[Event]) -> None:
+        start = time.perf_counter()
+        try:
+            written = self.storage.save_events(batch, conn)
+        except Exception as e:
+            logger.error(f"Failed to save {len(batch)} analytics events: {e}")
+            written = 0
+        
+        with self._cond:
+            self._stats["written"] += written
+            self._stats["failed"] += len(batch) - written
+            self._stats["batches"] += 1
+            self._stats["max_batch"] = max(self._stats["max_batch"], len(batch))
+            self._stats["last_batch_ms"] = (time.perf_counter() - start) * 1000
+            self._done += len(batch)
+            self._cond.notify_all()
+    
+    def flush(self, timeout: float = 10.0) -> bool:
+        """
+        Wait until every event submitted so far has been written.
+        
+        Returns:
+            False if the timeout expired first
+        """
+        with self._cond:
+            target = self._submitted
+            if self._done >= target:
+                return True
+            self._flush_target = max(self._flush_target, target)
+            self._ensure_thread()
+            self._cond.notify_all()
+            return self._cond.wait_for(
+                lambda: self._done >= target or self._thread is None or not self._thread.is_alive(),
+                timeout=timeout,
+            ) and self._done >= target
+    
+    def close(self, timeout: float = 10.0) -> None:
+        """Write remaining events and stop the writer thread."""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+        self._thread = None
+    
+    def get_stats(self) -> dict:
+        with self._cond:
+            return {
+                **self._stats,
+                "queued": len(self._buffer),
+                "max_queue": self.config.max_queue,
+                "drop_policy": self.config.drop_policy.value,
+            }
 
 
 # ============================================
@@ -430,10 +983,20 @@ class AnalyticsManager:
     Handles event tracking, statistics, and reporting.
     """
     
-    def __init__(self, db_path: str = "data/analytics.db"):
-        self._storage = AnalyticsStorage(db_path)
+    def __init__(
+        self,
+        db_path: str = "data/analytics.db",
+        ingestion: IngestionConfig = None,
+        rollup: RollupConfig = None,
+    ):
+        self._storage = AnalyticsStorage(db_path, rollup or RollupConfig.from_env())
         self._event_counter = 0
         
+        ingestion = ingestion or IngestionConfig.from_env()
+        self._ingestor = EventIngestor(self._storage, ingestion) if ingestion.enabled else None
+        if self._ingestor:
+            atexit.register(self._ingestor.close)
+        
         # In-memory cache for real-time stats
         self._cache = {
             "today_events": 0,
@@ -511,9 +1074,12 @@ class AnalyticsManager:
             cost=cost,
         )
         
-        # Save to storage
+        # Save to storage (queued for the writer thread when enabled)
         try:
-            self._storage.save_event(event)
+            if self._ingestor:
+                self._ingestor.submit(event)
+            else:
+                self._storage.save_event(event)
         except Exception as e:
             logger.error(f"Failed to save analytics event: {e}")
         
@@ -591,6 +1157,23 @@ class AnalyticsManager:
             },
         )
     
+    def flush(self, timeout: float = 10.0) -> bool:
+        """Wait for queued events to reach the database."""
+        if self._ingestor:
+            return self._ingestor.flush(timeout)
+        return True
+    
+    def close(self) -> None:
+        """Flush queued events and stop the writer thread."""
+        if self._ingestor:
+            self._ingestor.close()
+    
+    def get_ingestion_stats(self) -> dict:
+        """Get background ingestion counters (queued, written, dropped...)."""
+        if self._ingestor:
+            return {"enabled": True, **self._ingestor.get_stats()}
+        return {"enabled": False}
+    
     # ============================================
     # Statistics Methods
     # ============================================
@@ -608,6 +1191,7 @@ class AnalyticsManager:
     
     def get_daily_stats(self, days: int = 30) -> list[DailyStats]:
         """Get daily statistics for the past N days."""
+        self.flush()
         aggregates = self._storage.get_daily_aggregates(days)
         return [
             DailyStats(
@@ -627,6 +1211,7 @@ class AnalyticsManager:
     
     def get_user_stats(self, user_id: str) -> Optional[UserStats]:
         """Get statistics for a specific user."""
+        self.flush()
         events = self._storage.get_events(user_id=user_id, limit=10000)
         
         if not events:
@@ -665,6 +1250,7 @@ class AnalyticsManager:
     
     def get_top_users(self, limit: int = 10) -> list[dict]:
         """Get top users by activity."""
+        self.flush()
         return self._storage.get_user_aggregates(limit)
     
     def get_events(
@@ -676,6 +1262,7 @@ class AnalyticsManager:
         limit: int = 100,
     ) -> list[Event]:
         """Query events with filters."""
+        self.flush()
         return self._storage.get_events(
             start_date=start_date,
             end_date=end_date,
@@ -693,11 +1280,9 @@ class AnalyticsManager:
         total_events = sum(d.total_events for d in daily)
         total_tokens = sum(d.total_tokens for d in daily)
         total_cost = sum(d.total_cost for d in daily)
-        total_users = len(set(
-            u["user_id"] for u in self._storage.get_user_aggregates(1000)
-        ))
+        total_users = self._storage.get_user_count(30)
         
-        return {
+        summary = {
             "today": today,
             "last_30_days": {
                 "total_events": total_events,
@@ -705,9 +1290,20 @@ class AnalyticsManager:
                 "total_cost": round(total_cost, 4),
                 "total_users": total_users,
                 "avg_daily_events": total_events / 30 if daily else 0,
+                "latency": self._storage.get_latency_histogram(30),
             },
             "top_users": self.get_top_users(5),
+            "ingestion": self.get_ingestion_stats(),
         }
+        
+        # LLM response cache hit/miss and savings counters
+        try:
+            from .response_cache import get_response_cache
+            summary["response_cache"] = get_response_cache().get_stats()
+        except Exception as e:
+            logger.debug(f"Response cache stats unavailable: {e}")
+        
+        return summary
     
     # ============================================
     # Export Methods
@@ -719,21 +1315,20 @@ class AnalyticsManager:
         start_date: datetime = None,
         end_date: datetime = None,
     ) -> str:
-        """Export analytics data to JSON file."""
-        events = self._storage.get_events(
-            start_date=start_date,
-            end_date=end_date,
-            limit=100000,
-        )
+        """Export analytics data to JSON file, streaming events oldest first."""
+        self.flush()
         
-        data = {
-            "exported_at": datetime.now().isoformat(),
-            "total_events": len(events),
-            "events": [e.to_dict() for e in events],
-        }
-        
-        with open(output_path, "w") as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+        total = 0
+        with open(output_path, "w", encoding="utf-8") as f:
+            f.write("{\n")
+            f.write(f'  "exported_at": {json.dumps(datetime.now().isoformat())},\n')
+            f.write('  "events": [')
+            for event in self._storage.iter_events(start_date=start_date, end_date=end_date):
+                f.write(("," if total else "") + "\n    ")
+                f.write(json.dumps(event.to_dict(), ensure_ascii=False))
+                total += 1
+            # total_events goes last since it is counted while streaming
+            f.write(("\n  ]" if total else "]") + f',\n  "total_events": {total}\n}}\n')
         
         return output_path
     
@@ -743,14 +1338,10 @@ class AnalyticsManager:
         start_date: datetime = None,
         end_date: datetime = None,
     ) -> str:
-        """Export analytics data to CSV file."""
+        """Export analytics data to CSV file, streaming events oldest first."""
         import csv
         
-        events = self._storage.get_events(
-            start_date=start_date,
-            end_date=end_date,
-            limit=100000,
-        )
+        self.flush()
         
         with open(output_path, "w", newline="") as f:
             writer = csv.writer(f)
@@ -759,7 +1350,7 @@ class AnalyticsManager:
                 "duration_ms", "tokens_in", "tokens_out", "cost"
             ])
             
-            for event in events:
+            for event in self._storage.iter_events(start_date=start_date, end_date=end_date):
                 writer.writerow([
                     event.id,
                     event.type.value,
@@ -774,6 +1365,93 @@ class AnalyticsManager:
                 ])
         
         return output_path
+    
+    def export_to_columnar(
+        self,
+        output_path: str,
+        format: str = "parquet",
+        start_date: datetime = None,
+        end_date: datetime = None,
+        batch_size: int = 10000,
+    ) -> str:
+        """
+        Export analytics data to a Parquet or Arrow IPC file (requires pyarrow).
+        
+        Events are written in record batches of batch_size rows. Type, user,
+        chat, platform and model columns are dictionary-encoded; data is
+        kept as a JSON string.
+        """
+        from .columnar_export import ColumnarWriter
+        
+        self.flush()
+        
+        with ColumnarWriter(
+            output_path,
+            ANALYTICS_EXPORT_COLUMNS,
+            format=format,
+            batch_size=batch_size,
+            dictionary_columns={"type", "user_id", "chat_id", "platform", "model"},
+        ) as writer:
+            for event in self._storage.iter_events(
+                start_date=start_date, end_date=end_date, batch_size=batch_size
+            ):
+                writer.write((
+                    event.id,
+                    event.type.value,
+                    event.timestamp,
+                    event.user_id,
+                    event.chat_id,
+                    event.platform,
+                    event.data.get("model"),
+                    event.duration_ms,
+                    event.tokens_in,
+                    event.tokens_out,
+                    event.cost,
+                    json.dumps(event.data, ensure_ascii=False) if event.data else None,
+                ))
+        
+        return output_path
+    
+    async def export_to_file(
+        self,
+        format: str = "json",
+        output_dir: str = "exports",
+        start_date: datetime = None,
+        end_date: datetime = None,
+    ) -> Optional[str]:
+        """
+        Export to a timestamped file in output_dir without blocking the loop.
+        
+        Args:
+            format: "json", "csv", "parquet" or "arrow"
+        
+        Returns:
+            Path of the written file, or None on failure
+        """
+        exporters = {
+            "json": self.export_to_json,
+            "csv": self.export_to_csv,
+            "parquet": lambda path, start, end: self.export_to_columnar(path, "parquet", start, end),
+            "arrow": lambda path, start, end: self.export_to_columnar(path, "arrow", start, end),
+        }
+        if format not in exporters:
+            logger.error(f"Unsupported analytics export format: {format}")
+            return None
+        
+        Path(output_dir).mkdir(parents=True, exist_ok=True)
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        output_path = Path(output_dir) / f"analytics_{timestamp}.{format}"
+        tmp_path = output_path.with_name(output_path.name + ".tmp")
+        
+        try:
+            await asyncio.to_thread(exporters[format], str(tmp_path), start_date, end_date)
+            os.replace(tmp_path, output_path)
+        except Exception as e:
+            logger.error(f"Analytics export failed: {e}")
+            tmp_path.unlink(missing_ok=True)
+            return None
+        
+        return str(output_path)
 
 
 # ============================================
@@ -806,6 +1484,8 @@ def track_event(
 def reset_analytics() -> None:
     """Reset the analytics manager instance."""
     global _analytics
+    if _analytics is not None:
+        _analytics.close()
     _analytics = None
 
 
@@ -819,6 +1499,11 @@ __all__ = [
     "CostEstimator",
     # Storage
     "AnalyticsStorage",
+    "RollupConfig",
+    "LATENCY_BUCKETS_MS",
+    "DropPolicy",
+    "IngestionConfig",
+    "EventIngestor",
     # Manager
     "AnalyticsManager",
     "get_analytics",
@@ -106,10 +106,12 @@ class AsyncTask:
     on_complete: Optional[Callable] = None
     on_progress: Optional[Callable] = None
     on_error: Optional[Callable] = None
+    on_token: Optional[Callable] = None  # Streams response text; the result is not pushed again
     
     # Internal
     _task: Optional[asyncio.Task] = field(default=None, repr=False)
     _cancelled: bool = field(default=False, repr=False)
+    _finished: bool = field(default=False, repr=False)  # Completion handled
     
     @property
     def duration_seconds(self) -> float:
@@ -423,6 +425,7 @@ class AsyncTaskManager:
         on_complete: Callable = None,
         on_progress: Callable = None,
         on_error: Callable = None,
+        on_token: Callable = None,
         **kwargs,
     ) -> str:
         """
@@ -437,6 +440,8 @@ class AsyncTaskManager:
             on_complete: Callback when complete
             on_progress: Callback for progress updates
             on_error: Callback on error
+            on_token: Callback for each chunk of the response as it streams;
+                the completed response is then not pushed as a notification
             **kwargs: Additional arguments for agent
             
         Returns:
@@ -453,6 +458,7 @@ class AsyncTaskManager:
             on_complete=on_complete,
             on_progress=on_progress,
             on_error=on_error,
+            on_token=on_token,
         )
         
         self._tasks[task.id] = task
@@ -475,6 +481,7 @@ class AsyncTaskManager:
         on_complete: Callable = None,
         on_progress: Callable = None,
         on_error: Callable = None,
+        on_token: Callable = None,
         **kwargs,
     ) -> str:
         """
@@ -491,6 +498,9 @@ class AsyncTaskManager:
             on_complete: Callback when complete
             on_progress: Callback for progress updates
             on_error: Callback on error
+            on_token: Callback for live output: response text, tool call and
+                edit lines, then the diff summary; the completed output is
+                then not pushed as a notification
             **kwargs: Additional arguments
             
         Returns:
@@ -512,6 +522,7 @@ class AsyncTaskManager:
             on_complete=on_complete,
             on_progress=on_progress,
             on_error=on_error,
+            on_token=on_token,
         )
         
         self._tasks[task.id] = task
@@ -589,19 +600,27 @@ class AsyncTaskManager:
             task.progress.message = "Starting Agent..."
             
             try:
-                from .agent_loop import get_agent_loop
+                from .agent_loop import AgentState, get_agent_loop
                 
                 agent = get_agent_loop()
                 prompt = task.input_data.get("prompt", "")
                 
                 task.progress.message = "Agent is thinking..."
                 
+                # Stream with the user's selected model
+                llm_stream = None
+                if task.on_token:
+                    from .llm_providers import get_llm_manager
+                    llm_stream = get_llm_manager().get_llm_stream_function_for_user(task.user_id)
+                
                 # Run with timeout
                 ctx = await asyncio.wait_for(
                     agent.run(
                         prompt=prompt,
                         user_id=task.user_id,
                         timeout=int(task.timeout),
+                        on_token=task.on_token,
+                        llm_stream=llm_stream,
                     ),
                     timeout=task.timeout,
                 )
@@ -611,6 +630,13 @@ class AsyncTaskManager:
                     task.status = TaskStatus.CANCELLED
                     return
                 
+                # A stream that broke off is a failure, not an empty answer
+                if ctx.state == AgentState.ERROR:
+                    task.status = TaskStatus.FAILED
+                    task.error = ctx.error or "Agent failed"
+                    logger.error(f"Agent task {task.id} failed: {task.error}")
+                    return
+                
                 # Set result
                 task.result = ctx.final_response or "Agent completed without response"
                 task.status = TaskStatus.COMPLETED
@@ -653,9 +679,32 @@ class AsyncTaskManager:
                 
                 task.progress.message = "CLI is processing..."
                 
-                # Progress callback
-                def on_output(text: str):
-                    task.progress.message = text[:100] if text else "Processing..."
+                # Tool calls and edits go on their own lines between text
+                at_line_start = True
+                
+                async def emit(text: str) -> None:
+                    nonlocal at_line_start
+                    if not text or not task.on_token:
+                        return
+                    try:
+                        outcome = task.on_token(text)
+                        if asyncio.iscoroutine(outcome):
+                            await outcome
+                    except Exception as e:
+                        logger.debug(f"CLI task {task.id} on_token error: {e}")
+                    at_line_start = text.endswith("\n")
+                
+                # Progress callback: latest text or tool call, streamed if requested
+                async def on_event(event) -> None:
+                    if event.kind == "text":
+                        if event.text.strip():
+                            task.progress.message = event.text.strip()[-100:]
+                        await emit(event.text)
+                        return
+                    line = event.progress_line()
+                    if line:
+                        task.progress.message = line[:100]
+                        await emit(("" if at_line_start else "\n") + line + "\n")
                 
                 # Run CLI directly - CLI has its own timeout handling
                 # Don't wrap with asyncio.wait_for to avoid double timeout
@@ -664,7 +713,7 @@ class AsyncTaskManager:
                     working_directory=working_dir,
                     model=model,
                     timeout=int(task.timeout) if task.timeout else None,  # Pass timeout to CLI
-                    on_output=on_output,
+                    on_event=on_event,
                     user_id=task.user_id,
                 )
                 
@@ -673,9 +722,19 @@ class AsyncTaskManager:
                     task.status = TaskStatus.CANCELLED
                     return
                 
+                # Close the streamed reply with the diff summary and a
+                # truncation note (the spill path stays server-side)
+                footer = [result.diff_summary] if result.diff_summary else []
+                if result.output_truncated:
+                    footer.append("📄 Output truncated; full output saved on the server")
+                if footer:
+                    await emit(("" if at_line_start else "\n") + "\n" + "\n".join(footer))
+                
                 # Set result
                 if result.success:
                     task.result = result.output or "CLI completed"
+                    if result.diff_summary:
+                        task.result += f"\n\n{result.diff_summary}"
                     task.status = TaskStatus.COMPLETED
                 else:
                     # Check if it was a timeout
@@ -776,11 +835,17 @@ class AsyncTaskManager:
     
     async def _handle_task_completion(self, task: AsyncTask) -> None:
         """Handle task completion - send notifications and call callbacks."""
+        if task._finished:
+            return
+        task._finished = True
         logger.info(f"Handling completion for task {task.id}, status={task.status.value}")
         
-        # Send push notification
+        # Send push notification, unless the response was streamed into the chat
         try:
-            success = await self._notifier.send_completion(task)
+            if task.on_token and task.status == TaskStatus.COMPLETED:
+                success = True
+            else:
+                success = await self._notifier.send_completion(task)
             if success:
                 logger.info(f"Notification sent successfully for task {task.id}")
             else:
@@ -798,7 +863,7 @@ class AsyncTaskManager:
             except Exception as e:
                 logger.error(f"Task {task.id} on_complete callback error: {e}")
         
-        elif task.status in (TaskStatus.FAILED, TaskStatus.TIMEOUT) and task.on_error:
+        elif task.status in (TaskStatus.FAILED, TaskStatus.TIMEOUT, TaskStatus.CANCELLED) and task.on_error:
             try:
                 if asyncio.iscoroutinefunction(task.on_error):
                     await task.on_error(task)
@@ -854,6 +919,9 @@ class AsyncTaskManager:
         task.status = TaskStatus.CANCELLED
         task.completed_at = datetime.now()
         
+        # Cancelled before it started (e.g. queued on the semaphore)
+        await self._handle_task_completion(task)
+        
         logger.info(f"Task {task_id} cancelled")
         return True
     
@@ -480,6 +480,24 @@ class CodeParser:
         return sig
 
 
+def parse_modules(file_paths: list[str], config: DocConfig = None) -> list[ModuleDoc]:
+    """
+    Parse a batch of files, skipping ones without documented elements.
+    
+    Module-level so that it can run in the process lane.
+    """
+    parser = CodeParser(config)
+    modules = []
+    for file_path in file_paths:
+        try:
+            module_doc = parser.parse_file(file_path)
+            if module_doc.elements:  # Only include modules with documented elements
+                modules.append(module_doc)
+        except Exception as e:
+            logger.warning(f"Failed to parse {file_path}: {e}")
+    return modules
+
+
 # ============================================
 # Documentation Generators
 # ============================================
@@ -825,6 +843,8 @@ class HTMLGenerator:
 class AutoDocGenerator:
     """Main auto-documentation generator."""
     
+    PARSE_BATCH_SIZE = 16  # Files per process lane task
+    
     def __init__(self, config: DocConfig = None):
         self.config = config or DocConfig()
         self._parser = CodeParser(self.config)
@@ -873,16 +893,23 @@ class AutoDocGenerator:
         else:
             files = path.glob("*.py")
         
-        for file_path in files:
-            if file_path.name.startswith("_") and not file_path.name == "__init__.py":
-                continue
-            
-            try:
-                module_doc = self._parser.parse_file(str(file_path))
-                if module_doc.elements:  # Only include modules with documented elements
-                    modules.append(module_doc)
-            except Exception as e:
-                logger.warning(f"Failed to parse {file_path}: {e}")
+        file_paths = [
+            str(file_path) for file_path in files
+            if not file_path.name.startswith("_") or file_path.name == "__init__.py"
+        ]
+        
+        # Parsing is CPU-bound; spread batches over the process lane
+        from .process_pool import get_process_lane
+        lane = get_process_lane()
+        batches = [
+            file_paths[i:i + self.PARSE_BATCH_SIZE]
+            for i in range(0, len(file_paths), self.PARSE_BATCH_SIZE)
+        ]
+        results = await asyncio.gather(*(
+            lane.run(parse_modules, batch, self.config) for batch in batches
+        ))
+        for batch_modules in results:
+            modules.extend(batch_modules)
         
         # Sort modules by name
         modules.sort(key=lambda m: m.name)
@@ -1101,6 +1128,7 @@ __all__ = [
     "DocConfig",
     # Parser
     "CodeParser",
+    "parse_modules",
     # Generators
     "MarkdownGenerator",
     "HTMLGenerator",
@@ -0,0 +1,164 @@
+"""
+Columnar Export for CursorBot
+
+Writes rows to Parquet or Arrow IPC files in fixed-size record batches,
+so memory stays bounded however many rows are exported. Low-cardinality
+string columns (roles, event types, user and platform ids) are
+dictionary-encoded.
+
+Requires pyarrow (optional dependency).
+
+Usage:
+    from src.core.columnar_export import ColumnarWriter
+
+    columns = [("timestamp", "timestamp"), ("role", "string"), ("content", "string")]
+    with ColumnarWriter("chat.parquet", columns, dictionary_columns={"role"}) as writer:
+        for row in rows:
+            writer.write(row)
+"""
+
+from pathlib import Path
+from typing import Iterable, Optional, Union
+
+# Column type names accepted by ColumnarWriter
+COLUMN_TYPES = ("string", "int64", "float64", "timestamp")
+
+# Supported file formats
+COLUMNAR_FORMATS = ("parquet", "arrow")
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+        return pyarrow
+    except ImportError:
+        raise ImportError(
+            "Parquet/Arrow export requires pyarrow. Install with: pip install pyarrow"
+        ) from None
+
+
+class ColumnarWriter:
+    """
+    Incremental Parquet / Arrow IPC writer.
+
+    Rows are buffered per column and flushed as one record batch (one
+    Parquet row group) every batch_size rows. Arrow output uses the IPC
+    stream format, which allows each batch to carry its own dictionary.
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        columns: list[tuple[str, str]],
+        format: str = "parquet",
+        batch_size: int = 10000,
+        dictionary_columns: Iterable[str] = (),
+        compression: Optional[str] = "zstd",
+    ):
+        """
+        Args:
+            path: Output file
+            columns: (name, type) pairs; type is one of COLUMN_TYPES
+            format: "parquet" or "arrow"
+            batch_size: Rows per record batch / row group
+            dictionary_columns: String columns to dictionary-encode
+            compression: Parquet compression codec (None to disable)
+        """
+        if format not in COLUMNAR_FORMATS:
+            raise ValueError(f"Unsupported columnar format: {format}")
+        for name, type_name in columns:
+            if type_name not in COLUMN_TYPES:
+                raise ValueError(f"Unsupported type for column {name}: {type_name}")
+
+        pa = _require_pyarrow()
+        self._pa = pa
+        self.path = Path(path)
+        self.format = format
+        self.batch_size = batch_size
+        self.columns = columns
+        self.dictionary_columns = set(dictionary_columns)
+        self.rows_written = 0
+
+        base_types = {
+            "string": pa.string(),
+            "int64": pa.int64(),
+            "float64": pa.float64(),
+            "timestamp": pa.timestamp("us"),
+        }
+        self._types = {name: base_types[type_name] for name, type_name in columns}
+        self.schema = pa.schema([
+            pa.field(name, pa.dictionary(pa.int32(), pa.string()))
+            if name in self.dictionary_columns else pa.field(name, self._types[name])
+            for name, _ in columns
+        ])
+
+        self._buffers: dict[str, list] = {name: [] for name, _ in columns}
+        self._buffered = 0
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if format == "parquet":
+            import pyarrow.parquet as pq
+            self._writer = pq.ParquetWriter(
+                str(self.path),
+                self.schema,
+                compression=compression,
+                use_dictionary=sorted(self.dictionary_columns) or False,
+            )
+        else:
+            self._sink = pa.OSFile(str(self.path), "wb")
+            self._writer = pa.ipc.new_stream(self._sink, self.schema)
+
+    def write(self, row: Union[dict, tuple, list]) -> None:
+        """Add one row, given as a dict or in column order."""
+        if isinstance(row, dict):
+            for name, values in self._buffers.items():
+                values.append(row.get(name))
+        else:
+            for (name, _), value in zip(self.columns, row):
+                self._buffers[name].append(value)
+
+        self._buffered += 1
+        if self._buffered >= self.batch_size:
+            self.flush()
+
+    def write_many(self, rows: Iterable[Union[dict, tuple, list]]) -> None:
+        for row in rows:
+            self.write(row)
+
+    def flush(self) -> None:
+        """Write buffered rows as one record batch."""
+        if not self._buffered:
+            return
+
+        pa = self._pa
+        arrays = []
+        for name, _ in self.columns:
+            array = pa.array(self._buffers[name], type=self._types[name])
+            if name in self.dictionary_columns:
+                array = array.dictionary_encode()
+            arrays.append(array)
+            self._buffers[name] = []
+
+        self._writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=self.schema))
+        self.rows_written += self._buffered
+        self._buffered = 0
+
+    def close(self) -> None:
+        """Flush remaining rows and finish the file."""
+        self.flush()
+        self._writer.close()
+        if self.format == "arrow":
+            self._sink.close()
+
+    def __enter__(self) -> "ColumnarWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+
+__all__ = [
+    "COLUMN_TYPES",
+    "COLUMNAR_FORMATS",
+    "ColumnarWriter",
+]
@@ -8,14 +8,17 @@ Provides:
 - Multi-turn dialogue support
 - Follow-up handling
 - Compaction (conversation compression)
+- Token budgeting with cached per-message counts
 """
 
 import json
-from dataclasses import dataclass, field
+import os
+from dataclasses import dataclass, field, replace
 from datetime import datetime, timedelta
 from typing import Any, Callable, Optional
 
 from ..utils.logger import logger
+from .token_counter import TokenCounter, get_token_counter
 
 
 # ============================================
@@ -69,7 +72,7 @@ class CompactionConfig:
     
     # When to trigger compaction
     trigger_message_count: int = 15  # Compact when messages exceed this
-    trigger_token_estimate: int = 3000  # Compact when estimated tokens exceed this
+    trigger_token_estimate: int = 3000  # Compact when counted tokens exceed this
     
     # What to keep
     keep_recent_messages: int = 5  # Always keep N most recent messages
@@ -81,6 +84,28 @@ class CompactionConfig:
     
     # Auto-compaction
     auto_compact: bool = True  # Automatically compact when triggered
+    
+    # Hard budget: kept messages plus summary never exceed this (0 = no limit)
+    max_context_tokens: int = 0
+    summary_max_tokens: int = 500  # Room reserved for the summary under the budget
+    
+    @classmethod
+    def from_env(cls) -> "CompactionConfig":
+        return cls(
+            trigger_token_estimate=cls._env_int("CONTEXT_COMPACT_TOKENS", cls.trigger_token_estimate),
+            max_context_tokens=cls._env_int("CONTEXT_MAX_TOKENS", cls.max_context_tokens),
+        )
+    
+    @staticmethod
+    def _env_int(name: str, default: int) -> int:
+        value = os.getenv(name)
+        if value is None:
+            return default
+        try:
+            return int(value)
+        except ValueError:
+            logger.warning(f"Invalid {name}={value!r}, using {default}")
+            return default
 
 
 @dataclass
@@ -90,6 +115,17 @@ class Message:
     content: str
     timestamp: datetime = field(default_factory=datetime.now)
     metadata: dict = field(default_factory=dict)
+    # (counter, content, tokens) from the last token_count() call
+    _tokens: Optional[tuple] = field(default=None, repr=False, compare=False)
+
+    def token_count(self, counter: TokenCounter) -> int:
+        """Tokens this message costs under counter; counted once per content."""
+        cached = self._tokens
+        if cached is not None and cached[0] is counter and cached[1] is self.content:
+            return cached[2]
+        tokens = counter.count_message(self.role, self.content)
+        self._tokens = (counter, self.content, tokens)
+        return tokens
 
     def to_dict(self) -> dict:
         return {
@@ -133,6 +169,12 @@ class ConversationContext:
     compacted_summary: Optional[str] = None  # Summary of compacted messages
     compaction_count: int = 0  # Number of times compaction has been performed
     total_messages_processed: int = 0  # Total messages including compacted ones
+    
+    # Token counting; None = get_token_counter() (TOKEN_COUNTER_FAMILY)
+    token_counter: Optional[TokenCounter] = field(default=None, repr=False)
+    # (counter, total) running sum over messages; None = recount on next use
+    _message_tokens: Optional[tuple] = field(default=None, repr=False)
+    _summary_tokens: Optional[tuple] = field(default=None, repr=False)
 
     @property
     def is_expired(self) -> bool:
@@ -147,12 +189,18 @@ class ConversationContext:
             content=content,
             metadata=metadata or {},
         )
+        counter = self.counter
+        total = self.message_tokens() + msg.token_count(counter)
         self.messages.append(msg)
         self.last_activity = datetime.now()
 
         # Trim old messages if exceeding limit
         if len(self.messages) > self.max_messages:
-            self.messages = self.messages[-self.max_messages:]
+            excess = len(self.messages) - self.max_messages
+            total -= sum(m.token_count(counter) for m in self.messages[:excess])
+            del self.messages[:excess]
+        
+        self._message_tokens = (counter, total)
 
     def add_user_message(self, content: str, metadata: dict = None) -> None:
         """Add a user message."""
@@ -166,9 +214,30 @@ class ConversationContext:
         """Get the n most recent messages."""
         return self.messages[-n:]
 
-    def get_context_string(self, n: int = 5) -> str:
-        """Get recent messages as a formatted string for context."""
+    def get_context_string(self, n: int = 5, max_tokens: int = None) -> str:
+        """
+        Get recent messages as a formatted string for context.
+        
+        With max_tokens, only the newest of those messages whose lines fit
+        the budget are included.
+        """
         recent = self.get_recent_messages(n)
+        if max_tokens is not None:
+            counter = self.counter
+            # A line costs its content plus the label and newline, not the chat framing
+            labels = {
+                label: counter.count(f"{label}: ") + 1 - counter.message_overhead
+                for label in ("User", "Assistant")
+            }
+            start, used = len(recent), 0
+            while start > 0:
+                msg = recent[start - 1]
+                cost = msg.token_count(counter) + labels["User" if msg.role == "user" else "Assistant"]
+                if used + cost > max_tokens:
+                    break
+                used += cost
+                start -= 1
+            recent = recent[start:]
         parts = []
         for msg in recent:
             role_label = "User" if msg.role == "user" else "Assistant"
@@ -178,6 +247,7 @@ class ConversationContext:
     def clear(self) -> None:
         """Clear the conversation context."""
         self.messages.clear()
+        self._message_tokens = None
         self.current_task_id = None
         self.state.clear()
         self.last_activity = datetime.now()
@@ -205,17 +275,64 @@ class ConversationContext:
             "total_messages_processed": self.total_messages_processed,
         }
     
+    # ============================================
+    # Token Accounting
+    # ============================================
+    
+    @property
+    def counter(self) -> TokenCounter:
+        """Token counter for this conversation."""
+        if self.token_counter is None:
+            self.token_counter = get_token_counter()
+        return self.token_counter
+    
+    def message_tokens(self) -> int:
+        """
+        Tokens of all messages, kept as a running total.
+        
+        add_message(), trimming and compaction adjust the total; code that
+        edits messages or their content directly must call
+        invalidate_token_count().
+        """
+        counter = self.counter
+        cached = self._message_tokens
+        if cached is None or cached[0] is not counter:
+            cached = (counter, sum(m.token_count(counter) for m in self.messages))
+            self._message_tokens = cached
+        return cached[1]
+    
+    def invalidate_token_count(self) -> None:
+        """Recount messages on next use, after they were edited directly."""
+        self._message_tokens = None
+    
+    def summary_tokens(self) -> int:
+        """Tokens of the compacted summary as sent (see get_context_with_summary)."""
+        summary = self.compacted_summary
+        if not summary:
+            return 0
+        counter = self.counter
+        cached = self._summary_tokens
+        if cached is None or cached[0] is not counter or cached[1] is not summary:
+            cached = (counter, summary, counter.count(summary))
+            self._summary_tokens = cached
+        return cached[2] + self._summary_frame_tokens()
+    
+    def _summary_frame_tokens(self) -> int:
+        return self.counter.count_message("system", self._summary_content(""))
+    
+    def _summary_content(self, summary: str) -> str:
+        return (
+            f"[Previous conversation summary]\n{summary}\n"
+            f"[End of summary - {self.total_messages_processed} messages compacted]"
+        )
+    
     # ============================================
     # Compaction Methods
     # ============================================
     
     def estimate_tokens(self) -> int:
-        """Estimate total tokens in the conversation."""
-        # Rough estimation: ~4 chars per token
-        total_chars = sum(len(m.content) for m in self.messages)
-        if self.compacted_summary:
-            total_chars += len(self.compacted_summary)
-        return total_chars // 4
+        """Total tokens in the conversation: messages plus compacted summary."""
+        return self.message_tokens() + self.summary_tokens()
     
     def needs_compaction(self) -> bool:
         """Check if compaction is needed based on config."""
@@ -225,8 +342,11 @@ class ConversationContext:
         if len(self.messages) > config.trigger_message_count:
             return True
         
-        # Check token estimate
-        if self.estimate_tokens() > config.trigger_token_estimate:
+        # Check token count (a running total, so this is O(1) per message)
+        tokens = self.estimate_tokens()
+        if tokens > config.trigger_token_estimate:
+            return True
+        if config.max_context_tokens and tokens > config.max_context_tokens:
             return True
         
         return False
@@ -247,17 +367,39 @@ class ConversationContext:
             True if compaction was performed
         """
         config = self.compaction_config
+        counter = self.counter
+        budget = config.max_context_tokens
         
         # Check if compaction is needed
         if not force and not self.needs_compaction():
             return False
         
-        # Not enough messages to compact
-        if len(self.messages) <= config.keep_recent_messages:
+        # Not enough messages to compact (unless they overrun the hard budget)
+        over_budget = budget and self.message_tokens() > budget
+        if len(self.messages) <= config.keep_recent_messages and not over_budget:
             return False
         
         # Split messages: old (to compact) and recent (to keep)
-        split_point = len(self.messages) - config.keep_recent_messages
+        split_point = max(0, len(self.messages) - config.keep_recent_messages)
+        if budget:
+            # Shrink the kept tail until it, kept system messages and the
+            # summary fit; the newest message is always kept
+            room = budget
+            if config.include_summary:
+                room -= config.summary_max_tokens + self._summary_frame_tokens()
+            if config.keep_system_messages:
+                room -= sum(
+                    m.token_count(counter) for m in self.messages[:split_point] if m.role == "system"
+                )
+            kept = sum(m.token_count(counter) for m in self.messages[split_point:])
+            while kept > room and split_point < len(self.messages) - 1:
+                moved = self.messages[split_point]
+                split_point += 1
+                kept -= moved.token_count(counter)
+                if config.keep_system_messages and moved.role == "system":
+                    room -= moved.token_count(counter)
+        if split_point == 0:
+            return False
         old_messages = self.messages[:split_point]
         recent_messages = self.messages[split_point:]
         
@@ -298,11 +440,20 @@ class ConversationContext:
                 logger.error(f"Error during compaction summarization: {e}")
                 # Continue without summary
         
-        # Update message list
+        # Update message list; compacted messages leave the running total
+        remaining = self.message_tokens() - sum(m.token_count(counter) for m in old_messages)
         self.messages = system_messages + recent_messages
+        self._message_tokens = (counter, remaining)
         self.compaction_count += 1
         self.total_messages_processed += len(old_messages)
         
+        # Under a hard budget the summary gets whatever the kept messages leave
+        if budget and self.compacted_summary:
+            room = budget - self.message_tokens() - self._summary_frame_tokens()
+            self.compacted_summary = counter.truncate(
+                self.compacted_summary, min(room, config.summary_max_tokens), keep_end=True,
+            ) or None
+        
         logger.info(
             f"Compacted conversation {self.session_key}: "
             f"removed {len(old_messages)} messages, "
@@ -311,27 +462,44 @@ class ConversationContext:
         
         return True
     
-    def get_context_with_summary(self) -> list[dict]:
+    def get_context_with_summary(self, max_tokens: int = None) -> list[dict]:
         """
         Get messages for LLM including compacted summary.
         
+        Args:
+            max_tokens: Token budget (default: compaction_config.max_context_tokens,
+                0 = no limit). The newest messages that fit are kept, then as
+                much of the summary as still fits.
+        
         Returns:
             List of message dicts ready for LLM
         """
         result = []
+        budget = self.compaction_config.max_context_tokens if max_tokens is None else max_tokens
+        messages = self.messages
+        summary = self.compacted_summary
+        
+        if budget:
+            counter = self.counter
+            start, used = len(messages), 0
+            while start > 0 and used + messages[start - 1].token_count(counter) <= budget:
+                used += messages[start - 1].token_count(counter)
+                start -= 1
+            messages = messages[start:]
+            if summary and used + self.summary_tokens() > budget:
+                summary = counter.truncate(
+                    summary, budget - used - self._summary_frame_tokens(), keep_end=True,
+                )
         
         # Add compacted summary as system context
-        if self.compacted_summary:
+        if summary:
             result.append({
                 "role": "system",
-                "content": (
-                    f"[Previous conversation summary]\n{self.compacted_summary}\n"
-                    f"[End of summary - {self.total_messages_processed} messages compacted]"
-                )
+                "content": self._summary_content(summary),
             })
         
         # Add current messages
-        for msg in self.messages:
+        for msg in messages:
             result.append({
                 "role": msg.role,
                 "content": msg.content,
@@ -348,6 +516,8 @@ class ConversationContext:
             "has_summary": bool(self.compacted_summary),
             "summary_length": len(self.compacted_summary) if self.compacted_summary else 0,
             "estimated_tokens": self.estimate_tokens(),
+            "summary_tokens": self.summary_tokens(),
+            "token_counter": self.counter.name,
             "needs_compaction": self.needs_compaction(),
         }
 
@@ -367,6 +537,7 @@ class ContextManager:
         self._agent_routes: dict[str, str] = {}  # pattern -> agent_id
         self.max_contexts = max_contexts
         self.default_timeout_minutes = default_timeout_minutes
+        self.compaction_config = CompactionConfig.from_env()
 
     def _make_session_key(
         self, 
@@ -426,6 +597,7 @@ class ContextManager:
             chat_type=chat_type,
             chat_title=chat_title,
             context_timeout_minutes=self.default_timeout_minutes,
+            compaction_config=replace(self.compaction_config),
         )
         
         # Auto-assign agent based on routing rules
@@ -860,6 +1032,7 @@ class ContextManager:
         include_context: bool = True,
         n_messages: int = 5,
         chat_type: str = "private",
+        max_tokens: int = None,
     ) -> str:
         """
         Build a prompt with conversation context.
@@ -871,6 +1044,8 @@ class ContextManager:
             include_context: Whether to include conversation history
             n_messages: Number of historical messages to include
             chat_type: Chat type
+            max_tokens: Token budget for the whole prompt; history is cut
+                to the newest messages that fit
 
         Returns:
             Full prompt string with context
@@ -881,7 +1056,12 @@ class ContextManager:
 
         # Add conversation context
         if include_context and ctx.messages:
-            context_str = ctx.get_context_string(n_messages)
+            history_budget = None
+            if max_tokens is not None:
+                history_budget = max_tokens - ctx.counter.count(
+                    f"Previous conversation:\n\n\nCurrent request: {current_message}"
+                )
+            context_str = ctx.get_context_string(n_messages, max_tokens=history_budget)
             if context_str:
                 parts.append("Previous conversation:")
                 parts.append(context_str)
@@ -986,6 +1166,7 @@ def get_context_manager() -> ContextManager:
 
 
 __all__ = [
+    "CompactionConfig",
     "Message",
     "ConversationContext",
     "ContextManager",
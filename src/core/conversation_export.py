@@ -5,6 +5,8 @@ Export conversation history in various formats.
 
 Features:
 - Export to JSON, Markdown, HTML, PDF
+- Parquet / Arrow columnar export (requires pyarrow)
+- Streaming: output is produced in chunks with bounded memory
 - Filter by date, user, chat
 - Include/exclude system messages
 - Attachment handling
@@ -34,11 +36,12 @@ import asyncio
 import json
 import os
 import re
+import textwrap
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta
 from enum import Enum
 from pathlib import Path
-from typing import Any, Callable, Optional, Union
+from typing import Any, AsyncIterator, Callable, Iterable, Iterator, Optional, Union
 
 from ..utils.logger import logger
 
@@ -54,6 +57,8 @@ class ExportFormat(Enum):
     HTML = "html"
     TXT = "txt"
     CSV = "csv"
+    PARQUET = "parquet"
+    ARROW = "arrow"
 
 
 @dataclass
@@ -169,16 +174,54 @@ class PrivacyRedactor:
 # ============================================
 
 class BaseExporter:
-    """Base class for format exporters."""
+    """
+    Base class for format exporters.
+    
+    Subclasses implement begin(), render() and end(); iter_export() drives
+    them to produce the output in chunks (header, one chunk per message,
+    footer), so large conversations are written without building the whole
+    document in memory.
+    """
     
     def __init__(self, config: ExportConfig = None):
         self.config = config or ExportConfig()
         self._redactor = PrivacyRedactor()
+        self._count = 0
     
     def export(self, messages: list[ExportMessage]) -> str:
         """Export messages to string."""
+        return "".join(self.iter_export(messages, total=len(messages)))
+    
+    def iter_export(
+        self,
+        messages: Iterable[ExportMessage],
+        total: Optional[int] = None,
+    ) -> Iterator[str]:
+        """
+        Yield the export in chunks.
+        
+        Args:
+            messages: Messages in display order (may be a generator)
+            total: Message count for headers, if known in advance
+        """
+        yield self.begin(total)
+        for msg in messages:
+            yield self.render(msg)
+        yield self.end()
+    
+    def begin(self, total: Optional[int] = None) -> str:
+        """Start a new export and return its header."""
+        self._count = 0
+        return ""
+    
+    def render(self, message: ExportMessage) -> str:
+        """Return the chunk for one message."""
         raise NotImplementedError
     
+    def end(self) -> str:
+        """Return the footer."""
+        return ""
+    
     def _redact_message(self, message: ExportMessage) -> ExportMessage:
         """Apply privacy redaction to a message."""
         return ExportMessage(
@@ -195,80 +238,94 @@ class BaseExporter:
 class JSONExporter(BaseExporter):
     """Export to JSON format."""
     
-    def export(self, messages: list[ExportMessage]) -> str:
-        processed = [self._redact_message(m).to_dict() for m in messages]
-        return json.dumps({
-            "exported_at": datetime.now().isoformat(),
-            "message_count": len(processed),
-            "messages": processed,
-        }, indent=2, ensure_ascii=False)
+    def begin(self, total: Optional[int] = None) -> str:
+        super().begin(total)
+        return (
+            "{\n"
+            f'  "exported_at": {json.dumps(datetime.now().isoformat())},\n'
+            '  "messages": ['
+        )
+    
+    def render(self, message: ExportMessage) -> str:
+        body = json.dumps(self._redact_message(message).to_dict(), indent=2, ensure_ascii=False)
+        chunk = ("," if self._count else "") + "\n" + textwrap.indent(body, "    ")
+        self._count += 1
+        return chunk
+    
+    def end(self) -> str:
+        # message_count goes last since a stream's length is known only at the end
+        return ("\n  ]" if self._count else "]") + f',\n  "message_count": {self._count}\n}}'
 
 
 class MarkdownExporter(BaseExporter):
     """Export to Markdown format."""
     
-    def export(self, messages: list[ExportMessage]) -> str:
+    def begin(self, total: Optional[int] = None) -> str:
+        super().begin(total)
+        self._current_date = None
+        
         lines = [
             "# Conversation Export",
             "",
             f"*Exported at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}*",
-            f"*Messages: {len(messages)}*",
-            "",
-            "---",
-            "",
         ]
+        if total is not None:
+            lines.append(f"*Messages: {total}*")
+        lines.extend(["", "---", ""])
+        return "\n".join(lines)
+    
+    def render(self, message: ExportMessage) -> str:
+        msg = self._redact_message(message)
+        lines = []
         
-        current_date = None
-        
-        for msg in messages:
-            msg = self._redact_message(msg)
-            
-            # Add date separator
-            msg_date = msg.timestamp.strftime("%Y-%m-%d")
-            if msg_date != current_date:
-                current_date = msg_date
-                lines.append(f"## {msg_date}")
-                lines.append("")
-            
-            # Format message
-            role_icon = {
-                "user": "👤",
-                "assistant": "🤖",
-                "system": "⚙️",
-            }.get(msg.role, "•")
-            
-            timestamp = ""
-            if self.config.include_timestamps:
-                timestamp = f" *{msg.timestamp.strftime('%H:%M:%S')}*"
-            
-            user_str = ""
-            if msg.user_name:
-                user_str = f" **{msg.user_name}**"
-            
-            lines.append(f"### {role_icon}{user_str}{timestamp}")
-            lines.append("")
-            lines.append(msg.content)
+        # Add date separator
+        msg_date = msg.timestamp.strftime("%Y-%m-%d")
+        if msg_date != self._current_date:
+            self._current_date = msg_date
+            lines.append(f"## {msg_date}")
             lines.append("")
-            
-            # Attachments
-            if msg.attachments:
-                lines.append("**Attachments:**")
-                for att in msg.attachments:
-                    att_type = att.get("type", "file")
-                    att_name = att.get("name", "attachment")
-                    lines.append(f"- [{att_type}] {att_name}")
-                lines.append("")
-            
-            lines.append("---")
+        
+        # Format message
+        role_icon = {
+            "user": "👤",
+            "assistant": "🤖",
+            "system": "⚙️",
+        }.get(msg.role, "•")
+        
+        timestamp = ""
+        if self.config.include_timestamps:
+            timestamp = f" *{msg.timestamp.strftime('%H:%M:%S')}*"
+        
+        user_str = ""
+        if msg.user_name:
+            user_str = f" **{msg.user_name}**"
+        
+        lines.append(f"### {role_icon}{user_str}{timestamp}")
+        lines.append("")
+        lines.append(msg.content)
+        lines.append("")
+        
+        # Attachments
+        if msg.attachments:
+            lines.append("**Attachments:**")
+            for att in msg.attachments:
+                att_type = att.get("type", "file")
+                att_name = att.get("name", "attachment")
+                lines.append(f"- [{att_type}] {att_name}")
             lines.append("")
         
-        return "\n".join(lines)
+        lines.append("---")
+        lines.append("")
+        
+        return "\n" + "\n".join(lines)
 
 
 class HTMLExporter(BaseExporter):
     """Export to HTML format."""
     
-    def export(self, messages: list[ExportMessage]) -> str:
+    def begin(self, total: Optional[int] = None) -> str:
+        super().begin(total)
+        self._current_date = None
         is_dark = self.config.html_theme == "dark"
         
         # CSS styles
@@ -278,7 +335,9 @@ class HTMLExporter(BaseExporter):
         assistant_bg = "#0f3460" if is_dark else "#f5f5f5"
         border_color = "#e94560" if is_dark else "#2196f3"
         
-        html = f"""<!DOCTYPE html>
+        count_str = f" | \n                Messages: {total}" if total is not None else ""
+        
+        return f"""<!DOCTYPE html>
 <html lang="en">
 <head>
     <meta charset="UTF-8">
@@ -390,64 +449,62 @@ class HTMLExporter(BaseExporter):
         <div class="header">
             <h1>{self.config.html_title}</h1>
             <div class="stats">
-                Exported: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} | 
-                Messages: {len(messages)}
+                Exported: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}{count_str}
             </div>
         </div>
 """
+    
+    def render(self, message: ExportMessage) -> str:
+        msg = self._redact_message(message)
+        html = ""
         
-        current_date = None
+        # Date separator
+        msg_date = msg.timestamp.strftime("%Y-%m-%d")
+        if msg_date != self._current_date:
+            self._current_date = msg_date
+            html += f'        <div class="date-separator">{msg_date}</div>\n'
         
-        for msg in messages:
-            msg = self._redact_message(msg)
-            
-            # Date separator
-            msg_date = msg.timestamp.strftime("%Y-%m-%d")
-            if msg_date != current_date:
-                current_date = msg_date
-                html += f'        <div class="date-separator">{msg_date}</div>\n'
-            
-            # Role icon
-            role_icon = {
-                "user": "👤",
-                "assistant": "🤖",
-                "system": "⚙️",
-            }.get(msg.role, "•")
-            
-            # Escape HTML in content
-            content = self._escape_html(msg.content)
-            # Convert markdown code blocks
-            content = re.sub(r'```(\w*)\n(.*?)```', r'<pre><code>\2</code></pre>', content, flags=re.DOTALL)
-            content = re.sub(r'`([^`]+)`', r'<code>\1</code>', content)
-            
-            timestamp = msg.timestamp.strftime('%H:%M:%S') if self.config.include_timestamps else ""
-            user_name = msg.user_name or msg.role.capitalize()
-            
-            html += f"""        <div class="message {msg.role}">
+        # Role icon
+        role_icon = {
+            "user": "👤",
+            "assistant": "🤖",
+            "system": "⚙️",
+        }.get(msg.role, "•")
+        
+        # Escape HTML in content
+        content = self._escape_html(msg.content)
+        # Convert markdown code blocks
+        content = re.sub(r'```(\w*)\n(.*?)```', r'<pre><code>\2</code></pre>', content, flags=re.DOTALL)
+        content = re.sub(r'`([^`]+)`', r'<code>\1</code>', content)
+        
+        timestamp = msg.timestamp.strftime('%H:%M:%S') if self.config.include_timestamps else ""
+        user_name = msg.user_name or msg.role.capitalize()
+        
+        html += f"""        <div class="message {msg.role}">
             <div class="message-header">
                 <span><span class="role-icon">{role_icon}</span> {user_name}</span>
                 <span>{timestamp}</span>
             </div>
             <div class="content">{content}</div>
 """
-            
-            # Attachments
-            if msg.attachments:
-                html += '            <div class="attachments">\n'
-                for att in msg.attachments:
-                    att_type = att.get("type", "file")
-                    att_name = att.get("name", "attachment")
-                    html += f'                <span class="attachment">📎 {att_type}: {att_name}</span>\n'
-                html += '            </div>\n'
-            
-            html += '        </div>\n'
         
-        html += """    </div>
-</body>
-</html>"""
+        # Attachments
+        if msg.attachments:
+            html += '            <div class="attachments">\n'
+            for att in msg.attachments:
+                att_type = att.get("type", "file")
+                att_name = att.get("name", "attachment")
+                html += f'                <span class="attachment">📎 {att_type}: {att_name}</span>\n'
+            html += '            </div>\n'
         
+        html += '        </div>\n'
         return html
     
+    def end(self) -> str:
+        return """    </div>
+</body>
+</html>"""
+    
     def _escape_html(self, text: str) -> str:
         """Escape HTML special characters."""
         return (
@@ -463,54 +520,135 @@ class HTMLExporter(BaseExporter):
 class TxtExporter(BaseExporter):
     """Export to plain text format."""
     
-    def export(self, messages: list[ExportMessage]) -> str:
+    def begin(self, total: Optional[int] = None) -> str:
+        super().begin(total)
         lines = [
             "=" * 60,
             "CONVERSATION EXPORT",
             f"Exported: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
-            f"Messages: {len(messages)}",
-            "=" * 60,
-            "",
         ]
+        if total is not None:
+            lines.append(f"Messages: {total}")
+        lines.extend(["=" * 60, ""])
+        return "\n".join(lines)
+    
+    def render(self, message: ExportMessage) -> str:
+        msg = self._redact_message(message)
         
-        for msg in messages:
-            msg = self._redact_message(msg)
-            
-            timestamp = msg.timestamp.strftime('%Y-%m-%d %H:%M:%S') if self.config.include_timestamps else ""
-            user_name = msg.user_name or msg.role.upper()
-            
-            lines.append("-" * 40)
-            lines.append(f"[{user_name}] {timestamp}")
-            lines.append("-" * 40)
-            lines.append(msg.content)
-            lines.append("")
+        timestamp = msg.timestamp.strftime('%Y-%m-%d %H:%M:%S') if self.config.include_timestamps else ""
+        user_name = msg.user_name or msg.role.upper()
         
-        return "\n".join(lines)
+        return "\n" + "\n".join([
+            "-" * 40,
+            f"[{user_name}] {timestamp}",
+            "-" * 40,
+            msg.content,
+            "",
+        ])
 
 
 class CSVExporter(BaseExporter):
     """Export to CSV format."""
     
-    def export(self, messages: list[ExportMessage]) -> str:
+    def __init__(self, config: ExportConfig = None):
         import csv
         import io
         
-        output = io.StringIO()
-        writer = csv.writer(output)
-        
-        # Header
-        writer.writerow(["timestamp", "role", "user_name", "content"])
-        
-        for msg in messages:
-            msg = self._redact_message(msg)
-            writer.writerow([
-                msg.timestamp.isoformat(),
-                msg.role,
-                msg.user_name or "",
-                msg.content,
-            ])
+        super().__init__(config)
+        # One small buffer reused per row
+        self._output = io.StringIO()
+        self._writer = csv.writer(self._output)
+    
+    def _take(self) -> str:
+        chunk = self._output.getvalue()
+        self._output.seek(0)
+        self._output.truncate()
+        return chunk
+    
+    def begin(self, total: Optional[int] = None) -> str:
+        super().begin(total)
+        self._writer.writerow(["timestamp", "role", "user_name", "content"])
+        return self._take()
+    
+    def render(self, message: ExportMessage) -> str:
+        msg = self._redact_message(message)
+        self._writer.writerow([
+            msg.timestamp.isoformat(),
+            msg.role,
+            msg.user_name or "",
+            msg.content,
+        ])
+        return self._take()
+
+
+# Columns of the Parquet / Arrow conversation export
+COLUMNAR_MESSAGE_COLUMNS = [
+    ("id", "string"),
+    ("timestamp", "timestamp"),
+    ("role", "string"),
+    ("user_name", "string"),
+    ("content", "string"),
+    ("attachments", "string"),  # JSON
+    ("metadata", "string"),  # JSON
+]
+
+
+class ColumnarExporter(BaseExporter):
+    """
+    Export to Parquet or Arrow IPC for offline analysis.
+    
+    Output is binary, so this exporter writes files rather than yielding
+    text; role and user_name are dictionary-encoded. The metadata column
+    is only written with include_metadata.
+    """
+    
+    def __init__(self, config: ExportConfig = None, format: str = "parquet", batch_size: int = 10000):
+        super().__init__(config)
+        self.format = format
+        self.batch_size = batch_size
+        self.columns = [
+            column for column in COLUMNAR_MESSAGE_COLUMNS
+            if column[0] != "metadata" or self.config.include_metadata
+        ]
+    
+    def iter_export(self, messages, total=None):
+        raise TypeError("Columnar exports are binary; use write() instead")
+    
+    def render(self, message: ExportMessage) -> str:
+        raise TypeError("Columnar exports are binary; use row() instead")
+    
+    def row(self, message: ExportMessage) -> tuple:
+        msg = self._redact_message(message)
+        row = (
+            msg.id,
+            msg.timestamp,
+            msg.role,
+            msg.user_name,
+            msg.content,
+            json.dumps(msg.attachments, ensure_ascii=False) if msg.attachments else None,
+        )
+        if self.config.include_metadata:
+            row += (json.dumps(msg.metadata, ensure_ascii=False, default=str) if msg.metadata else None,)
+        return row
+    
+    def open(self, path: Union[str, Path]):
+        """Open a ColumnarWriter for this export's schema."""
+        from .columnar_export import ColumnarWriter
         
-        return output.getvalue()
+        return ColumnarWriter(
+            path,
+            self.columns,
+            format=self.format,
+            batch_size=self.batch_size,
+            dictionary_columns={"role", "user_name"},
+        )
+    
+    def write(self, messages: Iterable[ExportMessage], path: Union[str, Path]) -> int:
+        """Write messages to path; returns the number of rows written."""
+        with self.open(path) as writer:
+            for message in messages:
+                writer.write(self.row(message))
+        return writer.rows_written
 
 
 # ============================================
@@ -520,6 +658,12 @@ class CSVExporter(BaseExporter):
 class ConversationExporter:
     """Main conversation export manager."""
     
+    # Formats written with ColumnarExporter rather than as text
+    COLUMNAR_FORMATS = {ExportFormat.PARQUET, ExportFormat.ARROW}
+    
+    # Text is buffered up to this many characters between file writes
+    WRITE_BUFFER_CHARS = 64 * 1024
+    
     def __init__(self, config: ExportConfig = None):
         self.config = config or ExportConfig()
         
@@ -541,12 +685,15 @@ class ConversationExporter:
         """Export conversation history."""
         config = config or self.config
         
+        if format in self.COLUMNAR_FORMATS:
+            return ExportResult(
+                success=False,
+                format=format,
+                error=f"{format.value} is a binary format; use export_to_file()",
+            )
+        
         try:
-            # Fetch messages from context manager
-            messages = await self._fetch_messages(user_id, chat_id, config)
-            
-            # Filter messages
-            messages = self._filter_messages(messages, config)
+            messages = [msg async for msg in self._iter_messages(user_id, chat_id, config)]
             
             # Export
             exporter_class = self._exporters.get(format, MarkdownExporter)
@@ -569,6 +716,29 @@ class ConversationExporter:
                 error=str(e),
             )
     
+    async def export_stream(
+        self,
+        user_id: str = None,
+        chat_id: str = None,
+        format: ExportFormat = ExportFormat.MARKDOWN,
+        config: ExportConfig = None,
+    ) -> AsyncIterator[str]:
+        """
+        Yield a text export in chunks as messages are read from storage.
+        
+        Only one page of history is held in memory at a time; the message
+        count is omitted from headers since it is not known up front.
+        """
+        config = config or self.config
+        if format in self.COLUMNAR_FORMATS:
+            raise ValueError(f"{format.value} is a binary format; use export_to_file()")
+        
+        exporter = self._exporters.get(format, MarkdownExporter)(config)
+        yield exporter.begin()
+        async for msg in self._iter_messages(user_id, chat_id, config):
+            yield exporter.render(msg)
+        yield exporter.end()
+    
     async def export_to_file(
         self,
         user_id: str = None,
@@ -578,11 +748,15 @@ class ConversationExporter:
         filename: str = None,
         config: ExportConfig = None,
     ) -> ExportResult:
-        """Export conversation to a file."""
-        result = await self.export(user_id, chat_id, format, config)
+        """
+        Export conversation to a file.
         
-        if not result.success:
-            return result
+        The export is streamed to a temporary file that replaces the target
+        only once complete, so result.content is left empty.
+        """
+        config = config or self.config
+        result = ExportResult(success=True, format=format)
+        tmp_path = None
         
         try:
             # Create output directory
@@ -597,20 +771,155 @@ class ConversationExporter:
                 ext = self._get_extension(format)
                 filename = f"conversation{user_part}{chat_part}_{timestamp}.{ext}"
             
-            # Write file
             file_path = output_path / filename
-            file_path.write_text(result.content, encoding='utf-8')
+            tmp_path = file_path.with_name(file_path.name + ".tmp")
             
+            if format in self.COLUMNAR_FORMATS:
+                result.message_count = await self._write_columnar(
+                    user_id, chat_id, format, config, tmp_path
+                )
+            else:
+                result.message_count = await self._write_text(
+                    user_id, chat_id, format, config, tmp_path
+                )
+            
+            os.replace(tmp_path, file_path)
             result.file_path = str(file_path)
+            result.size_bytes = file_path.stat().st_size
             logger.info(f"Exported conversation to {file_path}")
             
         except Exception as e:
             logger.error(f"Failed to write export file: {e}")
             result.success = False
             result.error = str(e)
+            if tmp_path is not None:
+                tmp_path.unlink(missing_ok=True)
         
         return result
     
+    async def _write_text(
+        self,
+        user_id: Optional[str],
+        chat_id: Optional[str],
+        format: ExportFormat,
+        config: ExportConfig,
+        path: Path,
+    ) -> int:
+        """Stream a text export to path; returns the message count."""
+        exporter = self._exporters.get(format, MarkdownExporter)(config)
+        buffer: list[str] = []
+        buffered = 0
+        count = 0
+        
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            async def write(chunk: str, force: bool = False) -> None:
+                nonlocal buffered
+                buffer.append(chunk)
+                buffered += len(chunk)
+                if force or buffered >= self.WRITE_BUFFER_CHARS:
+                    data = "".join(buffer)
+                    buffer.clear()
+                    buffered = 0
+                    await asyncio.to_thread(f.write, data)
+            
+            await write(exporter.begin())
+            async for msg in self._iter_messages(user_id, chat_id, config):
+                await write(exporter.render(msg))
+                count += 1
+            await write(exporter.end(), force=True)
+        
+        return count
+    
+    async def _write_columnar(
+        self,
+        user_id: Optional[str],
+        chat_id: Optional[str],
+        format: ExportFormat,
+        config: ExportConfig,
+        path: Path,
+    ) -> int:
+        """Write a Parquet / Arrow export to path; returns the row count."""
+        exporter = ColumnarExporter(config, format=format.value)
+        writer = await asyncio.to_thread(exporter.open, path)
+        rows = []
+        try:
+            async for msg in self._iter_messages(user_id, chat_id, config):
+                rows.append(exporter.row(msg))
+                if len(rows) >= writer.batch_size:
+                    # Encode and compress each batch off the event loop
+                    await asyncio.to_thread(writer.write_many, rows)
+                    rows = []
+            await asyncio.to_thread(writer.write_many, rows)
+        finally:
+            await asyncio.to_thread(writer.close)
+        return writer.rows_written
+    
+    async def _iter_messages(
+        self,
+        user_id: str = None,
+        chat_id: str = None,
+        config: ExportConfig = None,
+    ) -> AsyncIterator[ExportMessage]:
+        """
+        Yield filtered messages in timestamp order.
+        
+        The persisted conversation history is streamed page by page; the
+        in-memory sources are used when it has nothing for this user.
+        """
+        config = config or self.config
+        
+        streamed = False
+        if user_id:
+            async for msg in self._iter_history(user_id, chat_id, config):
+                streamed = True
+                yield msg
+        
+        if not streamed:
+            messages = await self._fetch_messages(user_id, chat_id, config)
+            for msg in self._filter_messages(messages, config):
+                yield msg
+    
+    async def _iter_history(
+        self,
+        user_id: str,
+        chat_id: Optional[str],
+        config: ExportConfig,
+    ) -> AsyncIterator[ExportMessage]:
+        """Stream messages from the MemoryManager conversation history."""
+        try:
+            from .memory import get_memory_manager
+            
+            history = get_memory_manager().iter_conversation_history(
+                int(user_id),
+                int(chat_id) if chat_id else None,
+                start=config.start_date,
+                end=config.end_date,
+            )
+        except (ImportError, ValueError) as e:
+            logger.debug(f"Conversation history unavailable for export: {e}")
+            return
+        
+        async for row in history:
+            if not config.include_system and row["role"] == "system":
+                continue
+            
+            metadata = {}
+            if row["metadata"]:
+                try:
+                    metadata = json.loads(row["metadata"])
+                except ValueError:
+                    pass
+            
+            yield ExportMessage(
+                id=f"msg_{row['id']}",
+                role=row["role"],
+                content=row["content"],
+                timestamp=datetime.fromisoformat(row["created_at"]),
+                user_name=metadata.get("user_name"),
+                attachments=metadata.get("attachments", []),
+                metadata=metadata,
+            )
+    
     async def _fetch_messages(
         self,
         user_id: str = None,
@@ -716,6 +1025,8 @@ class ConversationExporter:
             ExportFormat.HTML: "html",
             ExportFormat.TXT: "txt",
             ExportFormat.CSV: "csv",
+            ExportFormat.PARQUET: "parquet",
+            ExportFormat.ARROW: "arrow",
         }
         return ext_map.get(format, "txt")
     
@@ -727,6 +1038,8 @@ class ConversationExporter:
             {"id": "html", "name": "HTML", "description": "Styled HTML webpage"},
             {"id": "txt", "name": "Plain Text", "description": "Simple text format"},
             {"id": "csv", "name": "CSV", "description": "Spreadsheet-compatible CSV"},
+            {"id": "parquet", "name": "Parquet", "description": "Columnar Parquet for analysis (requires pyarrow)"},
+            {"id": "arrow", "name": "Arrow", "description": "Arrow IPC stream for analysis (requires pyarrow)"},
         ]
 
 
@@ -769,6 +1082,7 @@ __all__ = [
     "HTMLExporter",
     "TxtExporter",
     "CSVExporter",
+    "ColumnarExporter",
     # Manager
     "ConversationExporter",
     "get_exporter",
@@ -82,6 +82,7 @@ class ConversationRAGConfig:
     embedding_provider: str = "openai"  # "openai", "google", "ollama"
     embedding_model: str = "text-embedding-3-small"
     embedding_dimensions: int = 1536
+    embedding_cache: bool = True
     
     # Retrieval settings
     max_context_messages: int = 10
@@ -166,7 +167,7 @@ class ConversationRAG:
     async def _init_embedding_provider(self):
         """Initialize embedding provider."""
         try:
-            from .rag import OpenAIEmbedding, GoogleEmbedding, OllamaEmbedding
+            from .rag import OpenAIEmbedding, GoogleEmbedding, OllamaEmbedding, with_embedding_cache
             from ..utils.config import settings
             
             provider = os.getenv("RAG_EMBEDDING_PROVIDER", self.config.embedding_provider)
@@ -185,6 +186,9 @@ class ConversationRAG:
                 api_key = getattr(settings, 'openai_api_key', None) or os.getenv("OPENAI_API_KEY")
                 self._embedding_provider = OpenAIEmbedding(api_key=api_key, model=model)
             
+            if self.config.embedding_cache:
+                self._embedding_provider = with_embedding_cache(self._embedding_provider)
+            
             logger.info(f"Embedding provider initialized: {provider}/{model}")
             
         except Exception as e:
@@ -5,16 +5,19 @@ Provides:
 - Telegram-style draft message streaming
 - Progressive message updates
 - Efficient edit batching
-- Rate-limited updates
+- Rate-limited updates that back off when the platform pushes back
+- Overflow of long streams into follow-up messages
 """
 
 import asyncio
+import time
 from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
 from typing import Any, Callable, Optional
 
 from ..utils.logger import logger
+from .chunking import MessageChunker
 
 
 class StreamState(Enum):
@@ -40,7 +43,22 @@ class StreamConfig:
     
     # Rate limiting
     max_updates_per_second: float = 3.0
-    debounce_ms: int = 100
+    debounce_ms: int = 100  # Coalescing delay before the first edit after a pause
+    max_update_interval: float = 10.0  # Backoff ceiling after rate limit errors
+    
+    # Overflow
+    max_message_length: int = 4000  # Longer drafts continue in a new message
+    
+    @classmethod
+    def for_platform(cls, platform: str) -> "StreamConfig":
+        """Defaults matched to a platform's message edit limits."""
+        if platform == "telegram":
+            # Telegram allows roughly one edit per second per chat
+            return cls(min_update_interval=1.0, max_updates_per_second=1.0, max_message_length=4000)
+        if platform == "discord":
+            # Discord allows 5 edits per 5 seconds per channel
+            return cls(min_update_interval=1.0, max_updates_per_second=1.0, max_message_length=1900)
+        return cls()
 
 
 @dataclass
@@ -55,15 +73,28 @@ class DraftMessage:
     created_at: datetime = field(default_factory=datetime.now)
     last_update: datetime = field(default_factory=datetime.now)
     update_count: int = 0
+    rate_limited: int = 0
+    message_ids: list = field(default_factory=list)  # Every message the draft has used
+    reply_markup: Any = None  # Buttons kept on the message while it streams
     
     # Buffering
     _buffer: str = field(default="", repr=False)
     _pending_update: bool = field(default=False, repr=False)
+    _committed: str = field(default="", repr=False)  # Text moved to earlier messages
+    _interval: float = field(default=0.0, repr=False)  # Current seconds between edits
+    _next_update: float = field(default=0.0, repr=False)  # Monotonic time of the next allowed edit
 
 
 class DraftStreamer:
     """
     Handles draft-style message streaming for Telegram.
+    
+    Appended text is coalesced into edits at most once per update
+    interval, with a single edit in flight per draft. The interval
+    doubles when the platform reports a rate limit and recovers as
+    edits succeed. A draft longer than max_message_length is split with
+    MessageChunker and continues in follow-up messages sent through the
+    overflow callback.
     """
     
     def __init__(self, config: StreamConfig = None):
@@ -71,7 +102,14 @@ class DraftStreamer:
         self._drafts: dict[str, DraftMessage] = {}
         self._update_callback: Optional[Callable] = None
         self._complete_callback: Optional[Callable] = None
+        self._overflow_callback: Optional[Callable] = None
         self._update_tasks: dict[str, asyncio.Task] = {}
+        self._chunker = MessageChunker()
+    
+    @property
+    def base_interval(self) -> float:
+        """Seconds between edits when the platform is not pushing back."""
+        return max(self.config.min_update_interval, 1.0 / self.config.max_updates_per_second)
     
     # ============================================
     # Stream Lifecycle
@@ -101,7 +139,9 @@ class DraftStreamer:
             chat_id=chat_id,
             content=initial_content,
             state=StreamState.STREAMING,
+            message_ids=[message_id],
         )
+        draft._interval = self.base_interval
         
         self._drafts[key] = draft
         
@@ -134,9 +174,10 @@ class DraftStreamer:
         # Add to buffer
         draft._buffer += text
         
-        # Check if we should update
-        if self._should_update(draft):
-            await self._schedule_update(key, draft)
+        # The running flush picks up whatever arrives while it waits
+        task = self._update_tasks.get(key)
+        if task is None or task.done():
+            self._update_tasks[key] = asyncio.create_task(self._flush_loop(key, draft))
     
     async def complete(
         self,
@@ -158,15 +199,26 @@ class DraftStreamer:
         if not draft:
             return
         
+        # Let an edit in flight finish so the final edit lands last
+        draft.state = StreamState.COMPLETED
+        task = self._update_tasks.pop(key, None)
+        if task is not None and not task.done():
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        
         # Flush remaining buffer
         if draft._buffer:
             draft.content += draft._buffer
             draft._buffer = ""
         
         if final_content:
-            draft.content = final_content
-        
-        draft.state = StreamState.COMPLETED
+            # final_content covers the whole stream, including overflowed text
+            if final_content.startswith(draft._committed):
+                draft.content = final_content[len(draft._committed):]
+            else:
+                logger.debug("Final content differs from overflowed text; keeping streamed text")
         
         # Final update
         await self._send_update(draft, final=True)
@@ -199,35 +251,23 @@ class DraftStreamer:
     # Update Management
     # ============================================
     
-    def _should_update(self, draft: DraftMessage) -> bool:
-        """Check if we should send an update."""
-        # Check buffer size
-        if len(draft._buffer) >= self.config.batch_chars:
-            return True
-        
-        # Check time since last update
-        elapsed = (datetime.now() - draft.last_update).total_seconds()
-        if elapsed >= self.config.min_update_interval:
-            return True
-        
-        return False
-    
-    async def _schedule_update(self, key: str, draft: DraftMessage) -> None:
-        """Schedule a debounced update."""
-        # Cancel existing task
-        if key in self._update_tasks:
-            self._update_tasks[key].cancel()
-        
-        # Schedule new task
-        async def delayed_update():
+    async def _flush_loop(self, key: str, draft: DraftMessage) -> None:
+        """Send coalesced edits until the buffer drains or the stream ends."""
+        # Gather a few more tokens before the first edit after a pause
+        if len(draft._buffer) < self.config.batch_chars:
             await asyncio.sleep(self.config.debounce_ms / 1000)
-            await self._flush_and_update(key, draft)
         
-        self._update_tasks[key] = asyncio.create_task(delayed_update())
+        while draft.state == StreamState.STREAMING and (draft._buffer or draft._pending_update):
+            delay = draft._next_update - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+                if draft.state != StreamState.STREAMING:
+                    return  # complete() sends the final edit
+            await self._flush_and_update(key, draft)
     
     async def _flush_and_update(self, key: str, draft: DraftMessage) -> None:
         """Flush buffer and send update."""
-        if not draft._buffer:
+        if not draft._buffer and not draft._pending_update:
             return
         
         # Move buffer to content
@@ -239,25 +279,98 @@ class DraftStreamer:
     
     async def _send_update(self, draft: DraftMessage, final: bool = False) -> None:
         """Send update to platform."""
-        # Prepare content with cursor
-        content = draft.content
-        if not final and self.config.show_cursor:
-            content += self.config.cursor_char
+        cursor = self.config.cursor_char if not final and self.config.show_cursor else ""
         
         # Update tracking
         draft.last_update = datetime.now()
         draft.update_count += 1
+        draft._pending_update = False
         
         # Call update callback
         if self._update_callback:
             try:
-                if asyncio.iscoroutinefunction(self._update_callback):
-                    await self._update_callback(draft, content, final)
-                else:
-                    self._update_callback(draft, content, final)
+                if (
+                    self._overflow_callback
+                    and len(draft.content) + len(cursor) > self.config.max_message_length
+                ):
+                    await self._overflow(draft, len(cursor))
+                    if not final:
+                        # The new message gets its cursor on the next edit
+                        draft._next_update = time.monotonic() + draft._interval
+                        return
+                
+                await self._call(self._update_callback, draft, draft.content + cursor, final)
+                
+                # Edits are going through; ease back toward the base rate
+                draft._interval = max(self.base_interval, draft._interval * 0.8)
+                draft._next_update = time.monotonic() + draft._interval
+            
             except Exception as e:
-                logger.error(f"Update callback error: {e}")
-                draft.state = StreamState.ERROR
+                retry_after = self._retry_after(e)
+                if retry_after is None:
+                    logger.error(f"Update callback error: {e}")
+                    draft.state = StreamState.ERROR
+                    return
+                
+                draft.rate_limited += 1
+                draft._interval = min(
+                    self.config.max_update_interval,
+                    max(draft._interval * 2, retry_after),
+                )
+                draft._next_update = time.monotonic() + max(draft._interval, retry_after)
+                draft._pending_update = True
+                logger.debug(f"Draft edits rate limited; next edit in {draft._interval:.1f}s")
+                
+                if final:
+                    # The final text must land; wait out the limit once
+                    await asyncio.sleep(max(draft._interval, retry_after))
+                    try:
+                        await self._call(self._update_callback, draft, draft.content, final)
+                    except Exception as e:
+                        logger.error(f"Final update failed: {e}")
+    
+    async def _overflow(self, draft: DraftMessage, reserve: int) -> None:
+        """Finish the current message and continue the draft in new ones."""
+        chunks = self._chunker.chunk_message(
+            draft.content, self.config.max_message_length - reserve
+        )
+        if len(chunks) < 2:
+            return
+        
+        # Text up to the last chunk is done; only the tail stays editable
+        tail = chunks[-1]
+        split = draft.content.rfind(tail)
+        if split <= 0:
+            split = len(draft.content) - len(tail)
+        
+        await self._call(self._update_callback, draft, chunks[0], True)
+        for chunk in chunks[1:]:
+            message_id = await self._call(self._overflow_callback, draft, chunk)
+            draft.message_id = message_id
+            draft.message_ids.append(message_id)
+        
+        draft._committed += draft.content[:split]
+        draft.content = draft.content[split:]
+    
+    @staticmethod
+    async def _call(callback: Callable, *args) -> Any:
+        if asyncio.iscoroutinefunction(callback):
+            return await callback(*args)
+        return callback(*args)
+    
+    @staticmethod
+    def _retry_after(error: Exception) -> Optional[float]:
+        """Seconds to back off if error is a rate limit, otherwise None."""
+        retry_after = getattr(error, "retry_after", None)
+        if retry_after is not None:
+            if hasattr(retry_after, "total_seconds"):
+                return retry_after.total_seconds()
+            return float(retry_after)
+        
+        text = str(error).lower()
+        if "429" in text or "too many requests" in text or "flood" in text:
+            return 0.0
+        return None
     
     # ============================================
     # Helpers
@@ -295,6 +408,14 @@ class DraftStreamer:
         """
         self._complete_callback = callback
     
+    def on_overflow(self, callback: Callable) -> None:
+        """
+        Set the callback that continues a long draft in a new message.
+        
+        Callback signature: (draft: DraftMessage, content: str) -> new message ID
+        """
+        self._overflow_callback = callback
+    
     # ============================================
     # Status
     # ============================================
@@ -317,6 +438,7 @@ class DraftStreamer:
             "total_drafts": len(self._drafts),
             "active_streams": len(self.get_active_streams()),
             "by_state": states,
+            "rate_limited": sum(d.rate_limited for d in self._drafts.values()),
         }
 
 
@@ -329,12 +451,14 @@ class TelegramDraftStreamer(DraftStreamer):
     Draft streamer with Telegram-specific integration.
     """
     
-    def __init__(self, bot, config: StreamConfig = None):
-        super().__init__(config)
+    def __init__(self, bot, config: StreamConfig = None, parse_mode: Optional[str] = "HTML"):
+        super().__init__(config or StreamConfig.for_platform("telegram"))
         self._bot = bot
+        self._parse_mode = parse_mode  # Applied to final text only
         
         # Set up callbacks
         self.on_update(self._telegram_update)
+        self.on_overflow(self._telegram_overflow)
     
     async def _telegram_update(
         self,
@@ -348,12 +472,20 @@ class TelegramDraftStreamer(DraftStreamer):
                 chat_id=draft.chat_id,
                 message_id=draft.message_id,
                 text=content,
-                parse_mode="HTML" if final else None,
+                parse_mode=self._parse_mode if final else None,
+                reply_markup=None if final else draft.reply_markup,
             )
         except Exception as e:
-            # Rate limit or message not found
+            if self._retry_after(e) is not None:
+                raise  # Lets the streamer back off
+            # Message not found or unchanged
             if "message is not modified" not in str(e).lower():
                 logger.warning(f"Telegram edit error: {e}")
+    
+    async def _telegram_overflow(self, draft: DraftMessage, content: str) -> Any:
+        """Continue a long draft in a new Telegram message."""
+        message = await self._bot.send_message(chat_id=draft.chat_id, text=content)
+        return message.message_id
 
 
 # ============================================
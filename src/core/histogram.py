@@ -0,0 +1,114 @@
+"""
+Latency Histograms for CursorBot
+
+Provides:
+- Fixed-bucket latency histograms (task queue, analytics rollups)
+- Percentile estimates from bucket counts with one overflow convention
+- Nearest-rank percentiles over raw sample windows (provider routing)
+
+Bucket i counts values below bounds[i] (and at or above bounds[i - 1]);
+the last bucket counts values at or above the last bound. A bucketed
+percentile is the upper bound of its bucket. One that falls in the
+overflow bucket is the last bound, which is then a lower bound, and its
+name is listed in "overflow". Percentiles are None only without data.
+"""
+
+import bisect
+from typing import Iterable, Optional, Sequence
+
+# Percentiles reported by histograms, as (name, percent)
+DEFAULT_PERCENTILES = (("p50_ms", 50), ("p95_ms", 95), ("p99_ms", 99))
+
+
+def bucket_index(bounds: Sequence[float], value: float) -> int:
+    """Bucket of value: the first bound it is below, or len(bounds) for overflow."""
+    return bisect.bisect_right(bounds, value)
+
+
+def _rank_bucket(counts: Sequence[int], p: float) -> Optional[int]:
+    """Index of the bucket holding the p-th percentile sample; None without data."""
+    total = sum(counts)
+    if not total:
+        return None
+    rank = p / 100 * total
+    seen = 0
+    for i, count in enumerate(counts):
+        seen += count
+        if seen >= rank:
+            return i
+    return len(counts) - 1
+
+
+def bucket_percentiles(
+    bounds: Sequence[float],
+    counts: Sequence[int],
+    percentiles: Iterable[tuple[str, float]] = DEFAULT_PERCENTILES,
+) -> dict:
+    """
+    Estimate percentiles from bucket counts (len(bounds) + 1 of them).
+
+    Returns:
+        dict of name -> percentile, plus "overflow": names whose
+        percentile is only a lower bound
+    """
+    result = {"overflow": []}
+    for name, p in percentiles:
+        i = _rank_bucket(counts, p)
+        if i is None:
+            result[name] = None
+        elif i < len(bounds):
+            result[name] = float(bounds[i])
+        else:
+            result[name] = float(bounds[-1])
+            result["overflow"].append(name)
+    return result
+
+
+def window_percentile(values: Iterable[float], p: float) -> Optional[float]:
+    """Nearest-rank percentile of raw samples; None without samples."""
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram."""
+
+    def __init__(self, bounds: Sequence[float]):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def record(self, ms: float) -> None:
+        self.counts[bucket_index(self.bounds, ms)] += 1
+        self.count += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+
+    def percentile(self, p: float) -> Optional[float]:
+        """Upper bound of the bucket holding the p-th percentile; the last bound on overflow."""
+        return bucket_percentiles(self.bounds, self.counts, [("p", p)])["p"]
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "avg_ms": round(self.total_ms / self.count, 1) if self.count else 0,
+            "max_ms": round(self.max_ms, 1),
+            **bucket_percentiles(self.bounds, self.counts),
+            "buckets": {
+                **{str(bound): count for bound, count in zip(self.bounds, self.counts)},
+                "inf": self.counts[-1],
+            },
+        }
+
+
+__all__ = [
+    "DEFAULT_PERCENTILES",
+    "LatencyHistogram",
+    "bucket_index",
+    "bucket_percentiles",
+    "window_percentile",
+]
@@ -13,13 +13,19 @@ Configuration is done via environment variables.
 """
 
 import asyncio
+import json
 import os
+import re
+import time
 from abc import ABC, abstractmethod
+from collections import deque
+from contextlib import aclosing, asynccontextmanager
 from dataclasses import dataclass, field
 from enum import Enum
-from typing import Any, Callable, Optional
+from typing import Any, AsyncIterator, Callable, Optional
 
 from ..utils.logger import logger
+from .histogram import window_percentile
 
 
 class ProviderType(Enum):
@@ -64,11 +70,834 @@ class ProviderConfig:
     extra: dict = field(default_factory=dict)
 
 
+# ============================================
+# HTTP Client Pool
+# ============================================
+
+@dataclass
+class HTTPPoolConfig:
+    """Connection limits for pooled provider HTTP clients."""
+    max_connections: int = 20
+    max_keepalive_connections: int = 10
+    keepalive_expiry: float = 60.0
+    http2: bool = True
+    
+    @classmethod
+    def from_env(cls) -> "HTTPPoolConfig":
+        return cls(
+            max_connections=int(os.getenv("LLM_HTTP_MAX_CONNECTIONS", "20")),
+            max_keepalive_connections=int(os.getenv("LLM_HTTP_MAX_KEEPALIVE", "10")),
+            keepalive_expiry=float(os.getenv("LLM_HTTP_KEEPALIVE_EXPIRY", "60")),
+            http2=os.getenv("LLM_HTTP2", "true").lower() in ("true", "1", "yes"),
+        )
+
+
+@dataclass
+class _ConnectionStats:
+    """Request and connection counters for one pooled client."""
+    requests: int = 0
+    connections_opened: int = 0
+    
+    def to_dict(self) -> dict:
+        reused = max(0, self.requests - self.connections_opened)
+        return {
+            "requests": self.requests,
+            "connections_opened": self.connections_opened,
+            "reused_requests": reused,
+            "reuse_rate": round(reused / self.requests, 3) if self.requests else 0.0,
+        }
+
+
+class HTTPClientPool:
+    """
+    Shared keep-alive HTTP clients for LLM providers.
+    
+    Each provider gets one long-lived httpx.AsyncClient (HTTP/2 when the
+    h2 package is installed), so requests reuse TCP+TLS connections
+    instead of paying the handshake on every message.
+    """
+    
+    def __init__(self, config: HTTPPoolConfig = None):
+        self.config = config or HTTPPoolConfig()
+        self._clients: dict[str, Any] = {}
+        self._stats: dict[str, _ConnectionStats] = {}
+        self._closed = False
+        
+        import importlib.util
+        self._http2 = self.config.http2 and importlib.util.find_spec("h2") is not None
+    
+    def _make_transport(self, stats: _ConnectionStats):
+        import httpx
+        
+        async def trace(event_name: str, info: dict) -> None:
+            if event_name == "connection.connect_tcp.complete":
+                stats.connections_opened += 1
+        
+        class TracingTransport(httpx.AsyncHTTPTransport):
+            async def handle_async_request(self, request):
+                stats.requests += 1
+                request.extensions["trace"] = trace
+                return await super().handle_async_request(request)
+        
+        return TracingTransport(
+            http2=self._http2,
+            limits=httpx.Limits(
+                max_connections=self.config.max_connections,
+                max_keepalive_connections=self.config.max_keepalive_connections,
+                keepalive_expiry=self.config.keepalive_expiry,
+            ),
+        )
+    
+    def get_client(self, key: str, timeout: float):
+        """Get (or create) the pooled client for a provider."""
+        import httpx
+        
+        if self._closed:
+            raise RuntimeError("HTTP client pool is closed")
+        
+        client = self._clients.get(key)
+        if client is None or client.is_closed:
+            stats = self._stats.setdefault(key, _ConnectionStats())
+            client = httpx.AsyncClient(timeout=timeout, transport=self._make_transport(stats))
+            self._clients[key] = client
+        return client
+    
+    async def aclose(self) -> None:
+        """Close all pooled clients."""
+        self._closed = True
+        clients = list(self._clients.values())
+        self._clients.clear()
+        for client in clients:
+            try:
+                await client.aclose()
+            except Exception as e:
+                logger.debug(f"Error closing HTTP client: {e}")
+    
+    def get_stats(self) -> dict:
+        return {
+            "http2": self._http2,
+            "max_connections": self.config.max_connections,
+            "max_keepalive_connections": self.config.max_keepalive_connections,
+            "by_provider": {key: stats.to_dict() for key, stats in self._stats.items()},
+        }
+
+
+# ============================================
+# Hedged Generation
+# ============================================
+
+class GenerationMode(Enum):
+    """How LLMProviderManager.generate spreads a request across providers."""
+    FAILOVER = "failover"  # Primary first, backups one at a time on error
+    HEDGE = "hedge"        # Fire a backup if the primary is slower than its usual latency
+    RACE = "race"          # Start the top-K providers at once, keep the first answer
+
+
+@dataclass
+class HedgingConfig:
+    """Settings and cost guardrails for hedged/raced generation."""
+    mode: GenerationMode = GenerationMode.FAILOVER
+    # Hedge after the primary exceeds this percentile of its recent latencies
+    hedge_percentile: float = 95.0
+    # Delay used until a provider has enough latency samples
+    hedge_initial_delay: float = 10.0
+    hedge_min_delay: float = 1.0
+    min_latency_samples: int = 20
+    # Providers started together in race mode
+    race_top_k: int = 2
+    # Extra (hedged or raced) requests allowed per normal request, e.g. 0.1 = +10% cost
+    max_extra_ratio: float = 0.1
+    # Extra requests that may be spent in a burst before the ratio applies
+    extra_burst: int = 5
+    # Never duplicate prompts longer than this (0 = no limit)
+    max_input_chars: int = 32000
+    
+    @classmethod
+    def from_env(cls) -> "HedgingConfig":
+        try:
+            mode = GenerationMode(os.getenv("LLM_GENERATION_MODE", "failover").lower())
+        except ValueError:
+            logger.warning("Unknown LLM_GENERATION_MODE, using failover")
+            mode = GenerationMode.FAILOVER
+        return cls(
+            mode=mode,
+            hedge_percentile=float(os.getenv("LLM_HEDGE_PERCENTILE", "95")),
+            hedge_initial_delay=float(os.getenv("LLM_HEDGE_INITIAL_DELAY", "10")),
+            hedge_min_delay=float(os.getenv("LLM_HEDGE_MIN_DELAY", "1")),
+            race_top_k=int(os.getenv("LLM_RACE_TOP_K", "2")),
+            max_extra_ratio=float(os.getenv("LLM_HEDGE_MAX_EXTRA_RATIO", "0.1")),
+            extra_burst=int(os.getenv("LLM_HEDGE_BURST", "5")),
+            max_input_chars=int(os.getenv("LLM_HEDGE_MAX_INPUT_CHARS", "32000")),
+        )
+
+
+class _ExtraRequestBudget:
+    """
+    Token bucket limiting duplicate requests.
+    
+    Every normal request earns `ratio` credits (capped at `burst`) and
+    every hedged or raced request spends one, so duplicates can never
+    exceed the configured fraction of traffic.
+    """
+    
+    def __init__(self, ratio: float, burst: int):
+        self.ratio = ratio
+        self.burst = burst
+        self.credits = float(burst)
+    
+    def earn(self) -> None:
+        self.credits = min(float(self.burst), self.credits + self.ratio)
+    
+    def try_spend(self) -> bool:
+        if self.credits >= 1.0:
+            self.credits -= 1.0
+            return True
+        return False
+    
+    def refund(self) -> None:
+        self.credits = min(float(self.burst), self.credits + 1.0)
+
+
+@dataclass
+class _ModeStats:
+    """Per-mode generation counters."""
+    requests: int = 0
+    successful: int = 0
+    failed: int = 0
+    extra_requests: int = 0
+    hedges_fired: int = 0
+    backup_wins: int = 0
+    cancelled: int = 0
+    budget_denied: int = 0
+    total_time_seconds: float = 0.0
+    
+    def to_dict(self) -> dict:
+        return {
+            "requests": self.requests,
+            "successful": self.successful,
+            "failed": self.failed,
+            "extra_requests": self.extra_requests,
+            "extra_request_ratio": round(self.extra_requests / self.requests, 3) if self.requests else 0.0,
+            "hedges_fired": self.hedges_fired,
+            "backup_wins": self.backup_wins,
+            "cancelled": self.cancelled,
+            "budget_denied": self.budget_denied,
+            "avg_latency_seconds": round(self.total_time_seconds / self.requests, 3) if self.requests else 0.0,
+        }
+
+
+# ============================================
+# Provider Routing
+# ============================================
+
+class CircuitState(Enum):
+    """Circuit breaker state for a provider/model route."""
+    CLOSED = "closed"        # Healthy, requests flow normally
+    OPEN = "open"            # Failing, requests are skipped until the cooldown ends
+    HALF_OPEN = "half_open"  # Cooldown over, one probe request decides
+
+
+@dataclass
+class RouterConfig:
+    """Settings for latency/health-aware provider routing."""
+    enabled: bool = True
+    # Recent requests kept per route for percentiles and error rate
+    window_size: int = 100
+    # Consecutive failures that open the circuit
+    failure_threshold: int = 5
+    # Error rate over the window that opens the circuit
+    error_rate_threshold: float = 0.5
+    min_requests: int = 10
+    # Cooldown before a probe; doubles after each failed probe
+    open_seconds: float = 30.0
+    max_open_seconds: float = 600.0
+    # A probe that never reports back is abandoned after this long
+    probe_timeout: float = 120.0
+    # Expected latency assumed for routes without samples
+    default_latency: float = 5.0
+    
+    @classmethod
+    def from_env(cls) -> "RouterConfig":
+        return cls(
+            enabled=os.getenv("LLM_ROUTER_ENABLED", "true").lower() in ("true", "1", "yes"),
+            window_size=int(os.getenv("LLM_ROUTER_WINDOW", "100")),
+            failure_threshold=int(os.getenv("LLM_CIRCUIT_FAILURE_THRESHOLD", "5")),
+            error_rate_threshold=float(os.getenv("LLM_CIRCUIT_ERROR_RATE", "0.5")),
+            open_seconds=float(os.getenv("LLM_CIRCUIT_OPEN_SECONDS", "30")),
+            max_open_seconds=float(os.getenv("LLM_CIRCUIT_MAX_OPEN_SECONDS", "600")),
+        )
+
+
+class _RouteHealth:
+    """Rolling latency/outcome window and breaker state for one route."""
+    
+    def __init__(self, window_size: int):
+        # Full request latencies (generate) and stream times to first chunk
+        # are kept apart so neither skews the other's percentiles
+        self.latencies: deque = deque(maxlen=window_size)
+        self.ttfts: deque = deque(maxlen=window_size)
+        self.outcomes: deque = deque(maxlen=window_size)
+        self.state = CircuitState.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.open_seconds = 0.0
+        self.probe_started: Optional[float] = None
+        self.total_requests = 0
+        self.times_opened = 0
+    
+    def percentile(self, pct: float, ttft: bool = False) -> Optional[float]:
+        return window_percentile(self.ttfts if ttft else self.latencies, pct)
+    
+    @property
+    def error_rate(self) -> float:
+        if not self.outcomes:
+            return 0.0
+        return 1 - sum(self.outcomes) / len(self.outcomes)
+
+
+class ProviderRouter:
+    """
+    Orders providers by expected latency and guards them with circuit breakers.
+    
+    Every attempt is recorded per provider/model route. Routes that keep
+    failing are opened and skipped; after a cooldown a single probe
+    request is let through (half-open), and its outcome closes the
+    circuit or reopens it with a longer cooldown.
+    """
+    
+    def __init__(self, config: RouterConfig = None):
+        self.config = config or RouterConfig()
+        self._routes: dict[str, _RouteHealth] = {}
+    
+    @staticmethod
+    def _key(provider: str, model: Optional[str]) -> str:
+        return f"{provider}/{model or 'default'}"
+    
+    def _route(self, provider: str, model: Optional[str]) -> _RouteHealth:
+        key = self._key(provider, model)
+        route = self._routes.get(key)
+        if route is None:
+            route = self._routes[key] = _RouteHealth(self.config.window_size)
+        return route
+    
+    def is_available(self, provider: str, model: Optional[str]) -> bool:
+        """Whether a request to this route would currently be allowed."""
+        if not self.config.enabled:
+            return True
+        route = self._routes.get(self._key(provider, model))
+        if route is None or route.state == CircuitState.CLOSED:
+            return True
+        now = time.monotonic()
+        if route.state == CircuitState.OPEN:
+            return now - route.opened_at >= route.open_seconds
+        return route.probe_started is None or now - route.probe_started >= self.config.probe_timeout
+    
+    def acquire(self, provider: str, model: Optional[str]) -> bool:
+        """Claim permission to send a request; half-open routes allow one probe."""
+        if not self.config.enabled:
+            return True
+        if not self.is_available(provider, model):
+            return False
+        route = self._route(provider, model)
+        if route.state != CircuitState.CLOSED:
+            route.state = CircuitState.HALF_OPEN
+            route.probe_started = time.monotonic()
+        return True
+    
+    def release(self, provider: str, model: Optional[str]) -> None:
+        """Give back a claim whose request was cancelled before finishing."""
+        route = self._routes.get(self._key(provider, model))
+        if route is not None and route.state == CircuitState.HALF_OPEN:
+            route.probe_started = None
+    
+    def record(
+        self,
+        provider: str,
+        model: Optional[str],
+        elapsed: float,
+        success: bool,
+        ttft: Optional[float] = None,
+    ) -> None:
+        """
+        Record the outcome of a finished request.
+        
+        Successful streams pass ttft (seconds to first chunk), which goes
+        to the TTFT window instead of the full-latency window.
+        
+        While routing is disabled only success latencies are kept (hedge
+        delays use them); outcomes and circuit state are left alone.
+        """
+        route = self._route(provider, model)
+        if success:
+            if ttft is None:
+                route.latencies.append(elapsed)
+            else:
+                route.ttfts.append(ttft)
+        if not self.config.enabled:
+            return
+        route.total_requests += 1
+        route.outcomes.append(success)
+        
+        if success:
+            route.consecutive_failures = 0
+            if route.state != CircuitState.CLOSED:
+                logger.info(f"Circuit closed for {self._key(provider, model)}")
+                route.state = CircuitState.CLOSED
+                route.probe_started = None
+                route.open_seconds = 0.0
+                # Forget the failures that opened the circuit
+                route.outcomes.clear()
+                route.outcomes.append(True)
+            return
+        
+        route.consecutive_failures += 1
+        if route.state == CircuitState.HALF_OPEN:
+            self._open(route, provider, model, min(route.open_seconds * 2, self.config.max_open_seconds))
+        elif route.state == CircuitState.CLOSED and (
+            route.consecutive_failures >= self.config.failure_threshold
+            or (
+                len(route.outcomes) >= self.config.min_requests
+                and route.error_rate >= self.config.error_rate_threshold
+            )
+        ):
+            self._open(route, provider, model, self.config.open_seconds)
+    
+    def _open(self, route: _RouteHealth, provider: str, model: Optional[str], open_seconds: float) -> None:
+        route.state = CircuitState.OPEN
+        route.opened_at = time.monotonic()
+        route.open_seconds = max(open_seconds, self.config.open_seconds)
+        route.probe_started = None
+        route.times_opened += 1
+        logger.warning(
+            f"Circuit opened for {self._key(provider, model)} "
+            f"for {route.open_seconds:.0f}s after {route.consecutive_failures} failures"
+        )
+    
+    def percentile(self, provider: str, model: Optional[str], pct: float, ttft: bool = False) -> Optional[float]:
+        """Latency (or, with ttft, time to first chunk) percentile in seconds of recent successes."""
+        route = self._routes.get(self._key(provider, model))
+        return route.percentile(pct, ttft) if route else None
+    
+    def sample_count(self, provider: str, model: Optional[str], ttft: bool = False) -> int:
+        route = self._routes.get(self._key(provider, model))
+        if route is None:
+            return 0
+        return len(route.ttfts if ttft else route.latencies)
+    
+    def expected_latency(self, provider: str, model: Optional[str], ttft: bool = False) -> float:
+        """
+        Median latency inflated by the error rate, i.e. expected time to a good answer.
+        
+        With ttft the median time to first chunk is used, falling back to
+        the full latency (an upper bound) while there are no stream samples.
+        """
+        route = self._routes.get(self._key(provider, model))
+        median = route.percentile(50, ttft) if route else None
+        if median is None and ttft and route:
+            median = route.percentile(50)
+        if median is None:
+            median = self.config.default_latency
+        success_rate = 1 - route.error_rate if route else 1.0
+        return median / max(success_rate, 0.1)
+    
+    def order(
+        self,
+        candidates: list[tuple["LLMProvider", Optional[str]]],
+        ttft: bool = False,
+    ) -> list[tuple["LLMProvider", Optional[str]]]:
+        """
+        Order candidates for an attempt.
+        
+        The requested (first) provider keeps its place while its circuit
+        allows requests; backups are sorted by expected latency (time to
+        first chunk for streams, with ttft), and routes with an open
+        circuit move to the end.
+        """
+        if not self.config.enabled:
+            return candidates
+        
+        def sort_key(item):
+            index, (candidate, candidate_model) = item
+            name = candidate.provider_type.value
+            return (
+                not self.is_available(name, candidate_model),
+                index != 0,
+                self.expected_latency(name, candidate_model, ttft),
+            )
+        
+        return [candidate for _, candidate in sorted(enumerate(candidates), key=sort_key)]
+    
+    def get_status(self) -> dict:
+        """Router state per route and aggregated per provider."""
+        routes = {}
+        by_provider: dict[str, dict] = {}
+        severity = {CircuitState.CLOSED: 0, CircuitState.HALF_OPEN: 1, CircuitState.OPEN: 2}
+        
+        for key, route in self._routes.items():
+            p50 = route.percentile(50)
+            p95 = route.percentile(95)
+            ttft_p50 = route.percentile(50, ttft=True)
+            entry = {
+                "state": route.state.value,
+                "requests": route.total_requests,
+                "error_rate": round(route.error_rate, 3),
+                "p50_ms": round(p50 * 1000) if p50 is not None else None,
+                "p95_ms": round(p95 * 1000) if p95 is not None else None,
+                "ttft_p50_ms": round(ttft_p50 * 1000) if ttft_p50 is not None else None,
+                "consecutive_failures": route.consecutive_failures,
+                "times_opened": route.times_opened,
+            }
+            if route.state == CircuitState.OPEN:
+                entry["retry_in_seconds"] = round(
+                    max(0.0, route.opened_at + route.open_seconds - time.monotonic()), 1
+                )
+            routes[key] = entry
+            
+            provider = key.split("/", 1)[0]
+            current = by_provider.get(provider)
+            # Summarise a provider by its least healthy route, then its busiest
+            if current is None or (severity[route.state], route.total_requests) > (
+                severity[CircuitState(current["state"])], current["requests"]
+            ):
+                by_provider[provider] = entry
+        
+        return {"enabled": self.config.enabled, "routes": routes, "by_provider": by_provider}
+
+
+# ============================================
+# Stream Decoding
+# ============================================
+
+_LINE_BREAK = re.compile(r"\r\n|\r|\n")
+
+
+@dataclass
+class SSEEvent:
+    """One server-sent event."""
+    event: str = "message"
+    data: str = ""
+    id: Optional[str] = None
+    
+    def json(self) -> Any:
+        return json.loads(self.data)
+
+
+class SSEDecoder:
+    """
+    Incremental text/event-stream decoder.
+    
+    Text is fed in whatever pieces the transport delivers; complete events
+    are returned as soon as their terminating blank line arrives and the
+    partial line is buffered. CRLF, CR and LF line endings are accepted,
+    including a CRLF split across two pieces.
+    """
+    
+    def __init__(self):
+        self._buffer = ""
+        self._skip_lf = False
+        self._event = ""
+        self._data: list[str] = []
+        self._id: Optional[str] = None
+    
+    def feed(self, text: str) -> list[SSEEvent]:
+        if self._skip_lf and text.startswith("\n"):
+            text = text[1:]
+        self._skip_lf = False
+        if "\n" not in text and "\r" not in text:
+            self._buffer += text
+            return []
+        
+        lines = _LINE_BREAK.split(self._buffer + text)
+        self._buffer = lines.pop()
+        # A trailing CR may be the first half of a CRLF
+        self._skip_lf = text.endswith("\r")
+        
+        events = []
+        for line in lines:
+            event = self._process_line(line)
+            if event is not None:
+                events.append(event)
+        return events
+    
+    def flush(self) -> list[SSEEvent]:
+        """Finish the stream, emitting an event left without its blank line."""
+        events = []
+        if self._buffer:
+            self._process_line(self._buffer)
+            self._buffer = ""
+        event = self._process_line("")
+        if event is not None:
+            events.append(event)
+        return events
+    
+    def _process_line(self, line: str) -> Optional[SSEEvent]:
+        if not line:
+            if not self._data:
+                self._event = ""
+                return None
+            event = SSEEvent(event=self._event or "message", data="\n".join(self._data), id=self._id)
+            self._event = ""
+            self._data = []
+            return event
+        
+        if line.startswith(":"):
+            return None  # Comment / keep-alive
+        
+        name, _, value = line.partition(":")
+        if value.startswith(" "):
+            value = value[1:]
+        if name == "data":
+            self._data.append(value)
+        elif name == "event":
+            self._event = value
+        elif name == "id" and "\0" not in value:
+            self._id = value
+        return None
+
+
+class NDJSONDecoder:
+    """Incremental newline-delimited JSON decoder (Ollama streaming)."""
+    
+    def __init__(self):
+        self._buffer = ""
+    
+    def feed(self, text: str) -> list[Any]:
+        if "\n" not in text:
+            self._buffer += text
+            return []
+        lines = (self._buffer + text).split("\n")
+        self._buffer = lines.pop()
+        return [obj for obj in map(self._parse, lines) if obj is not None]
+    
+    def flush(self) -> list[Any]:
+        obj = self._parse(self._buffer)
+        self._buffer = ""
+        return [obj] if obj is not None else []
+    
+    @staticmethod
+    def _parse(line: str) -> Any:
+        line = line.strip()
+        if not line:
+            return None
+        try:
+            return json.loads(line)
+        except json.JSONDecodeError:
+            logger.debug(f"Skipping malformed stream line: {line[:100]}")
+            return None
+
+
+async def aiter_sse(response) -> AsyncIterator[SSEEvent]:
+    """Yield the server-sent events of a streaming httpx response."""
+    decoder = SSEDecoder()
+    async for text in response.aiter_text():
+        for event in decoder.feed(text):
+            yield event
+    for event in decoder.flush():
+        yield event
+
+
+async def aiter_sse_json(response, done: str = "[DONE]") -> AsyncIterator[Any]:
+    """Yield the JSON payload of each event until the `done` marker."""
+    async for event in aiter_sse(response):
+        data = event.data.strip()
+        if not data:
+            continue
+        if data == done:
+            return
+        try:
+            yield json.loads(data)
+        except json.JSONDecodeError:
+            logger.debug(f"Skipping malformed stream event: {data[:100]}")
+
+
+async def aiter_ndjson(response) -> AsyncIterator[Any]:
+    """Yield the objects of a newline-delimited JSON httpx response."""
+    decoder = NDJSONDecoder()
+    async for text in response.aiter_text():
+        for obj in decoder.feed(text):
+            yield obj
+    for obj in decoder.flush():
+        yield obj
+
+
+# ============================================
+# Stream Metrics and Stall Detection
+# ============================================
+
+class StreamStallError(TimeoutError):
+    """A provider stream went silent for longer than the stall timeout."""
+
+
+@dataclass
+class StreamingConfig:
+    """Stall detection and failover settings for streamed generation."""
+    # Max wait for the first chunk (covers queueing and prompt processing)
+    first_token_timeout: float = 30.0
+    # Max silence between chunks once output has started
+    stall_timeout: float = 20.0
+    # Continue on a backup provider when a stream fails after emitting output
+    midstream_failover: bool = True
+    # Finished streams kept for TTFT / throughput statistics
+    history_size: int = 200
+    
+    @classmethod
+    def from_env(cls) -> "StreamingConfig":
+        return cls(
+            first_token_timeout=float(os.getenv("LLM_STREAM_FIRST_TOKEN_TIMEOUT", "30")),
+            stall_timeout=float(os.getenv("LLM_STREAM_STALL_TIMEOUT", "20")),
+            midstream_failover=os.getenv("LLM_STREAM_MIDSTREAM_FAILOVER", "true").lower() in ("true", "1", "yes"),
+            history_size=int(os.getenv("LLM_STREAM_HISTORY", "200")),
+        )
+
+
+@dataclass
+class StreamMetrics:
+    """Timing and throughput of one provider stream."""
+    provider: str
+    model: Optional[str] = None
+    # Whether this stream continues output started by a failed provider
+    resumed: bool = False
+    started_at: float = field(default_factory=time.monotonic)
+    first_token_at: Optional[float] = None
+    last_chunk_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    chunks: int = 0
+    chars: int = 0
+    # Longest silence between two chunks
+    max_gap: float = 0.0
+    stalled: bool = False
+    error: Optional[str] = None
+    
+    def record(self, chunk: str) -> None:
+        now = time.monotonic()
+        if self.first_token_at is None:
+            self.first_token_at = now
+        else:
+            self.max_gap = max(self.max_gap, now - self.last_chunk_at)
+        self.last_chunk_at = now
+        self.chunks += 1
+        self.chars += len(chunk)
+    
+    def finish(self, error: Optional[BaseException] = None) -> None:
+        if self.finished_at is None:
+            self.finished_at = time.monotonic()
+        if error is not None and self.error is None:
+            self.error = str(error) or type(error).__name__
+    
+    @property
+    def ttft_ms(self) -> Optional[float]:
+        if self.first_token_at is None:
+            return None
+        return (self.first_token_at - self.started_at) * 1000
+    
+    @property
+    def estimated_tokens(self) -> int:
+        # Roughly four characters per token for the languages we serve
+        return (self.chars + 3) // 4
+    
+    @property
+    def tokens_per_second(self) -> Optional[float]:
+        """Decode speed after the first token."""
+        if self.first_token_at is None or self.chunks < 2:
+            return None
+        duration = (self.last_chunk_at or self.first_token_at) - self.first_token_at
+        return self.estimated_tokens / duration if duration > 0 else None
+    
+    def to_dict(self) -> dict:
+        end = self.finished_at or time.monotonic()
+        tps = self.tokens_per_second
+        return {
+            "provider": self.provider,
+            "model": self.model or "default",
+            "resumed": self.resumed,
+            "ttft_ms": round(self.ttft_ms, 1) if self.ttft_ms is not None else None,
+            "tokens_per_second": round(tps, 1) if tps is not None else None,
+            "estimated_tokens": self.estimated_tokens,
+            "chunks": self.chunks,
+            "chars": self.chars,
+            "max_gap_seconds": round(self.max_gap, 3),
+            "duration_seconds": round(end - self.started_at, 3),
+            "stalled": self.stalled,
+            "error": self.error,
+        }
+
+
+_STREAM_END = object()
+
+
+async def watch_stream(
+    stream: AsyncIterator[str],
+    metrics: StreamMetrics,
+    first_token_timeout: float,
+    stall_timeout: float,
+) -> AsyncIterator[str]:
+    """
+    Relay a provider stream, recording metrics and enforcing stall timeouts.
+    
+    The provider generator is driven by a single pump task so a stall can
+    cancel it cleanly (closing its HTTP response) without the consumer
+    having to wait for the next chunk. A timeout of 0 disables the check.
+    
+    Raises:
+        StreamStallError: No first chunk within first_token_timeout, or no
+            further chunk within stall_timeout
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+    
+    async def pump() -> None:
+        try:
+            async for chunk in stream:
+                queue.put_nowait(chunk)
+        except Exception as e:
+            queue.put_nowait(e)
+        else:
+            queue.put_nowait(_STREAM_END)
+    
+    task = asyncio.create_task(pump())
+    try:
+        while True:
+            timeout = first_token_timeout if metrics.first_token_at is None else stall_timeout
+            try:
+                item = await asyncio.wait_for(queue.get(), timeout or None)
+            except asyncio.TimeoutError:
+                metrics.stalled = True
+                waiting_for = "first token" if metrics.first_token_at is None else "next chunk"
+                raise StreamStallError(
+                    f"{metrics.provider} stream stalled: no {waiting_for} for {timeout:g}s"
+                ) from None
+            
+            if item is _STREAM_END:
+                return
+            if isinstance(item, Exception):
+                raise item
+            if item:
+                metrics.record(item)
+                yield item
+    finally:
+        if not task.done():
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+
 class LLMProvider(ABC):
     """Base class for LLM providers."""
     
     def __init__(self, config: ProviderConfig):
         self.config = config
+        # Set by LLMProviderManager; None means one-off clients per request
+        self.http_pool: Optional[HTTPClientPool] = None
+    
+    @asynccontextmanager
+    async def _client(self):
+        """Yield the pooled keep-alive client, or a one-off client without a pool."""
+        import httpx
+        
+        timeout = self.config.timeout or 120
+        if self.http_pool is not None:
+            yield self.http_pool.get_client(self.provider_type.value, timeout)
+        else:
+            async with httpx.AsyncClient(timeout=timeout) as client:
+                yield client
     
     @property
     @abstractmethod
@@ -109,6 +938,34 @@ class LLMProvider(ABC):
         # Default: fall back to non-streaming
         result = await self.generate(messages, **kwargs)
         yield result
+    
+    async def _stream_events(self, url: str, headers: dict, payload: dict, name: str, ndjson: bool = False):
+        """
+        POST a streaming request and yield each decoded JSON event.
+        
+        Server-sent events are decoded by default; `ndjson` switches to
+        newline-delimited JSON. Error payloads sent mid-stream are raised
+        so the manager can fail over.
+        """
+        async with self._client() as client:
+            async with client.stream("POST", url, headers=headers, json=payload) as response:
+                if response.status_code != 200:
+                    error_text = (await response.aread()).decode(errors="replace")
+                    raise ValueError(f"{name} API error: {response.status_code} - {error_text}")
+                
+                events = aiter_ndjson(response) if ndjson else aiter_sse_json(response)
+                async for data in events:
+                    if isinstance(data, dict) and data.get("error"):
+                        raise ValueError(f"{name} stream error: {data['error']}")
+                    yield data
+    
+    async def _stream_chat_completions(self, url: str, headers: dict, payload: dict, name: str):
+        """Yield content deltas from an OpenAI-compatible chat completions stream."""
+        async for data in self._stream_events(url, headers, {**payload, "stream": True}, name):
+            choices = data.get("choices") or [{}]
+            content = (choices[0].get("delta") or {}).get("content")
+            if content:
+                yield content
 
 
 # ============================================
@@ -171,41 +1028,22 @@ class OpenAIProvider(LLMProvider):
         model = kwargs.get("model") or self.config.model or "gpt-4o-mini"
         
         try:
-            async with httpx.AsyncClient(timeout=self.config.timeout) as client:
-                async with client.stream(
-                    "POST",
-                    f"{api_base}/chat/completions",
-                    headers={
-                        "Authorization": f"Bearer {api_key}",
-                        "Content-Type": "application/json",
-                    },
-                    json={
-                        "model": model,
-                        "messages": messages,
-                        "max_tokens": kwargs.get("max_tokens", self.config.max_tokens),
-                        "temperature": kwargs.get("temperature", self.config.temperature),
-                        "stream": True,
-                    },
-                ) as response:
-                    if response.status_code != 200:
-                        error_text = await response.aread()
-                        raise ValueError(f"OpenAI API error: {response.status_code} - {error_text}")
-                    
-                    async for line in response.aiter_lines():
-                        if line.startswith("data: "):
-                            data = line[6:]
-                            if data == "[DONE]":
-                                break
-                            try:
-                                import json
-                                chunk = json.loads(data)
-                                delta = chunk.get("choices", [{}])[0].get("delta", {})
-                                content = delta.get("content", "")
-                                if content:
-                                    yield content
-                            except json.JSONDecodeError:
-                                continue
-                                
+            async for content in self._stream_chat_completions(
+                f"{api_base}/chat/completions",
+                headers={
+                    "Authorization": f"Bearer {api_key}",
+                    "Content-Type": "application/json",
+                },
+                payload={
+                    "model": model,
+                    "messages": messages,
+                    "max_tokens": kwargs.get("max_tokens", self.config.max_tokens),
+                    "temperature": kwargs.get("temperature", self.config.temperature),
+                },
+                name="OpenAI",
+            ):
+                yield content
+                
         except httpx.TimeoutException:
             raise ValueError("OpenAI API timeout")
         except Exception as e:
@@ -220,7 +1058,7 @@ class OpenAIProvider(LLMProvider):
         model = kwargs.get("model") or self.config.model or "gpt-4o-mini"
         
         try:
-            async with httpx.AsyncClient(timeout=self.config.timeout) as client:
+            async with self._client() as client:
                 response = await client.post(
                     f"{api_base}/chat/completions",
                     headers={
@@ -352,6 +1190,67 @@ class GoogleProvider(LLMProvider):
         except Exception as e:
             logger.error(f"Gemini API error: {e}")
             raise
+    
+    async def generate_stream(self, messages: list[dict], **kwargs):
+        """
+        Generate streaming response from Gemini.
+        
+        Uses the REST streamGenerateContent endpoint in SSE mode so chunks
+        arrive over the pooled HTTP client instead of a blocking SDK iterator.
+        """
+        import httpx
+        
+        api_base = self.config.api_base or "https://generativelanguage.googleapis.com/v1beta"
+        model_name = kwargs.get("model") or self.config.model or "gemini-2.0-flash"
+        
+        # Convert to Gemini format: system text becomes systemInstruction
+        system_parts = []
+        contents = []
+        for msg in messages:
+            role = msg.get("role", "user")
+            content = msg.get("content", "")
+            if role == "system":
+                system_parts.append({"text": content})
+            else:
+                contents.append({
+                    "role": "model" if role == "assistant" else "user",
+                    "parts": [{"text": content}],
+                })
+        
+        payload = {
+            "contents": contents,
+            "generationConfig": {
+                "temperature": kwargs.get("temperature", self.config.temperature),
+                "maxOutputTokens": kwargs.get("max_tokens", self.config.max_tokens),
+            },
+        }
+        if system_parts:
+            payload["systemInstruction"] = {"parts": system_parts}
+        
+        try:
+            async for data in self._stream_events(
+                f"{api_base}/models/{model_name}:streamGenerateContent?alt=sse",
+                headers={
+                    "x-goog-api-key": self.config.api_key,
+                    "Content-Type": "application/json",
+                },
+                payload=payload,
+                name="Gemini",
+            ):
+                block_reason = data.get("promptFeedback", {}).get("blockReason")
+                if block_reason:
+                    raise ValueError(f"Gemini blocked the prompt: {block_reason}")
+                
+                for candidate in data.get("candidates", [])[:1]:
+                    for part in candidate.get("content", {}).get("parts", []):
+                        if part.get("text") and not part.get("thought"):
+                            yield part["text"]
+                            
+        except httpx.TimeoutException:
+            raise ValueError("Gemini API timeout")
+        except Exception as e:
+            logger.error(f"Gemini streaming error: {e}")
+            raise
 
 
 # ============================================
@@ -381,6 +1280,57 @@ class AnthropicProvider(LLMProvider):
             "claude-3-haiku-20240307",
         ]
     
+    def _build_request(
+        self,
+        messages: list[dict],
+        thinking: bool = False,
+        thinking_budget: int = 10000,
+        **kwargs
+    ) -> tuple[str, dict, dict]:
+        """Build the Messages API url, headers and payload."""
+        api_base = self.config.api_base or "https://api.anthropic.com/v1"
+        model = kwargs.get("model") or self.config.model or "claude-3-5-sonnet-20241022"
+        
+        # Extract system message
+        system_content = ""
+        chat_messages = []
+        for msg in messages:
+            if msg.get("role") == "system":
+                system_content += msg.get("content", "") + "\n"
+            else:
+                chat_messages.append(msg)
+        
+        payload = {
+            "model": model,
+            "messages": chat_messages,
+            "max_tokens": kwargs.get("max_tokens", self.config.max_tokens),
+        }
+        
+        if system_content:
+            payload["system"] = system_content.strip()
+        
+        headers = {
+            "x-api-key": self.config.api_key,
+            "anthropic-version": "2023-06-01",
+            "Content-Type": "application/json",
+        }
+        
+        # Add thinking configuration if enabled
+        if thinking:
+            # Thinking requires specific budget configuration
+            thinking_budget = max(1024, min(thinking_budget, 100000))
+            payload["thinking"] = {
+                "type": "enabled",
+                "budget_tokens": thinking_budget
+            }
+            # When thinking is enabled, temperature must be 1
+            payload["temperature"] = 1
+            # Use beta header for thinking feature
+            headers["anthropic-beta"] = "interleaved-thinking-2025-05-14"
+            logger.info(f"Extended Thinking enabled with budget: {thinking_budget}")
+        
+        return f"{api_base}/messages", headers, payload
+    
     async def generate(
         self, 
         messages: list[dict], 
@@ -402,60 +1352,11 @@ class AnthropicProvider(LLMProvider):
         """
         import httpx
         
-        api_key = self.config.api_key
-        api_base = self.config.api_base or "https://api.anthropic.com/v1"
-        model = kwargs.get("model") or self.config.model or "claude-3-5-sonnet-20241022"
-        
-        # Extract system message
-        system_content = ""
-        chat_messages = []
-        for msg in messages:
-            if msg.get("role") == "system":
-                system_content += msg.get("content", "") + "\n"
-            else:
-                chat_messages.append(msg)
+        url, headers, payload = self._build_request(messages, thinking, thinking_budget, **kwargs)
         
         try:
-            async with httpx.AsyncClient(timeout=self.config.timeout) as client:
-                # Build payload
-                max_tokens = kwargs.get("max_tokens", self.config.max_tokens)
-                
-                payload = {
-                    "model": model,
-                    "messages": chat_messages,
-                    "max_tokens": max_tokens,
-                }
-                
-                if system_content:
-                    payload["system"] = system_content.strip()
-                
-                # Add thinking configuration if enabled
-                if thinking:
-                    # Thinking requires specific budget configuration
-                    thinking_budget = max(1024, min(thinking_budget, 100000))
-                    payload["thinking"] = {
-                        "type": "enabled",
-                        "budget_tokens": thinking_budget
-                    }
-                    # When thinking is enabled, temperature must be 1
-                    payload["temperature"] = 1
-                    logger.info(f"Extended Thinking enabled with budget: {thinking_budget}")
-                
-                headers = {
-                    "x-api-key": api_key,
-                    "anthropic-version": "2023-06-01",
-                    "Content-Type": "application/json",
-                }
-                
-                # Use beta header for thinking feature
-                if thinking:
-                    headers["anthropic-beta"] = "interleaved-thinking-2025-05-14"
-                
-                response = await client.post(
-                    f"{api_base}/messages",
-                    headers=headers,
-                    json=payload,
-                )
+            async with self._client() as client:
+                response = await client.post(url, headers=headers, json=payload)
                 
                 if response.status_code != 200:
                     logger.error(f"Anthropic API error: {response.status_code} - {response.text}")
@@ -490,6 +1391,49 @@ class AnthropicProvider(LLMProvider):
             logger.error(f"Anthropic API error: {e}")
             raise
     
+    async def generate_stream(
+        self,
+        messages: list[dict],
+        thinking: bool = False,
+        thinking_budget: int = 10000,
+        **kwargs
+    ):
+        """
+        Generate streaming response from Anthropic Claude.
+        
+        Yields text deltas; thinking deltas are only included (wrapped in
+        <thinking> tags) when include_thinking is set.
+        """
+        import httpx
+        
+        url, headers, payload = self._build_request(messages, thinking, thinking_budget, **kwargs)
+        payload["stream"] = True
+        include_thinking = thinking and kwargs.get("include_thinking", False)
+        in_thinking = False
+        
+        try:
+            async for event in self._stream_events(url, headers, payload, "Anthropic"):
+                if event.get("type") != "content_block_delta":
+                    continue
+                
+                delta = event.get("delta", {})
+                if delta.get("type") == "thinking_delta" and include_thinking:
+                    if not in_thinking:
+                        in_thinking = True
+                        yield "<thinking>\n"
+                    yield delta.get("thinking", "")
+                elif delta.get("type") == "text_delta" and delta.get("text"):
+                    if in_thinking:
+                        in_thinking = False
+                        yield "\n</thinking>\n\n"
+                    yield delta["text"]
+                    
+        except httpx.TimeoutException:
+            raise ValueError("Anthropic API timeout")
+        except Exception as e:
+            logger.error(f"Anthropic streaming error: {e}")
+            raise
+    
     async def generate_with_thinking(
         self,
         messages: list[dict],
@@ -525,7 +1469,7 @@ class AnthropicProvider(LLMProvider):
                 chat_messages.append(msg)
         
         try:
-            async with httpx.AsyncClient(timeout=self.config.timeout) as client:
+            async with self._client() as client:
                 thinking_budget = max(1024, min(thinking_budget, 100000))
                 
                 payload = {
@@ -650,43 +1594,24 @@ class OpenRouterProvider(LLMProvider):
         model = kwargs.get("model") or self.config.model or "google/gemini-2.0-flash-exp:free"
         
         try:
-            async with httpx.AsyncClient(timeout=self.config.timeout) as client:
-                async with client.stream(
-                    "POST",
-                    "https://openrouter.ai/api/v1/chat/completions",
-                    headers={
-                        "Authorization": f"Bearer {api_key}",
-                        "Content-Type": "application/json",
-                        "HTTP-Referer": "https://github.com/cursorbot",
-                        "X-Title": "CursorBot",
-                    },
-                    json={
-                        "model": model,
-                        "messages": messages,
-                        "max_tokens": kwargs.get("max_tokens", self.config.max_tokens),
-                        "temperature": kwargs.get("temperature", self.config.temperature),
-                        "stream": True,
-                    },
-                ) as response:
-                    if response.status_code != 200:
-                        error_text = await response.aread()
-                        raise ValueError(f"OpenRouter API error: {response.status_code} - {error_text}")
-                    
-                    async for line in response.aiter_lines():
-                        if line.startswith("data: "):
-                            data = line[6:]
-                            if data == "[DONE]":
-                                break
-                            try:
-                                import json
-                                chunk = json.loads(data)
-                                delta = chunk.get("choices", [{}])[0].get("delta", {})
-                                content = delta.get("content", "")
-                                if content:
-                                    yield content
-                            except json.JSONDecodeError:
-                                continue
-                                
+            async for content in self._stream_chat_completions(
+                "https://openrouter.ai/api/v1/chat/completions",
+                headers={
+                    "Authorization": f"Bearer {api_key}",
+                    "Content-Type": "application/json",
+                    "HTTP-Referer": "https://github.com/cursorbot",
+                    "X-Title": "CursorBot",
+                },
+                payload={
+                    "model": model,
+                    "messages": messages,
+                    "max_tokens": kwargs.get("max_tokens", self.config.max_tokens),
+                    "temperature": kwargs.get("temperature", self.config.temperature),
+                },
+                name="OpenRouter",
+            ):
+                yield content
+                
         except httpx.TimeoutException:
             raise ValueError("OpenRouter API timeout")
         except Exception as e:
@@ -700,7 +1625,7 @@ class OpenRouterProvider(LLMProvider):
         model = kwargs.get("model") or self.config.model or "google/gemini-2.0-flash-exp:free"
         
         try:
-            async with httpx.AsyncClient(timeout=self.config.timeout) as client:
+            async with self._client() as client:
                 response = await client.post(
                     "https://openrouter.ai/api/v1/chat/completions",
                     headers={
@@ -786,7 +1711,7 @@ class OllamaProvider(LLMProvider):
         model = kwargs.get("model") or self.config.model or "llama3.2"
         
         try:
-            async with httpx.AsyncClient(timeout=self.config.timeout) as client:
+            async with self._client() as client:
                 response = await client.post(
                     f"{api_base}/api/chat",
                     json={
@@ -813,6 +1738,42 @@ class OllamaProvider(LLMProvider):
         except Exception as e:
             logger.error(f"Ollama API error: {e}")
             raise
+    
+    async def generate_stream(self, messages: list[dict], **kwargs):
+        """Generate streaming response from Ollama (newline-delimited JSON)."""
+        import httpx
+        
+        api_base = self.config.api_base or "http://localhost:11434"
+        model = kwargs.get("model") or self.config.model or "llama3.2"
+        
+        try:
+            async for data in self._stream_events(
+                f"{api_base}/api/chat",
+                headers={"Content-Type": "application/json"},
+                payload={
+                    "model": model,
+                    "messages": messages,
+                    "stream": True,
+                    "options": {
+                        "temperature": kwargs.get("temperature", self.config.temperature),
+                    },
+                },
+                name="Ollama",
+                ndjson=True,
+            ):
+                content = data.get("message", {}).get("content")
+                if content:
+                    yield content
+                if data.get("done"):
+                    break
+                    
+        except httpx.ConnectError:
+            raise ValueError(f"Cannot connect to Ollama at {api_base}. Is Ollama running?")
+        except httpx.TimeoutException:
+            raise ValueError("Ollama API timeout")
+        except Exception as e:
+            logger.error(f"Ollama streaming error: {e}")
+            raise
 
 
 # ============================================
@@ -874,69 +1835,67 @@ class BedrockProvider(LLMProvider):
                 "meta.llama3-2-90b-instruct-v1:0",
             ]
     
-    async def generate(self, messages: list[dict], **kwargs) -> str:
-        """Generate response using AWS Bedrock."""
-        try:
-            import boto3
-            import json
+    def _build_body(self, model_id: str, messages: list[dict], **kwargs) -> dict:
+        """Format messages for the model family behind model_id."""
+        if "anthropic" in model_id:
+            # Claude format
+            system_prompt = kwargs.get("system_prompt", "")
             
-            region = self.config.extra.get("region", "us-east-1")
-            model_id = kwargs.get("model") or self.config.model or "anthropic.claude-3-5-sonnet-20241022-v2:0"
+            # Extract system message if present
+            formatted_messages = []
+            for msg in messages:
+                if msg["role"] == "system":
+                    system_prompt = msg["content"]
+                else:
+                    formatted_messages.append({
+                        "role": msg["role"],
+                        "content": msg["content"],
+                    })
             
-            bedrock_runtime = boto3.client(
-                service_name="bedrock-runtime",
-                region_name=region,
-            )
+            body = {
+                "anthropic_version": "bedrock-2023-05-31",
+                "max_tokens": kwargs.get("max_tokens", self.config.max_tokens),
+                "messages": formatted_messages,
+            }
             
-            # Format messages for different model types
-            if "anthropic" in model_id:
-                # Claude format
-                system_prompt = kwargs.get("system_prompt", "")
-                
-                # Extract system message if present
-                formatted_messages = []
-                for msg in messages:
-                    if msg["role"] == "system":
-                        system_prompt = msg["content"]
-                    else:
-                        formatted_messages.append({
-                            "role": msg["role"],
-                            "content": msg["content"],
-                        })
-                
-                body = {
-                    "anthropic_version": "bedrock-2023-05-31",
-                    "max_tokens": kwargs.get("max_tokens", self.config.max_tokens),
-                    "messages": formatted_messages,
-                }
-                
-                if system_prompt:
-                    body["system"] = system_prompt
-                    
-            elif "amazon" in model_id:
-                # Titan format
-                prompt = "\n".join([f"{m['role']}: {m['content']}" for m in messages])
-                body = {
-                    "inputText": prompt,
-                    "textGenerationConfig": {
-                        "maxTokenCount": kwargs.get("max_tokens", self.config.max_tokens),
-                        "temperature": kwargs.get("temperature", self.config.temperature),
-                    }
-                }
-                
-            elif "meta" in model_id:
-                # Llama format
-                prompt = "\n".join([f"{m['role']}: {m['content']}" for m in messages])
-                body = {
-                    "prompt": prompt,
-                    "max_gen_len": kwargs.get("max_tokens", self.config.max_tokens),
+            if system_prompt:
+                body["system"] = system_prompt
+            return body
+        
+        prompt = "\n".join([f"{m['role']}: {m['content']}" for m in messages])
+        if "amazon" in model_id:
+            # Titan format
+            return {
+                "inputText": prompt,
+                "textGenerationConfig": {
+                    "maxTokenCount": kwargs.get("max_tokens", self.config.max_tokens),
                     "temperature": kwargs.get("temperature", self.config.temperature),
                 }
-                
-            else:
-                # Generic format
-                prompt = "\n".join([f"{m['role']}: {m['content']}" for m in messages])
-                body = {"prompt": prompt}
+            }
+        if "meta" in model_id:
+            # Llama format
+            return {
+                "prompt": prompt,
+                "max_gen_len": kwargs.get("max_tokens", self.config.max_tokens),
+                "temperature": kwargs.get("temperature", self.config.temperature),
+            }
+        # Generic format
+        return {"prompt": prompt}
+    
+    def _runtime_client(self):
+        import boto3
+        
+        return boto3.client(
+            service_name="bedrock-runtime",
+            region_name=self.config.extra.get("region", "us-east-1"),
+        )
+    
+    async def generate(self, messages: list[dict], **kwargs) -> str:
+        """Generate response using AWS Bedrock."""
+        try:
+            model_id = kwargs.get("model") or self.config.model or "anthropic.claude-3-5-sonnet-20241022-v2:0"
+            bedrock_runtime = self._runtime_client()
+            body = self._build_body(model_id, messages, **kwargs)
             
             # Run in executor since boto3 is synchronous
             loop = asyncio.get_event_loop()
@@ -967,6 +1926,61 @@ class BedrockProvider(LLMProvider):
         except Exception as e:
             logger.error(f"Bedrock API error: {e}")
             raise ValueError(f"Bedrock API error: {e}")
+    
+    async def generate_stream(self, messages: list[dict], **kwargs):
+        """
+        Generate streaming response using invoke_model_with_response_stream.
+        
+        boto3 already decodes the AWS event-stream framing; each blocking
+        read of the next event is run in the executor.
+        """
+        try:
+            model_id = kwargs.get("model") or self.config.model or "anthropic.claude-3-5-sonnet-20241022-v2:0"
+            bedrock_runtime = self._runtime_client()
+            body = self._build_body(model_id, messages, **kwargs)
+            
+            loop = asyncio.get_event_loop()
+            response = await loop.run_in_executor(
+                None,
+                lambda: bedrock_runtime.invoke_model_with_response_stream(
+                    modelId=model_id,
+                    body=json.dumps(body),
+                    contentType="application/json",
+                    accept="application/json",
+                )
+            )
+            
+            stream = response["body"]
+            events = iter(stream)
+            try:
+                while True:
+                    event = await loop.run_in_executor(None, next, events, None)
+                    if event is None:
+                        break
+                    if "chunk" not in event:
+                        # Modeled exceptions arrive as events, e.g. throttlingException
+                        raise ValueError(f"Bedrock stream error: {event}")
+                    
+                    data = json.loads(event["chunk"]["bytes"])
+                    if "anthropic" in model_id:
+                        delta = data.get("delta", {}) if data.get("type") == "content_block_delta" else {}
+                        text = delta.get("text", "")
+                    elif "amazon" in model_id:
+                        text = data.get("outputText", "")
+                    elif "meta" in model_id:
+                        text = data.get("generation", "")
+                    else:
+                        text = data.get("completion", "")
+                    if text:
+                        yield text
+            finally:
+                stream.close()
+                
+        except ImportError:
+            raise ValueError("boto3 not installed. Run: pip install boto3")
+        except Exception as e:
+            logger.error(f"Bedrock streaming error: {e}")
+            raise ValueError(f"Bedrock API error: {e}")
 
 
 # ============================================
@@ -1019,7 +2033,7 @@ class MoonshotProvider(LLMProvider):
         }
         
         try:
-            async with httpx.AsyncClient(timeout=120) as client:
+            async with self._client() as client:
                 response = await client.post(
                     f"{self.API_BASE}/chat/completions",
                     headers=headers,
@@ -1037,6 +2051,37 @@ class MoonshotProvider(LLMProvider):
             raise ValueError(f"Moonshot HTTP error: {e}")
         except Exception as e:
             raise ValueError(f"Moonshot error: {e}")
+    
+    async def generate_stream(self, messages: list[dict], **kwargs):
+        """Generate streaming response using Moonshot API (OpenAI compatible)."""
+        import httpx
+        
+        if not self.is_available():
+            raise ValueError("Moonshot API key not configured")
+        
+        try:
+            async for content in self._stream_chat_completions(
+                f"{self.API_BASE}/chat/completions",
+                headers={
+                    "Authorization": f"Bearer {self.config.api_key}",
+                    "Content-Type": "application/json",
+                },
+                payload={
+                    "model": kwargs.get("model") or self.config.model or "moonshot-v1-8k",
+                    "messages": messages,
+                    "max_tokens": kwargs.get("max_tokens", self.config.max_tokens),
+                    "temperature": kwargs.get("temperature", self.config.temperature),
+                },
+                name="Moonshot",
+            ):
+                yield content
+                
+        except httpx.HTTPError as e:
+            raise ValueError(f"Moonshot HTTP error: {e}")
+        except ValueError:
+            raise
+        except Exception as e:
+            raise ValueError(f"Moonshot error: {e}")
 
 
 # ============================================
@@ -1096,7 +2141,7 @@ class GLMProvider(LLMProvider):
         }
         
         try:
-            async with httpx.AsyncClient(timeout=120) as client:
+            async with self._client() as client:
                 response = await client.post(
                     f"{self.API_BASE}/chat/completions",
                     headers=headers,
@@ -1115,6 +2160,37 @@ class GLMProvider(LLMProvider):
         except Exception as e:
             raise ValueError(f"GLM error: {e}")
     
+    async def generate_stream(self, messages: list[dict], **kwargs):
+        """Generate streaming response using GLM API (OpenAI compatible)."""
+        import httpx
+        
+        if not self.is_available():
+            raise ValueError("GLM API key not configured")
+        
+        try:
+            async for content in self._stream_chat_completions(
+                f"{self.API_BASE}/chat/completions",
+                headers={
+                    "Authorization": f"Bearer {self._generate_token()}",
+                    "Content-Type": "application/json",
+                },
+                payload={
+                    "model": kwargs.get("model") or self.config.model or "glm-4-flash",
+                    "messages": messages,
+                    "max_tokens": kwargs.get("max_tokens", self.config.max_tokens),
+                    "temperature": kwargs.get("temperature", self.config.temperature),
+                },
+                name="GLM",
+            ):
+                yield content
+                
+        except httpx.HTTPError as e:
+            raise ValueError(f"GLM HTTP error: {e}")
+        except ValueError:
+            raise
+        except Exception as e:
+            raise ValueError(f"GLM error: {e}")
+    
     def _generate_token(self) -> str:
         """Generate JWT token for GLM API authentication."""
         import time
@@ -1299,7 +2375,7 @@ class CopilotProvider(LLMProvider):
             payload["top_p"] = kwargs["top_p"]
         
         try:
-            async with httpx.AsyncClient(timeout=self.config.timeout or 120) as client:
+            async with self._client() as client:
                 response = await client.post(
                     self.COPILOT_CHAT_URL,
                     headers={
@@ -1370,40 +2446,21 @@ class CopilotProvider(LLMProvider):
         }
         
         try:
-            async with httpx.AsyncClient(timeout=self.config.timeout or 120) as client:
-                async with client.stream(
-                    "POST",
-                    self.COPILOT_CHAT_URL,
-                    headers={
-                        "Authorization": f"Bearer {copilot_token}",
-                        "Content-Type": "application/json",
-                        "Accept": "text/event-stream",
-                        "Editor-Version": "vscode/1.85.0",
-                        "Editor-Plugin-Version": "copilot-chat/0.12.0",
-                        "User-Agent": "GitHubCopilotChat/0.12.0",
-                    },
-                    json=payload,
-                ) as response:
-                    if response.status_code != 200:
-                        error_text = await response.aread()
-                        raise ValueError(f"Copilot API error: {response.status_code} - {error_text.decode()}")
-                    
-                    async for line in response.aiter_lines():
-                        if line.startswith("data: "):
-                            data_str = line[6:]
-                            if data_str.strip() == "[DONE]":
-                                break
-                            
-                            try:
-                                import json
-                                data = json.loads(data_str)
-                                delta = data.get("choices", [{}])[0].get("delta", {})
-                                content = delta.get("content", "")
-                                if content:
-                                    yield content
-                            except json.JSONDecodeError:
-                                continue
-                                
+            async for content in self._stream_chat_completions(
+                self.COPILOT_CHAT_URL,
+                headers={
+                    "Authorization": f"Bearer {copilot_token}",
+                    "Content-Type": "application/json",
+                    "Accept": "text/event-stream",
+                    "Editor-Version": "vscode/1.85.0",
+                    "Editor-Plugin-Version": "copilot-chat/0.12.0",
+                    "User-Agent": "GitHubCopilotChat/0.12.0",
+                },
+                payload=payload,
+                name="Copilot",
+            ):
+                yield content
+                
         except httpx.HTTPError as e:
             raise ValueError(f"Copilot HTTP error: {e}")
         except Exception as e:
@@ -1615,7 +2672,7 @@ class MinimaxProvider(LLMProvider):
             url = f"{url}?GroupId={group_id}"
         
         try:
-            async with httpx.AsyncClient(timeout=self.config.timeout) as client:
+            async with self._client() as client:
                 response = await client.post(
                     url,
                     headers=headers,
@@ -1650,7 +2707,6 @@ class MinimaxProvider(LLMProvider):
     async def generate_stream(self, messages: list[dict], **kwargs):
         """Stream generate response using Minimax API."""
         import httpx
-        import json as json_lib
         
         api_key = self.config.api_key
         group_id = self.config.extra.get("group_id", "")
@@ -1713,36 +2769,16 @@ class MinimaxProvider(LLMProvider):
             url = f"{url}?GroupId={group_id}"
         
         try:
-            async with httpx.AsyncClient(timeout=self.config.timeout) as client:
-                async with client.stream(
-                    "POST",
-                    url,
-                    headers=headers,
-                    json=payload,
-                ) as response:
-                    if response.status_code != 200:
-                        error_text = await response.aread()
-                        raise ValueError(f"Minimax API error: {response.status_code} - {error_text}")
-                    
-                    async for line in response.aiter_lines():
-                        if not line or not line.startswith("data:"):
-                            continue
+            async for data in self._stream_events(url, headers, payload, "Minimax"):
+                if data.get("base_resp", {}).get("status_code", 0) != 0:
+                    continue
+                
+                choices = data.get("choices", [])
+                if choices:
+                    delta = choices[0].get("messages", [{}])[0].get("text", "")
+                    if delta:
+                        yield delta
                         
-                        try:
-                            data = json_lib.loads(line[5:].strip())
-                            
-                            if data.get("base_resp", {}).get("status_code", 0) != 0:
-                                continue
-                            
-                            choices = data.get("choices", [])
-                            if choices:
-                                delta = choices[0].get("messages", [{}])[0].get("text", "")
-                                if delta:
-                                    yield delta
-                                    
-                        except json_lib.JSONDecodeError:
-                            continue
-                            
         except httpx.TimeoutException:
             raise ValueError("Minimax API request timeout")
         except Exception as e:
@@ -1820,7 +2856,7 @@ class CustomProvider(LLMProvider):
             headers["Authorization"] = f"Bearer {api_key}"
         
         try:
-            async with httpx.AsyncClient(timeout=self.config.timeout) as client:
+            async with self._client() as client:
                 response = await client.post(
                     f"{api_base}/chat/completions",
                     headers=headers,
@@ -1844,6 +2880,42 @@ class CustomProvider(LLMProvider):
         except Exception as e:
             logger.error(f"Custom API error: {e}")
             raise
+    
+    async def generate_stream(self, messages: list[dict], **kwargs):
+        """Generate streaming response from the custom endpoint."""
+        import httpx
+        
+        api_key = self.config.api_key
+        api_base = self.config.api_base
+        
+        if not api_base:
+            raise ValueError("CUSTOM_API_BASE not configured")
+        
+        headers = {
+            "Content-Type": "application/json",
+        }
+        if api_key:
+            headers["Authorization"] = f"Bearer {api_key}"
+        
+        try:
+            async for content in self._stream_chat_completions(
+                f"{api_base}/chat/completions",
+                headers=headers,
+                payload={
+                    "model": kwargs.get("model") or self.config.model,
+                    "messages": messages,
+                    "max_tokens": kwargs.get("max_tokens", self.config.max_tokens),
+                    "temperature": kwargs.get("temperature", self.config.temperature),
+                },
+                name="Custom",
+            ):
+                yield content
+                
+        except httpx.TimeoutException:
+            raise ValueError("Custom API timeout")
+        except Exception as e:
+            logger.error(f"Custom streaming error: {e}")
+            raise
 
 
 # ============================================
@@ -1905,6 +2977,18 @@ class LLMProviderManager:
         self._user_selections: dict[str, tuple[ProviderType, str]] = {}
         # Usage tracking history
         self._usage_history: list[dict] = []
+        # Shared keep-alive HTTP clients
+        self._http_pool = HTTPClientPool(HTTPPoolConfig.from_env())
+        # Hedged/raced generation
+        self._hedging = HedgingConfig.from_env()
+        self._extra_budget = _ExtraRequestBudget(self._hedging.max_extra_ratio, self._hedging.extra_burst)
+        self._mode_stats: dict[str, _ModeStats] = {m.value: _ModeStats() for m in GenerationMode}
+        # Latency/health-aware ordering and circuit breakers
+        self._router = ProviderRouter(RouterConfig.from_env())
+        # Streaming stall detection and per-stream metrics
+        self._streaming = StreamingConfig.from_env()
+        self._stream_history: deque = deque(maxlen=self._streaming.history_size)
+        self._stream_counts = {"streams": 0, "failed": 0, "stalls": 0, "failovers": 0, "midstream_failovers": 0}
     
     def load_from_settings(self) -> None:
         """Load provider configurations from settings."""
@@ -2041,9 +3125,16 @@ class LLMProviderManager:
             self._providers[ProviderType.COPILOT] = CopilotProvider(config)
             logger.info(f"Loaded GitHub Copilot provider with model: {copilot_model}")
         
+        for llm_provider in self._providers.values():
+            llm_provider.http_pool = self._http_pool
+        
         # Set default provider based on priority
         self._set_default_provider(settings)
     
+    async def aclose(self) -> None:
+        """Close pooled HTTP connections (call on shutdown)."""
+        await self._http_pool.aclose()
+    
     def _set_default_provider(self, settings) -> None:
         """Set default provider based on configuration priority."""
         # Check explicit default setting first
@@ -2320,6 +3411,8 @@ class LLMProviderManager:
         provider: Optional[str] = None,
         model: Optional[str] = None,
         enable_failover: bool = True,
+        mode: Optional[str] = None,
+        cache: Optional[str] = None,
         **kwargs
     ) -> str:
         """
@@ -2331,13 +3424,14 @@ class LLMProviderManager:
             provider: Optional provider name (openai, google, anthropic, etc.)
             model: Optional model name (overrides provider default)
             enable_failover: Whether to try other providers on failure
+            mode: Optional generation mode (failover, hedge, race);
+                defaults to LLM_GENERATION_MODE
+            cache: Optional response cache tier (exact, semantic); off by default
             **kwargs: Additional arguments for the provider
         
         Returns:
             Generated response text
         """
-        import time
-        
         llm_provider = self.get_provider(provider)
         
         if not llm_provider:
@@ -2355,8 +3449,73 @@ class LLMProviderManager:
         if not model and self._default_model:
             model = self._default_model
         
-        # Build failover order
-        failover_providers = []
+        # Serve repeated prompts from the response cache when the caller opts in
+        response_cache = None
+        if cache and cache != "off":
+            from .response_cache import CacheMode, get_response_cache
+            response_cache = get_response_cache()
+            # Built once so lookup and store share keys and the query embedding
+            cache_request = response_cache.request(
+                messages,
+                CacheMode(cache),
+                provider=llm_provider.provider_type.value,
+                model=model or llm_provider.config.model,
+                temperature=kwargs.get("temperature", llm_provider.config.temperature),
+                max_tokens=kwargs.get("max_tokens"),
+            )
+            cached = await response_cache.lookup(cache_request)
+            if cached is not None:
+                return cached
+        
+        candidates = self._failover_candidates(llm_provider, model, enable_failover)
+        generation_mode = GenerationMode(mode) if mode else self._hedging.mode
+        input_chars = len(str(messages))
+        
+        # Cost guardrails: nothing to hedge against, or prompt too large to duplicate
+        if generation_mode != GenerationMode.FAILOVER and (
+            len(candidates) < 2
+            or (self._hedging.max_input_chars and input_chars > self._hedging.max_input_chars)
+        ):
+            generation_mode = GenerationMode.FAILOVER
+        
+        stats = self._mode_stats[generation_mode.value]
+        stats.requests += 1
+        self._extra_budget.earn()
+        start_time = time.time()
+        
+        try:
+            if generation_mode == GenerationMode.FAILOVER:
+                result, winner, winner_model = await self._generate_sequential(
+                    candidates, messages, input_chars, **kwargs
+                )
+            else:
+                result, winner, winner_model = await self._generate_hedged(
+                    candidates, messages, input_chars, generation_mode, stats, **kwargs
+                )
+        except Exception:
+            stats.failed += 1
+            raise
+        finally:
+            stats.total_time_seconds += time.time() - start_time
+        
+        stats.successful += 1
+        if response_cache is not None:
+            # Key the entry like the lookup above; price it by the model that answered
+            await response_cache.store(
+                cache_request, result, elapsed=time.time() - start_time,
+                answered_model=winner_model or winner.config.model,
+            )
+        return result
+    
+    def _failover_candidates(
+        self,
+        llm_provider: LLMProvider,
+        model: Optional[str],
+        enable_failover: bool,
+        stream: bool = False,
+    ) -> list[tuple[LLMProvider, Optional[str]]]:
+        """Primary plus backup providers, ordered by the router (by TTFT for streams)."""
+        candidates = [(llm_provider, model)]
         if enable_failover:
             # Priority order for failover
             priority = [
@@ -2372,56 +3531,168 @@ class LLMProviderManager:
             primary_type = llm_provider.provider_type
             for pt in priority:
                 if pt != primary_type and pt in self._providers:
-                    failover_providers.append(self._providers[pt])
+                    backup = self._providers[pt]
+                    candidates.append((backup, backup.config.model))
         
-        # Try primary provider first
-        start_time = time.time()
+        return self._router.order(candidates, ttft=stream)
+    
+    async def _generate_sequential(
+        self,
+        candidates: list[tuple[LLMProvider, Optional[str]]],
+        messages: list[dict],
+        input_chars: int,
+        **kwargs
+    ) -> tuple[str, LLMProvider, Optional[str]]:
+        """Try each candidate in order; returns the first answer and who gave it."""
         errors = []
         
-        try:
-            result = await llm_provider.generate(messages, model=model, **kwargs)
-            
-            # Track usage
-            elapsed = time.time() - start_time
-            self._track_usage(llm_provider.provider_type.value, model, len(str(messages)), len(result), elapsed, True)
-            
-            return result
-            
-        except Exception as e:
-            errors.append(f"{llm_provider.provider_type.value}: {str(e)}")
-            logger.warning(f"Primary provider {llm_provider.provider_type.value} failed: {e}")
-            
-            # Track failed usage
-            elapsed = time.time() - start_time
-            self._track_usage(llm_provider.provider_type.value, model, len(str(messages)), 0, elapsed, False)
-        
-        # Try failover providers
-        for backup_provider in failover_providers:
+        for index, (candidate, candidate_model) in enumerate(candidates):
             start_time = time.time()
-            backup_model = backup_provider.config.model
+            failover = index > 0
+            
+            if not self._router.acquire(candidate.provider_type.value, candidate_model):
+                errors.append(f"{candidate.provider_type.value}: circuit open")
+                continue
             
             try:
-                logger.info(f"Failing over to {backup_provider.provider_type.value}")
-                result = await backup_provider.generate(messages, model=backup_model, **kwargs)
+                if failover:
+                    logger.info(f"Failing over to {candidate.provider_type.value}")
+                result = await candidate.generate(messages, model=candidate_model, **kwargs)
                 
                 # Track usage
                 elapsed = time.time() - start_time
-                self._track_usage(backup_provider.provider_type.value, backup_model, len(str(messages)), len(result), elapsed, True, failover=True)
+                self._track_usage(candidate.provider_type.value, candidate_model, input_chars, len(result), elapsed, True, failover=failover)
                 
-                return result
+                return result, candidate, candidate_model
                 
             except Exception as e:
-                errors.append(f"{backup_provider.provider_type.value}: {str(e)}")
-                logger.warning(f"Failover provider {backup_provider.provider_type.value} failed: {e}")
+                errors.append(f"{candidate.provider_type.value}: {str(e)}")
+                role = "Failover" if failover else "Primary"
+                logger.warning(f"{role} provider {candidate.provider_type.value} failed: {e}")
                 
                 # Track failed usage
                 elapsed = time.time() - start_time
-                self._track_usage(backup_provider.provider_type.value, backup_model, len(str(messages)), 0, elapsed, False, failover=True)
-                continue
+                self._track_usage(candidate.provider_type.value, candidate_model, input_chars, 0, elapsed, False, failover=failover)
+        
+        # All providers failed
+        raise ValueError(f"All LLM providers failed:\n" + "\n".join(errors))
+    
+    async def _generate_hedged(
+        self,
+        candidates: list[tuple[LLMProvider, Optional[str]]],
+        messages: list[dict],
+        input_chars: int,
+        mode: GenerationMode,
+        stats: _ModeStats,
+        **kwargs
+    ) -> tuple[str, LLMProvider, Optional[str]]:
+        """
+        Run candidates concurrently and return the first successful answer,
+        with the provider and model that gave it.
+        
+        Race mode starts the top-K candidates at once. Hedge mode starts the
+        primary and launches the next candidate whenever the newest attempt
+        runs past the hedge delay. Either way a failed attempt is replaced by
+        the next candidate, and the losers are cancelled once one succeeds.
+        Duplicate requests are only started while the extra-request budget
+        allows it.
+        """
+        pending: dict[asyncio.Task, tuple[LLMProvider, Optional[str], float, bool]] = {}
+        errors = []
+        next_index = 0
+        
+        def launch(extra: bool) -> bool:
+            nonlocal next_index
+            # Skip candidates whose circuit is open
+            while next_index < len(candidates):
+                candidate, candidate_model = candidates[next_index]
+                next_index += 1
+                if not self._router.acquire(candidate.provider_type.value, candidate_model):
+                    errors.append(f"{candidate.provider_type.value}: circuit open")
+                    continue
+                task = asyncio.create_task(candidate.generate(messages, model=candidate_model, **kwargs))
+                pending[task] = (candidate, candidate_model, time.time(), next_index > 1)
+                if extra:
+                    stats.extra_requests += 1
+                return True
+            return False
+        
+        def hedge_deadline() -> Optional[float]:
+            if mode != GenerationMode.HEDGE or next_index >= len(candidates):
+                return None
+            newest = max(pending.values(), key=lambda attempt: attempt[2])
+            return newest[2] + self._hedge_delay(newest[0].provider_type.value, newest[1])
+        
+        launch(extra=False)
+        if mode == GenerationMode.RACE:
+            while len(pending) < self._hedging.race_top_k and next_index < len(candidates):
+                if not self._extra_budget.try_spend():
+                    stats.budget_denied += 1
+                    break
+                if not launch(extra=True):
+                    self._extra_budget.refund()
+        
+        hedging = True
+        try:
+            while pending:
+                deadline = hedge_deadline() if hedging else None
+                timeout = max(0.0, deadline - time.time()) if deadline is not None else None
+                done, _ = await asyncio.wait(
+                    pending.keys(), timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+                
+                if not done:
+                    # The newest attempt is slower than usual: hedge with the next candidate
+                    if self._extra_budget.try_spend():
+                        if launch(extra=True):
+                            stats.hedges_fired += 1
+                            newest = max(pending.values(), key=lambda attempt: attempt[2])
+                            logger.info(f"Hedging slow request with {newest[0].provider_type.value}")
+                        else:
+                            self._extra_budget.refund()
+                    else:
+                        stats.budget_denied += 1
+                        hedging = False
+                    continue
+                
+                for task in done:
+                    candidate, candidate_model, started, failover = pending.pop(task)
+                    elapsed = time.time() - started
+                    name = candidate.provider_type.value
+                    
+                    if task.exception() is None:
+                        result = task.result()
+                        self._track_usage(name, candidate_model, input_chars, len(result), elapsed, True, failover=failover, mode=mode.value)
+                        if failover:
+                            stats.backup_wins += 1
+                        return result, candidate, candidate_model
+                    
+                    errors.append(f"{name}: {task.exception()}")
+                    logger.warning(f"Provider {name} failed in {mode.value} mode: {task.exception()}")
+                    self._track_usage(name, candidate_model, input_chars, 0, elapsed, False, failover=failover, mode=mode.value)
+                
+                # Replace failed attempts so something is always in flight
+                if not pending and next_index < len(candidates):
+                    launch(extra=False)
+        finally:
+            for task, (candidate, candidate_model, _, _) in pending.items():
+                task.cancel()
+                self._router.release(candidate.provider_type.value, candidate_model)
+            if pending:
+                stats.cancelled += len(pending)
+                await asyncio.gather(*pending.keys(), return_exceptions=True)
         
         # All providers failed
         raise ValueError(f"All LLM providers failed:\n" + "\n".join(errors))
     
+    def _hedge_delay(self, provider: str, model: Optional[str]) -> float:
+        """Seconds to wait on a provider before hedging, from its latency percentile."""
+        if self._router.sample_count(provider, model) < self._hedging.min_latency_samples:
+            return self._hedging.hedge_initial_delay
+        
+        latency = self._router.percentile(provider, model, self._hedging.hedge_percentile)
+        return max(self._hedging.hedge_min_delay, latency)
+    
     def _track_usage(
         self, 
         provider: str, 
@@ -2430,9 +3701,16 @@ class LLMProviderManager:
         output_chars: int, 
         elapsed: float, 
         success: bool,
-        failover: bool = False
+        failover: bool = False,
+        mode: str = "failover",
+        ttft: Optional[float] = None,
     ) -> None:
-        """Track API usage for analytics."""
+        """
+        Track API usage for analytics.
+        
+        ttft (seconds to first chunk) is passed for successful streams;
+        the router keeps it apart from full request latencies.
+        """
         usage_entry = {
             "timestamp": asyncio.get_event_loop().time() if asyncio.get_event_loop().is_running() else 0,
             "provider": provider,
@@ -2442,6 +3720,7 @@ class LLMProviderManager:
             "elapsed_seconds": round(elapsed, 2),
             "success": success,
             "failover": failover,
+            "mode": mode,
         }
         
         self._usage_history.append(usage_entry)
@@ -2450,6 +3729,8 @@ class LLMProviderManager:
         if len(self._usage_history) > 1000:
             self._usage_history = self._usage_history[-1000:]
         
+        self._router.record(provider, model, elapsed, success, ttft=ttft)
+        
         logger.debug(f"Usage tracked: {provider}/{model} - {output_chars} chars in {elapsed:.2f}s")
     
     def get_usage_stats(self, user_id: Optional[str] = None) -> dict:
@@ -2469,6 +3750,11 @@ class LLMProviderManager:
                 "total_output_chars": 0,
                 "total_time_seconds": 0,
                 "by_provider": {},
+                "connection_pool": self._http_pool.get_stats(),
+                "generation": self._get_generation_stats(),
+                "router": self._router.get_status(),
+                "response_cache": self._get_response_cache_stats(),
+                "streaming": self._get_streaming_stats(),
             }
         
         stats = {
@@ -2480,6 +3766,11 @@ class LLMProviderManager:
             "total_output_chars": sum(u["output_chars"] for u in self._usage_history),
             "total_time_seconds": round(sum(u["elapsed_seconds"] for u in self._usage_history), 2),
             "by_provider": {},
+            "connection_pool": self._http_pool.get_stats(),
+            "generation": self._get_generation_stats(),
+            "router": self._router.get_status(),
+            "response_cache": self._get_response_cache_stats(),
+            "streaming": self._get_streaming_stats(),
         }
         
         # Group by provider
@@ -2504,6 +3795,49 @@ class LLMProviderManager:
         
         return stats
     
+    def get_router_status(self) -> dict:
+        """
+        Get provider routing state.
+        
+        Returns:
+            dict with per-route and per-provider circuit state, error rate
+            and latency percentiles
+        """
+        return self._router.get_status()
+    
+    def _get_response_cache_stats(self) -> dict:
+        from .response_cache import get_response_cache
+        return get_response_cache().get_stats()
+    
+    def _get_streaming_stats(self) -> dict:
+        """Stream counters plus time-to-first-token and throughput of recent streams."""
+        history = list(self._stream_history)
+        ttfts = [m.ttft_ms for m in history if m.ttft_ms is not None]
+        rates = [m.tokens_per_second for m in history if m.tokens_per_second is not None]
+        
+        def pct(values: list, p: float) -> Optional[float]:
+            value = window_percentile(values, p)
+            return round(value, 1) if value is not None else None
+        
+        return {
+            **self._stream_counts,
+            "first_token_timeout": self._streaming.first_token_timeout,
+            "stall_timeout": self._streaming.stall_timeout,
+            "ttft_ms_p50": pct(ttfts, 50),
+            "ttft_ms_p95": pct(ttfts, 95),
+            "avg_tokens_per_second": round(sum(rates) / len(rates), 1) if rates else None,
+            "max_gap_seconds": round(max((m.max_gap for m in history), default=0.0), 3),
+            "recent": [m.to_dict() for m in history[-5:]],
+        }
+    
+    def _get_generation_stats(self) -> dict:
+        """Generation mode configuration and per-mode counters."""
+        return {
+            "mode": self._hedging.mode.value,
+            "extra_budget_credits": round(self._extra_budget.credits, 2),
+            "by_mode": {name: stats.to_dict() for name, stats in self._mode_stats.items()},
+        }
+    
     def get_llm_provider_function(self) -> Optional[Callable]:
         """
         Get a callable function for AgentLoop compatibility.
@@ -2517,16 +3851,54 @@ class LLMProviderManager:
         
         return provider_func
     
+    def get_llm_stream_function(self) -> Optional[Callable]:
+        """
+        Get a streaming counterpart of get_llm_provider_function().
+        Returns an async generator function yielding text chunks.
+        """
+        if not self._default_provider:
+            return None
+        
+        def stream_func(conversation: list[dict]):
+            return self.generate_stream(conversation)
+        
+        return stream_func
+    
+    def get_llm_stream_function_for_user(self, user_id: str) -> Optional[Callable]:
+        """
+        Get a streaming function for a specific user's model selection.
+        """
+        if not self._default_provider and user_id not in self._user_selections:
+            return None
+        
+        def stream_func(conversation: list[dict]):
+            return self.generate_stream_for_user(user_id, conversation)
+        
+        return stream_func
+    
+    # Sent to a backup provider that takes over a stream mid-answer
+    STREAM_CONTINUE_PROMPT = (
+        "Your previous reply was cut off. Continue it exactly where it stopped, "
+        "without repeating any text already written and without commentary."
+    )
+    
     async def generate_stream(
         self,
         messages: list[dict],
         provider: Optional[str] = None,
         model: Optional[str] = None,
+        enable_failover: bool = True,
         **kwargs
     ):
         """
         Generate a streaming response.
         
+        Each provider stream is watched for stalls (no first token within
+        LLM_STREAM_FIRST_TOKEN_TIMEOUT, or silence longer than
+        LLM_STREAM_STALL_TIMEOUT afterwards). A stream that stalls or errors
+        fails over to the next candidate; if text was already emitted the
+        backup is asked to continue from it, so callers see one answer.
+        
         Yields:
             str: Text chunks as they arrive
         """
@@ -2538,8 +3910,83 @@ class LLMProviderManager:
         if not model and self._default_model:
             model = self._default_model
         
-        async for chunk in llm_provider.generate_stream(messages, model=model, **kwargs):
-            yield chunk
+        candidates = self._failover_candidates(llm_provider, model, enable_failover, stream=True)
+        input_chars = len(str(messages))
+        emitted: list[str] = []
+        errors = []
+        
+        for index, (candidate, candidate_model) in enumerate(candidates):
+            name = candidate.provider_type.value
+            failover = index > 0
+            
+            if emitted and not self._streaming.midstream_failover:
+                break
+            if not self._router.acquire(name, candidate_model):
+                errors.append(f"{name}: circuit open")
+                continue
+            
+            attempt_messages = messages
+            if emitted:
+                attempt_messages = messages + [
+                    {"role": "assistant", "content": "".join(emitted)},
+                    {"role": "user", "content": self.STREAM_CONTINUE_PROMPT},
+                ]
+                self._stream_counts["midstream_failovers"] += 1
+                logger.info(f"Resuming interrupted stream on {name}")
+            elif failover:
+                logger.info(f"Failing over to {name}")
+            if failover:
+                self._stream_counts["failovers"] += 1
+            
+            self._stream_counts["streams"] += 1
+            metrics = StreamMetrics(name, candidate_model, resumed=bool(emitted))
+            stream = watch_stream(
+                candidate.generate_stream(attempt_messages, model=candidate_model, **kwargs),
+                metrics,
+                self._streaming.first_token_timeout,
+                self._streaming.stall_timeout,
+            )
+            
+            try:
+                async with aclosing(stream):
+                    async for chunk in stream:
+                        emitted.append(chunk)
+                        yield chunk
+            except Exception as e:
+                metrics.finish(e)
+                self._stream_history.append(metrics)
+                self._stream_counts["failed"] += 1
+                if metrics.stalled:
+                    self._stream_counts["stalls"] += 1
+                errors.append(f"{name}: {e}")
+                role = "Failover" if failover else "Primary"
+                logger.warning(f"{role} stream from {name} failed after {metrics.chars} chars: {e}")
+                self._track_usage(
+                    name, candidate_model, input_chars, metrics.chars,
+                    metrics.finished_at - metrics.started_at, False, failover=failover, mode="stream",
+                )
+                continue
+            except BaseException:
+                # Consumer stopped reading or was cancelled: not the provider's fault
+                metrics.finish()
+                self._stream_history.append(metrics)
+                self._router.release(name, candidate_model)
+                raise
+            
+            metrics.finish()
+            self._stream_history.append(metrics)
+            # Rank streams by time to first chunk, not by how long the answer is
+            ttft = metrics.ttft_ms
+            self._track_usage(
+                name, candidate_model, input_chars, metrics.chars,
+                metrics.finished_at - metrics.started_at, True, failover=failover, mode="stream",
+                ttft=ttft / 1000 if ttft is not None else None,
+            )
+            logger.debug(f"Stream {name}: {metrics.to_dict()}")
+            return
+        
+        # All providers failed
+        raise ValueError(f"All LLM providers failed:\n" + "\n".join(errors))
     
     async def generate_stream_for_user(
         self,
@@ -2583,6 +4030,12 @@ def get_llm_manager() -> LLMProviderManager:
 def reset_llm_manager() -> None:
     """Reset the LLM manager (useful after config changes)."""
     global _llm_manager
+    if _llm_manager is not None:
+        # Release pooled connections in the background if a loop is running
+        try:
+            asyncio.get_running_loop().create_task(_llm_manager.aclose())
+        except RuntimeError:
+            pass
     _llm_manager = None
 
 
@@ -2590,6 +4043,20 @@ __all__ = [
     "ProviderType",
     "ModelInfo",
     "ProviderConfig",
+    "HTTPPoolConfig",
+    "HTTPClientPool",
+    "GenerationMode",
+    "HedgingConfig",
+    "CircuitState",
+    "RouterConfig",
+    "ProviderRouter",
+    "SSEEvent",
+    "SSEDecoder",
+    "NDJSONDecoder",
+    "StreamingConfig",
+    "StreamMetrics",
+    "StreamStallError",
+    "watch_stream",
     "LLMProvider",
     "OpenAIProvider",
     "GoogleProvider",
@@ -39,6 +39,8 @@ class TaskTemplate:
     output_format: Optional[str] = None
     max_tokens: int = 1000
     temperature: float = 0.7
+    # Response cache tier: "off", "exact" or "semantic"
+    cache: str = "off"
     
     def render_prompt(self, **kwargs) -> str:
         """Render the user prompt with variables."""
@@ -80,6 +82,7 @@ BUILTIN_TEMPLATES = {
         user_prompt_template="Please summarize the following text:\n\n{text}\n\nProvide a summary in {length} sentences.",
         max_tokens=500,
         temperature=0.3,
+        cache="exact",
     ),
     "translate": TaskTemplate(
         name="translate",
@@ -88,6 +91,7 @@ BUILTIN_TEMPLATES = {
         user_prompt_template="Translate the following text to {target_language}:\n\n{text}",
         max_tokens=2000,
         temperature=0.2,
+        cache="exact",
     ),
     "analyze_code": TaskTemplate(
         name="analyze_code",
@@ -96,6 +100,7 @@ BUILTIN_TEMPLATES = {
         user_prompt_template="Analyze the following {language} code:\n\n```{language}\n{code}\n```\n\nProvide:\n1. Code quality assessment\n2. Potential bugs\n3. Improvement suggestions",
         max_tokens=1500,
         temperature=0.5,
+        cache="exact",
     ),
     "extract_entities": TaskTemplate(
         name="extract_entities",
@@ -105,6 +110,7 @@ BUILTIN_TEMPLATES = {
         output_format="json",
         max_tokens=1000,
         temperature=0.1,
+        cache="exact",
     ),
     "generate_docstring": TaskTemplate(
         name="generate_docstring",
@@ -113,6 +119,7 @@ BUILTIN_TEMPLATES = {
         user_prompt_template="Generate a docstring for the following {language} function:\n\n```{language}\n{code}\n```\n\nUse {style} style.",
         max_tokens=500,
         temperature=0.3,
+        cache="exact",
     ),
     "rewrite": TaskTemplate(
         name="rewrite",
@@ -129,6 +136,7 @@ BUILTIN_TEMPLATES = {
         user_prompt_template="Explain {topic} in simple terms. Target audience: {audience}.",
         max_tokens=1500,
         temperature=0.5,
+        cache="exact",
     ),
 }
 
@@ -212,6 +220,7 @@ class LLMTaskManager:
                 user_id=user_id,
                 max_tokens=template.max_tokens,
                 temperature=template.temperature,
+                cache=template.cache,
             )
             
             execution_time = (datetime.now() - start_time).total_seconds()
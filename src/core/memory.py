@@ -9,11 +9,13 @@ Provides persistent memory storage for:
 - Custom facts/knowledge
 """
 
+import asyncio
 import json
 import os
+from contextlib import asynccontextmanager
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Optional
+from typing import Any, AsyncIterator, Optional
 
 import aiosqlite
 
@@ -23,6 +25,247 @@ from ..utils.logger import logger
 DATA_DIR = Path("data")
 MEMORY_DB = DATA_DIR / "memory.db"
 
+# Full-text indexes over memories and conversation history. External
+# content tables store only the index; triggers keep them in sync. The
+# trigram tokenizer matches substrings, which also covers CJK text that
+# has no word separators.
+FTS_SCHEMA = (
+    """CREATE VIRTUAL TABLE IF NOT EXISTS memories_fts USING fts5(
+        key, value, content='memories', content_rowid='id', tokenize='trigram'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS memories_fts_ai AFTER INSERT ON memories BEGIN
+        INSERT INTO memories_fts(rowid, key, value) VALUES (new.id, new.key, new.value);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS memories_fts_ad AFTER DELETE ON memories BEGIN
+        INSERT INTO memories_fts(memories_fts, rowid, key, value)
+        VALUES ('delete', old.id, old.key, old.value);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS memories_fts_au AFTER UPDATE ON memories BEGIN
+        INSERT INTO memories_fts(memories_fts, rowid, key, value)
+        VALUES ('delete', old.id, old.key, old.value);
+        INSERT INTO memories_fts(rowid, key, value) VALUES (new.id, new.key, new.value);
+    END""",
+    """CREATE VIRTUAL TABLE IF NOT EXISTS conversation_fts USING fts5(
+        content, content='conversation_history', content_rowid='id', tokenize='trigram'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS conversation_fts_ai AFTER INSERT ON conversation_history BEGIN
+        INSERT INTO conversation_fts(rowid, content) VALUES (new.id, new.content);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS conversation_fts_ad AFTER DELETE ON conversation_history BEGIN
+        INSERT INTO conversation_fts(conversation_fts, rowid, content)
+        VALUES ('delete', old.id, old.content);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS conversation_fts_au AFTER UPDATE ON conversation_history BEGIN
+        INSERT INTO conversation_fts(conversation_fts, rowid, content)
+        VALUES ('delete', old.id, old.content);
+        INSERT INTO conversation_fts(rowid, content) VALUES (new.id, new.content);
+    END""",
+)
+
+
+def build_fts_query(query: str, fuzzy: bool = False) -> tuple[str, list[str]]:
+    """
+    Turn user input into an FTS5 MATCH expression.
+
+    Each whitespace-separated term is matched as a quoted substring and
+    all terms must be present. In fuzzy mode terms are split into their
+    trigrams and any of them may match, so BM25 ranks rows by how many
+    trigrams they share with the query; this tolerates typos and partial
+    words.
+
+    Terms shorter than three characters cannot use the trigram index and
+    are returned separately to be filtered with LIKE.
+
+    Returns:
+        (MATCH expression or "", short terms)
+    """
+    terms = query.split()
+    long_terms = [t for t in terms if len(t) >= 3]
+    short_terms = [t for t in terms if len(t) < 3]
+
+    if fuzzy:
+        grams = {t[i:i + 3] for t in long_terms for i in range(len(t) - 2)}
+        phrases = ['"' + g.replace('"', '""') + '"' for g in sorted(grams)]
+        return " OR ".join(phrases), short_terms
+
+    phrases = ['"' + t.replace('"', '""') + '"' for t in long_terms]
+    return " AND ".join(phrases), short_terms
+
+
+def make_snippet(
+    text: str,
+    query: str,
+    fuzzy: bool = False,
+    highlight: tuple[str, str] = ("[", "]"),
+    width: int = 80,
+) -> str:
+    """
+    Excerpt of text around the query matches, with matches highlighted.
+
+    Overlapping matches (common with fuzzy trigrams) are merged into one
+    highlighted span.
+    """
+    terms = query.split()
+    if fuzzy:
+        terms = [t[i:i + 3] for t in terms for i in range(max(1, len(t) - 2))]
+
+    lowered = text.lower()
+    spans = []
+    for term in {t.lower() for t in terms if t}:
+        start = lowered.find(term)
+        while start != -1:
+            spans.append((start, start + len(term)))
+            start = lowered.find(term, start + 1)
+    if not spans:
+        return text[:width] + ("…" if len(text) > width else "")
+
+    merged = []
+    for start, end in sorted(spans):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+
+    # Window starting a little before the first match
+    window_start = max(0, merged[0][0] - width // 4)
+    window_end = min(len(text), window_start + width)
+
+    parts = ["…" if window_start > 0 else ""]
+    position = window_start
+    for start, end in merged:
+        if start >= window_end:
+            break
+        end = min(end, window_end)
+        parts.extend([text[position:start], highlight[0], text[start:end], highlight[1]])
+        position = end
+    parts.append(text[position:window_end])
+    if window_end < len(text):
+        parts.append("…")
+    return "".join(parts)
+
+
+def _escape_like(term: str) -> str:
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+class SQLitePool:
+    """
+    Long-lived aiosqlite connections for one database file.
+
+    SQLite serializes writers, so there is a single writer connection
+    guarded by a lock, plus a small pool of reader connections. WAL mode
+    lets readers proceed while a write is in progress.
+
+    Connections belong to the event loop that opened them; if the pool is
+    used from a different loop it transparently reconnects.
+    """
+
+    PRAGMAS = (
+        "PRAGMA journal_mode=WAL",
+        "PRAGMA synchronous=NORMAL",
+        "PRAGMA temp_store=MEMORY",
+        "PRAGMA cache_size=-16000",
+        "PRAGMA mmap_size=268435456",
+        "PRAGMA busy_timeout=5000",
+    )
+
+    def __init__(self, db_path: Path, readers: int = 4):
+        self.db_path = db_path
+        self.readers = readers
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._writer: Optional[aiosqlite.Connection] = None
+        self._write_lock: Optional[asyncio.Lock] = None
+        self._idle_readers: Optional[asyncio.Queue] = None
+        self._all_readers: list[aiosqlite.Connection] = []
+        self._opening = 0
+        self._open_lock: Optional[asyncio.Lock] = None
+
+    async def _connect(self) -> aiosqlite.Connection:
+        db = await aiosqlite.connect(self.db_path)
+        db.row_factory = aiosqlite.Row
+        for pragma in self.PRAGMAS:
+            await db.execute(pragma)
+        return db
+
+    async def _ensure_open(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self._writer is not None:
+            return
+
+        if self._loop is not loop:
+            stale = self._detach()
+            self._loop = loop
+            self._open_lock = asyncio.Lock()
+            await self._close_all(stale)
+
+        async with self._open_lock:
+            if self._writer is not None:
+                return
+            self._writer = await self._connect()
+            self._write_lock = asyncio.Lock()
+            self._idle_readers = asyncio.Queue()
+            self._all_readers = []
+
+    def _detach(self) -> list[aiosqlite.Connection]:
+        """Forget all connections and return them for closing."""
+        connections = [db for db in [self._writer, *self._all_readers] if db is not None]
+        self._writer = None
+        self._all_readers = []
+        self._idle_readers = None
+        return connections
+
+    @staticmethod
+    async def _close_all(connections: list[aiosqlite.Connection]) -> None:
+        """
+        Close connections and stop their worker threads.
+
+        Each aiosqlite connection runs its own thread and answers on the
+        loop of whoever awaits it, so connections opened on another (possibly
+        closed) loop can still be closed from the current one.
+        """
+        for db in connections:
+            try:
+                await db.close()
+            except Exception as e:
+                logger.warning(f"Error closing SQLite connection: {e}")
+
+    @asynccontextmanager
+    async def read(self):
+        """Borrow a reader connection."""
+        await self._ensure_open()
+        if self._idle_readers.empty() and self._opening + len(self._all_readers) < self.readers:
+            self._opening += 1
+            try:
+                db = await self._connect()
+            finally:
+                self._opening -= 1
+            self._all_readers.append(db)
+        else:
+            db = await self._idle_readers.get()
+        try:
+            yield db
+        finally:
+            # Not returned if the pool was closed or moved loops meanwhile
+            if self._idle_readers is not None and db in self._all_readers:
+                self._idle_readers.put_nowait(db)
+
+    @asynccontextmanager
+    async def write(self):
+        """Hold the writer connection for one transaction (committed on exit)."""
+        await self._ensure_open()
+        async with self._write_lock:
+            try:
+                yield self._writer
+                await self._writer.commit()
+            except BaseException:
+                await self._writer.rollback()
+                raise
+
+    async def close(self) -> None:
+        """Close all connections."""
+        await self._close_all(self._detach())
+        self._loop = None
+
 
 class MemoryManager:
     """
@@ -35,9 +278,15 @@ class MemoryManager:
     - Task statistics
     """
 
-    def __init__(self, db_path: Optional[Path] = None):
+    def __init__(self, db_path: Optional[Path] = None, readers: int = 4, batch_size: int = 256):
         self.db_path = db_path or MEMORY_DB
         self._initialized = False
+        self._pool = SQLitePool(self.db_path, readers=readers)
+        self._fts_enabled = False
+        # add_message write coalescing
+        self.batch_size = batch_size
+        self._pending_messages: list[tuple[tuple, asyncio.Future]] = []
+        self._flush_task: Optional[asyncio.Task] = None
 
     async def initialize(self) -> None:
         """Initialize the database schema."""
@@ -47,7 +296,7 @@ class MemoryManager:
         # Ensure data directory exists
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
 
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self._pool.write() as db:
             # User preferences table
             await db.execute("""
                 CREATE TABLE IF NOT EXISTS user_preferences (
@@ -102,11 +351,46 @@ class MemoryManager:
                 )
             """)
 
-            await db.commit()
+            # History lookups and deletes filter on (user_id, chat_id) and
+            # order by created_at; this index serves both without a scan
+            await db.execute("""
+                CREATE INDEX IF NOT EXISTS idx_conversation_history_chat
+                ON conversation_history (user_id, chat_id, created_at)
+            """)
+
+            # list_memories orders a user's memories by importance then age
+            await db.execute("""
+                CREATE INDEX IF NOT EXISTS idx_memories_user_rank
+                ON memories (user_id, importance DESC, created_at DESC)
+            """)
+
+            await self._create_fts(db)
 
         self._initialized = True
         logger.info("Memory system initialized")
 
+    async def _create_fts(self, db: aiosqlite.Connection) -> None:
+        """Create the full-text indexes, backfilling them for existing databases."""
+        cursor = await db.execute(
+            "SELECT name FROM sqlite_master WHERE name IN ('memories_fts', 'conversation_fts')"
+        )
+        existing = {row[0] for row in await cursor.fetchall()}
+
+        try:
+            for statement in FTS_SCHEMA:
+                await db.execute(statement)
+        except aiosqlite.OperationalError as e:
+            # SQLite built without FTS5 or older than 3.34 (trigram tokenizer)
+            logger.warning(f"Full-text search unavailable, using LIKE search: {e}")
+            return
+
+        for table in ("memories_fts", "conversation_fts"):
+            if table not in existing:
+                await db.execute(f"INSERT INTO {table}({table}) VALUES ('rebuild')")
+                logger.info(f"Built full-text index {table}")
+
+        self._fts_enabled = True
+
     # ============================================
     # User Preferences
     # ============================================
@@ -115,8 +399,7 @@ class MemoryManager:
         """Get user preferences."""
         await self.initialize()
 
-        async with aiosqlite.connect(self.db_path) as db:
-            db.row_factory = aiosqlite.Row
+        async with self._pool.read() as db:
             cursor = await db.execute(
                 "SELECT * FROM user_preferences WHERE user_id = ?",
                 (user_id,)
@@ -145,7 +428,7 @@ class MemoryManager:
 
         now = datetime.now().isoformat()
 
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self._pool.write() as db:
             # Check if user exists
             cursor = await db.execute(
                 "SELECT user_id FROM user_preferences WHERE user_id = ?",
@@ -170,8 +453,6 @@ class MemoryManager:
                     (value, user_id)
                 )
 
-            await db.commit()
-
     async def get_default_repo(self, user_id: int) -> str:
         """Get user's default repository."""
         prefs = await self.get_user_preferences(user_id)
@@ -213,14 +494,21 @@ class MemoryManager:
         now = datetime.now().isoformat()
         expires = expires_at.isoformat() if expires_at else None
 
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self._pool.write() as db:
+            # Upsert rather than INSERT OR REPLACE: REPLACE deletes without
+            # firing delete triggers, which would leave stale index entries
             await db.execute(
-                """INSERT OR REPLACE INTO memories 
+                """INSERT INTO memories 
                    (user_id, key, value, category, importance, created_at, expires_at)
-                   VALUES (?, ?, ?, ?, ?, ?, ?)""",
+                   VALUES (?, ?, ?, ?, ?, ?, ?)
+                   ON CONFLICT(user_id, key) DO UPDATE SET
+                       value = excluded.value,
+                       category = excluded.category,
+                       importance = excluded.importance,
+                       created_at = excluded.created_at,
+                       expires_at = excluded.expires_at""",
                 (user_id, key, value, category, importance, now, expires)
             )
-            await db.commit()
 
         logger.debug(f"Remembered [{key}] for user {user_id}")
 
@@ -243,7 +531,7 @@ class MemoryManager:
         """
         await self.initialize()
 
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self._pool.read() as db:
             cursor = await db.execute(
                 """SELECT value FROM memories 
                    WHERE user_id = ? AND key = ?
@@ -270,12 +558,11 @@ class MemoryManager:
         """
         await self.initialize()
 
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self._pool.write() as db:
             cursor = await db.execute(
                 "DELETE FROM memories WHERE user_id = ? AND key = ?",
                 (user_id, key)
             )
-            await db.commit()
             return cursor.rowcount > 0
 
     async def list_memories(
@@ -287,9 +574,7 @@ class MemoryManager:
         """List all memories for a user."""
         await self.initialize()
 
-        async with aiosqlite.connect(self.db_path) as db:
-            db.row_factory = aiosqlite.Row
-
+        async with self._pool.read() as db:
             if category:
                 cursor = await db.execute(
                     """SELECT key, value, category, importance, created_at 
@@ -312,13 +597,64 @@ class MemoryManager:
         self,
         user_id: int,
         query: str,
-        limit: int = 10
+        limit: int = 10,
+        fuzzy: bool = False,
+        highlight: tuple[str, str] = ("[", "]"),
     ) -> list[dict]:
-        """Search memories by key or value."""
+        """
+        Search memories by key or value.
+
+        Results are ranked by BM25 (key matches weigh double) and carry a
+        snippet of the value with matches wrapped in the highlight markers.
+
+        Args:
+            user_id: User ID
+            query: Search terms; all must appear unless fuzzy
+            limit: Maximum results
+            fuzzy: Match on shared trigrams, tolerating typos and partial words
+            highlight: (start, end) markers around matches in the snippet
+        """
         await self.initialize()
 
-        async with aiosqlite.connect(self.db_path) as db:
-            db.row_factory = aiosqlite.Row
+        if not self._fts_enabled:
+            return await self._like_search_memories(user_id, query, limit)
+
+        match, short_terms = build_fts_query(query, fuzzy)
+        if not match and not short_terms:
+            return []
+
+        conditions = ["m.user_id = ?"]
+        params: list[Any] = [user_id]
+        if match:
+            conditions.append("memories_fts MATCH ?")
+            params.append(match)
+        for term in short_terms:
+            conditions.append("(f.key LIKE ? ESCAPE '\\' OR f.value LIKE ? ESCAPE '\\')")
+            params.extend([f"%{_escape_like(term)}%"] * 2)
+        params.append(limit)
+
+        async with self._pool.read() as db:
+            cursor = await db.execute(
+                f"""SELECT m.key, m.value, m.category, m.importance, m.created_at,
+                       {"bm25(memories_fts, 2.0, 1.0)" if match else "0.0"} AS rank
+                   FROM memories_fts f JOIN memories m ON m.id = f.rowid
+                   WHERE {" AND ".join(conditions)}
+                   ORDER BY rank, m.importance DESC LIMIT ?""",
+                params
+            )
+            rows = await cursor.fetchall()
+
+        results = []
+        for row in rows:
+            item = dict(row)
+            item["score"] = round(0.0 - item.pop("rank"), 4)
+            item["snippet"] = make_snippet(item["value"], query, fuzzy, highlight)
+            results.append(item)
+        return results
+
+    async def _like_search_memories(self, user_id: int, query: str, limit: int) -> list[dict]:
+        """Substring search without a full-text index."""
+        async with self._pool.read() as db:
             cursor = await db.execute(
                 """SELECT key, value, category, importance, created_at 
                    FROM memories WHERE user_id = ? 
@@ -327,7 +663,10 @@ class MemoryManager:
                 (user_id, f"%{query}%", f"%{query}%", limit)
             )
             rows = await cursor.fetchall()
-            return [dict(row) for row in rows]
+            return [
+                {**dict(row), "snippet": make_snippet(row["value"], query), "score": 0.0}
+                for row in rows
+            ]
 
     # ============================================
     # Conversation History
@@ -347,14 +686,40 @@ class MemoryManager:
         now = datetime.now().isoformat()
         meta_json = json.dumps(metadata) if metadata else None
 
-        async with aiosqlite.connect(self.db_path) as db:
-            await db.execute(
-                """INSERT INTO conversation_history 
-                   (user_id, chat_id, role, content, metadata, created_at)
-                   VALUES (?, ?, ?, ?, ?, ?)""",
-                (user_id, chat_id, role, content, meta_json, now)
-            )
-            await db.commit()
+        # Concurrent calls are coalesced into one transaction; each caller
+        # still returns only after its row is committed
+        future = asyncio.get_running_loop().create_future()
+        self._pending_messages.append(((user_id, chat_id, role, content, meta_json, now), future))
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_messages())
+        await future
+
+    async def _flush_messages(self) -> None:
+        """Write queued add_message rows in batched transactions."""
+        # Yield once so messages added in the same loop iteration join the batch
+        await asyncio.sleep(0)
+
+        while self._pending_messages:
+            batch = self._pending_messages[:self.batch_size]
+            del self._pending_messages[:self.batch_size]
+
+            try:
+                async with self._pool.write() as db:
+                    await db.executemany(
+                        """INSERT INTO conversation_history 
+                           (user_id, chat_id, role, content, metadata, created_at)
+                           VALUES (?, ?, ?, ?, ?, ?)""",
+                        [row for row, _ in batch]
+                    )
+            except Exception as e:
+                logger.error(f"Failed to write {len(batch)} history messages: {e}")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+            else:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_result(None)
 
     async def get_conversation_history(
         self,
@@ -365,18 +730,142 @@ class MemoryManager:
         """Get recent conversation history."""
         await self.initialize()
 
-        async with aiosqlite.connect(self.db_path) as db:
-            db.row_factory = aiosqlite.Row
+        async with self._pool.read() as db:
             cursor = await db.execute(
                 """SELECT role, content, metadata, created_at 
                    FROM conversation_history 
                    WHERE user_id = ? AND chat_id = ?
-                   ORDER BY created_at DESC LIMIT ?""",
+                   ORDER BY created_at DESC, id DESC LIMIT ?""",
                 (user_id, chat_id, limit)
             )
             rows = await cursor.fetchall()
             return [dict(row) for row in reversed(rows)]
 
+    async def iter_conversation_history(
+        self,
+        user_id: int,
+        chat_id: Optional[int] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        page_size: int = 500,
+    ) -> AsyncIterator[dict]:
+        """
+        Yield a user's history oldest first, one page at a time.
+
+        Pages are fetched by keyset on (created_at, id), so memory use is
+        bounded by page_size however long the history is.
+        """
+        await self.initialize()
+
+        where = ["user_id = ?"]
+        params: list = [user_id]
+        if chat_id is not None:
+            where.append("chat_id = ?")
+            params.append(chat_id)
+        if start is not None:
+            where.append("created_at >= ?")
+            params.append(start.isoformat())
+        if end is not None:
+            where.append("created_at <= ?")
+            params.append(end.isoformat())
+
+        last: Optional[tuple] = None
+        while True:
+            clauses = list(where)
+            page_params = list(params)
+            if last is not None:
+                clauses.append("(created_at > ? OR (created_at = ? AND id > ?))")
+                page_params.extend([last[0], last[0], last[1]])
+
+            async with self._pool.read() as db:
+                cursor = await db.execute(
+                    f"""SELECT id, chat_id, role, content, metadata, created_at
+                        FROM conversation_history
+                        WHERE {' AND '.join(clauses)}
+                        ORDER BY created_at, id LIMIT ?""",
+                    (*page_params, page_size)
+                )
+                rows = await cursor.fetchall()
+
+            for row in rows:
+                yield dict(row)
+            if len(rows) < page_size:
+                return
+            last = (rows[-1]["created_at"], rows[-1]["id"])
+
+    async def search_history(
+        self,
+        user_id: int,
+        query: str,
+        chat_id: Optional[int] = None,
+        limit: int = 10,
+        fuzzy: bool = False,
+        highlight: tuple[str, str] = ("[", "]"),
+    ) -> list[dict]:
+        """
+        Search a user's conversation history, ranked by BM25.
+
+        Args:
+            user_id: User ID
+            query: Search terms; all must appear unless fuzzy
+            chat_id: Restrict to one chat
+            limit: Maximum results
+            fuzzy: Match on shared trigrams, tolerating typos and partial words
+            highlight: (start, end) markers around matches in the snippet
+        """
+        await self.initialize()
+
+        # Wait for queued writes so just-sent messages are searchable
+        if self._flush_task is not None and not self._flush_task.done():
+            await asyncio.shield(self._flush_task)
+
+        if self._fts_enabled:
+            match, short_terms = build_fts_query(query, fuzzy)
+        else:
+            match, short_terms = "", query.split()
+        if not match and not short_terms:
+            return []
+
+        conditions = ["h.user_id = ?"]
+        params: list[Any] = [user_id]
+        if chat_id is not None:
+            conditions.append("h.chat_id = ?")
+            params.append(chat_id)
+        if match:
+            conditions.append("conversation_fts MATCH ?")
+            params.append(match)
+        for term in short_terms:
+            conditions.append("h.content LIKE ? ESCAPE '\\'")
+            params.append(f"%{_escape_like(term)}%")
+        params.append(limit)
+
+        if match:
+            select = "bm25(conversation_fts) AS rank"
+            source = "conversation_fts JOIN conversation_history h ON h.id = conversation_fts.rowid"
+            order = "rank, h.created_at DESC"
+        else:
+            select = "0.0 AS rank"
+            source = "conversation_history h"
+            order = "h.created_at DESC"
+
+        async with self._pool.read() as db:
+            cursor = await db.execute(
+                f"""SELECT h.chat_id, h.role, h.content, h.created_at, {select}
+                   FROM {source}
+                   WHERE {" AND ".join(conditions)}
+                   ORDER BY {order} LIMIT ?""",
+                params
+            )
+            rows = await cursor.fetchall()
+
+        results = []
+        for row in rows:
+            item = dict(row)
+            item["score"] = round(0.0 - item.pop("rank"), 4)
+            item["snippet"] = make_snippet(item["content"], query, fuzzy, highlight)
+            results.append(item)
+        return results
+
     async def clear_conversation_history(
         self,
         user_id: int,
@@ -385,12 +874,11 @@ class MemoryManager:
         """Clear conversation history for a chat."""
         await self.initialize()
 
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self._pool.write() as db:
             cursor = await db.execute(
                 "DELETE FROM conversation_history WHERE user_id = ? AND chat_id = ?",
                 (user_id, chat_id)
             )
-            await db.commit()
             return cursor.rowcount
 
     # ============================================
@@ -408,7 +896,7 @@ class MemoryManager:
 
         now = datetime.now().isoformat()
 
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self._pool.write() as db:
             # Check if user stats exist
             cursor = await db.execute(
                 "SELECT user_id FROM task_stats WHERE user_id = ?",
@@ -445,14 +933,11 @@ class MemoryManager:
                     (user_id, 1 if success else 0, 0 if success else 1, tokens_used, now)
                 )
 
-            await db.commit()
-
     async def get_task_stats(self, user_id: int) -> dict:
         """Get task statistics for a user."""
         await self.initialize()
 
-        async with aiosqlite.connect(self.db_path) as db:
-            db.row_factory = aiosqlite.Row
+        async with self._pool.read() as db:
             cursor = await db.execute(
                 "SELECT * FROM task_stats WHERE user_id = ?",
                 (user_id,)
@@ -469,6 +954,12 @@ class MemoryManager:
                 "last_task_at": None,
             }
 
+    async def close(self) -> None:
+        """Flush queued messages and close pooled connections."""
+        if self._flush_task is not None and not self._flush_task.done():
+            await self._flush_task
+        await self._pool.close()
+
 
 # Global instance
 _memory_manager: Optional[MemoryManager] = None
@@ -482,4 +973,4 @@ def get_memory_manager() -> MemoryManager:
     return _memory_manager
 
 
-__all__ = ["MemoryManager", "get_memory_manager"]
+__all__ = ["MemoryManager", "SQLitePool", "build_fts_query", "make_snippet", "get_memory_manager"]
@@ -0,0 +1,464 @@
+"""
+Process Pool Lane for CursorBot
+
+Threads give CPU-bound Python no parallelism under the GIL, so work such
+as PDF text extraction or parsing a source tree runs in a pool of warm
+worker processes instead.
+
+Provides:
+- Worker processes kept alive between tasks
+- Picklable call descriptors (functions are sent as "module:qualname")
+- Per-task time and memory limits, enforced inside the worker
+- Streaming of generator results back to the caller as they are produced
+
+Usage:
+    from src.core.process_pool import get_process_lane
+
+    lane = get_process_lane()
+    docs = await lane.run(parse_modules, paths, time_limit=60)
+
+    # Generators stream each yielded chunk to on_chunk
+    total = await lane.run(render_pages, path, on_chunk=send_page)
+"""
+
+import asyncio
+import importlib
+import inspect
+import itertools
+import multiprocessing
+import os
+import pickle
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional, Union
+
+from ..utils.logger import logger
+
+
+class ProcessTimeoutError(TimeoutError):
+    """A task ran past its time limit in a worker process."""
+
+
+@dataclass
+class ProcessLaneConfig:
+    """Configuration for the process pool lane."""
+    workers: int = field(default_factory=lambda: min(4, os.cpu_count() or 1))  # 0 = run in threads
+    warm: bool = False  # Start every worker up front instead of on first use
+    time_limit: Optional[float] = 300.0  # Default per-task wall-clock limit (seconds)
+    memory_limit_mb: int = 0  # Default per-task address space allowance (0 = none)
+    start_method: str = "spawn"  # fork is unsafe with the bot's background threads
+    kill_grace: float = 5.0  # Extra seconds before an unresponsive pool is replaced
+
+    @classmethod
+    def from_env(cls) -> "ProcessLaneConfig":
+        defaults = cls()
+        return cls(
+            workers=int(os.getenv("PROCESS_POOL_WORKERS", str(defaults.workers))),
+            warm=os.getenv("PROCESS_POOL_WARM", "false").lower() == "true",
+            time_limit=float(os.getenv("PROCESS_TASK_TIME_LIMIT", "300")) or None,
+            memory_limit_mb=int(os.getenv("PROCESS_TASK_MEMORY_MB", "0")),
+        )
+
+
+@dataclass
+class ProcessCall:
+    """Picklable description of one call to run in a worker."""
+    target: str  # "package.module:qualified.name"
+    args: tuple = ()
+    kwargs: dict = field(default_factory=dict)
+    time_limit: Optional[float] = None
+    memory_limit_mb: int = 0
+    stream_id: Optional[int] = None  # Set when the caller wants generator chunks
+
+
+def callable_path(func: Union[Callable, str]) -> str:
+    """Return the "module:qualname" a worker process can import func by."""
+    if isinstance(func, str):
+        return func
+    qualname = getattr(func, "__qualname__", "")
+    module = getattr(func, "__module__", None)
+    if not module or not qualname or "<" in qualname:
+        raise ValueError(
+            f"{func!r} cannot run in a worker process; use a module-level function"
+        )
+    return f"{module}:{qualname}"
+
+
+# ============================================
+# Worker Side
+# ============================================
+
+_stream_queue = None
+
+
+def _init_worker(stream_queue) -> None:
+    global _stream_queue
+    _stream_queue = stream_queue
+
+
+def _ping(delay: float) -> int:
+    import time
+    time.sleep(delay)
+    return os.getpid()
+
+
+def _resolve(target: str) -> Callable:
+    module_name, _, qualname = target.partition(":")
+    obj: Any = importlib.import_module(module_name)
+    for part in qualname.split("."):
+        obj = getattr(obj, part)
+    return obj
+
+
+def _address_space_bytes() -> Optional[int]:
+    """Current virtual memory size, where the platform exposes it."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[0]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def _execute_call(call: ProcessCall) -> Any:
+    """Run a ProcessCall inside a worker, applying its limits."""
+    import signal
+
+    restore_memory = None
+    if call.memory_limit_mb:
+        try:
+            import resource
+            current = _address_space_bytes()
+            if current is not None:
+                # The allowance is on top of what the warm worker already maps
+                soft, hard = resource.getrlimit(resource.RLIMIT_AS)
+                limit = current + call.memory_limit_mb * 1024 * 1024
+                if hard != resource.RLIM_INFINITY:
+                    limit = min(limit, hard)
+                resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+                restore_memory = (soft, hard)
+        except (ImportError, ValueError, OSError):
+            pass
+
+    timed = bool(call.time_limit) and hasattr(signal, "setitimer")
+    if timed:
+        def on_alarm(signum, frame):
+            raise ProcessTimeoutError(f"Task exceeded its {call.time_limit}s time limit")
+
+        previous_handler = signal.signal(signal.SIGALRM, on_alarm)
+        signal.setitimer(signal.ITIMER_REAL, call.time_limit)
+
+    try:
+        result = _resolve(call.target)(*call.args, **call.kwargs)
+
+        if inspect.isgenerator(result):
+            if call.stream_id is None:
+                return list(result)
+            while True:
+                try:
+                    chunk = next(result)
+                except StopIteration as stop:
+                    return stop.value
+                _stream_queue.put((call.stream_id, False, chunk))
+        return result
+
+    finally:
+        if call.stream_id is not None:
+            # Lets the parent know every chunk has been forwarded
+            _stream_queue.put((call.stream_id, True, None))
+        if timed:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, previous_handler)
+        if restore_memory is not None:
+            import resource
+            resource.setrlimit(resource.RLIMIT_AS, restore_memory)
+
+
+# ============================================
+# Process Lane
+# ============================================
+
+class ProcessLane:
+    """
+    Shared pool of warm worker processes for CPU-bound calls.
+
+    A worker that stops responding past its time limit (for example
+    stuck inside a C extension, where the in-worker alarm cannot fire)
+    takes the pool down with it; the pool is then replaced.
+    """
+
+    def __init__(self, config: ProcessLaneConfig = None):
+        self.config = config or ProcessLaneConfig()
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._stream_queue = None
+        self._pump: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._stream_ids = itertools.count(1)
+        self._streams: dict[int, tuple[asyncio.AbstractEventLoop, Callable, asyncio.Event]] = {}
+
+        self._completed = 0
+        self._failed = 0
+        self._timeouts = 0
+        self._recycles = 0
+        self._in_flight = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.config.workers > 0
+
+    def _ensure_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                context = multiprocessing.get_context(self.config.start_method)
+                if self._stream_queue is None:
+                    self._stream_queue = context.Queue()
+                    self._pump = threading.Thread(
+                        target=self._pump_chunks, name="process-lane-stream", daemon=True
+                    )
+                    self._pump.start()
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.config.workers,
+                    mp_context=context,
+                    initializer=_init_worker,
+                    initargs=(self._stream_queue,),
+                )
+                logger.info(f"Process lane started with {self.config.workers} workers")
+            return self._executor
+
+    def _pump_chunks(self) -> None:
+        """Forward streamed chunks from workers to their callers' event loops."""
+        while True:
+            try:
+                item = self._stream_queue.get()
+            except (EOFError, OSError):
+                return
+            if item is None:
+                return
+            stream_id, done, chunk = item
+            target = self._streams.get(stream_id)
+            if target is None:
+                continue
+            loop, on_chunk, finished = target
+            if done:
+                loop.call_soon_threadsafe(finished.set)
+            else:
+                loop.call_soon_threadsafe(on_chunk, chunk)
+
+    async def warm(self) -> None:
+        """Start all workers now so the first tasks do not pay for process start-up."""
+        if not self.enabled:
+            return
+        executor = self._ensure_pool()
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(
+            loop.run_in_executor(executor, _ping, 0.05) for _ in range(self.config.workers)
+        ))
+
+    def _describe(
+        self,
+        func: Union[Callable, str],
+        args: tuple,
+        kwargs: dict,
+        time_limit: Optional[float],
+        memory_limit_mb: Optional[int],
+        stream_id: Optional[int] = None,
+    ) -> ProcessCall:
+        call = ProcessCall(
+            target=callable_path(func),
+            args=args,
+            kwargs=kwargs,
+            time_limit=time_limit if time_limit is not None else self.config.time_limit,
+            memory_limit_mb=memory_limit_mb if memory_limit_mb is not None else self.config.memory_limit_mb,
+            stream_id=stream_id,
+        )
+        # Fail here with a clear error rather than inside the pool
+        try:
+            pickle.dumps(call)
+        except Exception as e:
+            raise TypeError(f"Arguments for {call.target} are not picklable: {e}") from e
+        return call
+
+    async def run(
+        self,
+        func: Union[Callable, str],
+        *args,
+        time_limit: Optional[float] = None,
+        memory_limit_mb: Optional[int] = None,
+        on_chunk: Optional[Callable[[Any], None]] = None,
+        **kwargs,
+    ) -> Any:
+        """
+        Run func(*args, **kwargs) in a worker process.
+
+        Args:
+            func: Module-level function, or its "module:qualname"
+            time_limit: Seconds before the task is stopped (default from config)
+            memory_limit_mb: Extra address space the task may use (0 = no limit)
+            on_chunk: Called on this loop with each item a generator func yields;
+                the generator's return value becomes the result
+
+        Raises:
+            ProcessTimeoutError: The time limit was exceeded
+            MemoryError: The memory limit was exceeded
+        """
+        if not self.enabled:
+            result = await asyncio.to_thread(_resolve(callable_path(func)), *args, **kwargs)
+            if inspect.isgenerator(result):
+                if on_chunk is None:
+                    return await asyncio.to_thread(list, result)
+                return await asyncio.to_thread(self._drain_local, result, asyncio.get_running_loop(), on_chunk)
+            return result
+
+        loop = asyncio.get_running_loop()
+        stream_id = next(self._stream_ids) if on_chunk is not None else None
+        call = self._describe(func, args, kwargs, time_limit, memory_limit_mb, stream_id)
+        finished = asyncio.Event()
+        if stream_id is not None:
+            self._streams[stream_id] = (loop, on_chunk, finished)
+        executor = self._ensure_pool()
+        self._in_flight += 1
+        try:
+            future = loop.run_in_executor(executor, _execute_call, call)
+            deadline = call.time_limit + self.config.kill_grace if call.time_limit else None
+            try:
+                result = await asyncio.wait_for(future, deadline)
+            except ProcessTimeoutError:
+                self._timeouts += 1
+                raise
+            except asyncio.TimeoutError:
+                # The in-worker alarm did not fire; the worker is stuck
+                self._timeouts += 1
+                self.recycle(executor)
+                raise ProcessTimeoutError(f"{call.target} did not finish within {deadline:.0f}s") from None
+            except BrokenProcessPool as e:
+                self._failed += 1
+                self.recycle(executor)
+                raise RuntimeError(f"Worker process died running {call.target}") from e
+            except Exception:
+                self._failed += 1
+                raise
+            self._completed += 1
+            if stream_id is not None:
+                # The result can overtake the last chunks still in the stream queue
+                try:
+                    await asyncio.wait_for(finished.wait(), self.config.kill_grace)
+                except asyncio.TimeoutError:
+                    logger.warning(f"Stream for {call.target} ended without its end marker")
+            return result
+        finally:
+            self._in_flight -= 1
+            if stream_id is not None:
+                self._streams.pop(stream_id, None)
+
+    @staticmethod
+    def _drain_local(generator, loop: asyncio.AbstractEventLoop, on_chunk: Callable) -> Any:
+        while True:
+            try:
+                chunk = next(generator)
+            except StopIteration as stop:
+                return stop.value
+            loop.call_soon_threadsafe(on_chunk, chunk)
+
+    def call(
+        self,
+        func: Union[Callable, str],
+        *args,
+        time_limit: Optional[float] = None,
+        memory_limit_mb: Optional[int] = None,
+        **kwargs,
+    ) -> Any:
+        """Blocking variant of run() for code already running in a worker thread."""
+        if not self.enabled:
+            result = _resolve(callable_path(func))(*args, **kwargs)
+            return list(result) if inspect.isgenerator(result) else result
+
+        call = self._describe(func, args, kwargs, time_limit, memory_limit_mb)
+        executor = self._ensure_pool()
+        deadline = call.time_limit + self.config.kill_grace if call.time_limit else None
+        try:
+            result = executor.submit(_execute_call, call).result(timeout=deadline)
+        except ProcessTimeoutError:
+            self._timeouts += 1
+            raise
+        except FutureTimeoutError:
+            self._timeouts += 1
+            self.recycle(executor)
+            raise ProcessTimeoutError(f"{call.target} did not finish within {deadline:.0f}s") from None
+        except BrokenProcessPool as e:
+            self._failed += 1
+            self.recycle(executor)
+            raise RuntimeError(f"Worker process died running {call.target}") from e
+        self._completed += 1
+        return result
+
+    def recycle(self, executor: Optional[ProcessPoolExecutor] = None) -> None:
+        """Kill the workers and start a fresh pool on next use."""
+        with self._lock:
+            if executor is not None and executor is not self._executor:
+                return  # Already replaced
+            old, self._executor = self._executor, None
+        if old is None:
+            return
+        self._recycles += 1
+        # ProcessPoolExecutor has no public way to stop a busy worker
+        for process in list(getattr(old, "_processes", {}).values()):
+            process.kill()
+        old.shutdown(wait=False, cancel_futures=True)
+        logger.warning("Process lane workers recycled")
+
+    def shutdown(self) -> None:
+        """Stop the workers."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+        if self._stream_queue is not None:
+            self._stream_queue.put(None)
+            self._stream_queue = None
+
+    def get_stats(self) -> dict:
+        return {
+            "workers": self.config.workers,
+            "started": self._executor is not None,
+            "in_flight": self._in_flight,
+            "completed": self._completed,
+            "failed": self._failed,
+            "timeouts": self._timeouts,
+            "recycles": self._recycles,
+        }
+
+
+# ============================================
+# Global Instance
+# ============================================
+
+_process_lane: Optional[ProcessLane] = None
+
+
+def get_process_lane() -> ProcessLane:
+    """Get the global process lane."""
+    global _process_lane
+    if _process_lane is None:
+        _process_lane = ProcessLane(ProcessLaneConfig.from_env())
+    return _process_lane
+
+
+def reset_process_lane() -> None:
+    """Shut down and reset the global process lane."""
+    global _process_lane
+    if _process_lane is not None:
+        _process_lane.shutdown()
+    _process_lane = None
+
+
+__all__ = [
+    "ProcessTimeoutError",
+    "ProcessLaneConfig",
+    "ProcessCall",
+    "ProcessLane",
+    "callable_path",
+    "get_process_lane",
+    "reset_process_lane",
+]
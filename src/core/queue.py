@@ -3,30 +3,43 @@ Task Queue System for CursorBot
 
 Provides:
 - Async task queue management
-- Priority-based task scheduling
+- Priority-based task scheduling with aging
+- Weighted fair sharing across users (deficit round robin)
 - Task status tracking
 - Concurrent execution control
 - Rate limiting
+- Wait and run time histograms
+- A process-pool lane for CPU-bound callables
+
+src.utils.task_queue adds per-user admission limits on top of this queue.
 """
 
 import asyncio
+import heapq
+import itertools
+import time
 import uuid
+from collections import defaultdict, deque
 from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
-from typing import Any, Callable, Optional
+from typing import Any, AsyncIterator, Callable, Optional
 
 from ..utils.logger import logger
+from .histogram import LatencyHistogram
+from .process_pool import ProcessTimeoutError, callable_path, get_process_lane
 
 
 class TaskStatus(Enum):
     """Task execution status."""
     PENDING = "pending"
+    QUEUED = "queued"
     RUNNING = "running"
     COMPLETED = "completed"
     FAILED = "failed"
     CANCELLED = "cancelled"
     RETRYING = "retrying"
+    TIMEOUT = "timeout"
 
 
 class TaskPriority(Enum):
@@ -35,6 +48,13 @@ class TaskPriority(Enum):
     NORMAL = 1
     HIGH = 2
     CRITICAL = 3
+    URGENT = 3  # Alias of CRITICAL
+
+
+class TaskLane(Enum):
+    """Where a task's callable runs."""
+    DEFAULT = "default"  # Coroutines on the loop, sync functions in a thread
+    PROCESS = "process"  # Worker process; for CPU-bound module-level functions
 
 
 @dataclass
@@ -57,20 +77,45 @@ class Task:
     callback: Optional[Callable] = None
     metadata: dict = field(default_factory=dict)
     
+    # Fair sharing
+    user_id: Any = None  # Tasks are shared fairly between users; None is the system lane
+    name: str = ""
+    cost: float = 1.0  # Deficit round robin cost
+    enqueued_at: float = 0.0  # Monotonic time of the last enqueue
+    
+    # Execution lane
+    lane: TaskLane = TaskLane.DEFAULT
+    memory_limit_mb: Optional[int] = None  # Process lane only; None = lane default
+    
     def __lt__(self, other: "Task") -> bool:
         """Compare tasks by priority (higher priority first)."""
         if self.priority.value != other.priority.value:
             return self.priority.value > other.priority.value
         return self.created_at < other.created_at
     
+    @property
+    def finished_at(self) -> Optional[datetime]:
+        return self.completed_at
+    
+    @property
+    def duration_ms(self) -> Optional[int]:
+        """Get task duration in milliseconds."""
+        if self.started_at and self.completed_at:
+            return int((self.completed_at - self.started_at).total_seconds() * 1000)
+        return None
+    
     def to_dict(self) -> dict:
         return {
             "id": self.id,
+            "user_id": self.user_id,
+            "name": self.name,
+            "lane": self.lane.value,
             "status": self.status.value,
             "priority": self.priority.name,
             "created_at": self.created_at.isoformat(),
             "started_at": self.started_at.isoformat() if self.started_at else None,
             "completed_at": self.completed_at.isoformat() if self.completed_at else None,
+            "duration_ms": self.duration_ms,
             "retries": self.retries,
             "error": self.error,
             "metadata": self.metadata,
@@ -86,24 +131,63 @@ class QueueConfig:
     retry_delay: float = 1.0  # Base delay between retries
     rate_limit: Optional[float] = None  # Min seconds between task starts
     persist_results: bool = True  # Keep completed task results
+    max_queue_size: int = 0  # Max waiting tasks (0 = unbounded)
+    aging_interval: float = 30.0  # Seconds of waiting worth one priority level (0 = no aging)
+    quantum: float = 1.0  # Fair-share credit per round, multiplied by the user's weight
+
+
+# Upper bounds (ms) of the queue latency histogram buckets
+QUEUE_LATENCY_BUCKETS_MS = (10, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000, 300000)
+
+# Marks the end of a task's stream
+_STREAM_END = object()
 
 
 class TaskQueue:
     """
     Async task queue with priority scheduling.
+    
+    Waiting tasks sit in one lane per user. Workers share the lanes and
+    take the next task by deficit round robin, so each user gets a share
+    of the workers proportional to their weight however many tasks they
+    submit. Within a lane the highest priority runs first. A task's
+    priority rises one level for every aging_interval seconds it waits,
+    so low-priority work is not starved. Idle workers block until a task
+    is submitted; they never poll.
     """
     
     def __init__(self, config: QueueConfig = None, name: str = "default"):
         self.config = config or QueueConfig()
         self.name = name
-        self._queue: asyncio.PriorityQueue = None
         self._tasks: dict[str, Task] = {}
         self._running_tasks: set[str] = set()
         self._workers: list[asyncio.Task] = []
         self._running = False
-        self._semaphore: asyncio.Semaphore = None
-        self._last_task_time: float = 0
         self._callbacks: list[Callable] = []
+        self._start_callbacks: list[Callable] = []
+        
+        # Fair queuing: lane heaps of (rank, seq, task), round robin order of
+        # non-empty lanes, and each lane's deficit counter
+        self._lanes: dict[Any, list] = {}
+        self._active: deque = deque()
+        self._deficit: dict[Any, float] = defaultdict(float)
+        self._in_turn = False
+        self._weights: dict[Any, float] = {}
+        self._lane_limits: dict[Any, int] = {}
+        self._lane_running: dict[Any, int] = defaultdict(int)
+        self._queued = 0
+        self._seq = itertools.count()
+        self._ready: Optional[asyncio.Condition] = None
+        
+        self._next_start = 0.0
+        self._runners: dict[str, asyncio.Future] = {}
+        self._cancel_requested: dict[str, str] = {}  # Running task id -> cancel reason
+        self._retry_timers: set[asyncio.Task] = set()
+        self._done_events: dict[str, asyncio.Event] = {}
+        self._streams: dict[str, asyncio.Queue] = {}
+        
+        self.wait_histogram = LatencyHistogram(QUEUE_LATENCY_BUCKETS_MS)  # Enqueue to start
+        self.run_histogram = LatencyHistogram(QUEUE_LATENCY_BUCKETS_MS)  # Start to finish
     
     async def start(self) -> None:
         """Start the task queue workers."""
@@ -111,8 +195,7 @@ class TaskQueue:
             return
         
         self._running = True
-        self._queue = asyncio.PriorityQueue()
-        self._semaphore = asyncio.Semaphore(self.config.max_concurrent)
+        self._ready = asyncio.Condition()
         
         # Start worker tasks
         for i in range(self.config.max_concurrent):
@@ -130,10 +213,12 @@ class TaskQueue:
         """
         self._running = False
         
-        if wait:
+        if wait and self._runners:
             # Wait for running tasks to complete
-            while self._running_tasks:
-                await asyncio.sleep(0.1)
+            await asyncio.wait(list(self._runners.values()))
+        
+        for timer in list(self._retry_timers):
+            timer.cancel()
         
         # Cancel workers
         for worker in self._workers:
@@ -146,10 +231,39 @@ class TaskQueue:
         self._workers.clear()
         logger.info(f"Task queue '{self.name}' stopped")
     
+    @property
+    def tasks(self) -> dict[str, Task]:
+        """Tasks by ID, including finished ones kept for their results."""
+        return self._tasks
+    
+    @property
+    def queued(self) -> int:
+        """Number of tasks waiting to run."""
+        return self._queued
+    
+    @property
+    def is_running(self) -> bool:
+        return self._running
+    
     def add_callback(self, callback: Callable) -> None:
         """Add callback for task completion."""
         self._callbacks.append(callback)
     
+    def add_start_callback(self, callback: Callable) -> None:
+        """Add callback run when a task starts."""
+        self._start_callbacks.append(callback)
+    
+    def set_weight(self, user_id: Any, weight: float) -> None:
+        """Set a user's fair-share weight (default 1.0)."""
+        self._weights[user_id] = weight
+    
+    def set_concurrency_limit(self, user_id: Any, limit: Optional[int]) -> None:
+        """Cap how many of a user's tasks may run at once (None = no cap)."""
+        if limit is None:
+            self._lane_limits.pop(user_id, None)
+        else:
+            self._lane_limits[user_id] = limit
+    
     async def submit(
         self,
         func: Callable,
@@ -159,6 +273,12 @@ class TaskQueue:
         max_retries: int = None,
         callback: Callable = None,
         metadata: dict = None,
+        user_id: Any = None,
+        name: str = "",
+        cost: float = 1.0,
+        lane: TaskLane = TaskLane.DEFAULT,
+        memory_limit_mb: int = None,
+        stream: bool = False,
         **kwargs
     ) -> str:
         """
@@ -172,11 +292,28 @@ class TaskQueue:
             max_retries: Max retry attempts
             callback: Callback on completion
             metadata: Additional task metadata
+            user_id: Lane the task is fairly scheduled in
+            name: Display name
+            cost: Relative cost for fair sharing
+            lane: TaskLane.PROCESS runs func in a worker process; func must be
+                a module-level sync function and its arguments picklable
+            memory_limit_mb: Process lane memory allowance
+            stream: Keep items yielded by a generator func for stream()
             **kwargs: Keyword arguments
         
         Returns:
             Task ID
+        
+        Raises:
+            ValueError: If the queue is full, or func cannot run in its lane
         """
+        if self.config.max_queue_size and self._queued >= self.config.max_queue_size:
+            raise ValueError("Task queue is full")
+        if lane == TaskLane.PROCESS:
+            if asyncio.iscoroutinefunction(func):
+                raise ValueError("Coroutine functions cannot run in the process lane")
+            callable_path(func)
+        
         task_id = str(uuid.uuid4())[:8]
         
         task = Task(
@@ -189,38 +326,130 @@ class TaskQueue:
             max_retries=max_retries if max_retries is not None else self.config.default_max_retries,
             callback=callback,
             metadata=metadata or {},
+            user_id=user_id,
+            name=name,
+            cost=cost,
+            lane=lane,
+            memory_limit_mb=memory_limit_mb,
         )
         
         self._tasks[task_id] = task
-        await self._queue.put((task.priority.value * -1, task.created_at, task))
+        if stream:
+            self._streams[task_id] = asyncio.Queue()
+        await self._enqueue(task)
         
         logger.debug(f"Task {task_id} submitted to queue '{self.name}'")
         return task_id
     
+    # ============================================
+    # Fair Scheduling
+    # ============================================
+    
+    async def _enqueue(self, task: Task) -> None:
+        """Add a task to its user's lane and wake one worker."""
+        task.status = TaskStatus.QUEUED
+        task.enqueued_at = time.monotonic()
+        
+        # Aged priority p + (now - t) / interval orders the same as
+        # p - t / interval, so the rank is fixed at enqueue time
+        rank = -task.priority.value
+        if self.config.aging_interval:
+            rank += task.enqueued_at / self.config.aging_interval
+        
+        lane = self._lanes.setdefault(task.user_id, [])
+        if not lane and task.user_id not in self._active:
+            self._active.append(task.user_id)
+        heapq.heappush(lane, (rank, next(self._seq), task))
+        self._queued += 1
+        await self._wake()
+    
+    async def _wake(self, n: int = 1) -> None:
+        if self._ready is None:
+            return
+        async with self._ready:
+            self._ready.notify(n)
+    
+    def _next_task(self) -> Optional[Task]:
+        """
+        Pick the next task by deficit round robin, or None if none can run.
+        
+        The lane at the front of the round gets quantum * weight credit once
+        per turn and runs tasks while its credit covers their cost.
+        """
+        blocked = 0
+        while self._active and blocked < len(self._active):
+            key = self._active[0]
+            lane = self._lanes[key]
+            
+            # Drop tasks cancelled while waiting (already uncounted)
+            while lane and lane[0][2].status == TaskStatus.CANCELLED:
+                heapq.heappop(lane)
+            if not lane:
+                self._end_turn(key, exhausted=True)
+                continue
+            
+            limit = self._lane_limits.get(key)
+            if limit is not None and self._lane_running[key] >= limit:
+                self._end_turn(key)
+                blocked += 1
+                continue
+            blocked = 0
+            
+            if not self._in_turn:
+                self._deficit[key] += self.config.quantum * self._weights.get(key, 1.0)
+                self._in_turn = True
+            
+            task = lane[0][2]
+            if self._deficit[key] < task.cost:
+                self._end_turn(key)
+                continue
+            
+            heapq.heappop(lane)
+            self._queued -= 1
+            self._deficit[key] -= task.cost
+            self._lane_running[key] += 1
+            if not lane:
+                self._end_turn(key, exhausted=True)
+            return task
+        return None
+    
+    def _end_turn(self, key: Any, exhausted: bool = False) -> None:
+        self._in_turn = False
+        if exhausted:
+            # Idle lanes do not bank credit
+            self._active.popleft()
+            self._deficit.pop(key, None)
+            self._lanes.pop(key, None)
+        else:
+            self._active.rotate(-1)
+    
+    async def _throttle(self) -> None:
+        """Space task starts by rate_limit seconds across all workers."""
+        if not self.config.rate_limit:
+            return
+        now = asyncio.get_running_loop().time()
+        slot = max(now, self._next_start)
+        self._next_start = slot + self.config.rate_limit
+        if slot > now:
+            await asyncio.sleep(slot - now)
+    
     async def _worker(self, worker_id: int) -> None:
         """Worker coroutine that processes tasks."""
         while self._running:
             try:
-                # Wait for a task
-                try:
-                    _, _, task = await asyncio.wait_for(
-                        self._queue.get(),
-                        timeout=1.0
-                    )
-                except asyncio.TimeoutError:
-                    continue
+                # Block until a task can run
+                async with self._ready:
+                    task = self._next_task()
+                    while task is None and self._running:
+                        await self._ready.wait()
+                        task = self._next_task()
+                if task is None:
+                    break
                 
                 # Rate limiting
-                if self.config.rate_limit:
-                    now = asyncio.get_event_loop().time()
-                    elapsed = now - self._last_task_time
-                    if elapsed < self.config.rate_limit:
-                        await asyncio.sleep(self.config.rate_limit - elapsed)
-                    self._last_task_time = asyncio.get_event_loop().time()
+                await self._throttle()
                 
-                # Execute task with semaphore
-                async with self._semaphore:
-                    await self._execute_task(task)
+                await self._execute_task(task)
                 
             except asyncio.CancelledError:
                 break
@@ -232,43 +461,87 @@ class TaskQueue:
         task.status = TaskStatus.RUNNING
         task.started_at = datetime.now()
         self._running_tasks.add(task.id)
+        started = time.monotonic()
+        self.wait_histogram.record((started - task.enqueued_at) * 1000)
+        
+        await self._notify(self._start_callbacks, task)
         
         try:
             # Execute with timeout
-            if asyncio.iscoroutinefunction(task.func):
+            timeout = task.timeout
+            if task.lane == TaskLane.PROCESS:
+                # The lane enforces the time limit inside the worker
+                stream = self._streams.get(task.id)
+                coro = get_process_lane().run(
+                    task.func,
+                    *task.args,
+                    time_limit=task.timeout,
+                    memory_limit_mb=task.memory_limit_mb,
+                    on_chunk=stream.put_nowait if stream else None,
+                    **task.kwargs,
+                )
+                timeout = None
+            elif asyncio.iscoroutinefunction(task.func):
                 coro = task.func(*task.args, **task.kwargs)
             else:
                 coro = asyncio.to_thread(task.func, *task.args, **task.kwargs)
             
-            if task.timeout:
-                task.result = await asyncio.wait_for(coro, timeout=task.timeout)
+            runner = asyncio.ensure_future(coro)
+            self._runners[task.id] = runner
+            try:
+                if timeout:
+                    task.result = await asyncio.wait_for(runner, timeout=timeout)
+                else:
+                    task.result = await runner
+            except asyncio.CancelledError:
+                if task.id not in self._cancel_requested:
+                    raise
+                task.status = TaskStatus.CANCELLED
+                task.error = self._cancel_requested[task.id]
             else:
-                task.result = await coro
-            
-            task.status = TaskStatus.COMPLETED
+                task.status = TaskStatus.COMPLETED
+                logger.debug(f"Task {task.id} completed successfully")
             task.completed_at = datetime.now()
             
-            logger.debug(f"Task {task.id} completed successfully")
-            
-        except asyncio.TimeoutError:
+        except (asyncio.TimeoutError, ProcessTimeoutError):
             task.error = f"Task timed out after {task.timeout}s"
-            await self._handle_task_failure(task)
+            self._handle_task_failure(task, TaskStatus.TIMEOUT)
             
         except Exception as e:
-            task.error = str(e)
-            await self._handle_task_failure(task)
+            if task.id in self._cancel_requested:
+                # The function turned its cancellation into another error
+                task.status = TaskStatus.CANCELLED
+                task.error = self._cancel_requested[task.id]
+                task.completed_at = datetime.now()
+            else:
+                task.error = str(e)
+                self._handle_task_failure(task, TaskStatus.FAILED)
         
         finally:
+            self._runners.pop(task.id, None)
+            self._cancel_requested.pop(task.id, None)
             self._running_tasks.discard(task.id)
+            self._lane_running[task.user_id] -= 1
+            self.run_histogram.record((time.monotonic() - started) * 1000)
             
-            # Execute callbacks
-            await self._notify_completion(task)
+            # A lane at its concurrency limit may be able to run again
+            await self._wake()
+            
+            # A retrying task has not finished; callbacks run once it does
+            if task.status != TaskStatus.RETRYING:
+                await self._notify_completion(task)
+                event = self._done_events.pop(task.id, None)
+                if event:
+                    event.set()
+                stream = self._streams.pop(task.id, None)
+                if stream:
+                    stream.put_nowait(_STREAM_END)
             
             # Cleanup if not persisting
             if not self.config.persist_results and task.status == TaskStatus.COMPLETED:
                 self._tasks.pop(task.id, None)
     
-    async def _handle_task_failure(self, task: Task) -> None:
+    def _handle_task_failure(self, task: Task, final_status: TaskStatus) -> None:
         """Handle task failure with retry logic."""
         if task.retries < task.max_retries:
             task.retries += 1
@@ -282,17 +555,32 @@ class TaskQueue:
                 f"in {delay:.1f}s: {task.error}"
             )
             
-            await asyncio.sleep(delay)
-            
-            # Re-queue the task
-            task.status = TaskStatus.PENDING
-            task.started_at = None
-            await self._queue.put((task.priority.value * -1, task.created_at, task))
+            # Re-queue after the delay without holding this worker
+            timer = asyncio.create_task(self._retry_later(task, delay))
+            self._retry_timers.add(timer)
+            timer.add_done_callback(self._retry_timers.discard)
         else:
-            task.status = TaskStatus.FAILED
+            task.status = final_status
             task.completed_at = datetime.now()
             logger.error(f"Task {task.id} failed after {task.max_retries} retries: {task.error}")
     
+    async def _retry_later(self, task: Task, delay: float) -> None:
+        await asyncio.sleep(delay)
+        if task.status != TaskStatus.RETRYING:
+            return
+        task.started_at = None
+        await self._enqueue(task)
+    
+    async def _notify(self, callbacks: list[Callable], task: Task) -> None:
+        for callback in callbacks:
+            try:
+                if asyncio.iscoroutinefunction(callback):
+                    await callback(task)
+                else:
+                    callback(task)
+            except Exception as e:
+                logger.error(f"Queue callback error: {e}")
+    
     async def _notify_completion(self, task: Task) -> None:
         """Notify callbacks of task completion."""
         # Task-specific callback
@@ -306,27 +594,53 @@ class TaskQueue:
                 logger.error(f"Task callback error: {e}")
         
         # Global callbacks
-        for callback in self._callbacks:
-            try:
-                if asyncio.iscoroutinefunction(callback):
-                    await callback(task)
-                else:
-                    callback(task)
-            except Exception as e:
-                logger.error(f"Queue callback error: {e}")
+        await self._notify(self._callbacks, task)
     
     async def get_task(self, task_id: str) -> Optional[Task]:
         """Get a task by ID."""
         return self._tasks.get(task_id)
     
-    async def cancel_task(self, task_id: str) -> bool:
-        """Cancel a pending task."""
+    async def cancel_task(
+        self,
+        task_id: str,
+        include_running: bool = False,
+        reason: str = "Task was cancelled",
+    ) -> bool:
+        """
+        Cancel a waiting task.
+        
+        Args:
+            task_id: Task to cancel
+            include_running: Also cancel the task if it is already running
+            reason: Stored as the task's error
+        """
         task = self._tasks.get(task_id)
         if not task:
             return False
         
-        if task.status == TaskStatus.PENDING:
+        if task.status in (TaskStatus.PENDING, TaskStatus.QUEUED, TaskStatus.RETRYING):
+            # Removed from its lane when it reaches the front, but it stops
+            # counting against max_queue_size now
+            if task.status == TaskStatus.QUEUED:
+                self._queued -= 1
+            retrying = task.status == TaskStatus.RETRYING
             task.status = TaskStatus.CANCELLED
+            task.error = reason
+            task.completed_at = datetime.now()
+            if retrying:
+                # It ran before, so completion callbacks are still owed
+                await self._notify_completion(task)
+            event = self._done_events.pop(task_id, None)
+            if event:
+                event.set()
+            stream = self._streams.pop(task_id, None)
+            if stream:
+                stream.put_nowait(_STREAM_END)
+            return True
+        
+        if include_running and task.status == TaskStatus.RUNNING and task_id in self._runners:
+            self._cancel_requested[task_id] = reason
+            self._runners[task_id].cancel()
             return True
         
         return False
@@ -350,17 +664,31 @@ class TaskQueue:
         if not task:
             raise ValueError(f"Task not found: {task_id}")
         
-        start_time = asyncio.get_event_loop().time()
-        
-        while task.status in (TaskStatus.PENDING, TaskStatus.RUNNING, TaskStatus.RETRYING):
-            if timeout:
-                elapsed = asyncio.get_event_loop().time() - start_time
-                if elapsed > timeout:
-                    raise asyncio.TimeoutError(f"Timeout waiting for task {task_id}")
-            await asyncio.sleep(0.1)
+        if task.status in (TaskStatus.PENDING, TaskStatus.QUEUED, TaskStatus.RUNNING, TaskStatus.RETRYING):
+            event = self._done_events.setdefault(task_id, asyncio.Event())
+            try:
+                await asyncio.wait_for(event.wait(), timeout)
+            except asyncio.TimeoutError:
+                raise asyncio.TimeoutError(f"Timeout waiting for task {task_id}") from None
         
         return task
     
+    async def stream(self, task_id: str) -> AsyncIterator[Any]:
+        """
+        Iterate over the items a task's generator yields, as they arrive.
+        
+        The task must have been submitted with stream=True. Iteration ends
+        when the task finishes; its return value is then in task.result.
+        """
+        stream = self._streams.get(task_id)
+        if stream is None:
+            raise ValueError(f"Task {task_id} is not streaming")
+        while True:
+            chunk = await stream.get()
+            if chunk is _STREAM_END:
+                return
+            yield chunk
+    
     def get_stats(self) -> dict:
         """Get queue statistics."""
         status_counts = {}
@@ -372,10 +700,13 @@ class TaskQueue:
             "name": self.name,
             "running": self._running,
             "total_tasks": len(self._tasks),
-            "queue_size": self._queue.qsize() if self._queue else 0,
+            "queue_size": self._queued,
             "running_tasks": len(self._running_tasks),
             "worker_count": len(self._workers),
+            "active_lanes": len(self._active),
             "status_counts": status_counts,
+            "wait_ms": self.wait_histogram.to_dict(),
+            "run_ms": self.run_histogram.to_dict(),
         }
     
     def get_recent_tasks(self, limit: int = 20) -> list[dict]:
@@ -443,8 +774,10 @@ def get_task_queue(name: str = "default", config: QueueConfig = None) -> TaskQue
 __all__ = [
     "TaskStatus",
     "TaskPriority",
+    "TaskLane",
     "Task",
     "QueueConfig",
+    "LatencyHistogram",
     "TaskQueue",
     "QueueManager",
     "get_queue_manager",
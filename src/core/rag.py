@@ -118,6 +118,13 @@ class RAGConfig:
     embedding_provider: EmbeddingProvider = EmbeddingProvider.OPENAI
     embedding_model: str = "text-embedding-3-small"
     embedding_dimensions: int = 1536
+    embedding_cache: bool = True
+    
+    # Indexing pipeline settings
+    index_workers: int = 4  # Threads loading and chunking files
+    embedding_batch_size: int = 100  # Texts per embedding request (capped by provider)
+    embedding_concurrency: int = 4  # Concurrent embedding requests
+    store_batch_size: int = 500  # Chunks per vector store write
     
     # Retrieval settings
     top_k: int = 5
@@ -130,6 +137,14 @@ class RAGConfig:
     # Storage settings
     persist_directory: str = "data/rag"
     collection_name: str = "default"
+    vector_store: str = "auto"  # auto, chroma, numpy, mmap, memory
+    mmap_compact_ratio: float = 0.3  # Dead-row share that triggers compaction (0 = manual only)
+    
+    # Approximate nearest-neighbour settings (numpy vector store)
+    ann_index: str = "none"  # none, ivf
+    ann_nlist: int = 0  # Number of IVF partitions (0 = sqrt(N))
+    ann_nprobe: int = 8  # Partitions scanned per query; higher = better recall, slower
+    ann_min_documents: int = 10000  # Use brute force below this size
 
 
 @dataclass
@@ -141,6 +156,51 @@ class RAGResponse:
     metadata: dict = field(default_factory=dict)
 
 
+@dataclass
+class IndexingResult:
+    """Result (or running progress) of a directory indexing run."""
+    directory: str
+    files_scanned: int = 0
+    files_indexed: int = 0
+    files_unchanged: int = 0
+    files_removed: int = 0
+    files_failed: int = 0
+    chunks_indexed: int = 0
+    chunks_deleted: int = 0
+    elapsed_seconds: float = 0.0
+    
+    @property
+    def chunks_per_second(self) -> float:
+        if self.elapsed_seconds <= 0:
+            return 0.0
+        return self.chunks_indexed / self.elapsed_seconds
+    
+    def to_dict(self) -> dict:
+        return {
+            "directory": self.directory,
+            "files_scanned": self.files_scanned,
+            "files_indexed": self.files_indexed,
+            "files_unchanged": self.files_unchanged,
+            "files_removed": self.files_removed,
+            "files_failed": self.files_failed,
+            "chunks_indexed": self.chunks_indexed,
+            "chunks_deleted": self.chunks_deleted,
+            "elapsed_seconds": round(self.elapsed_seconds, 3),
+            "chunks_per_second": round(self.chunks_per_second, 1),
+        }
+
+
+@dataclass
+class _PreparedFile:
+    """A loaded and chunked file waiting to be embedded and stored."""
+    path: str
+    mtime: float
+    size: int
+    content_hash: str
+    documents: list[Document]
+    remaining: int = 0
+
+
 # ============================================
 # Document Loaders
 # ============================================
@@ -437,6 +497,11 @@ class PDFLoader(DocumentLoader):
             )]
 
 
+def load_pdf(source: str) -> list[Document]:
+    """Extract a PDF's pages; module-level so that it can run in the process lane."""
+    return PDFLoader().load(source)
+
+
 class JSONLoader(DocumentLoader):
     """Load JSON files."""
     
@@ -741,6 +806,9 @@ class TextChunker:
 class EmbeddingProviderBase(ABC):
     """Base class for embedding providers."""
     
+    # Maximum number of texts accepted by a single embed() call
+    max_batch_size: int = 100
+    
     @abstractmethod
     async def embed(self, texts: list[str]) -> list[list[float]]:
         """Generate embeddings for texts."""
@@ -761,6 +829,8 @@ class OpenAIEmbedding(EmbeddingProviderBase):
         "text-embedding-ada-002": 1536,
     }
     
+    max_batch_size = 2048
+    
     def __init__(self, api_key: str = None, model: str = "text-embedding-3-small"):
         self.api_key = api_key or os.getenv("OPENAI_API_KEY")
         self.model = model
@@ -870,6 +940,211 @@ class OllamaEmbedding(EmbeddingProviderBase):
         return embeddings
 
 
+# ============================================
+# Embedding Cache
+# ============================================
+
+class EmbeddingCache:
+    """
+    On-disk embedding cache keyed by (provider, model, sha256(text)).
+    
+    Backed by a SQLite table with least-recently-used eviction once
+    `max_entries` is exceeded. Shared by RAGManager and ConversationRAG so
+    re-indexing unchanged content costs no embedding API calls.
+    
+    Calls block on disk I/O; async callers run them with asyncio.to_thread.
+    The one connection is shared across worker threads and serialized by
+    a lock.
+    """
+    
+    def __init__(self, db_path: str = "data/rag/embedding_cache.db", max_entries: int = 100000):
+        import sqlite3
+        import threading
+        
+        self.db_path = db_path
+        self.max_entries = max_entries
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS embeddings (
+                provider TEXT NOT NULL,
+                model TEXT NOT NULL,
+                text_hash TEXT NOT NULL,
+                embedding BLOB NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (provider, model, text_hash)
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_embeddings_last_used ON embeddings(last_used)")
+        self._conn.commit()
+        
+        self._entries = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    @staticmethod
+    def hash_text(text: str) -> str:
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+    
+    def get_many(self, provider: str, model: str, texts: list[str]) -> list[Optional[list[float]]]:
+        """Look up embeddings; returns None for each miss."""
+        import time
+        from array import array
+        
+        hashes = [self.hash_text(t) for t in texts]
+        found: dict[str, list[float]] = {}
+        
+        with self._lock:
+            unique = list(dict.fromkeys(hashes))
+            # Stay under SQLite's bound-parameter limit
+            for i in range(0, len(unique), 500):
+                batch = unique[i:i + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT text_hash, embedding FROM embeddings "
+                    f"WHERE provider = ? AND model = ? AND text_hash IN ({placeholders})",
+                    [provider, model, *batch],
+                ).fetchall()
+                for text_hash, blob in rows:
+                    found[text_hash] = array("f", blob).tolist()
+            
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_used = ? WHERE provider = ? AND model = ? AND text_hash = ?",
+                    [(now, provider, model, h) for h in found],
+                )
+                self._conn.commit()
+            
+            results = [found.get(h) for h in hashes]
+            hit_count = sum(1 for r in results if r is not None)
+            self.hits += hit_count
+            self.misses += len(results) - hit_count
+        return results
+    
+    def put_many(self, provider: str, model: str, texts: list[str], embeddings: list[list[float]]) -> None:
+        """Store embeddings and evict least-recently-used entries if over capacity."""
+        import time
+        from array import array
+        
+        now = time.time()
+        rows = [
+            (provider, model, self.hash_text(t), array("f", e).tobytes(), now)
+            for t, e in zip(texts, embeddings)
+        ]
+        
+        with self._lock:
+            before = self._conn.total_changes
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (provider, model, text_hash, embedding, last_used) "
+                "VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+            # Replacements count as changes too, so recount only when close to the cap
+            self._entries += self._conn.total_changes - before
+            if self._entries > self.max_entries:
+                self._entries = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+                overflow = self._entries - self.max_entries
+                if overflow > 0:
+                    # Evict a little extra so we don't evict on every insert
+                    evict = overflow + self.max_entries // 10
+                    self._conn.execute(
+                        "DELETE FROM embeddings WHERE rowid IN "
+                        "(SELECT rowid FROM embeddings ORDER BY last_used LIMIT ?)",
+                        (evict,),
+                    )
+                    self.evictions += evict
+                    self._entries = max(0, self._entries - evict)
+            self._conn.commit()
+    
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM embeddings")
+            self._conn.commit()
+            self._entries = 0
+    
+    def get_stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": self._entries,
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+        }
+    
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class CachedEmbedding(EmbeddingProviderBase):
+    """Embedding provider wrapper that serves repeats from an EmbeddingCache."""
+    
+    def __init__(self, provider: EmbeddingProviderBase, cache: EmbeddingCache):
+        self.provider = provider
+        self.cache = cache
+        self.provider_name = type(provider).__name__
+        self.model = getattr(provider, "model", "")
+    
+    @property
+    def max_batch_size(self) -> int:
+        return self.provider.max_batch_size
+    
+    def get_dimensions(self) -> int:
+        return self.provider.get_dimensions()
+    
+    async def embed(self, texts: list[str]) -> list[list[float]]:
+        if not texts:
+            return []
+        
+        # SQLite calls block; keep them off the event loop
+        cached = await asyncio.to_thread(self.cache.get_many, self.provider_name, self.model, texts)
+        
+        # Embed each distinct missing text once
+        missing = list(dict.fromkeys(t for t, e in zip(texts, cached) if e is None))
+        if missing:
+            fresh = await self.provider.embed(missing)
+            await asyncio.to_thread(self.cache.put_many, self.provider_name, self.model, missing, fresh)
+            by_text = dict(zip(missing, fresh))
+            cached = [e if e is not None else by_text[t] for t, e in zip(texts, cached)]
+        
+        return cached
+
+
+_embedding_cache: Optional[EmbeddingCache] = None
+
+
+def get_embedding_cache() -> EmbeddingCache:
+    """Get the shared embedding cache instance."""
+    global _embedding_cache
+    
+    if _embedding_cache is None:
+        _embedding_cache = EmbeddingCache(
+            db_path=os.getenv("RAG_EMBEDDING_CACHE_PATH", "data/rag/embedding_cache.db"),
+            max_entries=int(os.getenv("RAG_EMBEDDING_CACHE_MAX_ENTRIES", "100000")),
+        )
+    
+    return _embedding_cache
+
+
+def with_embedding_cache(provider: EmbeddingProviderBase) -> EmbeddingProviderBase:
+    """Wrap an embedding provider with the shared on-disk cache."""
+    if isinstance(provider, CachedEmbedding):
+        return provider
+    try:
+        return CachedEmbedding(provider, get_embedding_cache())
+    except Exception as e:
+        logger.warning(f"Embedding cache unavailable, embedding without cache: {e}")
+        return provider
+
+
 # ============================================
 # Vector Store
 # ============================================
@@ -877,6 +1152,9 @@ class OllamaEmbedding(EmbeddingProviderBase):
 class VectorStore(ABC):
     """Base class for vector stores."""
     
+    # Whether documents survive a process restart
+    persistent: bool = False
+    
     @abstractmethod
     async def add(self, documents: list[Document]) -> None:
         """Add documents to the store."""
@@ -959,9 +1237,904 @@ class InMemoryVectorStore(VectorStore):
         return dot_product / (magnitude_a * magnitude_b)
 
 
+def _top_k_rows(np, scores, k: int):
+    """Return indices of the k highest scores, best first."""
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    if k < len(scores):
+        top = np.argpartition(-scores, k - 1)[:k]
+    else:
+        top = np.arange(len(scores))
+    return top[np.argsort(-scores[top], kind="stable")]
+
+
+class IVFIndex:
+    """
+    Inverted-file (IVF) approximate nearest-neighbour index.
+    
+    Vectors are partitioned with spherical k-means; a query only scores the
+    rows in its `nprobe` closest partitions. `nprobe` is the recall/latency
+    knob: nprobe == nlist is equivalent to brute force.
+    
+    The index stores row numbers of an external matrix (owned by
+    NumpyVectorStore) and is kept in sync through add/remove/move.
+    """
+    
+    def __init__(
+        self,
+        nlist: int = 0,
+        nprobe: int = 8,
+        min_train_size: int = 10000,
+        train_iterations: int = 10,
+        sample_per_list: int = 64,
+        seed: int = 0,
+    ):
+        import numpy as np
+        
+        self._np = np
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.min_train_size = min_train_size
+        self.train_iterations = train_iterations
+        self.sample_per_list = sample_per_list
+        self.seed = seed
+        
+        self.centroids = None
+        self.trained_size = 0
+        self._lists: list[list[int]] = []
+        # Row -> (list number, position within list)
+        self._where: dict[int, tuple[int, int]] = {}
+    
+    @property
+    def is_trained(self) -> bool:
+        return self.centroids is not None
+    
+    def should_train(self, size: int) -> bool:
+        """Train once the store is big enough, retrain when it has doubled."""
+        if size < self.min_train_size:
+            return False
+        return not self.is_trained or size > 2 * self.trained_size
+    
+    def train(self, vectors) -> None:
+        """Fit centroids on normalized vectors and assign every row."""
+        self.install(self.fit(vectors))
+    
+    def fit(self, vectors) -> tuple:
+        """
+        Run k-means and assign rows without touching the index.
+        
+        Safe to call from a worker thread on a copy of the vectors; the
+        result is applied with install().
+        """
+        np = self._np
+        n = len(vectors)
+        nlist = self.nlist or max(1, int(np.sqrt(n)))
+        nlist = min(nlist, n)
+        
+        rng = np.random.default_rng(self.seed)
+        sample_size = min(n, nlist * self.sample_per_list)
+        sample = vectors[rng.choice(n, size=sample_size, replace=False)]
+        centroids = sample[rng.choice(sample_size, size=nlist, replace=False)].copy()
+        
+        for _ in range(self.train_iterations):
+            assign = np.argmax(sample @ centroids.T, axis=1)
+            for c in range(nlist):
+                members = sample[assign == c]
+                if len(members):
+                    centroids[c] = members.sum(axis=0)
+                else:
+                    # Re-seed empty partitions from a random sample row
+                    centroids[c] = sample[rng.integers(sample_size)]
+            norms = np.linalg.norm(centroids, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            centroids /= norms
+        
+        centroids = centroids.astype(np.float32)
+        
+        # Assign in blocks to bound the temporary score matrix
+        block = 4096
+        assignments = np.concatenate([
+            np.argmax(vectors[start:start + block] @ centroids.T, axis=1)
+            for start in range(0, n, block)
+        ]) if n else np.zeros(0, dtype=np.int64)
+        return centroids, assignments
+    
+    def install(self, fitted: tuple) -> None:
+        """Replace centroids and partitions with a fit() result."""
+        centroids, assignments = fitted
+        self.centroids = centroids
+        self._lists = [[] for _ in range(len(centroids))]
+        self._where = {}
+        for row, c in enumerate(assignments.tolist()):
+            self._append(row, c)
+        
+        self.trained_size = len(assignments)
+        logger.info(f"Trained IVF index: {len(centroids)} partitions over {self.trained_size} vectors")
+    
+    def _append(self, row: int, list_no: int) -> None:
+        members = self._lists[list_no]
+        self._where[row] = (list_no, len(members))
+        members.append(row)
+    
+    def add(self, row: int, vector) -> None:
+        if not self.is_trained:
+            return
+        self.remove(row)
+        self._append(row, int(self._np.argmax(self.centroids @ vector)))
+    
+    def remove(self, row: int) -> None:
+        location = self._where.pop(row, None)
+        if location is None:
+            return
+        list_no, pos = location
+        members = self._lists[list_no]
+        last = members.pop()
+        if last != row:
+            members[pos] = last
+            self._where[last] = (list_no, pos)
+    
+    def move(self, old_row: int, new_row: int) -> None:
+        """Record that the vector at old_row now lives at new_row."""
+        location = self._where.pop(old_row, None)
+        if location is None:
+            return
+        list_no, pos = location
+        self._lists[list_no][pos] = new_row
+        self._where[new_row] = location
+    
+    def candidates(self, query, nprobe: int = None):
+        """Return row numbers in the partitions closest to the query."""
+        np = self._np
+        nprobe = min(nprobe or self.nprobe, len(self._lists))
+        probes = _top_k_rows(np, self.centroids @ query, nprobe)
+        rows = [row for c in probes for row in self._lists[c]]
+        return np.fromiter(rows, dtype=np.int64, count=len(rows))
+    
+    def reset(self) -> None:
+        self.centroids = None
+        self.trained_size = 0
+        self._lists = []
+        self._where = {}
+
+
+class NumpyVectorStore(VectorStore):
+    """
+    In-memory vector store backed by a contiguous NumPy matrix.
+    
+    Embeddings are L2-normalized on insert and kept in a single float32
+    matrix, so a query is scored with one matrix-vector product and the
+    top-k rows are selected with argpartition instead of a full sort.
+    """
+    
+    def __init__(
+        self,
+        dimensions: int = None,
+        initial_capacity: int = 1024,
+        ann_index: Optional[IVFIndex] = None,
+    ):
+        try:
+            import numpy as np
+        except ImportError:
+            raise ImportError("numpy not installed. Run: pip install numpy")
+        
+        self._np = np
+        self.ann_index = ann_index
+        self._dimensions = dimensions
+        self._capacity = max(1, initial_capacity)
+        self._matrix = None
+        self._size = 0
+        # Row i of the matrix belongs to self._ids[i]
+        self._ids: list[str] = []
+        self._rows: dict[str, int] = {}
+        self.documents: dict[str, Document] = {}
+        
+        # Background ANN training; rows changed meanwhile are re-added after
+        self._train_task: Optional[asyncio.Task] = None
+        self._dirty_rows: Optional[set[int]] = None
+        self._generation = 0  # Bumped by clear() to drop stale training
+    
+    def _ensure_capacity(self, needed: int) -> None:
+        """Grow the matrix (amortized doubling) to hold `needed` rows."""
+        np = self._np
+        if self._matrix is None:
+            self._capacity = max(self._capacity, needed)
+            self._matrix = np.zeros((self._capacity, self._dimensions), dtype=np.float32)
+            return
+        if needed <= self._capacity:
+            return
+        new_capacity = self._capacity
+        while new_capacity < needed:
+            new_capacity *= 2
+        grown = np.zeros((new_capacity, self._dimensions), dtype=np.float32)
+        grown[:self._size] = self._matrix[:self._size]
+        self._matrix = grown
+        self._capacity = new_capacity
+    
+    def _normalize(self, vectors):
+        """L2-normalize rows; zero vectors stay zero."""
+        np = self._np
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+    
+    async def add(self, documents: list[Document]) -> None:
+        if not documents:
+            return
+        
+        for doc in documents:
+            if doc.embedding is None:
+                raise ValueError(f"Document {doc.id} has no embedding")
+        
+        np = self._np
+        vectors = np.asarray([doc.embedding for doc in documents], dtype=np.float32)
+        if vectors.ndim != 2:
+            raise ValueError("Embeddings must all have the same dimensions")
+        
+        if self._dimensions is None:
+            self._dimensions = vectors.shape[1]
+        elif vectors.shape[1] != self._dimensions:
+            raise ValueError(
+                f"Embedding dimension mismatch: expected {self._dimensions}, got {vectors.shape[1]}"
+            )
+        
+        vectors = self._normalize(vectors)
+        self._ensure_capacity(self._size + len(documents))
+        
+        for doc, vector in zip(documents, vectors):
+            row = self._rows.get(doc.id)
+            if row is None:
+                row = self._size
+                self._rows[doc.id] = row
+                self._ids.append(doc.id)
+                self._size += 1
+            self._matrix[row] = vector
+            if self.ann_index is not None:
+                self.ann_index.add(row, vector)
+                if self._dirty_rows is not None:
+                    self._dirty_rows.add(row)
+            # The matrix is the source of truth for vectors; drop the list copy
+            self.documents[doc.id] = Document(
+                id=doc.id, content=doc.content, metadata=doc.metadata,
+            )
+        
+        self._maybe_train()
+    
+    # ---- ANN training (off the event loop) ----
+    
+    def _maybe_train(self) -> None:
+        """Start background index training when the index asks for it."""
+        index = self.ann_index
+        if index is None or not index.should_train(self._size):
+            return
+        if self._train_task is not None and not self._train_task.done():
+            return
+        try:
+            self._train_task = asyncio.get_running_loop().create_task(self.train_index())
+        except RuntimeError:
+            pass  # No running loop; train_index() can be awaited explicitly
+    
+    async def train_index(self) -> None:
+        """
+        Train the ANN index in a worker thread.
+        
+        k-means runs on a copy of the matrix so the event loop keeps
+        serving; searches use brute force until the index is trained.
+        Rows added, deleted or moved meanwhile are re-synced on install.
+        """
+        task = self._train_task
+        if task is not None and not task.done() and task is not asyncio.current_task():
+            await task
+        index = self.ann_index
+        if index is None or self._size == 0:
+            return
+        generation = self._generation
+        snapshot = self._matrix[:self._size].copy()
+        self._dirty_rows = set()
+        try:
+            fitted = await asyncio.to_thread(index.fit, snapshot)
+            if generation != self._generation:
+                return
+            index.install(fitted)
+            for row in self._dirty_rows:
+                index.remove(row)
+                if row < self._size:
+                    index.add(row, self._matrix[row])
+        finally:
+            self._dirty_rows = None
+    
+    def _search_rows(self, query, top_k: int, nprobe: int = None, exact: bool = False):
+        """
+        Return (rows, scores) of the best matches for a normalized query.
+        
+        Uses the ANN index when one is configured and trained, unless
+        `exact` is set; falls back to brute force when the probed
+        partitions hold fewer than top_k rows.
+        """
+        np = self._np
+        index = self.ann_index
+        
+        if index is not None and not exact:
+            if index.is_trained:
+                candidates = index.candidates(query, nprobe)
+                if len(candidates) >= top_k:
+                    scores = self._matrix[candidates] @ query
+                    top = _top_k_rows(np, scores, top_k)
+                    return candidates[top], scores[top]
+        
+        scores = self._matrix[:self._size] @ query
+        top = _top_k_rows(np, scores, top_k)
+        return top, scores[top]
+    
+    def _prepare_query(self, query_embedding: list[float]):
+        query = self._np.asarray(query_embedding, dtype=self._np.float32)
+        if query.shape != (self._dimensions,):
+            raise ValueError(
+                f"Query dimension mismatch: expected {self._dimensions}, got {query.shape[-1]}"
+            )
+        return self._normalize(query)
+    
+    async def search(self, query_embedding: list[float], top_k: int = 5) -> list[SearchResult]:
+        if self._size == 0 or top_k <= 0:
+            return []
+        
+        self._maybe_train()
+        rows, scores = self._search_rows(self._prepare_query(query_embedding), top_k)
+        
+        return [
+            SearchResult(
+                document=self.documents[self._ids[row]],
+                score=float(score),
+                rank=i + 1,
+            )
+            for i, (row, score) in enumerate(zip(rows, scores))
+        ]
+    
+    async def benchmark_recall(
+        self,
+        queries: list[list[float]],
+        top_k: int = 10,
+        nprobe_values: list[int] = None,
+    ) -> list[dict]:
+        """
+        Measure ANN recall@k and latency against brute force.
+        
+        Args:
+            queries: Query embeddings
+            top_k: Number of neighbours compared per query
+            nprobe_values: nprobe settings to evaluate
+            
+        Returns:
+            One dict per nprobe with recall, avg_latency_ms and
+            brute_force_latency_ms
+        """
+        import time
+        
+        if self.ann_index is None:
+            raise ValueError("No ANN index configured")
+        if self._size == 0 or not queries:
+            return []
+        
+        prepared = [self._prepare_query(q) for q in queries]
+        if self._train_task is not None and not self._train_task.done():
+            await self._train_task
+        if not self.ann_index.is_trained:
+            await self.train_index()
+        
+        start = time.perf_counter()
+        truth = [set(self._search_rows(q, top_k, exact=True)[0].tolist()) for q in prepared]
+        brute_ms = (time.perf_counter() - start) * 1000 / len(prepared)
+        
+        nprobe_values = nprobe_values or [1, 2, 4, 8, 16, 32, 64]
+        report = []
+        for nprobe in nprobe_values:
+            hits = 0
+            start = time.perf_counter()
+            for q, expected in zip(prepared, truth):
+                rows, _ = self._search_rows(q, top_k, nprobe=nprobe)
+                hits += len(expected.intersection(rows.tolist()))
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            report.append({
+                "nprobe": nprobe,
+                "recall": hits / sum(len(t) for t in truth),
+                "avg_latency_ms": elapsed_ms / len(prepared),
+                "brute_force_latency_ms": brute_ms,
+            })
+        return report
+    
+    async def delete(self, document_ids: list[str]) -> None:
+        for doc_id in document_ids:
+            row = self._rows.pop(doc_id, None)
+            if row is None:
+                continue
+            self.documents.pop(doc_id, None)
+            if self.ann_index is not None:
+                self.ann_index.remove(row)
+                if self._dirty_rows is not None:
+                    self._dirty_rows.update((row, self._size - 1))
+            
+            # Move the last row into the hole to keep the matrix contiguous
+            last = self._size - 1
+            if row != last:
+                moved_id = self._ids[last]
+                self._matrix[row] = self._matrix[last]
+                self._ids[row] = moved_id
+                self._rows[moved_id] = row
+                if self.ann_index is not None:
+                    self.ann_index.move(last, row)
+            self._ids.pop()
+            self._size -= 1
+    
+    async def clear(self) -> None:
+        self._matrix = None
+        self._size = 0
+        self._generation += 1
+        if self.ann_index is not None:
+            self.ann_index.reset()
+        self._ids.clear()
+        self._rows.clear()
+        self.documents.clear()
+    
+    def count(self) -> int:
+        return self._size
+
+
+class _CompactionAborted(Exception):
+    """The store was cleared while a compaction was copying it."""
+
+
+class MmapVectorStore(VectorStore):
+    """
+    Persistent vector store backed by a memory-mapped embedding file.
+    
+    Layout of the store directory:
+        vectors.f32     - float32 rows of L2-normalized embeddings (np.memmap)
+        documents.jsonl - append-only content/metadata payloads
+        index.jsonl     - compact append-only log of id -> (row, offset)
+                          entries and tombstones
+    
+    Only the compact index is read at startup; embeddings are paged in by
+    the OS on demand and payloads are read for the top-k hits only, so a
+    restarted bot can serve queries without re-embedding. Adds append,
+    deletes write tombstones, and compact() rewrites the files without
+    dead rows. Compaction starts in the background once dead rows make
+    up compact_ratio of the file (and at least compact_min_rows), and
+    can be run by hand with scripts/compact_vector_store.py.
+    
+    header.json also names the generation of the three data files
+    (generation 0 uses the bare names above, later ones e.g.
+    vectors.3.f32). compact() writes a new generation and switches to it
+    by replacing the header, so a crash leaves either the old set or the
+    new one, never a mix.
+    """
+    
+    persistent = True
+    
+    VECTORS_FILE = "vectors.f32"
+    DOCUMENTS_FILE = "documents.jsonl"
+    INDEX_FILE = "index.jsonl"
+    HEADER_FILE = "header.json"
+    DATA_FILES = (VECTORS_FILE, DOCUMENTS_FILE, INDEX_FILE)
+    _DATA_FILE_PATTERN = re.compile(r"^(vectors|documents|index)(\.\d+)?\.(f32|jsonl)$")
+    
+    def __init__(
+        self,
+        directory: str,
+        initial_capacity: int = 1024,
+        compact_ratio: float = 0.3,
+        compact_min_rows: int = 1000,
+    ):
+        try:
+            import numpy as np
+        except ImportError:
+            raise ImportError("numpy not installed. Run: pip install numpy")
+        
+        import threading
+        
+        self._np = np
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._initial_capacity = max(1, initial_capacity)
+        self._lock = threading.RLock()
+        self._compact_lock = threading.Lock()  # One compaction at a time
+        self.compact_ratio = compact_ratio  # 0 disables automatic compaction
+        self.compact_min_rows = compact_min_rows
+        self._compact_task: Optional[asyncio.Task] = None
+        self._epoch = 0  # Bumped by clear() so an in-flight compaction can tell
+        
+        self._dimensions: Optional[int] = None
+        self._generation = 0
+        self._matrix = None
+        self._capacity = 0
+        self._size = 0  # Rows written, including tombstoned ones
+        self._live = None  # Bool mask over rows
+        self._ids: list[Optional[str]] = []  # Row -> document ID
+        self._entries: dict[str, tuple[int, int]] = {}  # ID -> (row, payload offset)
+        
+        self._load()
+    
+    # ---- file helpers ----
+    
+    def _path(self, name: str, generation: int = None) -> Path:
+        """Path of a store file; data files are named for their generation."""
+        generation = self._generation if generation is None else generation
+        if generation and name in self.DATA_FILES:
+            stem, ext = name.split(".", 1)
+            name = f"{stem}.{generation}.{ext}"
+        return self.directory / name
+    
+    def _remove_stale_generations(self) -> None:
+        """Delete data files not of the current generation (left by compaction)."""
+        current = {self._path(name).name for name in self.DATA_FILES}
+        for path in self.directory.iterdir():
+            if path.name not in current and self._DATA_FILE_PATTERN.match(path.name):
+                path.unlink(missing_ok=True)
+    
+    def _open_matrix(self, capacity: int) -> None:
+        """(Re)map the vectors file, growing it to `capacity` rows."""
+        np = self._np
+        path = self._path(self.VECTORS_FILE)
+        needed_bytes = capacity * self._dimensions * 4
+        
+        if self._matrix is not None:
+            self._matrix.flush()
+            self._matrix = None
+        
+        with open(path, "ab") as f:
+            if f.tell() < needed_bytes:
+                f.truncate(needed_bytes)
+        
+        self._matrix = np.memmap(path, dtype=np.float32, mode="r+", shape=(capacity, self._dimensions))
+        self._capacity = capacity
+        
+        live = np.zeros(capacity, dtype=bool)
+        if self._live is not None:
+            live[:len(self._live)] = self._live[:capacity]
+        self._live = live
+    
+    def _load(self) -> None:
+        """Rebuild in-memory row bookkeeping from the header and index log."""
+        header_path = self._path(self.HEADER_FILE)
+        if not header_path.exists():
+            return
+        
+        header = json.loads(header_path.read_text())
+        self._dimensions = header["dimensions"]
+        self._generation = header.get("generation", 0)
+        self._remove_stale_generations()
+        
+        entries: dict[str, tuple[int, int]] = {}
+        size = 0
+        index_path = self._path(self.INDEX_FILE)
+        if index_path.exists():
+            with open(index_path, "rb") as f:
+                data = f.read()
+            
+            offset = 0
+            for line in data.splitlines(keepends=True):
+                try:
+                    record = json.loads(line)
+                    if record.get("deleted"):
+                        entries.pop(record["id"], None)
+                    else:
+                        entries[record["id"]] = (record["row"], record["offset"])
+                        size = max(size, record["row"] + 1)
+                except (ValueError, KeyError, TypeError, AttributeError):
+                    if not line.endswith(b"\n"):
+                        # Torn final write from a crash; cut it so appends start clean
+                        logger.warning(f"Discarding torn vector index tail at byte {offset}")
+                        with open(index_path, "r+b") as f:
+                            f.truncate(offset)
+                        break
+                    # A garbled record must not hide the ones written after it
+                    logger.warning(f"Skipping unreadable vector index record at byte {offset}")
+                offset += len(line)
+            else:
+                if data and not data.endswith(b"\n"):
+                    with open(index_path, "ab") as f:
+                        f.write(b"\n")
+        
+        # Never map rows that have no vector on disk
+        vector_bytes = self._path(self.VECTORS_FILE).stat().st_size if self._path(self.VECTORS_FILE).exists() else 0
+        on_disk_rows = vector_bytes // (self._dimensions * 4)
+        size = min(size, on_disk_rows)
+        
+        self._open_matrix(max(self._initial_capacity, on_disk_rows, size))
+        self._size = size
+        self._ids = [None] * size
+        for doc_id, (row, offset) in entries.items():
+            if row < size:
+                self._entries[doc_id] = (row, offset)
+                self._ids[row] = doc_id
+                self._live[row] = True
+        
+        logger.info(f"Loaded mmap vector store with {len(self._entries)} documents from {self.directory}")
+    
+    def _write_header(self) -> None:
+        tmp = self._path(self.HEADER_FILE + ".tmp")
+        tmp.write_text(json.dumps({"dimensions": self._dimensions, "generation": self._generation}))
+        os.replace(tmp, self._path(self.HEADER_FILE))
+    
+    def _read_payload(self, offset: int) -> dict:
+        with open(self._path(self.DOCUMENTS_FILE), "rb") as f:
+            f.seek(offset)
+            return json.loads(f.readline())
+    
+    # ---- synchronous implementations (run in a worker thread) ----
+    
+    def _add_sync(self, documents: list[Document]) -> None:
+        np = self._np
+        vectors = np.asarray([doc.embedding for doc in documents], dtype=np.float32)
+        if vectors.ndim != 2:
+            raise ValueError("Embeddings must all have the same dimensions")
+        
+        with self._lock:
+            if self._dimensions is None:
+                self._dimensions = vectors.shape[1]
+                self._write_header()
+                self._open_matrix(self._initial_capacity)
+            elif vectors.shape[1] != self._dimensions:
+                raise ValueError(
+                    f"Embedding dimension mismatch: expected {self._dimensions}, got {vectors.shape[1]}"
+                )
+            
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            vectors = vectors / norms
+            
+            needed = self._size + len(documents)
+            if needed > self._capacity:
+                capacity = max(self._capacity, 1)
+                while capacity < needed:
+                    capacity *= 2
+                self._open_matrix(capacity)
+            
+            # Payloads and vectors are made durable before the index entry
+            # that references them, so a crash never leaves dangling rows.
+            index_lines = []
+            with open(self._path(self.DOCUMENTS_FILE), "ab") as payloads:
+                for doc, vector in zip(documents, vectors):
+                    offset = payloads.tell()
+                    payloads.write(json.dumps(
+                        {"id": doc.id, "content": doc.content, "metadata": doc.metadata},
+                        ensure_ascii=False,
+                    ).encode("utf-8") + b"\n")
+                    
+                    previous = self._entries.get(doc.id)
+                    if previous is not None:
+                        self._live[previous[0]] = False
+                    
+                    row = self._size
+                    self._matrix[row] = vector
+                    self._live[row] = True
+                    self._ids.append(doc.id)
+                    self._entries[doc.id] = (row, offset)
+                    self._size += 1
+                    index_lines.append(json.dumps({"id": doc.id, "row": row, "offset": offset}))
+            
+            self._matrix.flush()
+            with open(self._path(self.INDEX_FILE), "a", encoding="utf-8") as f:
+                f.write("\n".join(index_lines) + "\n")
+    
+    def _search_sync(self, query_embedding: list[float], top_k: int) -> list[SearchResult]:
+        np = self._np
+        with self._lock:
+            if not self._entries or top_k <= 0:
+                return []
+            
+            query = np.asarray(query_embedding, dtype=np.float32)
+            if query.shape != (self._dimensions,):
+                raise ValueError(
+                    f"Query dimension mismatch: expected {self._dimensions}, got {query.shape[-1]}"
+                )
+            norm = np.linalg.norm(query)
+            if norm > 0:
+                query = query / norm
+            
+            scores = np.asarray(self._matrix[:self._size] @ query)
+            scores[~self._live[:self._size]] = -np.inf
+            top = _top_k_rows(np, scores, min(top_k, len(self._entries)))
+            
+            results = []
+            for row in top:
+                doc_id = self._ids[row]
+                payload = self._read_payload(self._entries[doc_id][1])
+                results.append(SearchResult(
+                    document=Document(id=doc_id, content=payload["content"], metadata=payload["metadata"]),
+                    score=float(scores[row]),
+                    rank=len(results) + 1,
+                ))
+            return results
+    
+    def _delete_sync(self, document_ids: list[str]) -> None:
+        with self._lock:
+            tombstones = []
+            for doc_id in document_ids:
+                entry = self._entries.pop(doc_id, None)
+                if entry is None:
+                    continue
+                self._live[entry[0]] = False
+                tombstones.append(json.dumps({"id": doc_id, "deleted": True}))
+            
+            if tombstones:
+                with open(self._path(self.INDEX_FILE), "a", encoding="utf-8") as f:
+                    f.write("\n".join(tombstones) + "\n")
+    
+    def _compact_sync(self) -> int:
+        """
+        Rewrite the store without tombstoned rows.
+        
+        Live rows are copied to the next generation of files without
+        holding the store lock, so searches and writes carry on. Rows
+        added or deleted meanwhile are reconciled under the lock just
+        before the header rename that switches generations.
+        
+        Returns:
+            Number of dead rows reclaimed
+        """
+        with self._compact_lock:
+            with self._lock:
+                if self._dimensions is None:
+                    return 0
+                epoch = self._epoch
+                generation = self._generation + 1
+                matrix = self._matrix
+                snapshot = dict(self._entries)
+                old_docs_path = self._path(self.DOCUMENTS_FILE)
+            
+            paths = [self._path(name, generation) for name in self.DATA_FILES]
+            try:
+                with open(paths[0], "wb") as vf, \
+                        open(paths[1], "wb") as df, \
+                        open(paths[2], "w", encoding="utf-8") as xf:
+                    copied = self._copy_rows(matrix, old_docs_path, snapshot, vf, df, xf, 0)
+                    with self._lock:
+                        if self._epoch != epoch:
+                            raise _CompactionAborted()
+                        return self._finish_compaction(generation, snapshot, copied, vf, df, xf)
+            except _CompactionAborted:
+                for path in paths:
+                    path.unlink(missing_ok=True)
+                logger.info("Mmap vector store was cleared during compaction; discarded it")
+                return 0
+    
+    def _copy_rows(self, matrix, docs_path: Path, entries: dict, vf, df, xf, start_row: int) -> dict:
+        """Append the given rows to a new generation; return ID -> (row, offset)."""
+        np = self._np
+        copied: dict[str, tuple[int, int]] = {}
+        ordered = sorted((row, doc_id, offset) for doc_id, (row, offset) in entries.items())
+        with open(docs_path, "rb") as old_docs:
+            for new_row, (row, doc_id, offset) in enumerate(ordered, start_row):
+                vf.write(np.asarray(matrix[row], dtype=np.float32).tobytes())
+                old_docs.seek(offset)
+                new_offset = df.tell()
+                df.write(old_docs.readline())
+                xf.write(json.dumps({"id": doc_id, "row": new_row, "offset": new_offset}) + "\n")
+                copied[doc_id] = (new_row, new_offset)
+        return copied
+    
+    def _finish_compaction(self, generation: int, snapshot: dict, copied: dict, vf, df, xf) -> int:
+        """Reconcile writes made during the copy and switch generations (lock held)."""
+        # Rows added or replaced since the snapshot are copied now; rows
+        # deleted since then stay behind as tombstones
+        changed = {
+            doc_id: entry for doc_id, entry in self._entries.items()
+            if snapshot.get(doc_id) != entry
+        }
+        self._matrix.flush()
+        if changed:
+            copied.update(self._copy_rows(
+                self._matrix, self._path(self.DOCUMENTS_FILE), changed, vf, df, xf, len(snapshot),
+            ))
+        dead = [doc_id for doc_id in snapshot if self._entries.get(doc_id) != snapshot[doc_id]]
+        if dead:
+            xf.write("".join(json.dumps({"id": doc_id, "deleted": True}) + "\n" for doc_id in dead))
+        
+        # The new set must be on disk before the header points at it
+        for f in (vf, df, xf):
+            f.flush()
+            os.fsync(f.fileno())
+        
+        reclaimed = self._size - len(snapshot) - len(changed)
+        size = len(snapshot) + len(changed)
+        
+        self._matrix = None
+        self._generation = generation
+        self._write_header()  # Commit point: one rename switches all three files
+        self._remove_stale_generations()
+        
+        self._live = None
+        self._entries = {doc_id: copied[doc_id] for doc_id in self._entries}
+        self._size = size
+        self._ids = [None] * size
+        self._open_matrix(max(self._initial_capacity, size))
+        for doc_id, (row, _) in self._entries.items():
+            self._ids[row] = doc_id
+            self._live[row] = True
+        
+        logger.info(f"Compacted mmap vector store: reclaimed {reclaimed} rows")
+        return reclaimed
+    
+    def _should_compact(self) -> bool:
+        dead = self.tombstone_count()
+        return (
+            self.compact_ratio > 0
+            and dead >= self.compact_min_rows
+            and dead >= self._size * self.compact_ratio
+        )
+    
+    def _maybe_compact(self) -> None:
+        """Start a background compaction when enough rows are dead."""
+        if self._should_compact() and (self._compact_task is None or self._compact_task.done()):
+            self._compact_task = asyncio.create_task(self._auto_compact())
+    
+    async def _auto_compact(self) -> None:
+        try:
+            await self.compact()
+        except Exception as e:
+            logger.warning(f"Background vector store compaction failed: {e}")
+    
+    # ---- VectorStore interface ----
+    
+    async def add(self, documents: list[Document]) -> None:
+        if not documents:
+            return
+        for doc in documents:
+            if doc.embedding is None:
+                raise ValueError(f"Document {doc.id} has no embedding")
+        
+        await asyncio.to_thread(self._add_sync, documents)
+        self._maybe_compact()
+    
+    async def search(self, query_embedding: list[float], top_k: int = 5) -> list[SearchResult]:
+        return await asyncio.to_thread(self._search_sync, query_embedding, top_k)
+    
+    async def delete(self, document_ids: list[str]) -> None:
+        await asyncio.to_thread(self._delete_sync, document_ids)
+        self._maybe_compact()
+    
+    async def compact(self) -> int:
+        """
+        Rewrite the store without tombstoned rows, off the event loop.
+        
+        Returns:
+            Number of dead rows reclaimed
+        """
+        return await asyncio.to_thread(self._compact_sync)
+    
+    async def clear(self) -> None:
+        await asyncio.to_thread(self._clear_sync)
+    
+    def _clear_sync(self) -> None:
+        with self._lock:
+            if self._matrix is not None:
+                self._matrix.flush()
+                self._matrix = None
+            for name in (*self.DATA_FILES, self.HEADER_FILE):
+                self._path(name).unlink(missing_ok=True)
+            
+            self._generation = 0
+            self._epoch += 1
+            self._dimensions = None
+            self._capacity = 0
+            self._size = 0
+            self._live = None
+            self._ids = []
+            self._entries = {}
+    
+    def count(self) -> int:
+        return len(self._entries)
+    
+    def tombstone_count(self) -> int:
+        """Get number of dead rows awaiting compaction."""
+        return self._size - len(self._entries)
+
+
 class PgVectorStore(VectorStore):
     """PostgreSQL + pgvector store for production-grade vector storage."""
     
+    persistent = True
+    
     def __init__(
         self,
         host: str = None,
@@ -1121,6 +2294,8 @@ class PgVectorStore(VectorStore):
 class ChromaVectorStore(VectorStore):
     """ChromaDB vector store for persistent storage."""
     
+    persistent = True
+    
     def __init__(
         self,
         collection_name: str = "default",
@@ -1224,6 +2399,91 @@ class ChromaVectorStore(VectorStore):
         return collection.count()
 
 
+# ============================================
+# Index Manifest
+# ============================================
+
+class IndexManifest:
+    """
+    Record of indexed files used for change-aware re-indexing.
+    
+    Maps each absolute file path to its mtime, size, content hash and the
+    chunk IDs it produced, so unchanged files can be skipped and chunks of
+    changed or removed files can be deleted. With no path the manifest
+    lives only in memory (for non-persistent vector stores).
+    """
+    
+    def __init__(self, path: str = None):
+        self.path = Path(path) if path else None
+        self.entries: dict[str, dict] = {}
+        
+        if self.path and self.path.exists():
+            try:
+                self.entries = json.loads(self.path.read_text(encoding="utf-8"))
+            except (json.JSONDecodeError, OSError) as e:
+                logger.warning(f"Ignoring unreadable index manifest {self.path}: {e}")
+    
+    @staticmethod
+    def hash_file(file_path: str) -> str:
+        """Compute the sha256 of a file's content."""
+        digest = hashlib.sha256()
+        with open(file_path, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(block)
+        return digest.hexdigest()
+    
+    def get(self, file_path: str) -> Optional[dict]:
+        return self.entries.get(file_path)
+    
+    def set(self, file_path: str, mtime: float, size: int, content_hash: str, chunk_ids: list[str]) -> None:
+        self.entries[file_path] = {
+            "mtime": mtime,
+            "size": size,
+            "sha256": content_hash,
+            "chunk_ids": chunk_ids,
+        }
+    
+    def remove(self, file_path: str) -> Optional[dict]:
+        return self.entries.pop(file_path, None)
+    
+    def is_unchanged(self, file_path: str) -> bool:
+        """
+        Check whether a file matches its manifest entry.
+        
+        mtime and size are compared first; the content is only hashed when
+        they differ, and a matching hash refreshes the stored mtime/size.
+        """
+        entry = self.entries.get(file_path)
+        if entry is None:
+            return False
+        
+        stat = os.stat(file_path)
+        if entry["mtime"] == stat.st_mtime and entry["size"] == stat.st_size:
+            return True
+        
+        if entry["sha256"] == self.hash_file(file_path):
+            entry["mtime"] = stat.st_mtime
+            entry["size"] = stat.st_size
+            return True
+        return False
+    
+    def paths_under(self, directory: str) -> list[str]:
+        prefix = os.path.join(directory, "")
+        return [p for p in self.entries if p.startswith(prefix)]
+    
+    def clear(self) -> None:
+        self.entries.clear()
+    
+    def save(self) -> None:
+        """Write the manifest atomically."""
+        if not self.path:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        tmp.write_text(json.dumps(self.entries, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, self.path)
+
+
 # ============================================
 # RAG Manager
 # ============================================
@@ -1255,6 +2515,7 @@ class RAGManager:
         
         self._embedding_provider: Optional[EmbeddingProviderBase] = None
         self._vector_store: Optional[VectorStore] = None
+        self._manifest: Optional[IndexManifest] = None
         self._llm_provider: Optional[Callable] = None
         
         # Stats
@@ -1279,26 +2540,87 @@ class RAGManager:
             else:
                 # Default to OpenAI
                 self._embedding_provider = OpenAIEmbedding()
+            
+            if self.config.embedding_cache:
+                self._embedding_provider = with_embedding_cache(self._embedding_provider)
         
         return self._embedding_provider
     
     def _get_vector_store(self) -> VectorStore:
         """Lazy initialization of vector store."""
         if self._vector_store is None:
-            # Try ChromaDB first, fall back to in-memory
-            try:
-                import chromadb
+            backend = self.config.vector_store
+            
+            if backend == "auto":
+                # Try ChromaDB first, fall back to the NumPy matrix store
+                try:
+                    import chromadb
+                    backend = "chroma"
+                except ImportError:
+                    logger.info("ChromaDB not available, using local vector store")
+                    backend = "numpy"
+            
+            if backend == "chroma":
                 self._vector_store = ChromaVectorStore(
                     collection_name=self.config.collection_name,
                     persist_directory=self.config.persist_directory,
                 )
                 logger.info("Using ChromaDB vector store")
-            except ImportError:
-                logger.info("ChromaDB not available, using in-memory vector store")
+            elif backend == "mmap":
+                self._vector_store = MmapVectorStore(
+                    directory=os.path.join(
+                        self.config.persist_directory, "mmap", self.config.collection_name
+                    ),
+                    compact_ratio=self.config.mmap_compact_ratio,
+                )
+                logger.info("Using memory-mapped vector store")
+            elif backend == "numpy":
+                try:
+                    ann_index = None
+                    if self.config.ann_index == "ivf":
+                        ann_index = IVFIndex(
+                            nlist=self.config.ann_nlist,
+                            nprobe=self.config.ann_nprobe,
+                            min_train_size=self.config.ann_min_documents,
+                        )
+                    self._vector_store = NumpyVectorStore(ann_index=ann_index)
+                    logger.info("Using NumPy matrix vector store")
+                except ImportError:
+                    logger.info("NumPy not available, using in-memory vector store")
+                    self._vector_store = InMemoryVectorStore()
+            else:
                 self._vector_store = InMemoryVectorStore()
+                logger.info("Using in-memory vector store")
+            
+            # Only the numpy store builds an ANN index; say so rather than
+            # silently searching by brute force
+            if self.config.ann_index != "none" and getattr(self._vector_store, "ann_index", None) is None:
+                logger.warning(
+                    f"RAG_ANN_INDEX={self.config.ann_index!r} is ignored by "
+                    f"{type(self._vector_store).__name__}; only RAG_VECTOR_STORE=numpy supports it"
+                )
         
         return self._vector_store
     
+    def _get_manifest(self) -> IndexManifest:
+        """Lazy initialization of the index manifest."""
+        if self._manifest is None:
+            vector_store = self._get_vector_store()
+            path = None
+            if vector_store.persistent:
+                path = os.path.join(
+                    self.config.persist_directory, "manifests",
+                    f"{self.config.collection_name}_{type(vector_store).__name__}.json",
+                )
+            self._manifest = IndexManifest(path)
+            
+            # A manifest without the chunks it describes would skip everything
+            if self._manifest.entries and vector_store.count() == 0:
+                logger.info("Vector store is empty, discarding stale index manifest")
+                self._manifest.clear()
+        
+        return self._manifest
+    
     def set_llm_provider(self, provider: Callable) -> None:
         """Set the LLM provider for generation."""
         self._llm_provider = provider
@@ -1344,6 +2666,8 @@ class RAGManager:
         """
         Index a single file.
         
+        Chunks left over from a previous version of the file are removed.
+        
         Args:
             file_path: Path to the file
             metadata: Additional metadata
@@ -1351,12 +2675,34 @@ class RAGManager:
         Returns:
             Number of chunks indexed
         """
+        prepared = await asyncio.to_thread(self._prepare_file, file_path, metadata)
+        
+        await self._embed_documents(prepared.documents)
+        if prepared.documents:
+            await self._get_vector_store().add(prepared.documents)
+        
+        await self._finalize_file(prepared)
+        self._get_manifest().save()
+        
+        logger.info(f"Indexed {len(prepared.documents)} chunks from {prepared.path}")
+        return len(prepared.documents)
+    
+    def _prepare_file(self, file_path: str, metadata: dict = None) -> _PreparedFile:
+        """Load, chunk and sanitize a file (blocking; runs in a worker thread)."""
         loader = self._get_loader(file_path)
         if not loader:
             raise ValueError(f"Unsupported file type: {file_path}")
         
-        # Load document
-        documents = loader.load(file_path)
+        file_path = str(Path(file_path).resolve())
+        stat = os.stat(file_path)
+        content_hash = IndexManifest.hash_file(file_path)
+        
+        # Load document; PDF text extraction is CPU-bound pure Python
+        if isinstance(loader, PDFLoader):
+            from .process_pool import get_process_lane
+            documents = get_process_lane().call(load_pdf, file_path)
+        else:
+            documents = loader.load(file_path)
         
         # Add custom metadata
         if metadata:
@@ -1370,29 +2716,59 @@ class RAGManager:
         for doc in chunked:
             doc.metadata = self._sanitize_metadata(doc.metadata)
         
-        # Generate embeddings
+        return _PreparedFile(
+            path=file_path,
+            mtime=stat.st_mtime,
+            size=stat.st_size,
+            content_hash=content_hash,
+            documents=chunked,
+            remaining=len(chunked),
+        )
+    
+    def _embedding_batch_size(self, provider: EmbeddingProviderBase) -> int:
+        return max(1, min(self.config.embedding_batch_size, provider.max_batch_size))
+    
+    async def _embed_documents(self, documents: list[Document]) -> None:
+        """Embed documents in batches with bounded concurrency."""
+        if not documents:
+            return
+        
         embedding_provider = self._get_embedding_provider()
-        texts = [doc.content for doc in chunked]
+        batch_size = self._embedding_batch_size(embedding_provider)
+        semaphore = asyncio.Semaphore(max(1, self.config.embedding_concurrency))
         
-        # Batch embeddings
-        batch_size = 100
-        all_embeddings = []
-        for i in range(0, len(texts), batch_size):
-            batch = texts[i:i + batch_size]
-            batch_embeddings = await embedding_provider.embed(batch)
-            all_embeddings.extend(batch_embeddings)
+        async def embed_batch(batch: list[Document]) -> None:
+            async with semaphore:
+                embeddings = await embedding_provider.embed([doc.content for doc in batch])
+            for doc, embedding in zip(batch, embeddings):
+                doc.embedding = embedding
         
-        for doc, embedding in zip(chunked, all_embeddings):
-            doc.embedding = embedding
+        await asyncio.gather(*(
+            embed_batch(documents[i:i + batch_size])
+            for i in range(0, len(documents), batch_size)
+        ))
+    
+    async def _finalize_file(self, prepared: _PreparedFile) -> int:
+        """
+        Record a stored file in the manifest and drop chunks that a previous
+        version of it produced but this one did not.
         
-        # Store
-        vector_store = self._get_vector_store()
-        await vector_store.add(chunked)
+        Returns:
+            Number of stale chunks deleted
+        """
+        manifest = self._get_manifest()
+        chunk_ids = [doc.id for doc in prepared.documents]
         
-        self._indexed_count += len(chunked)
-        logger.info(f"Indexed {len(chunked)} chunks from {file_path}")
+        stale = []
+        previous = manifest.get(prepared.path)
+        if previous:
+            stale = list(set(previous["chunk_ids"]) - set(chunk_ids))
+            if stale:
+                await self._get_vector_store().delete(stale)
         
-        return len(chunked)
+        manifest.set(prepared.path, prepared.mtime, prepared.size, prepared.content_hash, chunk_ids)
+        self._indexed_count += len(chunk_ids)
+        return len(stale)
     
     async def index_directory(
         self,
@@ -1400,22 +2776,40 @@ class RAGManager:
         recursive: bool = True,
         extensions: set[str] = None,
         ignore_patterns: list[str] = None,
-    ) -> int:
+        force: bool = False,
+        progress_callback: Callable = None,
+    ) -> IndexingResult:
         """
         Index all files in a directory.
         
+        Re-runs are incremental: files whose mtime/size or content hash
+        match the manifest are skipped, and chunks of files that have been
+        deleted from disk are removed. Indexed files outside this run's
+        filters are left alone.
+        
+        Indexing is pipelined: files are loaded and chunked in worker
+        threads, chunks from different files are batched into embedding
+        requests that run concurrently, and embedded chunks are written to
+        the vector store in batches.
+        
         Args:
             directory: Path to directory
             recursive: Whether to search recursively
             extensions: File extensions to include (None = all supported)
             ignore_patterns: Glob patterns to ignore
+            force: Re-index every file even if unchanged
+            progress_callback: Called (sync or async) with the running
+                IndexingResult after each file is stored
             
         Returns:
-            Total number of chunks indexed
+            IndexingResult with counts and throughput
         """
         import fnmatch
+        import time
+        
+        started = time.perf_counter()
         
-        path = Path(directory)
+        path = Path(directory).resolve()
         if not path.exists():
             raise FileNotFoundError(f"Directory not found: {directory}")
         
@@ -1451,19 +2845,190 @@ class RAGManager:
             if ignored:
                 continue
             
-            files.append(str(file_path))
+            files.append(str(file_path.resolve()))
+        
+        result = IndexingResult(directory=str(path), files_scanned=len(files))
         
-        # Index files
-        total_chunks = 0
-        for file_path in files:
+        async def report_progress() -> None:
+            if progress_callback is None:
+                return
+            result.elapsed_seconds = time.perf_counter() - started
             try:
-                chunks = await self.index_file(file_path)
-                total_chunks += chunks
+                outcome = progress_callback(result)
+                if asyncio.iscoroutine(outcome):
+                    await outcome
             except Exception as e:
-                logger.warning(f"Failed to index {file_path}: {e}")
+                logger.debug(f"Indexing progress callback failed: {e}")
         
-        logger.info(f"Indexed {total_chunks} chunks from {len(files)} files in {directory}")
-        return total_chunks
+        await self._run_index_pipeline(files, force, result, report_progress)
+        
+        # Remove chunks of files that no longer exist. Files merely left out
+        # by this run's filters (extensions, ignore_patterns, recursive) stay.
+        manifest = self._get_manifest()
+        vector_store = self._get_vector_store()
+        current = set(files)
+        unseen = [p for p in manifest.paths_under(str(path)) if p not in current]
+        gone = await asyncio.to_thread(lambda: [p for p in unseen if not os.path.exists(p)])
+        for file_path in gone:
+            entry = manifest.remove(file_path)
+            if entry["chunk_ids"]:
+                await vector_store.delete(entry["chunk_ids"])
+                result.chunks_deleted += len(entry["chunk_ids"])
+            result.files_removed += 1
+        
+        manifest.save()
+        
+        result.elapsed_seconds = time.perf_counter() - started
+        await report_progress()
+        
+        logger.info(
+            f"Indexed {result.chunks_indexed} chunks from {result.files_indexed} files in {directory} "
+            f"({result.files_unchanged} unchanged, {result.files_removed} removed, "
+            f"{result.files_failed} failed, {result.chunks_per_second:.1f} chunks/s)"
+        )
+        return result
+    
+    async def _run_index_pipeline(
+        self,
+        files: list[str],
+        force: bool,
+        result: IndexingResult,
+        report_progress: Callable,
+    ) -> None:
+        """Load, embed and store files with bounded parallelism at each stage."""
+        config = self.config
+        manifest = self._get_manifest()
+        vector_store = self._get_vector_store()
+        embedding_provider = self._get_embedding_provider()
+        
+        batch_size = self._embedding_batch_size(embedding_provider)
+        workers = max(1, config.index_workers)
+        concurrency = max(1, config.embedding_concurrency)
+        
+        pending: dict[str, _PreparedFile] = {}
+        failed: set[str] = set()
+        embed_buffer: list[tuple[str, Document]] = []
+        write_buffer: list[tuple[str, Document]] = []
+        embed_tasks: set[asyncio.Task] = set()
+        embed_semaphore = asyncio.Semaphore(concurrency)
+        store_lock = asyncio.Lock()
+        
+        def fail(file_path: str, error: Exception) -> None:
+            if file_path not in failed:
+                failed.add(file_path)
+                pending.pop(file_path, None)
+                result.files_failed += 1
+                logger.warning(f"Failed to index {file_path}: {error}")
+        
+        async def finalize(prepared: _PreparedFile) -> None:
+            result.chunks_deleted += await self._finalize_file(prepared)
+            result.files_indexed += 1
+            result.chunks_indexed += len(prepared.documents)
+            await report_progress()
+        
+        async def flush() -> None:
+            async with store_lock:
+                if not write_buffer:
+                    return
+                batch = [item for item in write_buffer if item[0] not in failed]
+                write_buffer.clear()
+                if not batch:
+                    return
+                
+                try:
+                    await vector_store.add([doc for _, doc in batch])
+                except Exception as e:
+                    for file_path, _ in batch:
+                        fail(file_path, e)
+                    return
+                
+                for file_path, _ in batch:
+                    prepared = pending.get(file_path)
+                    if prepared is None:
+                        continue
+                    prepared.remaining -= 1
+                    if prepared.remaining == 0:
+                        del pending[file_path]
+                        await finalize(prepared)
+        
+        async def embed_batch(batch: list[tuple[str, Document]]) -> None:
+            async with embed_semaphore:
+                try:
+                    embeddings = await embedding_provider.embed([doc.content for _, doc in batch])
+                except Exception as e:
+                    for file_path, _ in batch:
+                        fail(file_path, e)
+                    return
+            
+            for (_, doc), embedding in zip(batch, embeddings):
+                doc.embedding = embedding
+            write_buffer.extend(batch)
+            if len(write_buffer) >= config.store_batch_size:
+                await flush()
+        
+        async def schedule_embedding(batch: list[tuple[str, Document]]) -> None:
+            # Backpressure: don't let loading run far ahead of embedding
+            while len(embed_tasks) >= concurrency * 2:
+                await asyncio.wait(embed_tasks, return_when=asyncio.FIRST_COMPLETED)
+            task = asyncio.create_task(embed_batch(batch))
+            embed_tasks.add(task)
+            task.add_done_callback(embed_tasks.discard)
+        
+        def load(file_path: str) -> Optional[_PreparedFile]:
+            if not force and file_path in manifest.entries and manifest.is_unchanged(file_path):
+                return None
+            return self._prepare_file(file_path)
+        
+        async def load_task(file_path: str):
+            try:
+                return file_path, await asyncio.to_thread(load, file_path), None
+            except Exception as e:
+                return file_path, None, e
+        
+        # Stage 1: load and chunk in worker threads, keeping a bounded window in flight
+        file_iter = iter(files)
+        loading: set[asyncio.Task] = set()
+        
+        def start_next_load() -> None:
+            for file_path in file_iter:
+                loading.add(asyncio.create_task(load_task(file_path)))
+                return
+        
+        for _ in range(workers):
+            start_next_load()
+        
+        while loading:
+            done, loading = await asyncio.wait(loading, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                start_next_load()
+                file_path, prepared, error = task.result()
+                
+                if error is not None:
+                    fail(file_path, error)
+                    continue
+                if prepared is None:
+                    result.files_unchanged += 1
+                    continue
+                if not prepared.documents:
+                    await finalize(prepared)
+                    continue
+                
+                # Stage 2: batch chunks across files into embedding requests
+                pending[file_path] = prepared
+                embed_buffer.extend((file_path, doc) for doc in prepared.documents)
+                while len(embed_buffer) >= batch_size:
+                    await schedule_embedding(embed_buffer[:batch_size])
+                    del embed_buffer[:batch_size]
+        
+        if embed_buffer:
+            await schedule_embedding(embed_buffer[:])
+            embed_buffer.clear()
+        
+        while embed_tasks:
+            await asyncio.gather(*list(embed_tasks))
+        
+        # Stage 3: write whatever is left
+        await flush()
     
     async def index_text(
         self,
@@ -1502,12 +3067,7 @@ class RAGManager:
         chunked = self._chunker.chunk_documents([doc])
         
         # Embed
-        embedding_provider = self._get_embedding_provider()
-        texts = [d.content for d in chunked]
-        embeddings = await embedding_provider.embed(texts)
-        
-        for d, emb in zip(chunked, embeddings):
-            d.embedding = emb
+        await self._embed_documents(chunked)
         
         # Store
         vector_store = self._get_vector_store()
@@ -1712,16 +3272,24 @@ Context:
         """Clear all indexed documents."""
         vector_store = self._get_vector_store()
         await vector_store.clear()
+        manifest = self._get_manifest()
+        manifest.clear()
+        manifest.save()
         self._indexed_count = 0
         logger.info("RAG index cleared")
     
     def get_stats(self) -> dict:
         """Get RAG system statistics."""
         vector_store = self._get_vector_store()
+        embedding_provider = self._embedding_provider
         return {
             "indexed_documents": vector_store.count(),
             "total_indexed": self._indexed_count,
             "total_queries": self._query_count,
+            "embedding_cache": (
+                embedding_provider.cache.get_stats()
+                if isinstance(embedding_provider, CachedEmbedding) else None
+            ),
             "config": {
                 "chunk_size": self.config.chunk_size,
                 "chunk_overlap": self.config.chunk_overlap,
@@ -1730,6 +3298,9 @@ Context:
                 "embedding_model": self.config.embedding_model,
                 "top_k": self.config.top_k,
                 "similarity_threshold": self.config.similarity_threshold,
+                "vector_store": self.config.vector_store,
+                "ann_index": self.config.ann_index,
+                "ann_nprobe": self.config.ann_nprobe,
             },
         }
 
@@ -1772,6 +3343,13 @@ def get_rag_manager(config: RAGConfig = None) -> RAGManager:
             similarity_threshold=float(os.getenv("RAG_SIMILARITY_THRESHOLD", "0.7")),
             persist_directory=os.getenv("RAG_PERSIST_DIR", "data/rag"),
             collection_name=os.getenv("RAG_COLLECTION", "default"),
+            embedding_cache=os.getenv("RAG_EMBEDDING_CACHE", "true").lower() == "true",
+            vector_store=os.getenv("RAG_VECTOR_STORE", "auto").lower(),
+            mmap_compact_ratio=float(os.getenv("RAG_MMAP_COMPACT_RATIO", "0.3")),
+            ann_index=os.getenv("RAG_ANN_INDEX", "none").lower(),
+            ann_nlist=int(os.getenv("RAG_ANN_NLIST", "0")),
+            ann_nprobe=int(os.getenv("RAG_ANN_NPROBE", "8")),
+            ann_min_documents=int(os.getenv("RAG_ANN_MIN_DOCUMENTS", "10000")),
         )
         
         _rag_manager = RAGManager(config or default_config)
@@ -1806,6 +3384,7 @@ __all__ = [
     "SearchResult",
     "RAGConfig",
     "RAGResponse",
+    "IndexingResult",
     # Document loaders
     "DocumentLoader",
     "TextLoader",
@@ -1820,12 +3399,20 @@ __all__ = [
     "OpenAIEmbedding",
     "GoogleEmbedding",
     "OllamaEmbedding",
+    "EmbeddingCache",
+    "CachedEmbedding",
+    "get_embedding_cache",
+    "with_embedding_cache",
     # Vector stores
     "VectorStore",
+    "IVFIndex",
     "InMemoryVectorStore",
+    "NumpyVectorStore",
+    "MmapVectorStore",
     "PgVectorStore",
     "ChromaVectorStore",
     # Manager
+    "IndexManifest",
     "RAGManager",
     "get_rag_manager",
     "reset_rag_manager",
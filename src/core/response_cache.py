@@ -0,0 +1,428 @@
+"""
+Response Cache for CursorBot
+
+Caches LLM responses so repeated prompts (translations, summaries, task
+templates) are answered without another paid API call.
+
+Two tiers:
+- Exact: keyed on the normalized messages, provider, model, temperature
+  and max_tokens
+- Semantic (optional): the last user message is embedded and compared by
+  cosine similarity against cached prompts that share everything else
+  (system prompt, earlier turns, model, temperature)
+
+Entries expire after a TTL and the least recently used are evicted.
+Caching is opt-in per request or per LLMTaskManager template.
+
+Usage:
+    from src.core.llm_providers import get_llm_manager
+
+    manager = get_llm_manager()
+
+    # Exact-match caching for this request
+    text = await manager.generate(messages, cache="exact")
+
+    # Also reuse answers to near-identical prompts
+    text = await manager.generate(messages, cache="semantic")
+"""
+
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Any, Optional
+
+from ..utils.logger import logger
+
+
+class CacheMode(Enum):
+    """Response cache tiers a request opts into."""
+    OFF = "off"
+    EXACT = "exact"
+    SEMANTIC = "semantic"
+
+
+@dataclass
+class ResponseCacheConfig:
+    """Configuration for the LLM response cache."""
+    enabled: bool = True
+    max_entries: int = 1000
+    ttl_seconds: float = 3600.0
+    # Minimum cosine similarity for a semantic hit
+    similarity_threshold: float = 0.95
+
+    @classmethod
+    def from_env(cls) -> "ResponseCacheConfig":
+        return cls(
+            enabled=os.getenv("LLM_RESPONSE_CACHE", "true").lower() in ("true", "1", "yes"),
+            max_entries=int(os.getenv("LLM_RESPONSE_CACHE_MAX_ENTRIES", "1000")),
+            ttl_seconds=float(os.getenv("LLM_RESPONSE_CACHE_TTL", "3600")),
+            similarity_threshold=float(os.getenv("LLM_RESPONSE_CACHE_SIMILARITY", "0.95")),
+        )
+
+
+@dataclass
+class _CacheEntry:
+    """A cached response and what it cost to produce."""
+    response: str
+    scope: str
+    model: str
+    created_at: float
+    input_chars: int
+    elapsed: float
+    embedding: Any = None  # Normalized numpy vector for the semantic tier
+    hits: int = 0
+
+
+@dataclass
+class CacheRequest:
+    """
+    Cache keys for one request, built once by ResponseCache.request().
+
+    Passing the same object to lookup() and store() means the prompt is
+    normalized, hashed and (for the semantic tier) embedded only once.
+    """
+    mode: CacheMode
+    params: dict
+    exact_key: str
+    scope: str
+    query: str
+    input_chars: int
+    embedding: Any = None
+    embedded: bool = False
+
+
+@dataclass
+class _CacheStats:
+    """Response cache counters."""
+    exact_hits: int = 0
+    semantic_hits: int = 0
+    misses: int = 0
+    stores: int = 0
+    evictions: int = 0
+    expirations: int = 0
+    cost_saved: float = 0.0
+    time_saved_seconds: float = 0.0
+    by_model: dict = field(default_factory=dict)
+
+
+class ResponseCache:
+    """
+    Two-tier (exact + semantic) LRU cache for LLM responses.
+
+    The semantic tier needs an embedding provider; without one only
+    exact matches are served.
+    """
+
+    def __init__(self, config: ResponseCacheConfig = None, embedding_provider=None):
+        self.config = config or ResponseCacheConfig()
+        self._embedding_provider = embedding_provider
+        self._entries: OrderedDict[str, _CacheEntry] = OrderedDict()
+        self._stats = _CacheStats()
+
+    # ============================================
+    # Keys
+    # ============================================
+
+    @staticmethod
+    def normalize_messages(messages: list[dict]) -> list[tuple[str, str]]:
+        """Reduce messages to (role, content) with whitespace collapsed."""
+        normalized = []
+        for message in messages:
+            content = message.get("content", "")
+            if not isinstance(content, str):
+                content = json.dumps(content, sort_keys=True, ensure_ascii=False)
+            normalized.append((message.get("role", "user"), " ".join(content.split())))
+        return normalized
+
+    @staticmethod
+    def _hash(value: Any) -> str:
+        payload = json.dumps(value, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _make_keys(self, messages: list[dict], params: dict) -> tuple[str, str, str]:
+        """
+        Build (exact key, semantic scope, semantic query text).
+
+        The scope covers everything except the last user message, so a
+        semantic hit can only differ from the cached prompt in that message.
+        """
+        normalized = self.normalize_messages(messages)
+
+        last_user = next(
+            (i for i in range(len(normalized) - 1, -1, -1) if normalized[i][0] == "user"),
+            None,
+        )
+        query = normalized[last_user][1] if last_user is not None else ""
+        context = [m for i, m in enumerate(normalized) if i != last_user]
+
+        exact_key = self._hash({"messages": normalized, "params": params})
+        scope = self._hash({"context": context, "params": params})
+        return exact_key, scope, query
+
+    # ============================================
+    # Lookup / Store
+    # ============================================
+
+    def request(
+        self,
+        messages: list[dict],
+        mode: CacheMode = CacheMode.EXACT,
+        **params,
+    ) -> CacheRequest:
+        """
+        Build the cache keys for a request.
+
+        Args:
+            messages: Conversation messages
+            mode: EXACT, or SEMANTIC to also accept similar prompts
+            **params: Request parameters that must match (provider, model, temperature...)
+        """
+        exact_key, scope, query = self._make_keys(messages, params)
+        return CacheRequest(
+            mode=mode,
+            params=params,
+            exact_key=exact_key,
+            scope=scope,
+            query=query,
+            input_chars=len(str(messages)),
+        )
+
+    async def lookup(self, request: CacheRequest) -> Optional[str]:
+        """
+        Look up a cached response.
+
+        Returns:
+            Cached response text, or None on a miss
+        """
+        if not self.config.enabled or request.mode == CacheMode.OFF:
+            return None
+
+        self._evict_expired()
+
+        entry = self._entries.get(request.exact_key)
+        if entry is not None:
+            self._entries.move_to_end(request.exact_key)
+            self._record_hit(entry, semantic=False)
+            return entry.response
+
+        if request.mode == CacheMode.SEMANTIC and request.query:
+            key = await self._find_similar(request)
+            if key is not None:
+                entry = self._entries[key]
+                self._entries.move_to_end(key)
+                self._record_hit(entry, semantic=True)
+                return entry.response
+
+        self._stats.misses += 1
+        return None
+
+    async def store(
+        self,
+        request: CacheRequest,
+        response: str,
+        elapsed: float = 0.0,
+        answered_model: Optional[str] = None,
+    ) -> None:
+        """
+        Store the response produced for a request.
+
+        ``answered_model`` is the model that actually produced the
+        response (e.g. a failover backup); it is used for pricing and
+        stats and defaults to the request's ``model`` parameter.
+        """
+        if not self.config.enabled or request.mode == CacheMode.OFF or not response:
+            return
+
+        embedding = None
+        if request.mode == CacheMode.SEMANTIC and request.query:
+            embedding = await self._query_embedding(request)
+
+        self._entries[request.exact_key] = _CacheEntry(
+            response=response,
+            scope=request.scope,
+            model=str(answered_model or request.params.get("model") or "default"),
+            created_at=time.time(),
+            input_chars=request.input_chars,
+            elapsed=elapsed,
+            embedding=embedding,
+        )
+        self._entries.move_to_end(request.exact_key)
+        self._stats.stores += 1
+
+        while len(self._entries) > self.config.max_entries:
+            self._entries.popitem(last=False)
+            self._stats.evictions += 1
+
+    async def get(
+        self,
+        messages: list[dict],
+        mode: CacheMode = CacheMode.EXACT,
+        **params,
+    ) -> Optional[str]:
+        """Look up a cached response; shorthand for lookup(request(...))."""
+        return await self.lookup(self.request(messages, mode, **params))
+
+    async def put(
+        self,
+        messages: list[dict],
+        response: str,
+        mode: CacheMode = CacheMode.EXACT,
+        elapsed: float = 0.0,
+        answered_model: Optional[str] = None,
+        **params,
+    ) -> None:
+        """
+        Store a response; shorthand for store(request(...), ...).
+
+        ``params`` must be the ones passed to ``get()`` so later lookups
+        find the entry.
+        """
+        await self.store(
+            self.request(messages, mode, **params), response,
+            elapsed=elapsed, answered_model=answered_model,
+        )
+
+    def clear(self) -> None:
+        """Drop all cached responses."""
+        self._entries.clear()
+
+    def _evict_expired(self) -> None:
+        cutoff = time.time() - self.config.ttl_seconds
+        expired = [key for key, entry in self._entries.items() if entry.created_at < cutoff]
+        for key in expired:
+            del self._entries[key]
+        self._stats.expirations += len(expired)
+
+    def _record_hit(self, entry: _CacheEntry, semantic: bool) -> None:
+        from .analytics import CostEstimator
+
+        entry.hits += 1
+        if semantic:
+            self._stats.semantic_hits += 1
+        else:
+            self._stats.exact_hits += 1
+
+        # Approximate tokens as chars / 4, as elsewhere in the bot
+        saved = CostEstimator.estimate(entry.model, entry.input_chars // 4, len(entry.response) // 4)
+        self._stats.cost_saved += saved
+        self._stats.time_saved_seconds += entry.elapsed
+
+        model_stats = self._stats.by_model.setdefault(entry.model, {"hits": 0, "cost_saved": 0.0})
+        model_stats["hits"] += 1
+        model_stats["cost_saved"] += saved
+
+    # ============================================
+    # Semantic Tier
+    # ============================================
+
+    def _get_embedding_provider(self):
+        if self._embedding_provider is None:
+            from .rag import get_rag_manager
+            self._embedding_provider = get_rag_manager()._get_embedding_provider()
+        return self._embedding_provider
+
+    async def _embed(self, text: str):
+        """Embed text as a normalized vector, or None if embeddings are unavailable."""
+        try:
+            import numpy as np
+
+            vectors = await self._get_embedding_provider().embed([text])
+            vector = np.asarray(vectors[0], dtype=np.float32)
+            norm = float(np.linalg.norm(vector))
+            return vector / norm if norm else None
+        except Exception as e:
+            logger.debug(f"Response cache embedding unavailable: {e}")
+            return None
+
+    async def _query_embedding(self, request: CacheRequest):
+        """Embed the request's query, at most once per request."""
+        if not request.embedded:
+            request.embedding = await self._embed(request.query)
+            request.embedded = True
+        return request.embedding
+
+    async def _find_similar(self, request: CacheRequest) -> Optional[str]:
+        """Find the most similar cached prompt in the same scope above the threshold."""
+        candidates = [
+            (key, entry.embedding) for key, entry in self._entries.items()
+            if entry.scope == request.scope and entry.embedding is not None
+        ]
+        if not candidates:
+            return None
+
+        vector = await self._query_embedding(request)
+        if vector is None:
+            return None
+
+        import numpy as np
+
+        matrix = np.stack([embedding for _, embedding in candidates])
+        scores = matrix @ vector
+        best = int(np.argmax(scores))
+        if scores[best] >= self.config.similarity_threshold:
+            return candidates[best][0]
+        return None
+
+    # ============================================
+    # Statistics
+    # ============================================
+
+    def get_stats(self) -> dict:
+        """Get cache hit/miss and savings counters."""
+        hits = self._stats.exact_hits + self._stats.semantic_hits
+        lookups = hits + self._stats.misses
+        return {
+            "enabled": self.config.enabled,
+            "entries": len(self._entries),
+            "max_entries": self.config.max_entries,
+            "ttl_seconds": self.config.ttl_seconds,
+            "hits": hits,
+            "exact_hits": self._stats.exact_hits,
+            "semantic_hits": self._stats.semantic_hits,
+            "misses": self._stats.misses,
+            "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+            "stores": self._stats.stores,
+            "evictions": self._stats.evictions,
+            "expirations": self._stats.expirations,
+            "cost_saved": round(self._stats.cost_saved, 6),
+            "time_saved_seconds": round(self._stats.time_saved_seconds, 2),
+            "by_model": {
+                model: {"hits": s["hits"], "cost_saved": round(s["cost_saved"], 6)}
+                for model, s in self._stats.by_model.items()
+            },
+        }
+
+
+# ============================================
+# Global Instance
+# ============================================
+
+_response_cache: Optional[ResponseCache] = None
+
+
+def get_response_cache() -> ResponseCache:
+    """Get the global response cache instance."""
+    global _response_cache
+    if _response_cache is None:
+        _response_cache = ResponseCache(ResponseCacheConfig.from_env())
+    return _response_cache
+
+
+def reset_response_cache() -> None:
+    """Reset the response cache instance."""
+    global _response_cache
+    _response_cache = None
+
+
+__all__ = [
+    "CacheMode",
+    "CacheRequest",
+    "ResponseCacheConfig",
+    "ResponseCache",
+    "get_response_cache",
+    "reset_response_cache",
+]
@@ -7,12 +7,21 @@ Provides:
 - One-time scheduled tasks
 - Recurring tasks
 - Webhook triggers
+
+Due jobs are kept in a min-heap keyed by next run time; the scheduler
+sleeps until the earliest deadline (or until a job is added or
+cancelled) and dispatches due jobs concurrently, up to a limit.
 """
 
 import asyncio
+import heapq
+import json
+import os
+import random
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta
 from enum import Enum
+from pathlib import Path
 from typing import Any, Callable, Optional
 import uuid
 
@@ -33,6 +42,34 @@ class JobType(Enum):
     CRON = "cron"  # Cron-style scheduling (simplified)
 
 
+class MisfirePolicy(Enum):
+    """What to do with a job whose run time passed more than the grace period ago."""
+    RUN = "run"  # Run once now; missed intervals are coalesced
+    SKIP = "skip"  # Skip this run and wait for the next one
+
+
+@dataclass
+class SchedulerConfig:
+    """Scheduler configuration."""
+    max_concurrency: int = 8  # Jobs running at the same time
+    misfire_grace_seconds: float = 60.0  # Lateness tolerated before the misfire policy applies
+    misfire_policy: MisfirePolicy = MisfirePolicy.RUN
+    state_path: Optional[str] = None  # None disables persistence; from_env() enables it
+    shutdown_timeout: float = 10.0  # Seconds stop() waits for running jobs
+    max_sleep_seconds: float = 60.0  # Re-check at least this often (wall clock changes)
+    state_max_age_seconds: float = 7 * 86400  # Saved jobs overdue by more than this are dropped on load
+
+    @classmethod
+    def from_env(cls) -> "SchedulerConfig":
+        return cls(
+            max_concurrency=int(os.getenv("SCHEDULER_MAX_CONCURRENCY", "8")),
+            misfire_grace_seconds=float(os.getenv("SCHEDULER_MISFIRE_GRACE", "60")),
+            misfire_policy=MisfirePolicy(os.getenv("SCHEDULER_MISFIRE_POLICY", "run").lower()),
+            state_path=os.getenv("SCHEDULER_STATE_PATH", "data/scheduler_state.json") or None,
+            state_max_age_seconds=float(os.getenv("SCHEDULER_STATE_MAX_AGE", str(7 * 86400))),
+        )
+
+
 @dataclass
 class ScheduledJob:
     """Represents a scheduled job."""
@@ -58,6 +95,10 @@ class ScheduledJob:
     run_count: int = 0
     max_runs: Optional[int] = None  # None = unlimited
 
+    # Policies
+    misfire_policy: Optional[MisfirePolicy] = None  # None = scheduler default
+    jitter_seconds: float = 0  # Random delay of up to this much added to each run
+
     # Results
     last_result: Any = None
     last_error: Optional[str] = None
@@ -83,6 +124,17 @@ class ScheduledJob:
             "run_count": self.run_count,
         }
 
+    @property
+    def spec(self) -> str:
+        """Identifies the job's timing, to match persisted state after a restart."""
+        if self.job_type == JobType.ONCE:
+            timing = self.run_at.isoformat() if self.run_at else ""
+        elif self.job_type == JobType.INTERVAL:
+            timing = str(self.interval_seconds)
+        else:
+            timing = self.cron_expression or ""
+        return f"{self.job_type.value}:{timing}"
+
 
 class Scheduler:
     """
@@ -108,11 +160,28 @@ class Scheduler:
         )
     """
 
-    def __init__(self):
+    def __init__(self, config: SchedulerConfig = None):
+        self.config = config or SchedulerConfig()
         self._jobs: dict[str, ScheduledJob] = {}
         self._running = False
         self._task: Optional[asyncio.Task] = None
 
+        # Min-heap of (next_run timestamp, sequence, job_id). Entries are
+        # invalidated lazily: one is live only while its sequence matches
+        # _heap_seq[job_id].
+        self._heap: list[tuple[float, int, str]] = []
+        self._heap_seq: dict[str, int] = {}
+        self._seq = 0
+        self._wakeup: Optional[asyncio.Event] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._inflight: set[asyncio.Task] = set()
+
+        self._dispatched = 0
+        self._misfired = 0
+
+        # Persisted state of jobs not (yet) re-registered since startup
+        self._saved_state: dict[str, dict] = self._load_state()
+
     def _generate_id(self) -> str:
         """Generate a unique job ID."""
         return uuid.uuid4().hex[:12]
@@ -123,11 +192,13 @@ class Scheduler:
             return
 
         self._running = True
+        self._wakeup = asyncio.Event()
+        self._semaphore = asyncio.Semaphore(self.config.max_concurrency)
         self._task = asyncio.create_task(self._run_loop())
         logger.info("Scheduler started")
 
     async def stop(self) -> None:
-        """Stop the scheduler."""
+        """Stop the scheduler, letting running jobs finish briefly."""
         self._running = False
         if self._task:
             self._task.cancel()
@@ -135,26 +206,142 @@ class Scheduler:
                 await self._task
             except asyncio.CancelledError:
                 pass
+
+        if self._inflight:
+            done, pending = await asyncio.wait(self._inflight, timeout=self.config.shutdown_timeout)
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+        # Saved jobs not re-registered during this run are gone for good
+        self._saved_state.clear()
+        self._save_state()
         logger.info("Scheduler stopped")
 
+    # ============================================
+    # Timer Heap
+    # ============================================
+
+    def _push(self, job: ScheduledJob) -> None:
+        """(Re)insert a job's next run and wake the loop."""
+        if self._jobs.get(job.job_id) is not job:
+            # Replaced by a re-registration while it ran; the new job has its own entry
+            return
+        self._seq += 1
+        self._heap_seq[job.job_id] = self._seq
+        if job.next_run is not None and job.status == JobStatus.PENDING:
+            heapq.heappush(self._heap, (job.next_run.timestamp(), self._seq, job.job_id))
+        self._notify()
+
+    def _discard(self, job_id: str) -> None:
+        """Invalidate a job's heap entry."""
+        self._heap_seq.pop(job_id, None)
+        # Drop dead entries from the top so the next deadline stays accurate
+        while self._heap and self._heap_seq.get(self._heap[0][2]) != self._heap[0][1]:
+            heapq.heappop(self._heap)
+        self._notify()
+
+    def _notify(self) -> None:
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def _pop_due(self, now: float) -> list[ScheduledJob]:
+        """Remove and return jobs whose run time has come."""
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            _, seq, job_id = heapq.heappop(self._heap)
+            if self._heap_seq.get(job_id) != seq:
+                continue
+            del self._heap_seq[job_id]
+            job = self._jobs.get(job_id)
+            if job is not None and job.status == JobStatus.PENDING:
+                due.append(job)
+        return due
+
+    def _next_deadline(self) -> Optional[float]:
+        while self._heap:
+            timestamp, seq, job_id = self._heap[0]
+            if self._heap_seq.get(job_id) == seq:
+                return timestamp
+            heapq.heappop(self._heap)
+        return None
+
     async def _run_loop(self) -> None:
-        """Main scheduler loop."""
+        """Main scheduler loop: sleep until the next deadline, then dispatch."""
         while self._running:
             try:
-                await self._check_and_run_jobs()
-                await asyncio.sleep(1)  # Check every second
+                self._wakeup.clear()
+                for job in self._pop_due(datetime.now().timestamp()):
+                    self._dispatch(job)
+
+                deadline = self._next_deadline()
+                timeout = self.config.max_sleep_seconds
+                if deadline is not None:
+                    timeout = min(timeout, max(0.0, deadline - datetime.now().timestamp()))
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
             except asyncio.CancelledError:
                 break
             except Exception as e:
                 logger.error(f"Scheduler error: {e}")
                 await asyncio.sleep(5)
 
+    def _dispatch(self, job: ScheduledJob) -> None:
+        """Start a due job without waiting for it."""
+        lateness = self._lateness(job)
+        job.status = JobStatus.RUNNING
+        self._dispatched += 1
+        task = asyncio.create_task(self._run_limited(job, lateness), name=f"job:{job.job_id}")
+        self._inflight.add(task)
+        task.add_done_callback(self._inflight.discard)
+
+    @staticmethod
+    def _lateness(job: ScheduledJob) -> float:
+        return (datetime.now() - job.next_run).total_seconds() if job.next_run else 0
+
+    async def _run_limited(self, job: ScheduledJob, lateness: float) -> None:
+        # Lateness is taken when the job is popped; waiting for a concurrency
+        # slot afterwards is not a misfire
+        policy = job.misfire_policy or self.config.misfire_policy
+        if lateness > self.config.misfire_grace_seconds and policy == MisfirePolicy.SKIP:
+            self._misfired += 1
+            logger.warning(f"Job {job.job_id} ({job.name}) misfired by {lateness:.0f}s, skipping")
+            if job.job_type == JobType.ONCE:
+                job.status = JobStatus.FAILED
+                job.last_error = "Missed scheduled run"
+                job.next_run = None
+            else:
+                self._update_job_schedule(job)
+            if job.status != JobStatus.CANCELLED:
+                self._push(job)
+            self._save_state()
+            return
+
+        async with self._semaphore:
+            if job.status == JobStatus.CANCELLED:
+                # Cancelled while waiting for a slot
+                return
+            await self._run_job(job)
+            # A job cancelled while it ran stays cancelled
+            if job.status != JobStatus.CANCELLED:
+                self._push(job)
+            self._save_state()
+
     async def _check_and_run_jobs(self) -> None:
-        """Check and run due jobs."""
-        due_jobs = [j for j in self._jobs.values() if j.is_due]
+        """Run all due jobs now and wait for them."""
+        due_jobs = self._pop_due(datetime.now().timestamp())
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.config.max_concurrency)
 
+        runs = []
         for job in due_jobs:
-            await self._run_job(job)
+            runs.append(self._run_limited(job, self._lateness(job)))
+            job.status = JobStatus.RUNNING
+            self._dispatched += 1
+        await asyncio.gather(*runs)
 
     async def _run_job(self, job: ScheduledJob) -> None:
         """Run a single job."""
@@ -173,6 +360,10 @@ class Scheduler:
 
             logger.debug(f"Job {job.job_id} ({job.name}) completed")
 
+        except asyncio.CancelledError:
+            if job.status != JobStatus.CANCELLED:
+                job.status = JobStatus.PENDING
+            raise
         except Exception as e:
             job.last_error = str(e)
             job.run_count += 1
@@ -183,6 +374,10 @@ class Scheduler:
 
     def _update_job_schedule(self, job: ScheduledJob) -> None:
         """Update job status and schedule next run."""
+        if job.status == JobStatus.CANCELLED:
+            job.next_run = None
+            return
+
         # Check if max runs reached
         if job.max_runs and job.run_count >= job.max_runs:
             job.status = JobStatus.COMPLETED
@@ -195,11 +390,108 @@ class Scheduler:
 
         elif job.job_type == JobType.INTERVAL:
             job.status = JobStatus.PENDING
-            job.next_run = datetime.now() + timedelta(seconds=job.interval_seconds)
+            job.next_run = self._jittered(job, datetime.now() + timedelta(seconds=job.interval_seconds))
 
         elif job.job_type == JobType.CRON:
             job.status = JobStatus.PENDING
-            job.next_run = self._calculate_next_cron_run(job.cron_expression)
+            job.next_run = self._jittered(job, self._calculate_next_cron_run(job.cron_expression))
+
+    @staticmethod
+    def _jittered(job: ScheduledJob, run_at: datetime) -> datetime:
+        if job.jitter_seconds:
+            return run_at + timedelta(seconds=random.uniform(0, job.jitter_seconds))
+        return run_at
+
+    # ============================================
+    # Persistence
+    # ============================================
+
+    def _load_state(self) -> dict[str, dict]:
+        """
+        Read persisted job state; callbacks are re-attached when jobs are re-registered.
+
+        Entries whose next run is more than state_max_age_seconds overdue
+        are dropped; the rest are kept until stop() and forgotten then if
+        no job re-registered them.
+        """
+        if not self.config.state_path:
+            return {}
+        path = Path(self.config.state_path)
+        if not path.exists():
+            return {}
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Failed to load scheduler state: {e}")
+            return {}
+
+        cutoff = datetime.now() - timedelta(seconds=self.config.state_max_age_seconds)
+        fresh = {}
+        for job_id, item in state.items():
+            try:
+                next_run = datetime.fromisoformat(item["next_run"]) if item.get("next_run") else None
+            except (AttributeError, TypeError, ValueError):
+                continue
+            if next_run is None or next_run >= cutoff:
+                fresh[job_id] = item
+        if len(fresh) < len(state):
+            logger.info(f"Dropped {len(state) - len(fresh)} stale scheduler state entries")
+        return fresh
+
+    @staticmethod
+    def _job_state(job: ScheduledJob) -> dict:
+        return {
+            "spec": job.spec,
+            "name": job.name,
+            "status": job.status.value,
+            "next_run": job.next_run.isoformat() if job.next_run else None,
+            "last_run": job.last_run.isoformat() if job.last_run else None,
+            "run_count": job.run_count,
+            "last_error": job.last_error,
+        }
+
+    def _save_state(self) -> None:
+        """Write the state of live jobs atomically."""
+        if not self.config.state_path:
+            return
+
+        state = dict(self._saved_state)
+        for job in self._jobs.values():
+            state[job.job_id] = self._job_state(job)
+        # Finished jobs need no restoring
+        state = {
+            job_id: item for job_id, item in state.items()
+            if item["status"] in (JobStatus.PENDING.value, JobStatus.RUNNING.value)
+        }
+
+        path = Path(self.config.state_path)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix(".json.tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(state, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.error(f"Failed to save scheduler state: {e}")
+
+    def _add_job(self, job: ScheduledJob) -> None:
+        """Register a job, restoring persisted state for the same ID and timing."""
+        saved = self._saved_state.pop(job.job_id, None)
+        if saved and saved.get("spec") == job.spec:
+            job.run_count = saved.get("run_count", 0)
+            job.last_error = saved.get("last_error")
+            if saved.get("last_run"):
+                job.last_run = datetime.fromisoformat(saved["last_run"])
+            if saved.get("next_run"):
+                # Missed while stopped: the misfire policy decides at dispatch
+                job.next_run = datetime.fromisoformat(saved["next_run"])
+
+        if job.job_id in self._jobs:
+            self._discard(job.job_id)
+        self._jobs[job.job_id] = job
+        self._push(job)
+        self._save_state()
 
     def _calculate_next_cron_run(self, expression: str) -> datetime:
         """
@@ -249,6 +541,8 @@ class Scheduler:
         callback_kwargs: dict = None,
         user_id: int = None,
         chat_id: int = None,
+        job_id: str = None,
+        misfire_policy: MisfirePolicy = None,
     ) -> ScheduledJob:
         """
         Schedule a one-time job.
@@ -261,12 +555,14 @@ class Scheduler:
             callback_kwargs: Kwargs for callback
             user_id: Associated user ID
             chat_id: Associated chat ID
+            job_id: Stable ID; replaces an existing job and restores its persisted state
+            misfire_policy: Overrides the scheduler default
 
         Returns:
             ScheduledJob instance
         """
         job = ScheduledJob(
-            job_id=self._generate_id(),
+            job_id=job_id or self._generate_id(),
             name=name,
             job_type=JobType.ONCE,
             callback=callback,
@@ -276,9 +572,10 @@ class Scheduler:
             chat_id=chat_id,
             run_at=run_at,
             next_run=run_at,
+            misfire_policy=misfire_policy,
         )
 
-        self._jobs[job.job_id] = job
+        self._add_job(job)
         logger.info(f"Scheduled one-time job: {name} at {run_at}")
         return job
 
@@ -293,6 +590,9 @@ class Scheduler:
         chat_id: int = None,
         start_immediately: bool = False,
         max_runs: int = None,
+        job_id: str = None,
+        misfire_policy: MisfirePolicy = None,
+        jitter_seconds: float = 0,
     ) -> ScheduledJob:
         """
         Schedule a recurring interval job.
@@ -303,6 +603,9 @@ class Scheduler:
             callback: Function to call
             start_immediately: Run immediately, then on interval
             max_runs: Maximum number of runs (None = unlimited)
+            job_id: Stable ID; replaces an existing job and restores its persisted state
+            misfire_policy: Overrides the scheduler default
+            jitter_seconds: Random delay of up to this much added to each run
 
         Returns:
             ScheduledJob instance
@@ -310,7 +613,7 @@ class Scheduler:
         first_run = datetime.now() if start_immediately else datetime.now() + timedelta(seconds=interval_seconds)
 
         job = ScheduledJob(
-            job_id=self._generate_id(),
+            job_id=job_id or self._generate_id(),
             name=name,
             job_type=JobType.INTERVAL,
             callback=callback,
@@ -321,9 +624,13 @@ class Scheduler:
             interval_seconds=interval_seconds,
             next_run=first_run,
             max_runs=max_runs,
+            misfire_policy=misfire_policy,
+            jitter_seconds=jitter_seconds,
         )
+        if not start_immediately:
+            job.next_run = self._jittered(job, first_run)
 
-        self._jobs[job.job_id] = job
+        self._add_job(job)
         logger.info(f"Scheduled interval job: {name} every {interval_seconds}s")
         return job
 
@@ -336,6 +643,9 @@ class Scheduler:
         callback_kwargs: dict = None,
         user_id: int = None,
         chat_id: int = None,
+        job_id: str = None,
+        misfire_policy: MisfirePolicy = None,
+        jitter_seconds: float = 0,
     ) -> ScheduledJob:
         """
         Schedule a cron-style job.
@@ -344,6 +654,9 @@ class Scheduler:
             name: Job name
             cron_expression: Simplified cron expression
             callback: Function to call
+            job_id: Stable ID; replaces an existing job and restores its persisted state
+            misfire_policy: Overrides the scheduler default
+            jitter_seconds: Random delay of up to this much added to each run
 
         Returns:
             ScheduledJob instance
@@ -351,7 +664,7 @@ class Scheduler:
         next_run = self._calculate_next_cron_run(cron_expression)
 
         job = ScheduledJob(
-            job_id=self._generate_id(),
+            job_id=job_id or self._generate_id(),
             name=name,
             job_type=JobType.CRON,
             callback=callback,
@@ -361,9 +674,12 @@ class Scheduler:
             chat_id=chat_id,
             cron_expression=cron_expression,
             next_run=next_run,
+            misfire_policy=misfire_policy,
+            jitter_seconds=jitter_seconds,
         )
+        job.next_run = self._jittered(job, next_run)
 
-        self._jobs[job.job_id] = job
+        self._add_job(job)
         logger.info(f"Scheduled cron job: {name} ({cron_expression})")
         return job
 
@@ -373,10 +689,16 @@ class Scheduler:
         if job:
             job.status = JobStatus.CANCELLED
             job.next_run = None
+            self._discard(job_id)
+            self._save_state()
             logger.info(f"Cancelled job: {job_id}")
             return True
         return False
 
+    def cancel(self, job_id: str) -> bool:
+        """Alias for cancel_job()."""
+        return self.cancel_job(job_id)
+
     def get_job(self, job_id: str) -> Optional[ScheduledJob]:
         """Get a job by ID."""
         return self._jobs.get(job_id)
@@ -395,6 +717,7 @@ class Scheduler:
     def get_stats(self) -> dict:
         """Get scheduler statistics."""
         jobs = list(self._jobs.values())
+        deadline = self._next_deadline()
         return {
             "total_jobs": len(jobs),
             "pending": len([j for j in jobs if j.status == JobStatus.PENDING]),
@@ -402,6 +725,11 @@ class Scheduler:
             "completed": len([j for j in jobs if j.status == JobStatus.COMPLETED]),
             "failed": len([j for j in jobs if j.last_error]),
             "scheduler_running": self._running,
+            "max_concurrency": self.config.max_concurrency,
+            "in_flight": len(self._inflight),
+            "dispatched": self._dispatched,
+            "misfired": self._misfired,
+            "next_run": datetime.fromtimestamp(deadline).isoformat() if deadline else None,
         }
 
 
@@ -413,14 +741,16 @@ def get_scheduler() -> Scheduler:
     """Get the global Scheduler instance."""
     global _scheduler
     if _scheduler is None:
-        _scheduler = Scheduler()
+        _scheduler = Scheduler(SchedulerConfig.from_env())
     return _scheduler
 
 
 __all__ = [
     "Scheduler",
     "ScheduledJob",
+    "SchedulerConfig",
     "JobStatus",
     "JobType",
+    "MisfirePolicy",
     "get_scheduler",
 ]
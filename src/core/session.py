@@ -3,7 +3,7 @@ Session Management for CursorBot
 Inspired by ClawdBot's session management system
 
 Features:
-- Session persistence (JSON store)
+- Session persistence (JSON snapshot + append-only journal)
 - Reset policies (daily, idle, per-type)
 - DM scope control (main, per-peer, per-channel-peer)
 - Identity links (cross-platform identity mapping)
@@ -15,6 +15,7 @@ Reference: https://docs.clawd.bot/concepts/session
 
 import json
 import os
+import threading
 import uuid
 from dataclasses import dataclass, field, asdict
 from datetime import datetime, timedelta
@@ -245,6 +246,11 @@ class SessionConfig:
     # Store path
     store_path: str = ""
     
+    # Journal: compact once it holds this many records (or one per session,
+    # whichever is larger); fsync each append for durability across power loss
+    journal_compact_records: int = 1000
+    journal_fsync: bool = False
+    
     def get_reset_policy(
         self, 
         chat_type: ChatType = ChatType.DM,
@@ -287,6 +293,8 @@ class SessionConfig:
             "reset_triggers": self.reset_triggers,
             "identity_links": self.identity_links,
             "store_path": self.store_path,
+            "journal_compact_records": self.journal_compact_records,
+            "journal_fsync": self.journal_fsync,
         }
     
     @classmethod
@@ -314,9 +322,206 @@ class SessionConfig:
             config.identity_links = data["identity_links"]
         if "store_path" in data:
             config.store_path = data["store_path"]
+        if "journal_compact_records" in data:
+            config.journal_compact_records = data["journal_compact_records"]
+        if "journal_fsync" in data:
+            config.journal_fsync = data["journal_fsync"]
         return config
 
 
+# ============================================
+# Session Store
+# ============================================
+
+class SessionStore:
+    """
+    Append-only journaled session store.
+    
+    State lives in a JSON snapshot (sessions.json) plus a journal of
+    per-session deltas (sessions.journal, one JSON record per line):
+    
+        {"op": "put", "key": ..., "data": {...full entry...}}
+        {"op": "patch", "key": ..., "fields": {...changed fields...}}
+        {"op": "del", "key": ...}
+    
+    A message only appends one small record, so persistence cost does not
+    grow with the number of sessions. Records carry absolute values, so
+    replaying a record twice is harmless; this makes compaction crash safe:
+    the new snapshot is written to a temp file and atomically renamed
+    before the journal is truncated. On load, a torn final line from a
+    crash is cut off and unreadable lines before it are skipped.
+    """
+    
+    def __init__(self, path: Path, compact_records: int = 1000, fsync: bool = False):
+        self.path = Path(path)
+        self.journal_path = self.path.with_suffix(".journal")
+        self.compact_records = compact_records
+        self.fsync = fsync
+        self.journal_records = 0
+        self._journal = None
+        self._lock = threading.Lock()
+    
+    def load(self) -> dict[str, dict]:
+        """Read the snapshot and replay the journal into raw session dicts."""
+        records: dict[str, dict] = {}
+        
+        if self.path.exists():
+            with open(self.path, "r", encoding="utf-8") as f:
+                records = json.load(f)
+        
+        if self.journal_path.exists():
+            with open(self.journal_path, "rb") as f:
+                data = f.read()
+            
+            offset = 0
+            for line in data.splitlines(keepends=True):
+                try:
+                    record = json.loads(line)
+                    self._apply(records, record)
+                except (ValueError, KeyError, TypeError, AttributeError):
+                    if not line.endswith(b"\n"):
+                        # Torn final write from a crash; cut it so appends start clean
+                        logger.warning(f"Discarding torn session journal tail at byte {offset}")
+                        with open(self.journal_path, "r+b") as f:
+                            f.truncate(offset)
+                        break
+                    # A garbled record must not hide the ones written after it
+                    logger.warning(f"Skipping unreadable session journal record at byte {offset}")
+                offset += len(line)
+                self.journal_records += 1
+            else:
+                if data and not data.endswith(b"\n"):
+                    # A complete last record without its newline; end it before appending
+                    with open(self.journal_path, "ab") as f:
+                        f.write(b"\n")
+        
+        return records
+    
+    @staticmethod
+    def _apply(records: dict[str, dict], record: dict) -> None:
+        op = record["op"]
+        key = record["key"]
+        if op == "put":
+            records[key] = record["data"]
+        elif op == "patch":
+            if key in records:
+                records[key].update(record["fields"])
+        elif op == "del":
+            records.pop(key, None)
+        else:
+            raise ValueError(f"Unknown journal op: {op}")
+    
+    def _append(self, record: dict) -> None:
+        line = json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n"
+        with self._lock:
+            if self._journal is None:
+                self.journal_path.parent.mkdir(parents=True, exist_ok=True)
+                self._journal = open(self.journal_path, "a", encoding="utf-8")
+            self._journal.write(line)
+            self._journal.flush()
+            if self.fsync:
+                os.fsync(self._journal.fileno())
+            self.journal_records += 1
+    
+    def put(self, key: str, data: dict) -> None:
+        self._append({"op": "put", "key": key, "data": data})
+    
+    def patch(self, key: str, fields: dict) -> None:
+        self._append({"op": "patch", "key": key, "fields": fields})
+    
+    def delete(self, key: str) -> None:
+        self._append({"op": "del", "key": key})
+    
+    def needs_compaction(self, session_count: int) -> bool:
+        """Compact once the journal outgrows the snapshot (amortized O(1) per write)."""
+        return self.journal_records >= max(self.compact_records, session_count)
+    
+    def compact(self, records: dict[str, dict]) -> None:
+        """Write a fresh snapshot and truncate the journal."""
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix(".json.tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(records, f, ensure_ascii=False, separators=(",", ":"))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+            
+            if self._journal is not None:
+                self._journal.close()
+            self._journal = open(self.journal_path, "w", encoding="utf-8")
+            self.journal_records = 0
+    
+    def close(self) -> None:
+        with self._lock:
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
+
+
+class _SessionTable:
+    """
+    session_key -> SessionEntry mapping that parses entries on first access.
+    
+    Loading only decodes JSON; datetimes and nested objects are built when
+    a session is actually used.
+    """
+    
+    def __init__(self, raw: dict[str, dict] = None):
+        self._raw: dict[str, dict] = raw or {}
+        self._entries: dict[str, SessionEntry] = {}
+    
+    def _materialize(self, key: str) -> Optional[SessionEntry]:
+        entry = self._entries.get(key)
+        if entry is None and key in self._raw:
+            try:
+                entry = SessionEntry.from_dict(self._raw.pop(key))
+            except Exception as e:
+                logger.warning(f"Failed to load session {key}: {e}")
+                return None
+            self._entries[key] = entry
+        return entry
+    
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries or key in self._raw
+    
+    def __getitem__(self, key: str) -> SessionEntry:
+        entry = self._materialize(key)
+        if entry is None:
+            raise KeyError(key)
+        return entry
+    
+    def get(self, key: str, default=None) -> Optional[SessionEntry]:
+        entry = self._materialize(key)
+        return default if entry is None else entry
+    
+    def __setitem__(self, key: str, entry: SessionEntry) -> None:
+        self._raw.pop(key, None)
+        self._entries[key] = entry
+    
+    def __delitem__(self, key: str) -> None:
+        if self._entries.pop(key, None) is None and self._raw.pop(key, None) is None:
+            raise KeyError(key)
+    
+    def __len__(self) -> int:
+        return len(self._entries) + len(self._raw)
+    
+    def keys(self) -> list[str]:
+        return [*self._entries, *self._raw]
+    
+    def items(self) -> list[tuple[str, SessionEntry]]:
+        return [(key, entry) for key in self.keys() if (entry := self._materialize(key)) is not None]
+    
+    def values(self) -> list[SessionEntry]:
+        return [entry for _, entry in self.items()]
+    
+    def to_records(self) -> dict[str, dict]:
+        """Serialized form of every session, without parsing unused ones."""
+        records = dict(self._raw)
+        records.update((key, entry.to_dict()) for key, entry in self._entries.items())
+        return records
+
+
 class SessionManager:
     """
     Manages sessions for all users across all channels.
@@ -334,7 +539,7 @@ class SessionManager:
         self.agent_id = agent_id
         
         # Session store: session_key -> SessionEntry
-        self._sessions: dict[str, SessionEntry] = {}
+        self._sessions = _SessionTable()
         
         # Determine store path
         if self.config.store_path:
@@ -342,40 +547,63 @@ class SessionManager:
         else:
             self._store_path = SESSIONS_DIR / agent_id / "sessions.json"
         
+        self._store = SessionStore(
+            self._store_path,
+            compact_records=self.config.journal_compact_records,
+            fsync=self.config.journal_fsync,
+        )
+        
         # Load existing sessions
         self._load_store()
     
     def _load_store(self) -> None:
         """Load sessions from persistent store."""
-        if not self._store_path.exists():
-            return
-        
         try:
-            with open(self._store_path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-            
-            for key, entry_data in data.items():
-                try:
-                    self._sessions[key] = SessionEntry.from_dict(entry_data)
-                except Exception as e:
-                    logger.warning(f"Failed to load session {key}: {e}")
-            
-            logger.info(f"Loaded {len(self._sessions)} sessions from {self._store_path}")
+            self._sessions = _SessionTable(self._store.load())
+            if len(self._sessions):
+                logger.info(f"Loaded {len(self._sessions)} sessions from {self._store_path}")
         except Exception as e:
             logger.error(f"Failed to load session store: {e}")
     
     def _save_store(self) -> None:
-        """Save sessions to persistent store."""
+        """Write a full snapshot of all sessions and truncate the journal."""
         try:
-            self._store_path.parent.mkdir(parents=True, exist_ok=True)
-            
-            data = {key: entry.to_dict() for key, entry in self._sessions.items()}
-            
-            with open(self._store_path, "w", encoding="utf-8") as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
+            self._store.compact(self._sessions.to_records())
         except Exception as e:
             logger.error(f"Failed to save session store: {e}")
     
+    def _persist(self, session_key: str, *fields: str) -> None:
+        """
+        Journal a change to one session.
+        
+        Args:
+            session_key: Session that changed
+            *fields: Changed SessionEntry fields; none writes the whole
+                entry, or records a deletion if the session is gone
+        """
+        try:
+            session = self._sessions.get(session_key)
+            if session is None:
+                self._store.delete(session_key)
+            elif fields:
+                data = session.to_dict()
+                self._store.patch(session_key, {name: data[name] for name in fields})
+            else:
+                self._store.put(session_key, session.to_dict())
+            
+            if self._store.needs_compaction(len(self._sessions)):
+                self._save_store()
+        except Exception as e:
+            logger.error(f"Failed to persist session {session_key}: {e}")
+    
+    def save_session(self, session_key: str) -> None:
+        """Persist a session after modifying its entry directly."""
+        self._persist(session_key)
+    
+    def close(self) -> None:
+        """Close the session journal."""
+        self._store.close()
+    
     def _make_session_key(
         self,
         user_id: str,
@@ -475,7 +703,7 @@ class SessionManager:
             
             # Touch session (update last activity)
             session.touch()
-            self._save_store()
+            self._persist(session_key, "updated_at", "last_message_at")
             return session
         
         # Create new session if requested
@@ -519,7 +747,7 @@ class SessionManager:
         )
         
         self._sessions[session_key] = session
-        self._save_store()
+        self._persist(session_key)
         
         logger.info(f"Created new session: {session_key} (id: {session_id[:8]}...)")
         return session
@@ -557,7 +785,7 @@ class SessionManager:
         """Delete a session by key."""
         if session_key in self._sessions:
             del self._sessions[session_key]
-            self._save_store()
+            self._persist(session_key)
             logger.info(f"Deleted session: {session_key}")
             return True
         return False
@@ -629,20 +857,30 @@ class SessionManager:
             session.add_tokens(input_tokens, output_tokens)
             if context_tokens:
                 session.context_tokens = context_tokens
-            self._save_store()
+            self._persist(
+                session_key, "input_tokens", "output_tokens", "total_tokens", "context_tokens"
+            )
     
     def increment_message_count(self, session_key: str) -> None:
         """Increment message count for a session."""
         if session_key in self._sessions:
             self._sessions[session_key].message_count += 1
             self._sessions[session_key].touch()
-            self._save_store()
+            self._persist(session_key, "message_count", "updated_at", "last_message_at")
     
     def set_cli_chat_id(self, session_key: str, cli_chat_id: str) -> None:
         """Set the Cursor CLI chat ID for a session."""
         if session_key in self._sessions:
             self._sessions[session_key].cli_chat_id = cli_chat_id
-            self._save_store()
+            self._persist(session_key, "cli_chat_id")
+    
+    def record_compaction(self, session_key: str, context_tokens: int) -> None:
+        """Count a context compaction and store the resulting context size."""
+        if session_key in self._sessions:
+            session = self._sessions[session_key]
+            session.compaction_count += 1
+            session.context_tokens = context_tokens
+            self._persist(session_key, "compaction_count", "context_tokens")
     
     def get_cli_chat_id(self, session_key: str) -> str:
         """Get the Cursor CLI chat ID for a session."""
@@ -666,9 +904,9 @@ class SessionManager:
         
         for key in stale_keys:
             del self._sessions[key]
+            self._persist(key)
         
         if stale_keys:
-            self._save_store()
             logger.info(f"Cleaned up {len(stale_keys)} stale sessions")
         
         return len(stale_keys)
@@ -701,6 +939,7 @@ class SessionManager:
             "by_channel": by_channel,
             "by_type": by_type,
             "store_path": str(self._store_path),
+            "journal_records": self._store.journal_records,
         }
     
     def get_session_status(self, session_key: str) -> dict:
@@ -785,6 +1024,12 @@ def get_session_manager() -> SessionManager:
         if idle_minutes:
             config.default_reset.idle_minutes = int(idle_minutes)
         
+        compact_records = os.getenv("SESSION_JOURNAL_COMPACT_RECORDS")
+        if compact_records:
+            config.journal_compact_records = int(compact_records)
+        
+        config.journal_fsync = os.getenv("SESSION_JOURNAL_FSYNC", "false").lower() in ("true", "1", "yes")
+        
         _session_manager = SessionManager(config)
     
     return _session_manager
@@ -793,6 +1038,8 @@ def get_session_manager() -> SessionManager:
 def reset_session_manager() -> None:
     """Reset the global session manager."""
     global _session_manager
+    if _session_manager is not None:
+        _session_manager.close()
     _session_manager = None
 
 
@@ -804,6 +1051,7 @@ __all__ = [
     "SessionOrigin",
     "SessionEntry",
     "SessionConfig",
+    "SessionStore",
     "SessionManager",
     "get_session_manager",
     "reset_session_manager",
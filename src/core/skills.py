@@ -530,12 +530,20 @@ class TranslateSkill(Skill):
         target_lang = args[0] if len(args) > 1 else "en"
         text = " ".join(args[1:]) if len(args) > 1 else args[0]
 
-        # This would integrate with translation API
+        from .llm_task import get_llm_task_manager
+
+        # Translation template opts into the response cache, so repeats are free
+        result = await get_llm_task_manager().translate(
+            text, target_lang, user_id=update.effective_user.id
+        )
+        if result.success:
+            await update.message.reply_text(f"🌐 {result.output}")
+            return
+
         await update.message.reply_text(
-            f"🌐 翻譯功能需要設定翻譯 API\n"
+            f"🌐 翻譯功能需要設定 AI 提供者\n"
             f"目標語言: {target_lang}\n"
             f"原文: {text}",
-            parse_mode="HTML",
         )
 
 
@@ -569,10 +577,16 @@ class SummarizeSkill(Skill):
 
         text = " ".join(args)
 
+        from .llm_task import get_llm_task_manager
+
+        result = await get_llm_task_manager().summarize(text, user_id=update.effective_user.id)
+        if result.success:
+            await update.message.reply_text(f"📝 {result.output}")
+            return
+
         await update.message.reply_text(
-            f"📝 摘要功能需要整合 AI API\n"
+            f"📝 摘要功能需要設定 AI 提供者\n"
             f"輸入: {text[:100]}...",
-            parse_mode="HTML",
         )
 
 
@@ -0,0 +1,254 @@
+"""
+Token Counting for CursorBot
+
+Counts tokens for context budgeting without calling a provider API.
+
+- HeuristicTokenCounter: fast offline approximation of a provider
+  family's BPE tokenizer. Text is split roughly the way BPE
+  pre-tokenizers split it (words, digit groups, CJK runs, symbols,
+  whitespace) and each piece is costed with per-family ratios, so CJK
+  text is no longer counted at 4 characters per token
+- TiktokenCounter: exact counts with tiktoken (optional dependency)
+- register_token_counter() plugs in any other tokenizer
+
+Usage:
+    from src.core.token_counter import get_token_counter
+
+    counter = get_token_counter("anthropic")
+    counter.count("你好，世界")
+    counter.count_message("user", "hello")
+"""
+
+import math
+import os
+import re
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Any
+
+from ..utils.logger import logger
+
+
+# ============================================
+# Counters
+# ============================================
+
+class TokenCounter(ABC):
+    """Counts tokens the way one tokenizer would."""
+
+    name: str = "base"
+    # Framing tokens a chat API adds per message (role, separators)
+    message_overhead: int = 4
+
+    @abstractmethod
+    def count(self, text: str) -> int:
+        """Tokens in text."""
+
+    def count_message(self, role: str, content: str) -> int:
+        """Tokens a chat message costs, including its framing."""
+        return self.count(content) + self.message_overhead
+
+    def truncate(self, text: str, max_tokens: int, keep_end: bool = False) -> str:
+        """Longest prefix (or suffix with keep_end) of text within max_tokens."""
+        if max_tokens <= 0:
+            return ""
+        if self.count(text) <= max_tokens:
+            return text
+
+        # Binary search on the cut point; counts grow with length
+        low, high = 0, len(text)
+        while low < high:
+            mid = (low + high + 1) // 2
+            part = text[-mid:] if keep_end else text[:mid]
+            if self.count(part) <= max_tokens:
+                low = mid
+            else:
+                high = mid - 1
+        if not low:
+            return ""
+        return text[-low:] if keep_end else text[:low]
+
+
+@dataclass(frozen=True)
+class TokenizerProfile:
+    """Per-family costs used by HeuristicTokenCounter."""
+    family: str
+    # Tokens per Han, Kana or Hangul character
+    cjk_per_char: float = 1.0
+    # Characters per extra token beyond the first in a Latin word
+    word_chars_per_token: float = 6.0
+    # Digits per token (vocabularies split long numbers into groups)
+    digits_per_token: int = 3
+    # Characters per extra token beyond the first in a run of ASCII symbols
+    symbol_chars_per_token: float = 2.0
+    # UTF-8 bytes per token for other scripts, accents and emoji
+    other_bytes_per_token: float = 3.0
+    message_overhead: int = 4
+
+
+# Ratios follow each family's vocabulary: large multilingual vocabularies
+# (o200k, Gemini) and Chinese-first ones (GLM, Moonshot, MiniMax, DeepSeek,
+# Qwen) cover CJK densely; Claude's tokenizer splits CJK and long words more.
+PROFILES: dict[str, TokenizerProfile] = {
+    "default": TokenizerProfile("default"),
+    "openai": TokenizerProfile("openai", cjk_per_char=0.8, message_overhead=4),
+    "anthropic": TokenizerProfile(
+        "anthropic", cjk_per_char=1.2, word_chars_per_token=5.0, message_overhead=3,
+    ),
+    "google": TokenizerProfile("google", cjk_per_char=0.7, message_overhead=3),
+    "llama": TokenizerProfile("llama", cjk_per_char=1.0, message_overhead=4),
+    "zh": TokenizerProfile(
+        "zh", cjk_per_char=0.6, word_chars_per_token=5.0, message_overhead=3,
+    ),
+}
+
+# LLM provider names (see llm_providers.ProviderType) to tokenizer family
+PROVIDER_FAMILIES: dict[str, str] = {
+    "openai": "openai",
+    "openrouter": "openai",
+    "copilot": "openai",
+    "custom": "openai",
+    "anthropic": "anthropic",
+    "bedrock": "anthropic",
+    "claude": "anthropic",
+    "google": "google",
+    "gemini": "google",
+    "ollama": "llama",
+    "llama": "llama",
+    "moonshot": "zh",
+    "glm": "zh",
+    "minimax": "zh",
+    "deepseek": "zh",
+    "qwen": "zh",
+}
+
+_PIECES = re.compile(
+    r"(?P<cjk>[\u3000-\u9fff\uac00-\ud7af\uf900-\ufaff\uff00-\uffef]+)"
+    r"|(?P<word>[A-Za-z]+)"
+    r"|(?P<digits>[0-9]+)"
+    r"|(?P<space>\s+)"
+    r"|(?P<symbol>[!-/:-@\[-`{-~]+)"
+    r"|(?P<other>[^\x00-\x7f\u3000-\u9fff\uac00-\ud7af\uf900-\ufaff\uff00-\uffef]+)"
+)
+
+
+class HeuristicTokenCounter(TokenCounter):
+    """
+    Offline BPE approximation for one provider family.
+
+    One regex pass over the text; no vocabulary is loaded. A single space
+    is free (BPE merges it into the next word), other whitespace runs
+    cost one token plus one per eight characters.
+    """
+
+    def __init__(self, profile: TokenizerProfile = None):
+        self.profile = profile or PROFILES["default"]
+        self.name = f"heuristic:{self.profile.family}"
+        self.message_overhead = self.profile.message_overhead
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+        p = self.profile
+        total = 0.0
+        for match in _PIECES.finditer(text):
+            kind = match.lastgroup
+            piece = match.group()
+            if kind == "cjk":
+                total += len(piece) * p.cjk_per_char
+            elif kind == "word":
+                total += 1 + (len(piece) - 1) // p.word_chars_per_token
+            elif kind == "digits":
+                total += math.ceil(len(piece) / p.digits_per_token)
+            elif kind == "space":
+                if piece != " ":
+                    total += 1 + len(piece) // 8
+            elif kind == "symbol":
+                total += 1 + (len(piece) - 1) // p.symbol_chars_per_token
+            else:
+                total += math.ceil(len(piece.encode("utf-8")) / p.other_bytes_per_token)
+        return max(1, math.ceil(total))
+
+
+class TiktokenCounter(TokenCounter):
+    """Exact counts with a tiktoken encoding (o200k_base by default)."""
+
+    def __init__(self, encoding: str = "o200k_base", message_overhead: int = 4):
+        try:
+            import tiktoken
+        except ImportError:
+            raise ImportError("tiktoken not installed. Run: pip install tiktoken")
+        self._encoding = tiktoken.get_encoding(encoding)
+        self.name = f"tiktoken:{encoding}"
+        self.message_overhead = message_overhead
+
+    def count(self, text: str) -> int:
+        return len(self._encoding.encode(text, disallowed_special=())) if text else 0
+
+
+# ============================================
+# Registry
+# ============================================
+
+_counters: dict[str, TokenCounter] = {}
+
+
+def family_for(provider: Any = None) -> str:
+    """Tokenizer family for a provider name, ProviderType or family name."""
+    if provider is None:
+        provider = os.getenv("TOKEN_COUNTER_FAMILY", "default")
+    name = str(getattr(provider, "value", provider)).lower()
+    if name in PROFILES:
+        return name
+    return PROVIDER_FAMILIES.get(name, "default")
+
+
+def register_token_counter(family: str, counter: TokenCounter) -> None:
+    """Use counter for a tokenizer family (e.g. a provider's own tokenizer)."""
+    _counters[family] = counter
+
+
+def get_token_counter(provider: Any = None) -> TokenCounter:
+    """
+    Token counter for a provider or family (default: TOKEN_COUNTER_FAMILY).
+
+    TOKEN_COUNTER_BACKEND=tiktoken counts exactly with tiktoken where it is
+    installed (encoding from TOKEN_COUNTER_ENCODING); otherwise the
+    offline approximation for the family is used.
+    """
+    family = family_for(provider)
+    counter = _counters.get(family)
+    if counter is not None:
+        return counter
+
+    if os.getenv("TOKEN_COUNTER_BACKEND", "heuristic").lower() == "tiktoken":
+        try:
+            counter = TiktokenCounter(
+                os.getenv("TOKEN_COUNTER_ENCODING", "o200k_base"),
+                PROFILES[family].message_overhead,
+            )
+        except Exception as e:
+            logger.warning(f"tiktoken unavailable, using approximate token counts: {e}")
+    if counter is None:
+        counter = HeuristicTokenCounter(PROFILES[family])
+    _counters[family] = counter
+    return counter
+
+
+def reset_token_counters() -> None:
+    """Forget registered and cached counters."""
+    _counters.clear()
+
+
+__all__ = [
+    "TokenCounter",
+    "TokenizerProfile",
+    "HeuristicTokenCounter",
+    "TiktokenCounter",
+    "PROFILES",
+    "PROVIDER_FAMILIES",
+    "family_for",
+    "register_token_counter",
+    "get_token_counter",
+    "reset_token_counters",
+]
@@ -291,6 +291,14 @@ async def handle_status(ctx: CommandContext) -> CommandResult:
     else:
         lines.append("⚪ AI 提供者: 未設定")
     
+    # Provider health (circuit state and latency) from the router
+    circuit_icons = {"closed": "🟢", "half_open": "🟡", "open": "🔴"}
+    for name, route in manager.get_router_status().get("by_provider", {}).items():
+        latency = f"p50 {route['p50_ms']}ms" if route["p50_ms"] is not None else "無延遲資料"
+        lines.append(
+            f"   {circuit_icons.get(route['state'], '⚪')} {name}: {latency}, 錯誤率 {route['error_rate']:.0%}"
+        )
+    
     # Session
     session_manager = get_session_manager()
     session = session_manager.get_session(ctx.user_id)
@@ -619,6 +627,13 @@ async def handle_stats(ctx: CommandContext) -> CommandResult:
         lines.append(f"總請求: {stats.get('total_requests', 0)}")
         lines.append(f"成功: {stats.get('successful_requests', 0)}")
         lines.append(f"失敗: {stats.get('failed_requests', 0)}")
+        
+        cache_stats = stats.get("response_cache", {})
+        if cache_stats.get("hits") or cache_stats.get("misses"):
+            lines.append(
+                f"快取命中: {cache_stats['hits']} ({cache_stats['hit_rate']:.0%}), "
+                f"節省 ${cache_stats['cost_saved']:.4f}"
+            )
     else:
         lines.append("統計功能尚未啟用")
     
@@ -1400,9 +1415,16 @@ async def handle_translate(ctx: CommandContext) -> CommandResult:
     
     lang = ctx.args[0]
     text = " ".join(ctx.args[1:])
+    
+    from .llm_task import get_llm_task_manager
+    
+    result = await get_llm_task_manager().translate(text, lang, user_id=ctx.user_id)
+    if result.success:
+        return CommandResult(success=True, message=f"🌐 {result.output}")
+    
     return CommandResult(
-        success=True,
-        message=f"🌐 翻譯中...\n\n原文: {text[:100]}\n目標語言: {lang}"
+        success=False,
+        message=f"❌ 翻譯失敗: {result.error}\n\n原文: {text[:100]}\n目標語言: {lang}"
     )
 
 
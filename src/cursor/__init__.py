@@ -9,9 +9,12 @@ from .cli_agent import (
     CLIConfig,
     CLIResult,
     CLIStatus,
+    CLIPoolConfig,
     get_cli_agent,
     is_cli_available,
 )
+from .cli_stream import CLIEvent, FileChange
+from .code_index import CodeSearchIndex, CodeMatch, SearchPage, get_code_index
 from .file_operations import FileOperations, EditResult
 from .terminal import TerminalManager, CommandResult, CommandStatus
 
@@ -22,8 +25,15 @@ __all__ = [
     "CLIConfig",
     "CLIResult",
     "CLIStatus",
+    "CLIPoolConfig",
+    "CLIEvent",
+    "FileChange",
     "get_cli_agent",
     "is_cli_available",
+    "CodeSearchIndex",
+    "CodeMatch",
+    "SearchPage",
+    "get_code_index",
     "FileOperations",
     "EditResult",
     "TerminalManager",
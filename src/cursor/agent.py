@@ -3,12 +3,14 @@ Workspace Agent for CursorBot
 Manages workspace navigation and local file operations
 """
 
+import asyncio
 import time
 from pathlib import Path
 from typing import Any, Optional
 
 from ..utils.config import settings
 from ..utils.logger import logger
+from .code_index import SearchPage, get_code_index
 
 
 class WorkspaceAgent:
@@ -116,65 +118,80 @@ class WorkspaceAgent:
             logger.error(f"Error listing directory: {e}")
             return f"❌ 錯誤: {str(e)}"
 
-    async def search_code(self, query: str) -> str:
+    async def search_code_page(
+        self,
+        query: str,
+        regex: bool = False,
+        case_sensitive: bool = False,
+        offset: int = 0,
+        limit: int = 20,
+    ) -> SearchPage:
+        """
+        Search code in the current workspace using its trigram index.
+
+        The index is loaded, refreshed and queried in a worker thread.
+
+        Args:
+            query: Literal text or regular expression
+            regex: Treat the query as a regular expression
+            case_sensitive: Match case exactly
+            offset: Number of ranked matches to skip
+            limit: Page size
+
+        Returns:
+            SearchPage with ranked matches
+
+        Raises:
+            re.error: If the regular expression is invalid
+        """
+        logger.info(f"Searching code: {query}")
+
+        index = await asyncio.to_thread(get_code_index, str(self.workspace_path))
+        page = await index.asearch(
+            query,
+            regex=regex,
+            case_sensitive=case_sensitive,
+            offset=offset,
+            limit=limit,
+        )
+        await self._update_activity()
+        return page
+
+    async def search_code(self, query: str, regex: bool = False) -> str:
         """
         Search for code in workspace.
 
         Args:
             query: Search query string
+            regex: Treat the query as a regular expression
 
         Returns:
             Formatted search results
         """
         import re
+        from html import escape
 
-        logger.info(f"Searching code: {query}")
+        try:
+            page = await self.search_code_page(query, regex=regex, limit=10)
+        except re.error as e:
+            return f"❌ 無效的正規表示式: {escape(str(e))}"
+        except Exception as e:
+            return f"❌ 搜尋錯誤: {escape(str(e))}"
 
-        results = []
-        pattern = re.compile(re.escape(query), re.IGNORECASE)
+        if not page.matches:
+            return "🔍 未找到匹配結果"
 
-        try:
-            for file_path in self.workspace_path.rglob("*"):
-                if not file_path.is_file():
-                    continue
-                if file_path.suffix not in [".py", ".js", ".ts", ".jsx", ".tsx", ".go", ".rs", ".java", ".md"]:
-                    continue
-                if any(p in str(file_path) for p in ["node_modules", ".git", "__pycache__", "venv", ".venv"]):
-                    continue
-
-                try:
-                    content = file_path.read_text(encoding="utf-8")
-                    for i, line in enumerate(content.split("\n"), 1):
-                        if pattern.search(line):
-                            relative_path = file_path.relative_to(self.workspace_path)
-                            results.append({
-                                "file": str(relative_path),
-                                "line": i,
-                                "content": line.strip(),
-                            })
-                            if len(results) >= 20:
-                                break
-                except Exception:
-                    continue
-
-                if len(results) >= 20:
-                    break
-
-            if not results:
-                return "🔍 未找到匹配結果"
-
-            formatted = []
-            for r in results[:10]:
-                formatted.append(
-                    f"📄 <code>{r['file']}:{r['line']}</code>\n"
-                    f"   {r['content'][:80]}"
-                )
+        formatted = []
+        for match in page.matches:
+            formatted.append(
+                f"📄 <code>{escape(match.file)}:{match.line}</code>\n"
+                f"   {escape(match.content[:80])}"
+            )
 
-            await self._update_activity()
-            return "\n\n".join(formatted)
+        if page.has_more:
+            formatted.append(f"… 共 {page.total} 筆結果")
 
-        except Exception as e:
-            return f"❌ 搜尋錯誤: {str(e)}"
+        return "\n\n".join(formatted)
 
     async def list_projects(self) -> str:
         """
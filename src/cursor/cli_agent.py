@@ -13,13 +13,23 @@ import asyncio
 import os
 import re
 import shutil
+import time
+from collections import deque
+from contextlib import asynccontextmanager
 from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
-from typing import Optional, Callable
+from typing import Any, Optional, Callable
 
 from ..utils.logger import logger
 from ..utils.config import settings
+from .cli_stream import (
+    CLIEvent,
+    CLIOutputBuffer,
+    CLIStreamParser,
+    FileChange,
+    format_diff_summary,
+)
 
 
 class CLIStatus(Enum):
@@ -49,6 +59,16 @@ class CLIConfig:
     
     # Capture full output
     capture_output: bool = True
+    
+    # Use --output-format stream-json to surface text, tool calls and edits live
+    stream_output: bool = False
+    
+    # Output kept in memory; beyond this it spills to a file in output_dir
+    max_output_chars: int = 200_000
+    output_dir: str = "data/cli_output"
+    # Spill files kept in output_dir, by count and age in seconds (0 = no limit)
+    output_keep_files: int = 20
+    output_max_age: float = 7 * 86400
 
 
 @dataclass
@@ -60,6 +80,398 @@ class CLIResult:
     exit_code: int = 0
     duration: float = 0.0
     files_modified: list[str] = field(default_factory=list)
+    # Time spent getting a CLI process ready (chat creation + spawn)
+    startup_time: float = 0.0
+    # Time from handing over the prompt to process exit
+    execution_time: float = 0.0
+    # Whether a pre-spawned warm worker served the prompt
+    warm_start: bool = False
+    # Set when output exceeded max_output_chars; the full text is in
+    # output_file, a server-side path that is logged but not shown to users
+    output_truncated: bool = False
+    output_file: str = ""
+    # Per-file line counts from stream-json edit events
+    file_changes: list[FileChange] = field(default_factory=list)
+    diff_summary: str = ""
+    tool_calls: int = 0
+
+
+@dataclass
+class CLIPoolConfig:
+    """Warm worker pool settings for Cursor CLI invocations."""
+    # Idle pre-spawned CLI processes kept per working directory (0 disables)
+    warm_workers: int = 1
+    # Pre-created chat sessions held in reserve for first-time users
+    reserve_chats: int = 2
+    # CLI runs allowed at once; further prompts wait for a slot
+    max_concurrent: int = 4
+    # Upper bound on idle workers across directories and users
+    max_idle_workers: int = 6
+    # Idle workers are killed after this many seconds
+    idle_timeout: float = 300.0
+    # Times reaped generic workers are replaced without a run in between,
+    # so an idle bot stops respawning after a while (0 = never replace)
+    idle_refills: int = 3
+    # Re-warm the user's own chat after each run so follow-ups start warm
+    user_affinity: bool = True
+    
+    @classmethod
+    def from_env(cls) -> "CLIPoolConfig":
+        return cls(
+            warm_workers=int(os.getenv("CURSOR_CLI_WARM_WORKERS", "1")),
+            reserve_chats=int(os.getenv("CURSOR_CLI_RESERVE_CHATS", "2")),
+            max_concurrent=max(1, int(os.getenv("CURSOR_CLI_MAX_CONCURRENT", "4"))),
+            max_idle_workers=int(os.getenv("CURSOR_CLI_MAX_IDLE_WORKERS", "6")),
+            idle_timeout=float(os.getenv("CURSOR_CLI_WORKER_IDLE_TIMEOUT", "300")),
+            idle_refills=int(os.getenv("CURSOR_CLI_IDLE_REFILLS", "3")),
+            user_affinity=os.getenv("CURSOR_CLI_USER_AFFINITY", "true").lower() in ("true", "1", "yes"),
+        )
+
+
+@dataclass
+class _WarmWorker:
+    """A CLI process started without its prompt, waiting on stdin."""
+    proc: asyncio.subprocess.Process
+    cwd: str
+    args: tuple[str, ...]
+    model: str
+    chat_id: Optional[str]
+    # Affinity owner; None for generic workers that serve first-time users
+    user_id: Optional[str]
+    spawned_at: float
+    spawn_seconds: float
+    
+    @property
+    def alive(self) -> bool:
+        return self.proc.returncode is None
+
+
+class CLIWorkerPool:
+    """
+    Pre-spawned Cursor CLI processes and pre-created chat sessions.
+    
+    A warm worker is started with every argument except the prompt and
+    reads the prompt from stdin when checked out, so CLI start-up happens
+    while the bot is idle rather than while the user waits. Each process
+    serves one prompt. Generic workers own a chat from the reserve and
+    serve first-time users; after a run the user's own chat is warmed
+    again (affinity). Idle workers are reaped after idle_timeout; reaped
+    generic workers are replaced up to idle_refills times until the next
+    run. A semaphore caps concurrent runs.
+    
+    If workers keep exiting before they are used, or exit with an error
+    right after taking the prompt without running it (a CLI build that
+    does not read prompts from stdin), warm spawning turns itself off and
+    runs fall back to cold starts.
+    """
+    
+    # Consecutive workers found dead before warm spawning is disabled
+    MAX_DEAD_WORKERS = 3
+    
+    def __init__(self, agent: "CursorCLIAgent", config: CLIPoolConfig = None):
+        self.agent = agent
+        self.config = config or CLIPoolConfig()
+        self._idle: list[_WarmWorker] = []
+        self._chat_reserve: deque[str] = deque()
+        self._slots = asyncio.Semaphore(self.config.max_concurrent)
+        self._running = 0
+        # Recently used working directories, most recent last
+        self._directories: deque[str] = deque(maxlen=3)
+        self._refill_lock = asyncio.Lock()
+        self._background: set[asyncio.Task] = set()
+        # Waits on killed workers; awaited (not cancelled) on close so pipes get closed
+        self._exiting: set[asyncio.Task] = set()
+        self._reaper: Optional[asyncio.Task] = None
+        self._dead_workers = 0
+        self._refill_budget = self.config.idle_refills  # Reap refills left until the next run
+        self._disabled = False
+        self._closed = False
+        self._stats = {
+            "warm_starts": 0,
+            "cold_starts": 0,
+            "workers_spawned": 0,
+            "workers_reaped": 0,
+            "workers_dead": 0,
+            "chats_from_reserve": 0,
+            "queued": 0,
+            "warm_startup_seconds": 0.0,
+            "cold_startup_seconds": 0.0,
+        }
+    
+    @property
+    def warm_enabled(self) -> bool:
+        return self.config.warm_workers > 0 and not self._disabled and not self._closed
+    
+    # ----- Concurrency -----
+    
+    @asynccontextmanager
+    async def slot(self):
+        """Hold one of the max_concurrent CLI run slots."""
+        if self._slots.locked():
+            self._stats["queued"] += 1
+        async with self._slots:
+            self._running += 1
+            try:
+                yield
+            finally:
+                self._running -= 1
+    
+    # ----- Checkout -----
+    
+    def checkout(self, cwd: str, args: list[str]) -> Optional[_WarmWorker]:
+        """Take an idle worker started with exactly these arguments."""
+        return self._take(lambda w: w.cwd == cwd and w.args == tuple(args))
+    
+    def checkout_fresh(self, cwd: str, model: str) -> Optional[_WarmWorker]:
+        """Take a generic worker (holding an unused chat, if any) for this directory."""
+        return self._take(lambda w: w.user_id is None and w.cwd == cwd and w.model == model)
+    
+    def _take(self, match: Callable[[_WarmWorker], bool]) -> Optional[_WarmWorker]:
+        for worker in list(self._idle):
+            if not match(worker):
+                continue
+            self._idle.remove(worker)
+            if worker.alive:
+                return worker
+            self._on_dead(worker)
+        return None
+    
+    def take_chat(self) -> Optional[str]:
+        """Pop a pre-created chat ID from the reserve."""
+        if self._chat_reserve:
+            self._stats["chats_from_reserve"] += 1
+            return self._chat_reserve.popleft()
+        return None
+    
+    async def start(self, worker: _WarmWorker, prompt: str) -> Optional[asyncio.subprocess.Process]:
+        """Hand the prompt to a warm worker; None if it died in the meantime."""
+        try:
+            worker.proc.stdin.write(prompt.encode("utf-8"))
+            await worker.proc.stdin.drain()
+            worker.proc.stdin.close()
+        except (BrokenPipeError, ConnectionResetError) as e:
+            logger.debug(f"Warm CLI worker died before use: {e}")
+            self._on_dead(worker)
+            return None
+        return worker.proc
+    
+    def record_start(self, warm: bool, startup_seconds: float) -> None:
+        kind = "warm" if warm else "cold"
+        self._stats[f"{kind}_starts"] += 1
+        self._stats[f"{kind}_startup_seconds"] += startup_seconds
+    
+    def record_retry(self, warm_seconds: float, startup_seconds: float) -> None:
+        """Count a warm start that never ran its prompt as the cold start that did."""
+        self._stats["warm_starts"] -= 1
+        self._stats["warm_startup_seconds"] -= warm_seconds
+        self.record_start(False, startup_seconds)
+    
+    def record_finish(self, worker: _WarmWorker, ran: bool) -> None:
+        """
+        Account for a warm worker's run.
+        
+        ran=False means it exited without running the prompt; it counts as
+        dead. Its chat is not reused, since the run retries cold with it.
+        """
+        if ran:
+            self._dead_workers = 0
+        else:
+            self._on_dead(worker, reuse_chat=False)
+    
+    # ----- Spawning -----
+    
+    def after_run(self, cwd: str, model: str, chat_id: Optional[str], user_id: Optional[str]) -> None:
+        """Re-warm the user's chat and top up generic workers and the chat reserve."""
+        if cwd in self._directories:
+            self._directories.remove(cwd)
+        self._directories.append(cwd)
+        self._refill_budget = self.config.idle_refills
+        
+        if self.warm_enabled and self.config.user_affinity and user_id and chat_id:
+            self._schedule(self._spawn(cwd, model, chat_id, user_id))
+        self._schedule(self.refill(cwd))
+    
+    async def refill(self, cwd: str = None) -> None:
+        """Bring generic workers for cwd and the chat reserve up to their targets."""
+        cwd = cwd or self.agent.config.working_directory or os.getcwd()
+        self._ensure_reaper()
+        resume = self.agent.resume_enabled
+        
+        async with self._refill_lock:
+            model = self.agent.config.model
+            while self.warm_enabled and len(self._idle) < self.config.max_idle_workers and sum(
+                1 for w in self._idle if w.user_id is None and w.cwd == cwd
+            ) < self.config.warm_workers:
+                chat_id = None
+                if resume:
+                    chat_id = self._chat_reserve.popleft() if self._chat_reserve else await self.agent.create_chat()
+                    if not chat_id:
+                        break
+                if not await self._spawn(cwd, model, chat_id, None):
+                    break
+            
+            while resume and not self._closed and len(self._chat_reserve) < self.config.reserve_chats:
+                chat_id = await self.agent.create_chat()
+                if not chat_id:
+                    break
+                self._chat_reserve.append(chat_id)
+    
+    async def _spawn(self, cwd: str, model: str, chat_id: Optional[str], user_id: Optional[str]) -> bool:
+        if not self.warm_enabled:
+            return False
+        
+        # A newer affinity worker replaces the user's previous one
+        if user_id is not None:
+            self.discard(user_id)
+        
+        args = self.agent._build_args(chat_id, model)
+        started = time.monotonic()
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                *args,
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                cwd=cwd,
+                env=self.agent._process_env(),
+            )
+        except Exception as e:
+            logger.warning(f"Failed to spawn warm CLI worker: {e}")
+            return False
+        
+        now = time.monotonic()
+        self._idle.append(_WarmWorker(
+            proc=proc, cwd=cwd, args=tuple(args), model=model, chat_id=chat_id,
+            user_id=user_id, spawned_at=now, spawn_seconds=now - started,
+        ))
+        self._stats["workers_spawned"] += 1
+        
+        # Over capacity: retire the oldest worker, affinity workers first
+        while len(self._idle) > self.config.max_idle_workers:
+            oldest = min(self._idle, key=lambda w: (w.user_id is None, w.spawned_at))
+            self._retire(oldest)
+        return True
+    
+    # ----- Reaping -----
+    
+    def reap(self) -> int:
+        """
+        Kill workers idle longer than idle_timeout and drop dead ones.
+        
+        Directories that lost generic workers are topped back up to
+        warm_workers while the refill budget lasts; a run restores it.
+        """
+        now = time.monotonic()
+        reaped = 0
+        directories = set()
+        for worker in list(self._idle):
+            if not worker.alive:
+                self._idle.remove(worker)
+                self._on_dead(worker)
+            elif now - worker.spawned_at > self.config.idle_timeout:
+                self._retire(worker)
+                reaped += 1
+                if worker.user_id is None:
+                    directories.add(worker.cwd)
+        self._stats["workers_reaped"] += reaped
+        
+        if directories and self._refill_budget > 0 and self.warm_enabled:
+            self._refill_budget -= 1
+            for cwd in directories:
+                self._schedule(self.refill(cwd))
+        return reaped
+    
+    def discard(self, user_id: str) -> None:
+        """Drop the affinity worker of a user whose chat or model changed."""
+        for worker in [w for w in self._idle if w.user_id == user_id]:
+            self._retire(worker, reuse_chat=False)
+    
+    def _retire(self, worker: _WarmWorker, reuse_chat: bool = True) -> None:
+        if worker in self._idle:
+            self._idle.remove(worker)
+        # An unused fresh chat goes back to the reserve
+        if reuse_chat and worker.user_id is None and worker.chat_id:
+            self._chat_reserve.append(worker.chat_id)
+        self._kill(worker.proc)
+    
+    def _on_dead(self, worker: _WarmWorker, reuse_chat: bool = True) -> None:
+        self._stats["workers_dead"] += 1
+        self._dead_workers += 1
+        if reuse_chat and worker.user_id is None and worker.chat_id:
+            self._chat_reserve.append(worker.chat_id)
+        self._kill(worker.proc)
+        if self._dead_workers >= self.MAX_DEAD_WORKERS and not self._disabled:
+            self._disabled = True
+            logger.warning(
+                "Warm Cursor CLI workers keep exiting before use; "
+                "the CLI may not read prompts from stdin. Using cold starts."
+            )
+    
+    @staticmethod
+    def _terminate(proc: asyncio.subprocess.Process) -> None:
+        if proc.stdin is not None and not proc.stdin.is_closing():
+            proc.stdin.close()
+        if proc.returncode is None:
+            try:
+                proc.kill()
+            except ProcessLookupError:
+                pass
+    
+    def _kill(self, proc: asyncio.subprocess.Process) -> None:
+        self._terminate(proc)
+        self._schedule(proc.wait(), self._exiting)
+    
+    def _ensure_reaper(self) -> None:
+        if self._reaper is None or self._reaper.done():
+            self._reaper = asyncio.create_task(self._reap_loop())
+    
+    async def _reap_loop(self) -> None:
+        interval = max(1.0, min(30.0, self.config.idle_timeout / 2))
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                self.reap()
+            except Exception as e:
+                logger.debug(f"CLI worker reap error: {e}")
+    
+    def _schedule(self, coro, tasks: set = None) -> None:
+        tasks = self._background if tasks is None else tasks
+        try:
+            task = asyncio.get_running_loop().create_task(coro)
+        except RuntimeError:
+            coro.close()
+            return
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+    
+    async def close(self) -> None:
+        """Kill idle workers and stop background tasks."""
+        self._closed = True
+        if self._reaper is not None:
+            self._reaper.cancel()
+        for task in list(self._background):
+            task.cancel()
+        await asyncio.gather(*self._background, return_exceptions=True)
+        
+        procs = [w.proc for w in self._idle]
+        self._idle.clear()
+        for proc in procs:
+            self._terminate(proc)
+        await asyncio.gather(*(p.wait() for p in procs), *self._exiting, return_exceptions=True)
+    
+    def get_stats(self) -> dict:
+        warm, cold = self._stats["warm_starts"], self._stats["cold_starts"]
+        return {
+            "enabled": self.warm_enabled,
+            "idle_workers": len(self._idle),
+            "affinity_workers": sum(1 for w in self._idle if w.user_id is not None),
+            "reserve_chats": len(self._chat_reserve),
+            "running": self._running,
+            "max_concurrent": self.config.max_concurrent,
+            **{k: v for k, v in self._stats.items() if not k.endswith("_seconds")},
+            "avg_warm_startup_seconds": round(self._stats["warm_startup_seconds"] / warm, 3) if warm else None,
+            "avg_cold_startup_seconds": round(self._stats["cold_startup_seconds"] / cold, 3) if cold else None,
+        }
 
 
 class CursorCLIAgent:
@@ -73,9 +485,11 @@ class CursorCLIAgent:
     - Timeout handling
     - Chat session context (resume conversations)
     - Model selection support
+    - Warm worker pool with reserve chats (see CLIWorkerPool)
+    - Live text, tool call and edit events via stream-json output
     """
     
-    def __init__(self, config: CLIConfig = None):
+    def __init__(self, config: CLIConfig = None, pool_config: CLIPoolConfig = None):
         self.config = config or CLIConfig()
         self._cli_path = self._find_cli()
         self._status = CLIStatus.AVAILABLE if self._cli_path else CLIStatus.NOT_INSTALLED
@@ -88,6 +502,8 @@ class CursorCLIAgent:
         # Cache available models
         self._available_models: list[dict] = []
         self._models_fetched: bool = False
+        # Warm CLI processes, reserve chats and the concurrency cap
+        self._pool = CLIWorkerPool(self, pool_config or CLIPoolConfig())
     
     def _find_cli(self) -> str:
         """Find the Cursor CLI binary."""
@@ -250,6 +666,7 @@ class CursorCLIAgent:
             True if a session was cleared, False if no session existed
         """
         cleared = False
+        self._pool.discard(user_id)
         
         if user_id in self._user_chat_sessions:
             old_chat = self._user_chat_sessions.pop(user_id)
@@ -378,6 +795,7 @@ class CursorCLIAgent:
         timeout: int = None,
         on_output: Callable[[str], None] = None,
         user_id: str = None,
+        on_event: Callable[[CLIEvent], Any] = None,
     ) -> CLIResult:
         """
         Run a prompt through Cursor CLI with optional context memory.
@@ -387,8 +805,10 @@ class CursorCLIAgent:
             working_directory: Directory to run in (default: config or cwd)
             model: Model to use (default: config or CLI default)
             timeout: Timeout in seconds (default: config)
-            on_output: Callback for streaming output
+            on_output: Callback for streaming output (assistant text in stream mode)
             user_id: User ID for context memory (enables --resume)
+            on_event: Callback (sync or async) for each parsed CLIEvent:
+                text deltas, tool calls and file edits
         
         Returns:
             CLIResult with output and status
@@ -404,37 +824,6 @@ class CursorCLIAgent:
         cwd = working_directory or self.config.working_directory or os.getcwd()
         timeout = timeout or self.config.timeout
         
-        # Build command (API key passed via env var for security)
-        cmd = [self._cli_path]
-        
-        # Use --print for non-interactive output
-        cmd.append("--print")
-        
-        # Use text output format
-        cmd.extend(["--output-format", "text"])
-        
-        # Check for existing chat session (context memory)
-        # Can be disabled via CLI_DISABLE_RESUME=1 if causing issues
-        chat_id = None
-        new_chat_created = False
-        use_resume = os.getenv("CLI_DISABLE_RESUME", "").lower() not in ("1", "true", "yes")
-        
-        if user_id and use_resume:
-            chat_id = self.get_user_chat_id(user_id)
-            if not chat_id:
-                # Create a new chat session for context memory
-                chat_id = await self.create_chat()
-                if chat_id:
-                    self.set_user_chat_id(user_id, chat_id)
-                    new_chat_created = True
-            
-            if chat_id:
-                # Resume existing conversation (or newly created one)
-                cmd.extend(["--resume", chat_id])
-                logger.info(f"{'Starting new' if new_chat_created else 'Resuming'} chat {chat_id} for user {user_id}")
-        elif user_id and not use_resume:
-            logger.info(f"CLI resume disabled, running without context memory for user {user_id}")
-        
         # Add model if specified (priority: explicit param > user setting > config)
         effective_model = model
         if not effective_model and user_id:
@@ -443,100 +832,273 @@ class CursorCLIAgent:
             effective_model = self.config.model
         
         if effective_model:
-            cmd.extend(["--model", effective_model])
             logger.info(f"Using CLI model: {effective_model}")
         
-        # Add the prompt
-        cmd.append(prompt)
-        
-        # Prepare environment with API key (safer than command line args)
-        # Command line args are visible in process list (ps aux)
-        process_env = {**os.environ, "NO_COLOR": "1"}
-        api_key = os.getenv("CURSOR_API_KEY", "")
-        if api_key:
-            process_env["CURSOR_API_KEY"] = api_key
-        
-        # Log the full command (without API key) for debugging
-        safe_cmd = [c for c in cmd]  # Don't log API key
-        logger.info(f"Running Cursor CLI in {cwd}" + (f" (chat: {chat_id})" if chat_id else " (new chat)"))
-        logger.debug(f"CLI command: {' '.join(safe_cmd)}")
-        logger.debug(f"Prompt: {prompt[:100]}...")
-        
-        try:
-            proc = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE,
-                cwd=cwd,
-                env=process_env,  # API key passed via env (not command line)
-            )
+        async with self._pool.slot():
+            startup_start = time.monotonic()
             
-            output_lines = []
-            error_lines = []
+            # Check for existing chat session (context memory)
+            # Can be disabled via CLI_DISABLE_RESUME=1 if causing issues
+            chat_id = None
+            new_chat_created = False
+            worker = None
+            use_resume = self.resume_enabled
             
-            async def read_stream(stream, lines, callback=None):
-                while True:
-                    line = await stream.readline()
-                    if not line:
-                        break
-                    text = line.decode('utf-8', errors='replace')
-                    lines.append(text)
-                    if callback:
-                        callback(text)
-            
-            # Read stdout and stderr concurrently
-            gather_task = asyncio.gather(
-                read_stream(proc.stdout, output_lines, on_output),
-                read_stream(proc.stderr, error_lines),
-            )
-            
-            if timeout:
-                await asyncio.wait_for(gather_task, timeout=timeout)
-            else:
-                # No timeout - wait indefinitely
-                await gather_task
-            
-            await proc.wait()
+            if user_id and use_resume:
+                chat_id = self.get_user_chat_id(user_id)
             
-            duration = (datetime.now() - start_time).total_seconds()
-            output = "".join(output_lines)
-            error = "".join(error_lines)
+            if not chat_id:
+                # A generic warm worker already holds a fresh chat (if resume is on)
+                worker = self._pool.checkout_fresh(cwd, effective_model)
+                if worker:
+                    chat_id = worker.chat_id
+                elif user_id and use_resume:
+                    # Use a pre-created chat, or create one for context memory
+                    chat_id = self._pool.take_chat() or await self.create_chat()
+                if user_id and use_resume and chat_id:
+                    self.set_user_chat_id(user_id, chat_id)
+                    new_chat_created = True
             
-            # Log output for debugging
-            logger.info(f"CLI completed in {duration:.1f}s, exit code: {proc.returncode}")
-            logger.debug(f"CLI output length: {len(output)} chars")
-            if output:
-                logger.debug(f"CLI output preview: {output[:200]}...")
-            if error:
-                logger.warning(f"CLI stderr: {error[:200]}...")
+            if user_id and chat_id:
+                # Resume existing conversation (or newly created one)
+                logger.info(f"{'Starting new' if new_chat_created else 'Resuming'} chat {chat_id} for user {user_id}")
+            elif user_id and not use_resume:
+                logger.info(f"CLI resume disabled, running without context memory for user {user_id}")
             
-            # Extract modified files from output
-            files_modified = self._extract_modified_files(output)
+            cmd = self._build_args(chat_id, effective_model)
+            if worker is None:
+                # Affinity: the worker warmed for this user's chat after their last run
+                worker = self._pool.checkout(cwd, cmd)
             
-            return CLIResult(
-                success=proc.returncode == 0,
-                output=output,
-                error=error,
-                exit_code=proc.returncode,
-                duration=duration,
-                files_modified=files_modified,
+            logger.info(
+                f"Running Cursor CLI in {cwd}" + (f" (chat: {chat_id})" if chat_id else " (new chat)")
+                + (" [warm]" if worker else "")
             )
+            logger.debug(f"CLI command: {' '.join(cmd)}")
+            logger.debug(f"Prompt: {prompt[:100]}...")
             
-        except asyncio.TimeoutError:
-            proc.kill()
-            return CLIResult(
-                success=False,
-                error=f"CLI operation timed out after {timeout}s",
-                exit_code=-1,
-                duration=timeout or 0,
-            )
-        except Exception as e:
-            logger.error(f"CLI error: {e}")
-            return CLIResult(
-                success=False,
-                error=str(e),
-                exit_code=-1,
+            proc = None
+            parser = CLIStreamParser(structured=self.config.stream_output, cwd=cwd)
+            buffer = CLIOutputBuffer(
+                self.config.max_output_chars,
+                self.config.output_dir,
+                keep_files=self.config.output_keep_files,
+                max_age=self.config.output_max_age,
             )
+            try:
+                if worker is not None:
+                    proc = await self._pool.start(worker, prompt)
+                warm_start = proc is not None
+                if proc is None:
+                    proc = await asyncio.create_subprocess_exec(
+                        *cmd, prompt,
+                        stdout=asyncio.subprocess.PIPE,
+                        stderr=asyncio.subprocess.PIPE,
+                        cwd=cwd,
+                        env=self._process_env(),  # API key passed via env (not command line)
+                    )
+                
+                startup_time = time.monotonic() - startup_start
+                self._pool.record_start(warm_start, startup_time)
+                warm_startup_time = startup_time if warm_start else 0.0
+                
+                error_lines = []
+                
+                async def read_output(stream):
+                    while True:
+                        line = await stream.readline()
+                        if not line:
+                            break
+                        event = parser.parse_line(line.decode('utf-8', errors='replace'))
+                        if event is None:
+                            continue
+                        if event.kind == "text":
+                            buffer.append(event.text)
+                            if on_output:
+                                on_output(event.text)
+                        if on_event:
+                            try:
+                                outcome = on_event(event)
+                                if asyncio.iscoroutine(outcome):
+                                    await outcome
+                            except Exception as e:
+                                logger.debug(f"CLI on_event callback error: {e}")
+                
+                async def read_errors(stream):
+                    while True:
+                        line = await stream.readline()
+                        if not line:
+                            break
+                        error_lines.append(line.decode('utf-8', errors='replace'))
+                
+                async def communicate():
+                    # Read stdout and stderr concurrently
+                    gather_task = asyncio.gather(read_output(proc.stdout), read_errors(proc.stderr))
+                    
+                    if timeout:
+                        await asyncio.wait_for(gather_task, timeout=timeout)
+                    else:
+                        # No timeout - wait indefinitely
+                        await gather_task
+                    
+                    await proc.wait()
+                
+                await communicate()
+                
+                if warm_start:
+                    # A worker that took the prompt and failed without any
+                    # output, not even on stderr, never ran it (e.g. the CLI
+                    # ignored stdin). An error on stderr (auth, quota, bad
+                    # model) is a real failure and is reported as is.
+                    ran = proc.returncode == 0 or bool(
+                        buffer.total_chars or parser.tool_calls or parser.result_text is not None
+                        or "".join(error_lines).strip()
+                    )
+                    self._pool.record_finish(worker, ran)
+                    if not ran:
+                        logger.warning(
+                            f"Warm CLI worker exited with code {proc.returncode} without "
+                            "running the prompt; retrying with a cold start"
+                        )
+                        warm_start = False
+                        parser = CLIStreamParser(structured=self.config.stream_output, cwd=cwd)
+                        error_lines.clear()
+                        proc = await asyncio.create_subprocess_exec(
+                            *cmd, prompt,
+                            stdout=asyncio.subprocess.PIPE,
+                            stderr=asyncio.subprocess.PIPE,
+                            cwd=cwd,
+                            env=self._process_env(),
+                        )
+                        # The user waited through the failed warm attempt too
+                        startup_time = time.monotonic() - startup_start
+                        self._pool.record_retry(warm_startup_time, startup_time)
+                        await communicate()
+                
+                duration = (datetime.now() - start_time).total_seconds()
+                output = buffer.text()
+                if parser.result_text and not buffer.truncated:
+                    # The result event carries the complete response text
+                    output = parser.result_text
+                error = "".join(error_lines)
+                if parser.is_error and not error:
+                    error = parser.result_text or "CLI reported an error"
+                
+                # Log output for debugging
+                logger.info(
+                    f"CLI completed in {duration:.1f}s (startup {startup_time:.2f}s"
+                    f"{', warm' if warm_start else ''}), exit code: {proc.returncode}"
+                )
+                logger.debug(f"CLI output length: {len(output)} chars")
+                if output:
+                    logger.debug(f"CLI output preview: {output[:200]}...")
+                if error:
+                    logger.warning(f"CLI stderr: {error[:200]}...")
+                
+                # Stream mode reports edits as events; text output is scraped
+                file_changes = parser.file_changes
+                if file_changes:
+                    files_modified = [c.path for c in file_changes]
+                else:
+                    files_modified = self._extract_modified_files(output)
+                
+                success = proc.returncode == 0 and not parser.is_error
+                if success:
+                    self._pool.after_run(cwd, effective_model, chat_id if user_id else None, user_id)
+                
+                return CLIResult(
+                    success=success,
+                    output=output,
+                    error=error,
+                    exit_code=proc.returncode,
+                    duration=duration,
+                    files_modified=files_modified,
+                    startup_time=startup_time,
+                    execution_time=duration - startup_time,
+                    warm_start=warm_start,
+                    output_truncated=buffer.truncated,
+                    output_file=buffer.path or "",
+                    file_changes=file_changes,
+                    diff_summary=format_diff_summary(file_changes),
+                    tool_calls=parser.tool_calls,
+                )
+                
+            except asyncio.TimeoutError:
+                proc.kill()
+                # Keep whatever was produced before the timeout
+                return CLIResult(
+                    success=False,
+                    output=buffer.text(),
+                    error=f"CLI operation timed out after {timeout}s",
+                    exit_code=-1,
+                    duration=timeout or 0,
+                    output_truncated=buffer.truncated,
+                    output_file=buffer.path or "",
+                    file_changes=parser.file_changes,
+                    diff_summary=format_diff_summary(parser.file_changes),
+                    tool_calls=parser.tool_calls,
+                )
+            except Exception as e:
+                logger.error(f"CLI error: {e}")
+                if proc is not None and proc.returncode is None:
+                    proc.kill()
+                return CLIResult(
+                    success=False,
+                    error=str(e),
+                    exit_code=-1,
+                )
+            finally:
+                buffer.close()
+                if buffer.path:
+                    logger.info(f"Full CLI output ({buffer.total_chars} chars) saved to {buffer.path}")
+    
+    def _build_args(self, chat_id: Optional[str], model: Optional[str]) -> list[str]:
+        """CLI command line for a non-interactive run, without the prompt."""
+        # Use --print for non-interactive output; stream-json emits one event per line
+        if self.config.stream_output:
+            cmd = [self._cli_path, "--print", "--output-format", "stream-json", "--stream-partial-output"]
+        else:
+            cmd = [self._cli_path, "--print", "--output-format", "text"]
+        if chat_id:
+            cmd.extend(["--resume", chat_id])
+        if model:
+            cmd.extend(["--model", model])
+        return cmd
+    
+    def _process_env(self) -> dict:
+        """
+        Environment for CLI processes.
+        
+        The API key is passed via env rather than command line args, which
+        are visible in the process list (ps aux).
+        """
+        process_env = {**os.environ, "NO_COLOR": "1"}
+        api_key = os.getenv("CURSOR_API_KEY", "")
+        if api_key:
+            process_env["CURSOR_API_KEY"] = api_key
+        return process_env
+    
+    @property
+    def resume_enabled(self) -> bool:
+        """Whether chat context memory (--resume) is on; CLI_DISABLE_RESUME turns it off."""
+        return os.getenv("CLI_DISABLE_RESUME", "").lower() not in ("1", "true", "yes")
+    
+    # ============================================
+    # Worker Pool
+    # ============================================
+    
+    async def warm_pool(self, working_directory: str = None) -> None:
+        """Pre-spawn warm workers and reserve chats for a working directory."""
+        if self.is_available:
+            await self._pool.refill(working_directory)
+    
+    def get_pool_stats(self) -> dict:
+        """Warm worker pool statistics (warm vs cold starts, reserve chats, etc.)."""
+        return self._pool.get_stats()
+    
+    async def aclose(self) -> None:
+        """Kill warm workers and stop pool background tasks."""
+        await self._pool.close()
     
     def _extract_modified_files(self, output: str) -> list[str]:
         """Extract list of modified files from CLI output."""
@@ -612,31 +1174,26 @@ class CursorCLIAgent:
         # Build command with --mode ask (API key via env for security)
         cmd = [self._cli_path, "--print", "--mode", "ask", prompt]
         
-        # Prepare environment with API key (safer than command line args)
-        process_env = {**os.environ, "NO_COLOR": "1"}
-        api_key = os.getenv("CURSOR_API_KEY", "")
-        if api_key:
-            process_env["CURSOR_API_KEY"] = api_key
-        
         logger.info(f"Running Cursor CLI (ask mode) in {cwd}")
         
         try:
-            proc = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE,
-                cwd=cwd,
-                env=process_env,  # API key passed via env (not command line)
-            )
-            
-            if timeout:
-                stdout, stderr = await asyncio.wait_for(
-                    proc.communicate(),
-                    timeout=timeout,
+            async with self._pool.slot():
+                proc = await asyncio.create_subprocess_exec(
+                    *cmd,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE,
+                    cwd=cwd,
+                    env=self._process_env(),  # API key passed via env (not command line)
                 )
-            else:
-                # No timeout - wait indefinitely
-                stdout, stderr = await proc.communicate()
+                
+                if timeout:
+                    stdout, stderr = await asyncio.wait_for(
+                        proc.communicate(),
+                        timeout=timeout,
+                    )
+                else:
+                    # No timeout - wait indefinitely
+                    stdout, stderr = await proc.communicate()
             
             duration = (datetime.now() - start_time).total_seconds()
             output = stdout.decode('utf-8', errors='replace')
@@ -724,6 +1281,8 @@ class CursorCLIAgent:
 # ============================================
 
 _cli_agent: Optional[CursorCLIAgent] = None
+# Pending aclose() of reset agents; referenced so they are not collected mid-run
+_closing: set[asyncio.Task] = set()
 
 
 def get_cli_agent() -> CursorCLIAgent:
@@ -750,8 +1309,13 @@ def get_cli_agent() -> CursorCLIAgent:
             working_directory=working_dir,
             model=os.getenv("CURSOR_CLI_MODEL", ""),
             timeout=cli_timeout,
+            stream_output=os.getenv("CURSOR_CLI_STREAM", "true").lower() in ("true", "1", "yes"),
+            max_output_chars=int(os.getenv("CURSOR_CLI_MAX_OUTPUT_CHARS", "200000")),
+            output_dir=os.getenv("CURSOR_CLI_OUTPUT_DIR", "data/cli_output"),
+            output_keep_files=int(os.getenv("CURSOR_CLI_OUTPUT_KEEP", "20")),
+            output_max_age=float(os.getenv("CURSOR_CLI_OUTPUT_MAX_AGE", "604800")),
         )
-        _cli_agent = CursorCLIAgent(config)
+        _cli_agent = CursorCLIAgent(config, CLIPoolConfig.from_env())
         logger.info(f"CLI Agent initialized with working directory: {working_dir}")
     return _cli_agent
 
@@ -764,6 +1328,15 @@ def is_cli_available() -> bool:
 def reset_cli_agent() -> None:
     """Reset the global CLI agent instance (e.g., after workspace change)."""
     global _cli_agent
+    if _cli_agent is not None:
+        # Kill warm workers in the background if a loop is running
+        try:
+            task = asyncio.get_running_loop().create_task(_cli_agent.aclose())
+        except RuntimeError:
+            pass
+        else:
+            _closing.add(task)
+            task.add_done_callback(_closing.discard)
     _cli_agent = None
     logger.info("CLI Agent reset, will reinitialize on next use")
 
@@ -778,6 +1351,9 @@ __all__ = [
     "CLIStatus",
     "CLIConfig",
     "CLIResult",
+    "CLIEvent",
+    "CLIPoolConfig",
+    "CLIWorkerPool",
     "CursorCLIAgent",
     "get_cli_agent",
     "is_cli_available",
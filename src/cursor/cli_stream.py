@@ -0,0 +1,390 @@
+"""
+Cursor CLI Stream Parsing for CursorBot
+Incremental parsing of `--output-format stream-json` output, capped
+output buffering and file change summaries
+"""
+
+import json
+import os
+import tempfile
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Optional, TextIO
+
+from ..utils.logger import logger
+
+
+# Tools whose completion changes a file on disk
+FILE_TOOLS = {"write", "edit", "delete"}
+
+# Argument keys that best describe what a tool call is working on
+_TARGET_KEYS = ("path", "command", "pattern", "globPattern", "query", "url")
+
+
+@dataclass
+class FileChange:
+    """Lines added/removed for one file across a CLI run."""
+    path: str
+    lines_added: int = 0
+    lines_removed: int = 0
+    created: bool = False
+    deleted: bool = False
+
+    @property
+    def marker(self) -> str:
+        if self.deleted:
+            return "D"
+        return "A" if self.created else "M"
+
+    def describe(self) -> str:
+        counts = []
+        if self.lines_added:
+            counts.append(f"+{self.lines_added}")
+        if self.lines_removed:
+            counts.append(f"-{self.lines_removed}")
+        return f"{self.path} ({' '.join(counts)})" if counts else self.path
+
+
+@dataclass
+class CLIEvent:
+    """One parsed event from a CLI run."""
+    # "text", "tool_started", "tool_completed", "result" or "system"
+    kind: str
+    # Assistant text delta, or the final result text
+    text: str = ""
+    # Tool name (Read, Edit, Shell, ...) and what it works on
+    tool: str = ""
+    target: str = ""
+    call_id: str = ""
+    change: Optional[FileChange] = None
+    is_error: bool = False
+
+    def progress_line(self) -> str:
+        """Short line for chat progress; empty for events not worth showing."""
+        if self.kind == "tool_started" and self.tool.lower() not in FILE_TOOLS:
+            return f"🔧 {self.tool} {self.target}".rstrip()
+        if self.kind == "tool_completed":
+            if self.is_error:
+                return " ".join(filter(None, ("⚠️", self.tool, self.target, "failed")))
+            if self.change is not None:
+                verb = {"A": "Created", "D": "Deleted"}.get(self.change.marker, "Edited")
+                return f"✏️ {verb} {self.change.describe()}"
+        return ""
+
+
+class CLIStreamParser:
+    """
+    Line-by-line parser for Cursor CLI output.
+
+    With structured=True each line is a stream-json event (system init,
+    assistant text, tool_call started/completed, result). Assistant text
+    may arrive as deltas (--stream-partial-output) or as whole segments;
+    a segment repeating what was already streamed only yields its new
+    suffix. Lines that are not JSON are passed through as text, as are all
+    lines when structured=False (plain text output).
+    """
+
+    def __init__(self, structured: bool = True, cwd: str = None):
+        self.structured = structured
+        self.cwd = cwd
+        self.session_id: Optional[str] = None
+        self.model: Optional[str] = None
+        # Text of the terminal result event, if the CLI sent one
+        self.result_text: Optional[str] = None
+        self.is_error = False
+        self.duration_ms: Optional[int] = None
+        self.tool_calls = 0
+        self._changes: dict[str, FileChange] = {}
+        # Assistant text since the last tool call
+        self._segment = ""
+
+    @property
+    def file_changes(self) -> list[FileChange]:
+        return list(self._changes.values())
+
+    def parse_line(self, line: str) -> Optional[CLIEvent]:
+        """Parse one output line into an event, or None if it carries nothing."""
+        if not self.structured:
+            return CLIEvent("text", text=line) if line else None
+
+        stripped = line.strip()
+        if not stripped:
+            return None
+        try:
+            data = json.loads(stripped)
+        except ValueError:
+            return CLIEvent("text", text=line)
+        if not isinstance(data, dict):
+            return CLIEvent("text", text=line)
+
+        kind = data.get("type")
+        if kind == "assistant":
+            return self._assistant(data)
+        if kind == "tool_call":
+            return self._tool_call(data)
+        if kind == "result":
+            result = data.get("result")
+            self.result_text = result if isinstance(result, str) else None
+            self.is_error = bool(data.get("is_error")) or data.get("subtype", "success") != "success"
+            self.duration_ms = data.get("duration_ms")
+            return CLIEvent("result", text=self.result_text or "", is_error=self.is_error)
+        if kind == "system":
+            self.session_id = data.get("session_id") or self.session_id
+            self.model = data.get("model") or self.model
+            return CLIEvent("system")
+        return None
+
+    def _assistant(self, data: dict) -> Optional[CLIEvent]:
+        content = (data.get("message") or {}).get("content", "")
+        if isinstance(content, list):
+            content = "".join(
+                part.get("text", "") for part in content
+                if isinstance(part, dict) and part.get("type") == "text"
+            )
+        if not isinstance(content, str) or not content:
+            return None
+
+        # A full segment after its deltas (or a cumulative update) repeats old text
+        if self._segment and content.startswith(self._segment):
+            delta = content[len(self._segment):]
+        else:
+            delta = content
+        self._segment += delta
+        return CLIEvent("text", text=delta) if delta else None
+
+    def _tool_call(self, data: dict) -> Optional[CLIEvent]:
+        call = data.get("tool_call") or {}
+        if not isinstance(call, dict) or not call:
+            return None
+        key, body = next(iter(call.items()))
+        body = body if isinstance(body, dict) else {}
+
+        args = body.get("args") or {}
+        if key == "function":
+            tool = body.get("name") or "Tool"
+            args = body.get("arguments") or {}
+            if isinstance(args, str):
+                try:
+                    args = json.loads(args)
+                except ValueError:
+                    args = {}
+        else:
+            tool = key[:-len("ToolCall")] if key.endswith("ToolCall") else key
+            tool = tool[:1].upper() + tool[1:]
+        args = args if isinstance(args, dict) else {}
+        target = next((str(args[k]) for k in _TARGET_KEYS if args.get(k)), "")
+        if len(target) > 120:
+            target = target[:117] + "..."
+
+        self._segment = ""
+        event = CLIEvent(
+            "tool_started" if data.get("subtype") == "started" else "tool_completed",
+            tool=tool,
+            target=self._relative(target) if "path" in args else target,
+            call_id=data.get("call_id", ""),
+        )
+        if event.kind == "tool_started":
+            self.tool_calls += 1
+            return event
+
+        result = body.get("result") or {}
+        if not isinstance(result, dict):
+            return event
+        if "error" in result or "failure" in result or "rejected" in result:
+            event.is_error = True
+            return event
+        success = result.get("success")
+        if isinstance(success, dict):
+            event.change = self._record_change(tool, args, success)
+        return event
+
+    def _record_change(self, tool: str, args: dict, success: dict) -> Optional[FileChange]:
+        name = tool.lower()
+        counted = any(k in success for k in ("linesAdded", "linesRemoved", "linesCreated", "diffString"))
+        if name not in FILE_TOOLS and not counted:
+            return None
+        path = success.get("path") or args.get("path")
+        if not path:
+            return None
+        path = self._relative(str(path))
+
+        added = int(success.get("linesAdded") or success.get("linesCreated") or 0)
+        removed = int(success.get("linesRemoved") or 0)
+        diff = success.get("diffString")
+        if isinstance(diff, str) and not (added or removed):
+            for diff_line in diff.splitlines():
+                if diff_line.startswith("+") and not diff_line.startswith("+++"):
+                    added += 1
+                elif diff_line.startswith("-") and not diff_line.startswith("---"):
+                    removed += 1
+
+        step = FileChange(
+            path=path,
+            lines_added=added,
+            lines_removed=removed,
+            created=name == "write" and "linesCreated" in success,
+            deleted=name == "delete",
+        )
+        total = self._changes.get(path)
+        if total is None:
+            self._changes[path] = FileChange(
+                path=path, lines_added=added, lines_removed=removed,
+                created=step.created, deleted=step.deleted,
+            )
+        else:
+            total.lines_added += added
+            total.lines_removed += removed
+            total.deleted = step.deleted
+            total.created = total.created and not step.deleted
+        return step
+
+    def _relative(self, path: str) -> str:
+        if self.cwd and os.path.isabs(path):
+            try:
+                rel = os.path.relpath(path, self.cwd)
+            except ValueError:
+                return path
+            if not rel.startswith(".."):
+                return rel
+        return path
+
+
+def format_diff_summary(changes: list[FileChange], limit: int = 20) -> str:
+    """Plain-text summary of file changes, e.g. for the end of a chat reply."""
+    if not changes:
+        return ""
+    added = sum(c.lines_added for c in changes)
+    removed = sum(c.lines_removed for c in changes)
+    noun = "file" if len(changes) == 1 else "files"
+    lines = [f"📁 {len(changes)} {noun} changed, +{added} -{removed}"]
+    for change in changes[:limit]:
+        lines.append(f"  {change.marker} {change.describe()}")
+    if len(changes) > limit:
+        lines.append(f"  … and {len(changes) - limit} more")
+    return "\n".join(lines)
+
+
+class CLIOutputBuffer:
+    """
+    Output kept in memory up to max_chars.
+
+    Past the cap everything seen so far and all further output goes to a
+    file under spill_dir, and memory keeps only the head and the tail
+    (half the cap each). text() then joins them around an omission
+    marker. max_chars <= 0 disables the cap.
+
+    Each new spill prunes spill_dir down to the keep_files newest files
+    and drops any older than max_age seconds (0 disables either limit).
+    """
+
+    def __init__(
+        self,
+        max_chars: int = 200_000,
+        spill_dir: str = "data/cli_output",
+        keep_files: int = 20,
+        max_age: float = 7 * 86400,
+    ):
+        self.max_chars = max_chars
+        self.spill_dir = spill_dir
+        self.keep_files = keep_files
+        self.max_age = max_age
+        self.total_chars = 0
+        self.truncated = False
+        self.path: Optional[str] = None
+        self._head: list[str] = []
+        self._head_chars = 0
+        self._tail: deque[str] = deque()
+        self._tail_chars = 0
+        self._file: Optional[TextIO] = None
+
+    def append(self, text: str) -> None:
+        if not text:
+            return
+        self.total_chars += len(text)
+        if not self.truncated:
+            self._head.append(text)
+            self._head_chars += len(text)
+            if self.max_chars > 0 and self._head_chars > self.max_chars:
+                self._spill()
+            return
+
+        if self._file is not None:
+            self._file.write(text)
+        self._tail.append(text)
+        self._tail_chars += len(text)
+        half = self.max_chars // 2
+        while len(self._tail) > 1 and self._tail_chars - len(self._tail[0]) >= half:
+            self._tail_chars -= len(self._tail.popleft())
+
+    def _spill(self) -> None:
+        text = "".join(self._head)
+        try:
+            os.makedirs(self.spill_dir, exist_ok=True)
+            self._file = tempfile.NamedTemporaryFile(
+                mode="w", encoding="utf-8", dir=self.spill_dir,
+                prefix="cli-", suffix=".log", delete=False,
+            )
+            self._file.write(text)
+            self.path = self._file.name
+        except OSError as e:
+            logger.warning(f"Could not spill CLI output to {self.spill_dir}: {e}")
+            self._file = None
+        else:
+            self._prune_spill_dir()
+
+        half = self.max_chars // 2
+        self._head = [text[:half]]
+        self._head_chars = half
+        self._tail = deque([text[-half:]] if half else [])
+        self._tail_chars = min(half, len(text))
+        self.truncated = True
+
+    def text(self) -> str:
+        head = "".join(self._head)
+        if not self.truncated:
+            return head
+        tail = "".join(self._tail)[-(self.max_chars // 2):] if self.max_chars // 2 else ""
+        omitted = self.total_chars - len(head) - len(tail)
+        # The spill path stays server-side; it is not shown to users
+        where = "; full output saved" if self.path else ""
+        return f"{head}\n\n… [{omitted} chars omitted{where}] …\n\n{tail}"
+
+    def _prune_spill_dir(self) -> None:
+        """Remove old spill files beyond the count and age limits."""
+        try:
+            with os.scandir(self.spill_dir) as entries:
+                spills = [
+                    (entry.stat().st_mtime, entry.path)
+                    for entry in entries
+                    if entry.name.startswith("cli-") and entry.name.endswith(".log")
+                    and entry.is_file() and entry.path != self.path
+                ]
+        except OSError as e:
+            logger.debug(f"Could not list {self.spill_dir}: {e}")
+            return
+
+        spills.sort(reverse=True)
+        cutoff = time.time() - self.max_age if self.max_age > 0 else None
+        # The current spill counts toward keep_files
+        keep = max(self.keep_files - 1, 0) if self.keep_files > 0 else len(spills)
+        for i, (mtime, path) in enumerate(spills):
+            if i >= keep or (cutoff is not None and mtime < cutoff):
+                try:
+                    os.remove(path)
+                except OSError as e:
+                    logger.debug(f"Could not remove old CLI output {path}: {e}")
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+__all__ = [
+    "FileChange",
+    "CLIEvent",
+    "CLIStreamParser",
+    "CLIOutputBuffer",
+    "format_diff_summary",
+]
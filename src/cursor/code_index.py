@@ -0,0 +1,521 @@
+"""
+Code Search Index for CursorBot
+Persistent trigram index over a workspace for fast code search
+"""
+
+import array
+import asyncio
+import hashlib
+import heapq
+import json
+import os
+import re
+import struct
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional
+
+from ..utils.logger import logger
+
+try:
+    from re import _parser as _sre_parse
+except ImportError:  # Python < 3.11
+    import sre_parse as _sre_parse
+
+
+# File types searched by default
+INDEXED_EXTENSIONS = {".py", ".js", ".ts", ".jsx", ".tsx", ".go", ".rs", ".java", ".md"}
+
+# Directories never walked into
+EXCLUDED_DIRS = {"node_modules", ".git", "__pycache__", "venv", ".venv"}
+
+# index.bin layout: file table JSON length (uint32), file table JSON, then
+# posting records of trigram (uint64) + file count (uint32) + file ids (uint32)
+_META_HEADER = struct.Struct("<I")
+_POSTING_HEADER = struct.Struct("<QI")
+
+
+def _trigram_id(trigram: str) -> int:
+    """Pack three characters into one integer key."""
+    return (ord(trigram[0]) << 42) | (ord(trigram[1]) << 21) | ord(trigram[2])
+
+
+def _trigrams(text: str) -> set[int]:
+    """Distinct trigram keys of (already lowercased) text."""
+    return {_trigram_id(t) for t in {text[i:i + 3] for i in range(len(text) - 2)}}
+
+
+def required_literals(pattern: str) -> list[str]:
+    """
+    Literal substrings every match of a regex must contain.
+
+    Only mandatory parts are considered: top-level literal runs, groups,
+    and repeats with a minimum of one. Alternations, classes and optional
+    parts end a run. Runs shorter than three characters are dropped since
+    they cannot narrow a trigram lookup.
+    """
+    runs: list[str] = []
+
+    def walk(items) -> None:
+        current: list[str] = []
+
+        def flush() -> None:
+            if len(current) >= 3:
+                runs.append("".join(current))
+            current.clear()
+
+        for op, av in items:
+            if op is _sre_parse.LITERAL:
+                current.append(chr(av))
+            elif op is _sre_parse.SUBPATTERN:
+                flush()
+                walk(av[-1])
+            elif op in (_sre_parse.MAX_REPEAT, _sre_parse.MIN_REPEAT) and av[0] >= 1:
+                flush()
+                walk(av[2])
+            elif op is _sre_parse.AT:
+                continue  # Anchors do not break a literal run
+            else:
+                flush()
+        flush()
+
+    try:
+        walk(_sre_parse.parse(pattern))
+    except Exception:
+        return []
+    return runs
+
+
+@dataclass
+class CodeMatch:
+    """A matching line."""
+    file: str
+    line: int
+    content: str
+    score: float = 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            "file": self.file,
+            "line": self.line,
+            "content": self.content,
+            "score": round(self.score, 2),
+        }
+
+
+def _rank_key(match: CodeMatch) -> tuple:
+    return (-match.score, match.file, match.line)
+
+
+@dataclass
+class SearchPage:
+    """One page of search results."""
+    query: str
+    total: int
+    offset: int
+    limit: int
+    matches: list[CodeMatch] = field(default_factory=list)
+    files_scanned: int = 0
+    elapsed_ms: float = 0.0
+    truncated: bool = False
+
+    @property
+    def has_more(self) -> bool:
+        return self.offset + len(self.matches) < self.total
+
+    def to_dict(self) -> dict:
+        return {
+            "query": self.query,
+            "total": self.total,
+            "offset": self.offset,
+            "limit": self.limit,
+            "has_more": self.has_more,
+            "truncated": self.truncated,
+            "files_scanned": self.files_scanned,
+            "elapsed_ms": round(self.elapsed_ms, 1),
+            "results": [m.to_dict() for m in self.matches],
+        }
+
+
+@dataclass
+class _IndexedFile:
+    path: str  # Relative to the workspace, "/" separated
+    mtime_ns: int
+    size: int
+    alive: bool = True
+
+
+class CodeSearchIndex:
+    """
+    Persistent trigram index for one workspace.
+
+    Each file's lowercased content is broken into trigrams; posting lists
+    map a trigram to the ids of files containing it. A query intersects
+    the posting lists of its required literals and only reads the
+    candidate files to confirm and rank line matches.
+
+    Updates are incremental: refresh() walks the tree (pruning excluded
+    directories), re-indexes files whose mtime or size changed and
+    tombstones deleted ones. Tombstoned ids are compacted away once they
+    make up a large share of the index. State is saved to
+    <index_dir>/index.bin with an atomic rename.
+
+    Methods are blocking; use asearch() from async code.
+    """
+
+    # Minimum seconds between filesystem walks triggered by searches
+    REFRESH_INTERVAL = 5.0
+    # Compact once this fraction of file ids are tombstones
+    COMPACT_RATIO = 0.3
+
+    def __init__(
+        self,
+        root: str,
+        index_dir: Optional[str] = None,
+        extensions: Optional[set[str]] = None,
+        exclude_dirs: Optional[set[str]] = None,
+        max_file_size: int = 1024 * 1024,
+        max_matches: int = 1000,
+    ):
+        self.root = Path(root).resolve()
+        if index_dir is None:
+            base = os.getenv("CODE_INDEX_DIR", "data/code_index")
+            digest = hashlib.sha1(str(self.root).encode("utf-8")).hexdigest()[:16]
+            index_dir = os.path.join(base, digest)
+        self.index_dir = Path(index_dir)
+        self.extensions = extensions or INDEXED_EXTENSIONS
+        self.exclude_dirs = exclude_dirs or EXCLUDED_DIRS
+        self.max_file_size = max_file_size
+        self.max_matches = max_matches
+
+        self._files: list[_IndexedFile] = []
+        self._by_path: dict[str, int] = {}
+        self._postings: dict[int, array.array] = {}
+        self._dead = 0
+        self._last_refresh = 0.0
+        self._lock = threading.RLock()
+
+        self._load()
+
+    # ============================================
+    # Persistence
+    # ============================================
+
+    def _load(self) -> None:
+        index_path = self.index_dir / "index.bin"
+        if not index_path.exists():
+            return
+
+        try:
+            data = memoryview(index_path.read_bytes())
+            (meta_size,) = _META_HEADER.unpack_from(data, 0)
+            offset = _META_HEADER.size + meta_size
+            meta = json.loads(bytes(data[_META_HEADER.size:offset]).decode("utf-8"))
+            if meta.get("version") != 1 or meta.get("root") != str(self.root):
+                return
+
+            files = [_IndexedFile(path, mtime_ns, size) for path, mtime_ns, size in meta["files"]]
+
+            postings: dict[int, array.array] = {}
+            while offset < len(data):
+                trigram, count = _POSTING_HEADER.unpack_from(data, offset)
+                offset += _POSTING_HEADER.size
+                ids = array.array("I")
+                ids.frombytes(data[offset:offset + count * 4])
+                offset += count * 4
+                postings[trigram] = ids
+        except Exception as e:
+            logger.warning(f"Code index at {self.index_dir} unreadable, rebuilding: {e}")
+            return
+
+        self._files = files
+        self._by_path = {f.path: i for i, f in enumerate(files)}
+        self._postings = postings
+        logger.info(f"Loaded code index for {self.root}: {len(files)} files")
+
+    def save(self) -> None:
+        """Write the index to disk (compacted, atomic)."""
+        with self._lock:
+            self._compact()
+            self.index_dir.mkdir(parents=True, exist_ok=True)
+
+            meta = json.dumps({
+                "version": 1,
+                "root": str(self.root),
+                "files": [[f.path, f.mtime_ns, f.size] for f in self._files],
+            }).encode("utf-8")
+
+            # File table and postings share one file so a single rename swaps both
+            tmp_path = self.index_dir / "index.bin.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(_META_HEADER.pack(len(meta)))
+                f.write(meta)
+                for trigram, ids in self._postings.items():
+                    f.write(_POSTING_HEADER.pack(trigram, len(ids)))
+                    ids.tofile(f)
+            os.replace(tmp_path, self.index_dir / "index.bin")
+
+    # ============================================
+    # Indexing
+    # ============================================
+
+    def _walk(self):
+        """Yield (relative path, stat) for indexable files, pruning excluded dirs."""
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            dirnames[:] = [d for d in dirnames if d not in self.exclude_dirs]
+            for name in filenames:
+                if os.path.splitext(name)[1] not in self.extensions:
+                    continue
+                full_path = os.path.join(dirpath, name)
+                try:
+                    stat = os.stat(full_path)
+                except OSError:
+                    continue
+                if stat.st_size > self.max_file_size:
+                    continue
+                yield os.path.relpath(full_path, self.root).replace(os.sep, "/"), stat
+
+    def _add_file(self, rel_path: str, stat) -> None:
+        try:
+            text = (self.root / rel_path).read_text(encoding="utf-8").lower()
+        except (OSError, UnicodeDecodeError):
+            # Recorded without trigrams so refreshes skip it until it changes
+            text = ""
+
+        file_id = len(self._files)
+        self._files.append(_IndexedFile(rel_path, stat.st_mtime_ns, stat.st_size))
+        self._by_path[rel_path] = file_id
+        for trigram in _trigrams(text):
+            ids = self._postings.get(trigram)
+            if ids is None:
+                ids = self._postings[trigram] = array.array("I")
+            ids.append(file_id)
+
+    def _remove_file(self, rel_path: str) -> None:
+        file_id = self._by_path.pop(rel_path, None)
+        if file_id is not None:
+            self._files[file_id].alive = False
+            self._dead += 1
+
+    def _compact(self) -> None:
+        """Drop tombstoned file ids and renumber the rest."""
+        if not self._dead:
+            return
+
+        remap = {}
+        files = []
+        for old_id, entry in enumerate(self._files):
+            if entry.alive:
+                remap[old_id] = len(files)
+                files.append(entry)
+
+        postings = {}
+        for trigram, ids in self._postings.items():
+            kept = array.array("I", (remap[i] for i in ids if i in remap))
+            if kept:
+                postings[trigram] = kept
+
+        self._files = files
+        self._by_path = {f.path: i for i, f in enumerate(files)}
+        self._postings = postings
+        self._dead = 0
+
+    def refresh(self, force: bool = False) -> dict:
+        """
+        Bring the index up to date with the filesystem.
+
+        Args:
+            force: Walk even if the last refresh was recent
+
+        Returns:
+            dict with added, updated and removed file counts
+        """
+        with self._lock:
+            if not force and time.monotonic() - self._last_refresh < self.REFRESH_INTERVAL:
+                return {"added": 0, "updated": 0, "removed": 0}
+
+            added = updated = 0
+            seen = set()
+            for rel_path, stat in self._walk():
+                seen.add(rel_path)
+                file_id = self._by_path.get(rel_path)
+                if file_id is not None:
+                    entry = self._files[file_id]
+                    if entry.mtime_ns == stat.st_mtime_ns and entry.size == stat.st_size:
+                        continue
+                    self._remove_file(rel_path)
+                    updated += 1
+                else:
+                    added += 1
+                self._add_file(rel_path, stat)
+
+            removed = [path for path in self._by_path if path not in seen]
+            for rel_path in removed:
+                self._remove_file(rel_path)
+
+            self._last_refresh = time.monotonic()
+            changed = added or updated or removed
+
+            if self._files and self._dead / len(self._files) > self.COMPACT_RATIO:
+                self._compact()
+            if changed:
+                self.save()
+                logger.info(
+                    f"Code index {self.root.name}: +{added} ~{updated} -{len(removed)} "
+                    f"({len(self._by_path)} files)"
+                )
+
+            return {"added": added, "updated": updated, "removed": len(removed)}
+
+    # ============================================
+    # Search
+    # ============================================
+
+    def _candidates(self, literals: list[str]) -> list[int]:
+        """File ids containing every trigram of the literals."""
+        trigrams = set()
+        for literal in literals:
+            trigrams |= _trigrams(literal.lower())
+
+        if not trigrams:
+            return [i for i, f in enumerate(self._files) if f.alive]
+
+        # Intersect smallest posting lists first
+        lists = sorted((self._postings.get(t, ()) for t in trigrams), key=len)
+        if not lists[0]:
+            return []
+        result = set(lists[0])
+        for ids in lists[1:]:
+            result.intersection_update(ids)
+            if not result:
+                return []
+        return sorted(i for i in result if self._files[i].alive)
+
+    def search(
+        self,
+        query: str,
+        regex: bool = False,
+        case_sensitive: bool = False,
+        offset: int = 0,
+        limit: int = 20,
+    ) -> SearchPage:
+        """
+        Search the workspace.
+
+        Args:
+            query: Literal text, or a regular expression if regex=True
+            regex: Treat the query as a regular expression
+            case_sensitive: Match case exactly
+            offset: Number of ranked matches to skip
+            limit: Page size
+
+        Returns:
+            SearchPage with ranked matches
+
+        Raises:
+            re.error: If the regular expression is invalid
+        """
+        start = time.perf_counter()
+        source = query if regex else re.escape(query)
+        pattern = re.compile(source, 0 if case_sensitive else re.IGNORECASE)
+        literals = required_literals(source)
+        # Exact-case word hits and path hits rank higher
+        try:
+            word_pattern = re.compile(rf"\b(?:{source})\b")
+        except re.error:
+            word_pattern = None
+        path_literal = max(literals, key=len).lower() if literals else None
+
+        with self._lock:
+            candidates = [self._files[i].path for i in self._candidates(literals)]
+
+        scored = []
+        truncated = False
+        for rel_path in candidates:
+            try:
+                text = (self.root / rel_path).read_text(encoding="utf-8")
+            except (OSError, UnicodeDecodeError):
+                continue
+
+            lines = []
+            for line_no, line in enumerate(text.split("\n"), 1):
+                if pattern.search(line):
+                    lines.append((line_no, line.strip(), bool(word_pattern and word_pattern.search(line))))
+            if not lines:
+                continue
+
+            file_score = min(len(lines), 10) * 0.5
+            if path_literal and path_literal in rel_path.lower():
+                file_score += 5
+            file_score -= rel_path.count("/") * 0.1
+
+            for line_no, content, exact in lines:
+                scored.append(CodeMatch(rel_path, line_no, content, file_score + (2 if exact else 0)))
+
+            # Rank across every candidate file, keeping only the best max_matches
+            if len(scored) >= 2 * self.max_matches:
+                scored = heapq.nsmallest(self.max_matches, scored, key=_rank_key)
+                truncated = True
+
+        scored.sort(key=_rank_key)
+        if len(scored) > self.max_matches:
+            del scored[self.max_matches:]
+            truncated = True
+        offset = max(0, offset)
+        return SearchPage(
+            query=query,
+            total=len(scored),
+            offset=offset,
+            limit=limit,
+            matches=scored[offset:offset + limit],
+            files_scanned=len(candidates),
+            elapsed_ms=(time.perf_counter() - start) * 1000,
+            truncated=truncated,
+        )
+
+    async def asearch(self, query: str, **kwargs) -> SearchPage:
+        """Refresh and search in a worker thread, off the event loop."""
+        def run() -> SearchPage:
+            self.refresh()
+            return self.search(query, **kwargs)
+
+        return await asyncio.to_thread(run)
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                "root": str(self.root),
+                "files": len(self._by_path),
+                "tombstones": self._dead,
+                "trigrams": len(self._postings),
+                "postings": sum(len(ids) for ids in self._postings.values()),
+            }
+
+
+# ============================================
+# Per-Workspace Instances
+# ============================================
+
+_indexes: dict[str, CodeSearchIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_code_index(root: str) -> CodeSearchIndex:
+    """Get the shared index for a workspace root."""
+    key = str(Path(root).resolve())
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is None:
+            index = _indexes[key] = CodeSearchIndex(key)
+        return index
+
+
+__all__ = [
+    "CodeMatch",
+    "SearchPage",
+    "CodeSearchIndex",
+    "get_code_index",
+    "required_literals",
+]
@@ -38,6 +38,7 @@ class CursorBotApp:
         self.server_task: Optional[asyncio.Task] = None
         self.bot_task: Optional[asyncio.Task] = None
         self.discord_task: Optional[asyncio.Task] = None
+        self.cli_warm_task: Optional[asyncio.Task] = None
         self._shutdown_event = asyncio.Event()
 
     async def start_telegram_bot(self) -> None:
@@ -245,6 +246,22 @@ class CursorBotApp:
             await task_queue.start()
             logger.info("Task queue started")
 
+            # Start the job scheduler (reminders and scheduled jobs)
+            from .core.scheduler import get_scheduler
+            await get_scheduler().start()
+
+            # Start process lane workers now if configured to run warm
+            from .core.process_pool import get_process_lane
+            process_lane = get_process_lane()
+            if process_lane.config.warm:
+                await process_lane.warm()
+
+            # Pre-spawn Cursor CLI workers and reserve chats in the background
+            from .cursor.cli_agent import get_cli_agent
+            cli_agent = get_cli_agent()
+            if cli_agent.is_available:
+                self.cli_warm_task = asyncio.create_task(cli_agent.warm_pool())
+
             # Initialize and start calendar reminder service
             await self._start_reminder_service()
             
@@ -321,10 +338,74 @@ class CursorBotApp:
         except Exception as e:
             logger.debug(f"Error stopping reminder service: {e}")
 
+        # Stop job scheduler, persisting job state
+        try:
+            from .core import scheduler
+            if scheduler._scheduler is not None:
+                await scheduler._scheduler.stop()
+        except Exception as e:
+            logger.debug(f"Error stopping scheduler: {e}")
+
         # Stop task queue
         task_queue = get_task_queue()
         await task_queue.stop()
 
+        # Stop process lane workers
+        try:
+            from .core.process_pool import reset_process_lane
+            await asyncio.to_thread(reset_process_lane)
+        except Exception as e:
+            logger.debug(f"Error stopping process lane: {e}")
+
+        # Kill warm Cursor CLI workers, after the startup warm-up can no longer spawn any
+        if self.cli_warm_task is not None:
+            self.cli_warm_task.cancel()
+            try:
+                await self.cli_warm_task
+            except asyncio.CancelledError:
+                pass
+            except Exception as e:
+                logger.debug(f"CLI warm-up failed: {e}")
+            self.cli_warm_task = None
+        try:
+            from .cursor import cli_agent
+            if cli_agent._cli_agent is not None:
+                await cli_agent._cli_agent.aclose()
+        except Exception as e:
+            logger.debug(f"Error stopping CLI workers: {e}")
+
+        # Close pooled LLM HTTP connections
+        try:
+            from .core import llm_providers
+            if llm_providers._llm_manager is not None:
+                await llm_providers._llm_manager.aclose()
+        except Exception as e:
+            logger.debug(f"Error closing LLM HTTP clients: {e}")
+
+        # Flush pending history writes and close memory database connections
+        try:
+            from .core import memory
+            if memory._memory_manager is not None:
+                await memory._memory_manager.close()
+        except Exception as e:
+            logger.debug(f"Error closing memory database: {e}")
+
+        # Write queued analytics events
+        try:
+            from .core import analytics
+            if analytics._analytics is not None:
+                await asyncio.to_thread(analytics._analytics.close)
+        except Exception as e:
+            logger.debug(f"Error flushing analytics: {e}")
+
+        # Close the session journal
+        try:
+            from .core import session
+            if session._session_manager is not None:
+                session._session_manager.close()
+        except Exception as e:
+            logger.debug(f"Error closing session store: {e}")
+
         # Stop Telegram bot
         if self.telegram_bot:
             await self.telegram_bot.stop()
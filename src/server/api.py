@@ -7,6 +7,7 @@ from contextlib import asynccontextmanager
 from datetime import datetime
 from typing import Optional, List
 import json
+import re
 import uuid
 
 from fastapi import FastAPI, HTTPException, Request, Response, WebSocket, WebSocketDisconnect
@@ -54,6 +55,10 @@ class SearchRequest(BaseModel):
     """Request model for search endpoint."""
 
     query: str
+    regex: bool = False
+    case_sensitive: bool = False
+    offset: int = 0
+    limit: int = 20
 
 
 class BroadcastRequest(BaseModel):
@@ -75,6 +80,7 @@ class UsageStatsResponse(BaseModel):
     total_output_chars: int
     total_time_seconds: float
     by_provider: dict
+    router: dict = {}
 
 
 # Track server start time
@@ -357,8 +363,17 @@ def register_routes(app: FastAPI) -> None:
         if not workspace_agent:
             raise HTTPException(status_code=503, detail="Workspace Agent not available")
 
-        results = await workspace_agent.search_code(request.query)
-        return {"results": results}
+        try:
+            page = await workspace_agent.search_code_page(
+                request.query,
+                regex=request.regex,
+                case_sensitive=request.case_sensitive,
+                offset=request.offset,
+                limit=max(1, min(request.limit, 200)),
+            )
+        except re.error as e:
+            raise HTTPException(status_code=400, detail=f"Invalid regex: {e}")
+        return page.to_dict()
 
     @app.get("/api/files")
     async def list_files(path: str = "."):
@@ -1,88 +1,24 @@
 """
 Task queue and multi-user management for CursorBot
 Provides job scheduling, queuing, and user isolation
+
+Scheduling is done by src.core.queue.TaskQueue (fair sharing between
+users, priority aging, latency histograms); this module adds per-user
+admission limits and the user-facing task API.
 """
 
 import asyncio
+import functools
 import time
 from dataclasses import dataclass, field
 from datetime import datetime
-from enum import Enum
-from typing import Any, Callable, Coroutine, Optional
-from uuid import uuid4
+from typing import Callable, Coroutine, Optional
 
+from ..core.queue import QueueConfig, Task, TaskPriority, TaskStatus
+from ..core.queue import TaskQueue as _SchedulingQueue
 from .logger import logger
 
 
-class TaskPriority(Enum):
-    """Task priority levels."""
-
-    LOW = 0
-    NORMAL = 1
-    HIGH = 2
-    URGENT = 3
-
-
-class TaskStatus(Enum):
-    """Task status."""
-
-    PENDING = "pending"
-    QUEUED = "queued"
-    RUNNING = "running"
-    COMPLETED = "completed"
-    FAILED = "failed"
-    CANCELLED = "cancelled"
-    TIMEOUT = "timeout"
-
-
-@dataclass
-class Task:
-    """Represents a queued task."""
-
-    id: str
-    user_id: int
-    name: str
-    func: Callable[..., Coroutine]
-    args: tuple = field(default_factory=tuple)
-    kwargs: dict = field(default_factory=dict)
-    priority: TaskPriority = TaskPriority.NORMAL
-    status: TaskStatus = TaskStatus.PENDING
-    result: Any = None
-    error: Optional[str] = None
-    created_at: datetime = field(default_factory=datetime.now)
-    started_at: Optional[datetime] = None
-    finished_at: Optional[datetime] = None
-    timeout: int = 300  # 5 minutes default
-
-    def __lt__(self, other: "Task") -> bool:
-        """Compare tasks by priority for queue ordering."""
-        if self.priority.value != other.priority.value:
-            return self.priority.value > other.priority.value
-        return self.created_at < other.created_at
-
-    @property
-    def duration_ms(self) -> Optional[int]:
-        """Get task duration in milliseconds."""
-        if self.started_at and self.finished_at:
-            return int((self.finished_at - self.started_at).total_seconds() * 1000)
-        return None
-
-    def to_dict(self) -> dict:
-        """Convert task to dictionary."""
-        return {
-            "id": self.id,
-            "user_id": self.user_id,
-            "name": self.name,
-            "priority": self.priority.name,
-            "status": self.status.value,
-            "error": self.error,
-            "created_at": self.created_at.isoformat(),
-            "started_at": self.started_at.isoformat() if self.started_at else None,
-            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
-            "duration_ms": self.duration_ms,
-        }
-
-
 @dataclass
 class UserContext:
     """User-specific context and limits."""
@@ -121,6 +57,9 @@ class TaskQueue:
     """
     Priority task queue with multi-user support.
     Manages task scheduling and execution.
+
+    Each user's tasks are scheduled fairly against other users', and at
+    most max_concurrent_tasks of them run at once.
     """
 
     def __init__(
@@ -138,17 +77,30 @@ class TaskQueue:
         self.max_workers = max_workers
         self.max_queue_size = max_queue_size
 
-        self._queue: asyncio.PriorityQueue = asyncio.PriorityQueue(maxsize=max_queue_size)
-        self._tasks: dict[str, Task] = {}
+        self._queue = _SchedulingQueue(
+            QueueConfig(
+                max_concurrent=max_workers,
+                default_max_retries=0,
+                max_queue_size=max_queue_size,
+            ),
+            name="users",
+        )
+        self._queue.add_start_callback(self._on_started)
+        self._queue.add_callback(self._on_finished)
+        self._tasks = self._queue.tasks
         self._user_contexts: dict[int, UserContext] = {}
-        self._workers: list[asyncio.Task] = []
-        self._running = False
         self._task_callbacks: list[Callable] = []
+        self._active_ids: set[str] = set()  # Started and not yet finished, across retries
+
+    @property
+    def _running(self) -> bool:
+        return self._queue.is_running
 
     def get_user_context(self, user_id: int) -> UserContext:
         """Get or create user context."""
         if user_id not in self._user_contexts:
             self._user_contexts[user_id] = UserContext(user_id=user_id)
+            self._queue.set_concurrency_limit(user_id, self._user_contexts[user_id].max_concurrent_tasks)
         return self._user_contexts[user_id]
 
     def set_user_limits(
@@ -158,6 +110,7 @@ class TaskQueue:
         max_queued: Optional[int] = None,
         timeout: Optional[int] = None,
         rate_limit: Optional[int] = None,
+        weight: Optional[float] = None,
     ) -> None:
         """
         Set limits for a specific user.
@@ -168,17 +121,21 @@ class TaskQueue:
             max_queued: Maximum queued tasks
             timeout: Task timeout in seconds
             rate_limit: Requests per minute limit
+            weight: Share of workers relative to other users (default 1.0)
         """
         ctx = self.get_user_context(user_id)
 
         if max_concurrent is not None:
             ctx.max_concurrent_tasks = max_concurrent
+            self._queue.set_concurrency_limit(user_id, max_concurrent)
         if max_queued is not None:
             ctx.max_queued_tasks = max_queued
         if timeout is not None:
             ctx.task_timeout = timeout
         if rate_limit is not None:
             ctx.rate_limit_per_minute = rate_limit
+        if weight is not None:
+            self._queue.set_weight(user_id, weight)
 
     async def submit(
         self,
@@ -215,10 +172,6 @@ class TaskQueue:
         if not can_submit:
             raise ValueError(reason)
 
-        # Check queue capacity
-        if self._queue.qsize() >= self.max_queue_size:
-            raise ValueError("Task queue is full")
-
         # Count user's queued tasks
         user_queued = sum(
             1
@@ -228,22 +181,17 @@ class TaskQueue:
         if user_queued >= ctx.max_queued_tasks:
             raise ValueError(f"User queue limit reached ({ctx.max_queued_tasks})")
 
-        # Create task
-        task = Task(
-            id=str(uuid4())[:8],
-            user_id=user_id,
-            name=name,
-            func=func,
-            args=args,
-            kwargs=kwargs or {},
+        # Bind the call's arguments up front so they can't collide with
+        # the queue's own keywords (priority, timeout, user_id, name, ...)
+        # Raises ValueError when the queue is full
+        task_id = await self._queue.submit(
+            functools.partial(func, *args, **(kwargs or {})),
             priority=priority,
             timeout=timeout or ctx.task_timeout,
+            user_id=user_id,
+            name=name,
         )
-
-        # Add to tracking and queue
-        self._tasks[task.id] = task
-        task.status = TaskStatus.QUEUED
-        await self._queue.put((task.priority.value * -1, task.created_at, task))
+        task = self._tasks[task_id]
 
         ctx.record_request()
 
@@ -256,102 +204,38 @@ class TaskQueue:
 
     async def start(self) -> None:
         """Start the task queue workers."""
-        if self._running:
-            return
-
-        self._running = True
         logger.info(f"Starting task queue with {self.max_workers} workers")
-
-        # Create worker tasks
-        for i in range(self.max_workers):
-            worker = asyncio.create_task(self._worker(i))
-            self._workers.append(worker)
+        await self._queue.start()
 
     async def stop(self) -> None:
         """Stop the task queue."""
-        self._running = False
-
-        # Cancel all workers
-        for worker in self._workers:
-            worker.cancel()
-
-        await asyncio.gather(*self._workers, return_exceptions=True)
-        self._workers.clear()
+        await self._queue.stop(wait=False)
 
         logger.info("Task queue stopped")
 
-    async def _worker(self, worker_id: int) -> None:
-        """Worker coroutine that processes tasks."""
-        logger.debug(f"Worker {worker_id} started")
-
-        while self._running:
-            try:
-                # Get task from queue with timeout
-                try:
-                    _, _, task = await asyncio.wait_for(
-                        self._queue.get(),
-                        timeout=1.0,
-                    )
-                except asyncio.TimeoutError:
-                    continue
-
-                # Execute task
-                await self._execute_task(task, worker_id)
-
-            except asyncio.CancelledError:
-                break
-            except Exception as e:
-                logger.error(f"Worker {worker_id} error: {e}")
-
-        logger.debug(f"Worker {worker_id} stopped")
-
-    async def _execute_task(self, task: Task, worker_id: int) -> None:
-        """Execute a single task."""
-        task.status = TaskStatus.RUNNING
-        task.started_at = datetime.now()
-
-        ctx = self.get_user_context(task.user_id)
-        ctx._active_tasks += 1
-
-        logger.info(f"Worker {worker_id} executing: {task.id} ({task.name})")
-
+    async def _on_started(self, task: Task) -> None:
+        if task.id not in self._active_ids:
+            self._active_ids.add(task.id)
+            self.get_user_context(task.user_id)._active_tasks += 1
+        logger.info(f"Executing: {task.id} ({task.name})")
         await self._notify_callbacks(task, "started")
 
-        try:
-            # Execute with timeout
-            result = await asyncio.wait_for(
-                task.func(*task.args, **task.kwargs),
-                timeout=task.timeout,
-            )
-
-            task.result = result
-            task.status = TaskStatus.COMPLETED
+    async def _on_finished(self, task: Task) -> None:
+        if task.id in self._active_ids:
+            self._active_ids.discard(task.id)
+            self.get_user_context(task.user_id)._active_tasks -= 1
 
-        except asyncio.TimeoutError:
-            task.status = TaskStatus.TIMEOUT
-            task.error = f"Task timed out after {task.timeout}s"
+        if task.status == TaskStatus.FAILED:
+            logger.error(f"Task failed: {task.id} - {task.error}")
+        elif task.status == TaskStatus.TIMEOUT:
             logger.warning(f"Task timeout: {task.id}")
 
-        except asyncio.CancelledError:
-            task.status = TaskStatus.CANCELLED
-            task.error = "Task was cancelled"
-            logger.info(f"Task cancelled: {task.id}")
-
-        except Exception as e:
-            task.status = TaskStatus.FAILED
-            task.error = str(e)
-            logger.error(f"Task failed: {task.id} - {e}")
+        await self._notify_callbacks(task, "finished")
 
-        finally:
-            task.finished_at = datetime.now()
-            ctx._active_tasks -= 1
-
-            await self._notify_callbacks(task, "finished")
-
-            logger.info(
-                f"Task {task.id} finished: {task.status.value} "
-                f"({task.duration_ms}ms)"
-            )
+        logger.info(
+            f"Task {task.id} finished: {task.status.value} "
+            f"({task.duration_ms}ms)"
+        )
 
     def add_callback(self, callback: Callable) -> None:
         """Add callback for task events."""
@@ -405,13 +289,9 @@ class TaskQueue:
         if task.user_id != user_id:
             return False
 
-        if task.status not in (TaskStatus.PENDING, TaskStatus.QUEUED, TaskStatus.RUNNING):
+        if not await self._queue.cancel_task(task_id, include_running=True, reason="Cancelled by user"):
             return False
 
-        task.status = TaskStatus.CANCELLED
-        task.error = "Cancelled by user"
-        task.finished_at = datetime.now()
-
         logger.info(f"Task cancelled: {task_id}")
         return True
 
@@ -424,12 +304,14 @@ class TaskQueue:
             )
 
         return {
-            "queue_size": self._queue.qsize(),
+            "queue_size": self._queue.queued,
             "max_queue_size": self.max_queue_size,
             "workers": self.max_workers,
             "running": self._running,
             "tasks_by_status": status_counts,
             "total_tasks": len(self._tasks),
+            "wait_ms": self._queue.wait_histogram.to_dict(),
+            "run_ms": self._queue.run_histogram.to_dict(),
         }
 
     def cleanup_old_tasks(self, max_age_hours: int = 24) -> int:
@@ -451,7 +333,7 @@ class TaskQueue:
             if task.finished_at
             and task.finished_at.timestamp() < cutoff
             and task.status
-            in (TaskStatus.COMPLETED, TaskStatus.FAILED, TaskStatus.CANCELLED)
+            in (TaskStatus.COMPLETED, TaskStatus.FAILED, TaskStatus.CANCELLED, TaskStatus.TIMEOUT)
         ]
 
         for task_id in to_remove:
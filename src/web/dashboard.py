@@ -418,11 +418,15 @@ DASHBOARD_HTML = """
                                              :class="info.available ? 'bg-green-100 dark:bg-green-500/20' : 'bg-slate-200 dark:bg-slate-600'">
                                             <span class="text-sm" x-text="info.available ? '✓' : '−'"></span>
                                         </div>
-                                        <span class="font-medium capitalize" :class="info.available ? 'text-green-700 dark:text-green-400' : 'text-slate-500 dark:text-slate-400'" x-text="name"></span>
+                                        <div>
+                                            <span class="font-medium capitalize" :class="info.available ? 'text-green-700 dark:text-green-400' : 'text-slate-500 dark:text-slate-400'" x-text="name"></span>
+                                            <p x-show="info.p50_ms !== null && info.p50_ms !== undefined" class="text-xs text-slate-500 dark:text-slate-400"
+                                               x-text="'p50 ' + info.p50_ms + 'ms · p95 ' + info.p95_ms + 'ms · 錯誤率 ' + Math.round(info.error_rate * 100) + '%'"></p>
+                                        </div>
                                     </div>
                                     <span class="text-xs px-2 py-1 rounded-full font-medium"
-                                          :class="info.available ? 'bg-green-200 dark:bg-green-500/30 text-green-700 dark:text-green-400' : 'bg-slate-200 dark:bg-slate-600 text-slate-500 dark:text-slate-400'"
-                                          x-text="info.current ? '使用中' : info.available ? '可用' : '未設定'"></span>
+                                          :class="info.circuit === 'open' ? 'bg-red-200 dark:bg-red-500/30 text-red-700 dark:text-red-400' : info.available ? 'bg-green-200 dark:bg-green-500/30 text-green-700 dark:text-green-400' : 'bg-slate-200 dark:bg-slate-600 text-slate-500 dark:text-slate-400'"
+                                          x-text="info.circuit === 'open' ? '熔斷中' : info.circuit === 'half_open' ? '探測中' : info.current ? '使用中' : info.available ? '可用' : '未設定'"></span>
                                 </div>
                             </template>
                         </div>
@@ -828,12 +832,18 @@ def create_dashboard_router():
             # Get provider status
             available = manager.list_available_providers()
             status = manager.get_current_status()
+            health = manager.get_router_status().get("by_provider", {})
             
             result = {}
             for provider in ["openai", "anthropic", "google", "openrouter", "ollama", "bedrock", "moonshot", "glm"]:
+                route = health.get(provider, {})
                 result[provider] = {
                     "available": provider in available,
                     "current": provider == status.get("current_provider"),
+                    "circuit": route.get("state", "closed"),
+                    "p50_ms": route.get("p50_ms"),
+                    "p95_ms": route.get("p95_ms"),
+                    "error_rate": route.get("error_rate", 0),
                 }
             
             return result
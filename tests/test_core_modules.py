@@ -83,6 +83,361 @@ class TestLLMProviders:
         assert ProviderType.OPENAI in LLMProviderManager.DEFAULT_MODELS
         assert ProviderType.ANTHROPIC in LLMProviderManager.DEFAULT_MODELS
         assert ProviderType.MINIMAX in LLMProviderManager.DEFAULT_MODELS
+    
+    @pytest.mark.asyncio
+    async def test_http_client_pool_reuses_connections(self):
+        """Test pooled provider clients keep connections alive across requests."""
+        import threading
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        from src.core.llm_providers import HTTPClientPool, HTTPPoolConfig
+        
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            
+            def do_GET(self):
+                body = b"ok"
+                self.send_response(200)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            
+            def log_message(self, *args):
+                pass
+        
+        server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        
+        pool = HTTPClientPool(HTTPPoolConfig(http2=False))
+        try:
+            client = pool.get_client("openai", timeout=5)
+            assert pool.get_client("openai", timeout=5) is client
+            
+            url = f"http://127.0.0.1:{server.server_address[1]}/"
+            for _ in range(3):
+                response = await client.get(url)
+                assert response.text == "ok"
+            
+            stats = pool.get_stats()["by_provider"]["openai"]
+            assert stats["requests"] == 3
+            assert stats["connections_opened"] == 1
+            assert stats["reused_requests"] == 2
+        finally:
+            await pool.aclose()
+            server.shutdown()
+        
+        assert client.is_closed
+    
+    @pytest.mark.asyncio
+    async def test_hedged_generation_cancels_slow_provider(self):
+        """Test hedge and race modes return the fast provider and cancel the slow one."""
+        from src.core.llm_providers import (
+            GenerationMode, LLMProvider, LLMProviderManager, ProviderConfig, ProviderType,
+        )
+        
+        cancelled = []
+        
+        class FakeProvider(LLMProvider):
+            def __init__(self, provider_type, delay):
+                super().__init__(ProviderConfig(provider_type=provider_type, model="m", enabled=True))
+                self._type = provider_type
+                self.delay = delay
+            
+            @property
+            def provider_type(self):
+                return self._type
+            
+            async def generate(self, messages, **kwargs):
+                try:
+                    await asyncio.sleep(self.delay)
+                except asyncio.CancelledError:
+                    cancelled.append(self._type.value)
+                    raise
+                return self._type.value
+        
+        manager = LLMProviderManager()
+        manager._providers = {
+            ProviderType.OPENAI: FakeProvider(ProviderType.OPENAI, 5.0),
+            ProviderType.ANTHROPIC: FakeProvider(ProviderType.ANTHROPIC, 0.01),
+        }
+        manager._hedging.hedge_initial_delay = 0.05
+        
+        result = await manager.generate([{"role": "user", "content": "hi"}], provider="openai", mode="hedge")
+        assert result == "anthropic"
+        assert cancelled == ["openai"]
+        
+        result = await manager.generate([{"role": "user", "content": "hi"}], provider="openai", mode="race")
+        assert result == "anthropic"
+        assert cancelled == ["openai", "openai"]
+        
+        by_mode = manager.get_usage_stats()["generation"]["by_mode"]
+        assert by_mode["hedge"]["hedges_fired"] == 1
+        assert by_mode["hedge"]["backup_wins"] == 1
+        assert by_mode["race"]["extra_requests"] == 1
+        
+        # Guardrail: without budget no duplicate is sent, the primary just finishes
+        manager._providers[ProviderType.OPENAI].delay = 0.1
+        manager._extra_budget.credits = 0
+        result = await manager.generate([{"role": "user", "content": "hi"}], provider="openai", mode=GenerationMode.HEDGE.value)
+        assert result == "openai"
+        assert manager.get_usage_stats()["generation"]["by_mode"]["hedge"]["budget_denied"] == 1
+    
+    @pytest.mark.asyncio
+    async def test_router_circuit_breaker_and_latency_order(self):
+        """Test the router opens failing routes, probes them, and prefers fast backups."""
+        from src.core.llm_providers import (
+            CircuitState, LLMProvider, LLMProviderManager, ProviderConfig,
+            ProviderRouter, ProviderType, RouterConfig,
+        )
+        
+        router = ProviderRouter(RouterConfig(failure_threshold=3, open_seconds=0.05))
+        for _ in range(3):
+            assert router.acquire("openai", "gpt")
+            router.record("openai", "gpt", 0.1, False)
+        
+        assert router.get_status()["routes"]["openai/gpt"]["state"] == CircuitState.OPEN.value
+        assert not router.acquire("openai", "gpt")
+        
+        await asyncio.sleep(0.06)
+        assert router.acquire("openai", "gpt")  # probe
+        assert not router.acquire("openai", "gpt")  # only one probe at a time
+        router.record("openai", "gpt", 0.2, True)
+        assert router.get_status()["by_provider"]["openai"]["state"] == "closed"
+        
+        # Disabled routing keeps latencies for hedging but never opens circuits
+        disabled = ProviderRouter(RouterConfig(enabled=False, failure_threshold=1))
+        for _ in range(3):
+            assert disabled.acquire("openai", "gpt")
+            disabled.record("openai", "gpt", 0.1, False)
+        disabled.record("openai", "gpt", 0.3, True)
+        route = disabled.get_status()["routes"]["openai/gpt"]
+        assert route["state"] == "closed" and route["requests"] == 0
+        assert disabled.sample_count("openai", "gpt") == 1
+        
+        calls = []
+        
+        class FakeProvider(LLMProvider):
+            def __init__(self, provider_type, fail=False):
+                super().__init__(ProviderConfig(provider_type=provider_type, model="m", enabled=True))
+                self._type = provider_type
+                self.fail = fail
+            
+            @property
+            def provider_type(self):
+                return self._type
+            
+            async def generate(self, messages, **kwargs):
+                calls.append(self._type.value)
+                if self.fail:
+                    raise RuntimeError("down")
+                return self._type.value
+        
+        manager = LLMProviderManager()
+        manager._router = ProviderRouter(RouterConfig(failure_threshold=2))
+        manager._providers = {
+            ProviderType.OPENAI: FakeProvider(ProviderType.OPENAI, fail=True),
+            ProviderType.ANTHROPIC: FakeProvider(ProviderType.ANTHROPIC),
+            ProviderType.GOOGLE: FakeProvider(ProviderType.GOOGLE),
+        }
+        # Google has been much faster than Anthropic, so it is the first backup
+        for _ in range(5):
+            manager._router.record("anthropic", "m", 4.0, True)
+            manager._router.record("google", "m", 0.5, True)
+        
+        messages = [{"role": "user", "content": "hi"}]
+        assert await manager.generate(messages, provider="openai") == "google"
+        assert await manager.generate(messages, provider="openai") == "google"
+        assert calls == ["openai", "google", "openai", "google"]
+        
+        # Circuit is open now: the failing primary is no longer called
+        assert await manager.generate(messages, provider="openai") == "google"
+        assert calls[-1] == "google" and calls.count("openai") == 2
+        assert manager.get_usage_stats()["router"]["by_provider"]["openai"]["state"] == "open"
+    
+    @pytest.mark.asyncio
+    async def test_response_cache_tiers(self):
+        """Test exact and semantic response cache hits, TTL and LRU eviction."""
+        from src.core.llm_providers import LLMProvider, LLMProviderManager, ProviderConfig, ProviderType
+        from src.core.response_cache import (
+            CacheMode, ResponseCache, ResponseCacheConfig, get_response_cache, reset_response_cache,
+        )
+        
+        class FakeEmbedding:
+            calls = 0
+            
+            async def embed(self, texts):
+                FakeEmbedding.calls += 1
+                # "colour" and "color" map to the same direction
+                return [[1.0, 0.0] if "colo" in t else [0.0, 1.0] for t in texts]
+        
+        cache = ResponseCache(ResponseCacheConfig(max_entries=2), embedding_provider=FakeEmbedding())
+        system = {"role": "system", "content": "Be brief."}
+        
+        await cache.put([system, {"role": "user", "content": "What  colour is the sky?"}], "Blue",
+                        CacheMode.SEMANTIC, model="gpt-4o", temperature=0.2)
+        
+        # Whitespace is normalized for exact hits
+        assert await cache.get([system, {"role": "user", "content": "What colour is the sky?"}],
+                               CacheMode.EXACT, model="gpt-4o", temperature=0.2) == "Blue"
+        # Different parameters never match
+        assert await cache.get([system, {"role": "user", "content": "What colour is the sky?"}],
+                               CacheMode.EXACT, model="gpt-4o", temperature=0.9) is None
+        # Similar prompt only hits in semantic mode
+        similar = [system, {"role": "user", "content": "what color is the sky"}]
+        assert await cache.get(similar, CacheMode.EXACT, model="gpt-4o", temperature=0.2) is None
+        assert await cache.get(similar, CacheMode.SEMANTIC, model="gpt-4o", temperature=0.2) == "Blue"
+        
+        # A semantic miss embeds the prompt once for both the lookup and the store
+        embedded = FakeEmbedding.calls
+        request = cache.request([system, {"role": "user", "content": "Is grass green?"}],
+                                CacheMode.SEMANTIC, model="gpt-4o", temperature=0.2)
+        assert await cache.lookup(request) is None
+        await cache.store(request, "Yes")
+        assert FakeEmbedding.calls == embedded + 1
+        assert await cache.get([system, {"role": "user", "content": "Is grass green?"}],
+                               CacheMode.EXACT, model="gpt-4o", temperature=0.2) == "Yes"
+        
+        stats = cache.get_stats()
+        assert stats["exact_hits"] == 2 and stats["semantic_hits"] == 1 and stats["misses"] == 3
+        assert stats["cost_saved"] > 0
+        
+        # LRU eviction
+        for i in range(3):
+            await cache.put([{"role": "user", "content": f"q{i}"}], f"a{i}", CacheMode.EXACT)
+        assert cache.get_stats()["entries"] == 2
+        assert await cache.get([{"role": "user", "content": "q0"}], CacheMode.EXACT) is None
+        
+        # TTL expiry
+        cache.config.ttl_seconds = 0
+        assert await cache.get([{"role": "user", "content": "q2"}], CacheMode.EXACT) is None
+        
+        # Manager only calls the provider once for a repeated opted-in prompt
+        calls = []
+        
+        class FakeProvider(LLMProvider):
+            @property
+            def provider_type(self):
+                return ProviderType.OPENAI
+            
+            async def generate(self, messages, **kwargs):
+                calls.append(messages)
+                return "Bonjour"
+        
+        reset_response_cache()
+        manager = LLMProviderManager()
+        manager._providers = {
+            ProviderType.OPENAI: FakeProvider(ProviderConfig(provider_type=ProviderType.OPENAI, model="m", enabled=True)),
+        }
+        messages = [{"role": "user", "content": "Translate hello to French"}]
+        for _ in range(3):
+            assert await manager.generate(messages, provider="openai", cache="exact") == "Bonjour"
+        await manager.generate(messages, provider="openai")
+        assert len(calls) == 2
+        assert manager.get_usage_stats()["response_cache"]["exact_hits"] == 2
+        
+        # A failover answer is found again under the primary's key, priced as the backup
+        class FailingProvider(LLMProvider):
+            @property
+            def provider_type(self):
+                return ProviderType.ANTHROPIC
+            
+            async def generate(self, messages, **kwargs):
+                raise RuntimeError("overloaded")
+        
+        manager._providers[ProviderType.ANTHROPIC] = FailingProvider(
+            ProviderConfig(provider_type=ProviderType.ANTHROPIC, model="claude", enabled=True)
+        )
+        failover_messages = [{"role": "user", "content": "Translate bye to French"}]
+        hits = manager.get_usage_stats()["response_cache"]["exact_hits"]
+        await manager.generate(failover_messages, provider="anthropic", cache="exact")
+        assert await manager.generate(failover_messages, provider="anthropic", cache="exact") == "Bonjour"
+        assert len(calls) == 3
+        stats = get_response_cache().get_stats()
+        assert stats["exact_hits"] == hits + 1
+        assert "m" in stats["by_model"] and "claude" not in stats["by_model"]
+        reset_response_cache()
+
+    @pytest.mark.asyncio
+    async def test_stream_decoding_and_stall_failover(self):
+        """Test incremental SSE/NDJSON decoding and mid-stream failover on a stall."""
+        from src.core.llm_providers import (
+            LLMProvider, LLMProviderManager, NDJSONDecoder, ProviderConfig,
+            ProviderType, SSEDecoder, StreamingConfig,
+        )
+
+        # Events split at arbitrary points, including inside a CRLF
+        raw = ': ping\r\ndata: {"a": 1}\r\n\r\nevent: delta\r\ndata: line1\r\ndata: line2\r\n\r\ndata: [DONE]'
+        decoder = SSEDecoder()
+        events = []
+        for i in range(0, len(raw), 3):
+            events.extend(decoder.feed(raw[i:i + 3]))
+        events.extend(decoder.flush())
+        assert [e.data for e in events] == ['{"a": 1}', "line1\nline2", "[DONE]"]
+        assert events[0].json() == {"a": 1}
+        assert events[1].event == "delta"
+
+        ndjson = NDJSONDecoder()
+        objects = ndjson.feed('{"n": 1}\n{"n"') + ndjson.feed(': 2}\n\n{"n": 3}') + ndjson.flush()
+        assert [o["n"] for o in objects] == [1, 2, 3]
+
+        seen = []
+
+        class FakeProvider(LLMProvider):
+            def __init__(self, provider_type, chunks, hang=False, gap=0.0):
+                super().__init__(ProviderConfig(provider_type=provider_type, model="m", enabled=True))
+                self._type = provider_type
+                self.chunks = chunks
+                self.hang = hang
+                self.gap = gap
+
+            @property
+            def provider_type(self):
+                return self._type
+
+            async def generate(self, messages, **kwargs):
+                return "".join(self.chunks)
+
+            async def generate_stream(self, messages, **kwargs):
+                seen.append((self._type.value, messages))
+                for i, chunk in enumerate(self.chunks):
+                    if i and self.gap:
+                        await asyncio.sleep(self.gap)
+                    yield chunk
+                if self.hang:
+                    await asyncio.sleep(10)
+
+        manager = LLMProviderManager()
+        manager._streaming = StreamingConfig(first_token_timeout=1, stall_timeout=0.05)
+        manager._providers = {
+            ProviderType.OPENAI: FakeProvider(ProviderType.OPENAI, ["Hello, ", "wor"], hang=True),
+            ProviderType.ANTHROPIC: FakeProvider(ProviderType.ANTHROPIC, ["ld!"]),
+        }
+
+        messages = [{"role": "user", "content": "hi"}]
+        chunks = [c async for c in manager.generate_stream(messages, provider="openai")]
+        assert "".join(chunks) == "Hello, world!"
+
+        # The backup was asked to continue the partial answer
+        backup, backup_messages = seen[-1]
+        assert backup == "anthropic"
+        assert backup_messages[-2] == {"role": "assistant", "content": "Hello, wor"}
+
+        stats = manager.get_usage_stats()["streaming"]
+        assert stats["stalls"] == 1 and stats["midstream_failovers"] == 1
+        assert stats["ttft_ms_p50"] is not None
+        assert stats["recent"][0]["stalled"] and stats["recent"][1]["resumed"]
+        assert manager.get_usage_stats()["by_provider"]["openai"]["failed"] == 1
+        
+        # The router ranks a stream by its first chunk, not its full length
+        manager._streaming = StreamingConfig(first_token_timeout=1, stall_timeout=1)
+        manager._providers[ProviderType.GOOGLE] = FakeProvider(ProviderType.GOOGLE, ["a", "b"], gap=0.2)
+        chunks = [c async for c in manager.generate_stream(messages, provider="google", enable_failover=False)]
+        assert chunks == ["a", "b"]
+        assert manager._router.percentile("google", None, 50, ttft=True) < 0.1
+        # Stream TTFTs stay out of the full-latency window hedge delays use
+        assert manager._router.sample_count("google", None) == 0
+        assert manager._router.percentile("google", None, 50) is None
+        assert manager._router.get_status()["routes"]["google/default"]["ttft_p50_ms"] < 100
 
 
 # ============================================
@@ -135,6 +490,455 @@ class TestAsyncTasks:
         manager2 = get_task_manager()
         
         assert manager1 is manager2
+    
+    @pytest.mark.asyncio
+    async def test_cancelled_tasks_call_on_error(self, monkeypatch):
+        """Test cancelling a running or queued task still finishes its callbacks."""
+        import src.core.agent_loop as agent_loop
+        from src.core.async_tasks import AsyncTaskManager, TaskStatus
+        
+        started = asyncio.Event()
+        
+        class HangingAgent:
+            async def run(self, **kwargs):
+                started.set()
+                await asyncio.sleep(60)
+        
+        monkeypatch.setattr(agent_loop, "get_agent_loop", lambda: HangingAgent())
+        manager = AsyncTaskManager(max_concurrent=1)
+        errors = []
+        
+        async def on_error(task):
+            errors.append((task.id, task.status))
+        
+        running = await manager.submit_agent_task(
+            user_id="u", chat_id="c", platform="cli", prompt="hi", on_error=on_error,
+        )
+        queued = await manager.submit_agent_task(
+            user_id="u", chat_id="c", platform="cli", prompt="hi", on_error=on_error,
+        )
+        await asyncio.wait_for(started.wait(), 1)
+        
+        assert await manager.cancel_task(running)
+        assert await manager.cancel_task(queued)
+        assert sorted(errors) == sorted([
+            (running, TaskStatus.CANCELLED), (queued, TaskStatus.CANCELLED),
+        ])
+    
+    @pytest.mark.asyncio
+    async def test_broken_stream_fails_agent_task(self, monkeypatch):
+        """Test a stream that breaks off mid-reply fails the task and keeps the text."""
+        import src.core.agent_loop as agent_loop
+        import src.core.llm_providers as llm_providers
+        from src.core.async_tasks import AsyncTaskManager, TaskStatus
+
+        async def stream(conversation):
+            yield "partial "
+            raise ConnectionError("stream reset")
+
+        class NoUserStream:
+            def get_llm_stream_function_for_user(self, user_id):
+                return None
+
+        monkeypatch.setattr(agent_loop, "get_agent_loop", lambda: agent_loop.AgentLoop(llm_stream_provider=stream))
+        monkeypatch.setattr(llm_providers, "get_llm_manager", lambda: NoUserStream())
+        manager = AsyncTaskManager()
+        tokens, outcomes = [], []
+        done = asyncio.Event()
+
+        async def on_finish(task):
+            outcomes.append(task)
+            done.set()
+
+        task_id = await manager.submit_agent_task(
+            user_id="u", chat_id="c", platform="cli", prompt="hi",
+            on_complete=on_finish, on_error=on_finish, on_token=tokens.append,
+        )
+        await asyncio.wait_for(done.wait(), 2)
+
+        task = outcomes[0]
+        assert task.id == task_id
+        assert task.status == TaskStatus.FAILED
+        assert "stream reset" in task.error
+        assert task.result is None
+        assert tokens == ["partial "]
+
+    @pytest.mark.asyncio
+    async def test_streaming_agent_into_draft(self):
+        """Test agent tokens stream into draft edits that back off and overflow."""
+        from src.core.agent_loop import AgentLoop
+        from src.core.draft_streaming import DraftStreamer, StreamConfig
+        
+        async def stream(conversation):
+            for word in ["Hello ", "streaming ", "world. "] * 12:
+                yield word
+        
+        streamer = DraftStreamer(StreamConfig(
+            min_update_interval=0.01, max_updates_per_second=100,
+            debounce_ms=0, max_message_length=120,
+        ))
+        edits, sent = [], []
+        
+        class RetryAfter(Exception):
+            retry_after = 0.02
+        
+        async def on_update(draft, content, final):
+            if not edits and not final:
+                edits.append(None)
+                raise RetryAfter("Flood control exceeded")
+            edits.append((draft.message_id, content, final))
+        
+        async def on_overflow(draft, content):
+            sent.append(content)
+            return f"m{len(sent) + 1}"
+        
+        streamer.on_update(on_update)
+        streamer.on_overflow(on_overflow)
+        await streamer.start_stream("chat", "m1")
+        
+        async def on_token(text):
+            await streamer.append("chat", "m1", text)
+            await asyncio.sleep(0.005)
+        
+        agent = AgentLoop(llm_stream_provider=stream)
+        ctx = await agent.run("hi", user_id="1", on_token=on_token)
+        assert ctx.final_response == "Hello streaming world. " * 12
+        assert ctx.first_token_ms is not None
+        
+        draft = streamer._drafts["chat:m1"]
+        assert draft.rate_limited == 1
+        await streamer.complete("chat", "m1", final_content=ctx.final_response)
+        
+        # The response continued in follow-up messages, each within the limit
+        assert sent and all(len(content) <= 120 for content in sent)
+        final_id, final_text, final = edits[-1]
+        assert final and final_id == draft.message_ids[-1] != "m1"
+        assert ctx.final_response.rstrip().endswith(final_text.strip())
+
+
+# ============================================
+# Task Queue Tests
+# ============================================
+
+class TestTaskQueue:
+    """Test fair-share TaskQueue."""
+    
+    @pytest.mark.asyncio
+    async def test_fair_sharing_aging_and_histograms(self):
+        """Test users are served round robin, waiting tasks age and latency is recorded."""
+        from src.core.queue import QueueConfig, TaskPriority, TaskQueue, TaskStatus
+        
+        queue = TaskQueue(QueueConfig(max_concurrent=1, aging_interval=0), name="test")
+        order = []
+        
+        async def job(label):
+            order.append(label)
+        
+        # Submitted before start, so scheduling order alone decides
+        ids = [await queue.submit(job, f"a{i}", user_id="a") for i in range(4)]
+        ids += [await queue.submit(job, f"b{i}", user_id="b") for i in range(2)]
+        queue.set_weight("a", 2)
+        await queue.start()
+        for task_id in ids:
+            await queue.wait_for_task(task_id, timeout=5)
+        assert order == ["a0", "a1", "b0", "a2", "a3", "b1"]
+        
+        stats = queue.get_stats()
+        assert stats["wait_ms"]["count"] == 6
+        assert stats["run_ms"]["count"] == 6
+        assert stats["queue_size"] == 0
+        await queue.stop()
+
+        # Slow samples report the last bound as a flagged lower bound, like analytics
+        from src.core.histogram import LatencyHistogram
+
+        hist = LatencyHistogram((100, 1000))
+        for ms in (50, 100, 2000, 5000):
+            hist.record(ms)
+        summary = hist.to_dict()
+        assert summary["buckets"] == {"100": 1, "1000": 1, "inf": 2}
+        assert summary["p50_ms"] == 1000.0 and summary["p95_ms"] == 1000.0
+        assert summary["overflow"] == ["p95_ms", "p99_ms"]
+        assert LatencyHistogram((100,)).percentile(50) is None
+        
+        # With aging, a long-waiting low priority task overtakes newer high priority ones
+        aged = TaskQueue(QueueConfig(max_concurrent=1, aging_interval=0.01), name="aged")
+        order.clear()
+        old = await aged.submit(job, "old", priority=TaskPriority.LOW)
+        await asyncio.sleep(0.05)
+        await aged.submit(job, "new", priority=TaskPriority.HIGH)
+        await aged.start()
+        await aged.wait_for_task(old, timeout=5)
+        assert order[0] == "old"
+        
+        async def forever():
+            await asyncio.sleep(60)
+        
+        running = await aged.submit(forever)
+        await asyncio.sleep(0.05)
+        waiting = await aged.submit(forever)
+        assert aged.queued == 1
+        assert await aged.cancel_task(waiting)
+        assert aged.queued == 0
+        assert await aged.cancel_task(running, include_running=True)
+        assert (await aged.wait_for_task(running, timeout=5)).status == TaskStatus.CANCELLED
+        await aged.stop()
+    
+    @pytest.mark.asyncio
+    async def test_user_queue_passes_kwargs_through(self):
+        """Test task kwargs named like queue options reach the task function."""
+        from src.core.queue import TaskStatus
+        from src.utils.task_queue import TaskQueue as UserTaskQueue
+        
+        queue = UserTaskQueue(max_workers=1)
+        seen = {}
+        
+        async def job(label, name=None, timeout=None, priority=None):
+            seen.update(label=label, name=name, timeout=timeout, priority=priority)
+        
+        await queue.start()
+        task = await queue.submit(
+            1, "display", job, args=("x",),
+            kwargs={"name": "file.txt", "timeout": 5, "priority": "high"},
+        )
+        done = await queue._queue.wait_for_task(task.id, timeout=5)
+        assert done.status == TaskStatus.COMPLETED
+        assert seen == {"label": "x", "name": "file.txt", "timeout": 5, "priority": "high"}
+        assert task.name == "display"
+        await queue.stop()
+
+    @pytest.mark.asyncio
+    async def test_callbacks_fire_once_on_terminal_states(self):
+        """Test retries don't fire completion callbacks and cancel reasons are kept."""
+        from src.core.queue import QueueConfig, TaskQueue, TaskStatus
+        from src.utils.task_queue import TaskQueue as UserTaskQueue
+
+        queue = TaskQueue(QueueConfig(max_concurrent=1, retry_delay=0.01), name="retry")
+        finished = []
+        queue.add_callback(lambda task: finished.append(task.status))
+        attempts = []
+
+        async def flaky():
+            attempts.append(1)
+            if len(attempts) < 3:
+                raise RuntimeError("boom")
+            return "ok"
+
+        await queue.start()
+        task_id = await queue.submit(flaky, max_retries=3)
+        assert (await queue.wait_for_task(task_id, timeout=5)).status == TaskStatus.COMPLETED
+        assert len(attempts) == 3
+        assert finished == [TaskStatus.COMPLETED]
+        await queue.stop()
+
+        users = UserTaskQueue(max_workers=1)
+        started = asyncio.Event()
+
+        async def stubborn():
+            started.set()
+            try:
+                await asyncio.sleep(60)
+            except asyncio.CancelledError:
+                raise RuntimeError("worker interrupted")
+
+        await users.start()
+        task = await users.submit(1, "slow", stubborn)
+        await started.wait()
+        assert await users.cancel_task(task.id, user_id=1)
+        done = await users._queue.wait_for_task(task.id, timeout=5)
+        assert done.status == TaskStatus.CANCELLED
+        assert done.error == "Cancelled by user"
+        assert users.get_user_context(1)._active_tasks == 0
+        await users.stop()
+    
+    @pytest.mark.asyncio
+    async def test_process_lane(self):
+        """Test CPU-bound tasks run in worker processes with limits and streaming."""
+        import math
+        from src.core.process_pool import ProcessLane, ProcessLaneConfig, ProcessTimeoutError
+        from src.core.queue import QueueConfig, TaskLane, TaskQueue, TaskStatus
+        
+        lane = ProcessLane(ProcessLaneConfig(workers=2, time_limit=30))
+        try:
+            await lane.warm()
+            results = await asyncio.gather(*(lane.run(math.factorial, n) for n in range(5)))
+            assert results == [1, 1, 2, 6, 24]
+            
+            chunks = []
+            total = await lane.run(count_up, 3, on_chunk=chunks.append)
+            assert chunks == [0, 1, 2] and total == 3
+            
+            with pytest.raises(ProcessTimeoutError):
+                await lane.run(time.sleep, 5, time_limit=0.2)
+            assert await lane.run(math.factorial, 3) == 6  # Worker still usable
+            
+            with pytest.raises(ValueError):
+                await lane.run(lambda: 1)
+            assert lane.get_stats()["timeouts"] == 1
+        finally:
+            lane.shutdown()
+        
+        # Queue tasks on the process lane, with thread fallback when disabled
+        with patch("src.core.queue.get_process_lane", return_value=ProcessLane(ProcessLaneConfig(workers=0))):
+            queue = TaskQueue(QueueConfig(max_concurrent=2, default_max_retries=0), name="cpu")
+            await queue.start()
+            task_id = await queue.submit(count_up, 4, lane=TaskLane.PROCESS, stream=True)
+            assert [chunk async for chunk in queue.stream(task_id)] == [0, 1, 2, 3]
+            task = await queue.wait_for_task(task_id, timeout=5)
+            assert task.status == TaskStatus.COMPLETED and task.result == 4
+            
+            async def not_allowed():
+                pass
+            
+            with pytest.raises(ValueError):
+                await queue.submit(not_allowed, lane=TaskLane.PROCESS)
+            await queue.stop()
+
+
+def count_up(n):
+    """Generator run in worker processes by TestTaskQueue."""
+    for i in range(n):
+        yield i
+    return n
+
+
+# ============================================
+# Scheduler Tests
+# ============================================
+
+class TestScheduler:
+    """Test heap-based Scheduler."""
+    
+    @pytest.mark.asyncio
+    async def test_concurrent_dispatch_misfire_and_persistence(self, tmp_path):
+        """Test due jobs run concurrently, misfires are skipped and state survives restarts."""
+        import json
+        from src.core.scheduler import (
+            JobStatus, MisfirePolicy, Scheduler, SchedulerConfig,
+        )
+        
+        state_path = str(tmp_path / "scheduler.json")
+        scheduler = Scheduler(SchedulerConfig(max_concurrency=2, state_path=state_path))
+        await scheduler.start()
+        
+        running = 0
+        peak = 0
+        
+        async def slow_job():
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.05)
+            running -= 1
+        
+        soon = datetime.now() + timedelta(seconds=0.05)
+        jobs = [scheduler.schedule_once(f"job{i}", soon, slow_job) for i in range(4)]
+        cancelled = scheduler.schedule_once("cancelled", soon, slow_job)
+        scheduler.cancel(cancelled.job_id)
+        missed = scheduler.schedule_once(
+            "missed", datetime.now() - timedelta(hours=1), slow_job,
+            misfire_policy=MisfirePolicy.SKIP,
+        )
+        interval = scheduler.schedule_interval("interval", 3600, slow_job, job_id="hourly")
+        
+        # Woken by the inserts, not a polling tick; capped at two at a time
+        await asyncio.sleep(0.3)
+        assert all(job.status == JobStatus.COMPLETED for job in jobs)
+        assert peak == 2
+        assert cancelled.run_count == 0
+        assert missed.status == JobStatus.FAILED
+        assert missed.run_count == 0
+        assert scheduler.get_stats()["misfired"] == 1
+        
+        await scheduler.stop()
+        
+        # Re-registering a job with the same ID and timing restores its schedule
+        restarted = Scheduler(SchedulerConfig(state_path=state_path))
+        restored = restarted.schedule_interval("interval", 3600, slow_job, job_id="hourly")
+        assert restored.next_run == interval.next_run
+        
+        # Saved jobs nobody re-registers are forgotten at stop; long-overdue ones on load
+        await restarted.start()
+        await restarted.stop()
+        idle = Scheduler(SchedulerConfig(state_path=state_path))
+        assert set(idle._saved_state) == {"hourly"}
+        await idle.start()
+        await idle.stop()
+        with open(state_path, encoding="utf-8") as f:
+            assert json.load(f) == {}
+        
+        with open(state_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "old": {"status": "pending", "next_run": (datetime.now() - timedelta(days=30)).isoformat()},
+                "soon": {"status": "pending", "next_run": (datetime.now() + timedelta(hours=1)).isoformat()},
+            }, f)
+        assert set(Scheduler(SchedulerConfig(state_path=state_path))._saved_state) == {"soon"}
+    
+    @pytest.mark.asyncio
+    async def test_waiting_for_a_slot_is_not_a_misfire(self):
+        """Test jobs queued behind the concurrency limit still run under SKIP."""
+        from src.core.scheduler import JobStatus, MisfirePolicy, Scheduler, SchedulerConfig
+
+        scheduler = Scheduler(SchedulerConfig(
+            state_path=None, max_concurrency=1, misfire_grace_seconds=0.1,
+            misfire_policy=MisfirePolicy.SKIP,
+        ))
+
+        async def slow_job():
+            await asyncio.sleep(0.3)
+
+        soon = datetime.now() + timedelta(seconds=0.05)
+        first = scheduler.schedule_once("first", soon, slow_job)
+        second = scheduler.schedule_once("second", soon, slow_job)
+        await scheduler.start()
+        await asyncio.sleep(0.8)
+
+        assert first.status == JobStatus.COMPLETED
+        assert second.status == JobStatus.COMPLETED
+        assert scheduler.get_stats()["misfired"] == 0
+        await scheduler.stop()
+
+    @pytest.mark.asyncio
+    async def test_job_cancelled_mid_run_is_not_rescheduled(self):
+        """Test a recurring job cancelled while running is not re-armed."""
+        from src.core.scheduler import JobStatus, Scheduler, SchedulerConfig
+        
+        scheduler = Scheduler(SchedulerConfig(state_path=None))
+        await scheduler.start()
+        started = asyncio.Event()
+        release = asyncio.Event()
+        
+        async def long_job():
+            started.set()
+            await release.wait()
+        
+        job = scheduler.schedule_interval("interval", 1, long_job, start_immediately=True)
+        await asyncio.wait_for(started.wait(), 1)
+        assert scheduler.cancel_job(job.job_id)
+        release.set()
+        await asyncio.sleep(0.05)
+        
+        assert job.run_count == 1
+        assert job.status == JobStatus.CANCELLED
+        assert job.next_run is None
+        assert scheduler.list_pending_jobs() == []
+        assert scheduler.get_stats()["next_run"] is None
+
+        # A job re-registered under the same ID while running keeps the new schedule
+        started.clear()
+        release.clear()
+        old = scheduler.schedule_interval("old", 1, long_job, job_id="fixed", start_immediately=True)
+        await asyncio.wait_for(started.wait(), 1)
+        new = scheduler.schedule_interval("new", 3600, long_job, job_id="fixed")
+        release.set()
+        await asyncio.sleep(0.05)
+
+        assert old.run_count == 1
+        assert scheduler.get_job("fixed") is new
+        assert scheduler.list_pending_jobs() == [new]
+        assert scheduler.get_stats()["next_run"] == new.next_run.isoformat()
+
+        await scheduler.stop()
 
 
 # ============================================
@@ -318,6 +1122,138 @@ class TestSessionManagement:
         messages = session.get_messages()
         assert len(messages) == 2
 
+    def test_journaled_session_store(self, tmp_path):
+        """Test session changes are journaled, replayed and compacted."""
+        from src.core.session import ChatType, SessionConfig, SessionManager
+
+        store_path = tmp_path / "sessions.json"
+        config = SessionConfig(store_path=str(store_path), journal_compact_records=50)
+
+        manager = SessionManager(config)
+        session = manager.get_session("u1", "c1", ChatType.GROUP, channel="telegram")
+        other = manager.get_session("u2", "c2", ChatType.GROUP, channel="telegram")
+        for _ in range(10):
+            manager.increment_message_count(session.session_key)
+        manager.update_session_tokens(session.session_key, input_tokens=100, output_tokens=20)
+        manager.delete_session(other.session_key)
+
+        # Deltas only: no snapshot yet, one small record per change
+        assert not store_path.exists()
+        journal = store_path.with_suffix(".journal")
+        lines = journal.read_text(encoding="utf-8").splitlines()
+        assert len(lines) == manager.get_stats()["journal_records"] == 14
+        manager.close()
+
+        # A garbled record is skipped without losing later ones; a torn final record is discarded
+        with open(journal, "w", encoding="utf-8") as f:
+            f.write("\n".join([lines[0], "not json", *lines[1:]]) + "\n")
+            f.write('{"op": "patch", "key": "')
+
+        reloaded = SessionManager(config)
+        assert len(reloaded._sessions) == 1
+        restored = reloaded.get_session_by_key(session.session_key)
+        assert restored.message_count == 10
+        assert restored.total_tokens == 120
+        assert reloaded.get_session_by_key(other.session_key) is None
+        assert journal.read_text(encoding="utf-8").endswith("\n")
+
+        # Reaching the threshold folds the journal into a snapshot
+        for _ in range(40):
+            reloaded.increment_message_count(session.session_key)
+        assert store_path.exists()
+        assert reloaded.get_stats()["journal_records"] < 50
+        reloaded.close()
+
+        final = SessionManager(config)
+        assert final.get_session_by_key(session.session_key).message_count == 50
+        final.close()
+
+        # A last record without its newline is terminated before the next append
+        from src.core.session import SessionStore
+
+        store = SessionStore(tmp_path / "bare.json")
+        store.journal_path.write_text('{"op":"put","key":"a","data":{"n":1}}', encoding="utf-8")
+        assert store.load() == {"a": {"n": 1}}
+        store.patch("a", {"n": 2})
+        store.close()
+        assert SessionStore(tmp_path / "bare.json").load() == {"a": {"n": 2}}
+
+
+# ============================================
+# Conversation Context Tests
+# ============================================
+
+class TestConversationContext:
+    """Test token budgeting in ConversationContext."""
+
+    @pytest.mark.asyncio
+    async def test_token_counts_running_totals_and_budget(self):
+        """Test CJK-aware counts, cached per-message totals and hard budgets."""
+        from src.core.context import CompactionConfig, ConversationContext, Message
+        from src.core.token_counter import TokenCounter, get_token_counter
+
+        # CJK costs far more than len // 4; families differ
+        text = "請幫我重構這個模組並補上測試"
+        assert get_token_counter("anthropic").count(text) > get_token_counter("glm").count(text) > len(text) // 4
+        assert get_token_counter("openai").count("The quick brown fox jumps over the lazy dog") == 9
+        # Full-width punctuation stays in the CJK run instead of swallowing the rest as bytes
+        punctuated = "你好，世界。今天天气很好，我们去公园吧。"
+        zh = get_token_counter("glm")
+        assert zh.count(punctuated) <= zh.count(punctuated.replace("，", "").replace("。", "")) + 2
+
+        class CountingCounter(TokenCounter):
+            name = "chars"
+            message_overhead = 2
+            calls = 0
+
+            def count(self, text):
+                CountingCounter.calls += 1
+                return len(text)
+
+        counter = CountingCounter()
+        ctx = ConversationContext(
+            user_id=1, chat_id=1, max_messages=6, token_counter=counter,
+            compaction_config=CompactionConfig(
+                trigger_token_estimate=50, keep_recent_messages=4, max_context_tokens=110, summary_max_tokens=10,
+            ),
+        )
+        for i in range(8):
+            ctx.add_user_message(f"message {i}")  # 9 chars + 2 overhead
+
+        # Each message is counted once; totals follow trimming without rescans
+        assert CountingCounter.calls == 8
+        assert ctx.estimate_tokens() == 6 * 11
+        assert ctx.needs_compaction() and CountingCounter.calls == 8
+
+        # Direct edits are recounted from the cached per-message counts once invalidated
+        ctx.messages.pop(0)
+        assert ctx.estimate_tokens() == 6 * 11
+        ctx.invalidate_token_count()
+        assert ctx.estimate_tokens() == 5 * 11 and CountingCounter.calls == 8
+        ctx.messages[2] = Message(role="user", content="replaced")  # 8 chars + 2
+        ctx.invalidate_token_count()
+        assert ctx.estimate_tokens() == 4 * 11 + 10
+        ctx.messages[2].content = "replaced again"  # 14 chars + 2
+        ctx.invalidate_token_count()
+        assert ctx.estimate_tokens() == 4 * 11 + 16 and CountingCounter.calls == 10
+        ctx.messages[2] = Message(role="user", content="message 5")
+        ctx.invalidate_token_count()
+
+        # Prompt assembly keeps the newest messages that fit
+        assembled = ctx.get_context_with_summary(max_tokens=25)
+        assert [m["content"] for m in assembled] == ["message 6", "message 7"]
+
+        async def summarizer(messages):
+            return "S" * 100
+
+        assert await ctx.compact(summarizer=summarizer)
+        # Kept tail (2 x 11) + summary (10) + its framing fit the budget
+        assert [m.content for m in ctx.messages] == ["message 6", "message 7"]
+        assert ctx.estimate_tokens() <= 110
+        assert ctx.compacted_summary == "S" * 10
+        assembled = ctx.get_context_with_summary()
+        assert sum(counter.count_message(m["role"], m["content"]) for m in assembled) <= 110
+
 
 # ============================================
 # Unified Commands Tests
@@ -389,6 +1325,58 @@ class TestUnifiedCommands:
         assert result.success is True
         assert "指令說明" in result.message
 
+    @pytest.mark.asyncio
+    async def test_translate_and_summarize_use_llm_tasks(self, monkeypatch):
+        """Test /translate and the translate/summarize skills answer through LLM tasks."""
+        from types import SimpleNamespace
+        
+        import src.core.llm_task as llm_task
+        from src.core.llm_task import TaskResult, TaskType
+        from src.core.skills import SummarizeSkill, TranslateSkill
+        from src.core.unified_commands import CommandContext, execute_command
+        
+        calls = []
+        
+        class FakeTasks:
+            ok = True
+            
+            async def translate(self, text, target_language, user_id=0):
+                calls.append(("translate", text, target_language))
+                if not self.ok:
+                    return TaskResult(success=False, task_type=TaskType.TRANSLATE, output="", error="no provider")
+                return TaskResult(success=True, task_type=TaskType.TRANSLATE, output="Hello world")
+            
+            async def summarize(self, text, length=3, user_id=0):
+                calls.append(("summarize", text))
+                return TaskResult(success=True, task_type=TaskType.SUMMARIZE, output="Short.")
+        
+        tasks = FakeTasks()
+        monkeypatch.setattr(llm_task, "get_llm_task_manager", lambda: tasks)
+        
+        ctx = CommandContext(user_id="u1", user_name="Test", platform="telegram", args=["en", "你好", "世界"])
+        result = await execute_command("translate", ctx)
+        assert result.success and result.message == "🌐 Hello world"
+        assert calls[-1] == ("translate", "你好 世界", "en")
+        
+        tasks.ok = False
+        result = await execute_command("translate", ctx)
+        assert not result.success and "no provider" in result.message
+        tasks.ok = True
+        
+        replies = []
+        
+        async def reply_text(text, **kwargs):
+            replies.append(text)
+        
+        update = SimpleNamespace(
+            effective_user=SimpleNamespace(id=1),
+            message=SimpleNamespace(reply_text=reply_text),
+        )
+        await TranslateSkill().execute(update, None, "translate", ["ja", "hello"])
+        await SummarizeSkill().execute(update, None, "summarize", ["a", "long", "text"])
+        assert replies == ["🌐 Hello world", "📝 Short."]
+        assert calls[-2:] == [("translate", "hello", "ja"), ("summarize", "a long text")]
+
 
 # ============================================
 # Memory System Tests
@@ -442,6 +1430,101 @@ class TestMemorySystem:
         value = manager.get("user123", "name")
         assert value is None
 
+    @pytest.mark.asyncio
+    async def test_pooled_sqlite_batched_history(self, tmp_path):
+        """Test concurrent history writes are batched over the WAL pool."""
+        from src.core.memory import MemoryManager
+
+        manager = MemoryManager(db_path=tmp_path / "memory.db", readers=2, batch_size=8)
+        try:
+            await asyncio.gather(*(
+                manager.add_message(1, 10, "user", f"message {i}") for i in range(20)
+            ))
+            history = await manager.get_conversation_history(1, 10, limit=50)
+            assert len(history) == 20
+            assert {m["content"] for m in history} == {f"message {i}" for i in range(20)}
+            assert [m["created_at"] for m in history] == sorted(m["created_at"] for m in history)
+
+            async with manager._pool.read() as db:
+                cursor = await db.execute("PRAGMA journal_mode")
+                assert (await cursor.fetchone())[0] == "wal"
+                cursor = await db.execute(
+                    "EXPLAIN QUERY PLAN SELECT * FROM conversation_history "
+                    "WHERE user_id = 1 AND chat_id = 10 ORDER BY created_at DESC"
+                )
+                plan = " ".join(str(row[-1]) for row in await cursor.fetchall())
+                assert "idx_conversation_history_chat" in plan
+
+            await manager.remember(1, "lang", "python")
+            assert await manager.recall(1, "lang") == "python"
+            assert await manager.forget(1, "lang") is True
+            assert await manager.recall(1, "lang") is None
+        finally:
+            await manager.close()
+
+    def test_pool_closes_connections_left_on_another_loop(self, tmp_path):
+        """Test moving to a new event loop stops the old connection threads."""
+        from src.core.memory import MemoryManager
+
+        manager = MemoryManager(db_path=tmp_path / "memory.db", readers=2)
+
+        async def use():
+            await manager.add_message(1, 10, "user", "hello")
+            await manager.get_conversation_history(1, 10)
+            return [manager._pool._writer, *manager._pool._all_readers]
+
+        first = asyncio.run(use())
+        second = asyncio.run(use())
+        assert not any(db.is_alive() for db in first)
+        asyncio.run(manager.close())
+        for db in second:
+            db.join(timeout=5)
+            assert not db.is_alive()
+
+    @pytest.mark.asyncio
+    async def test_full_text_search(self, tmp_path):
+        """Test FTS5 search stays in sync and ranks with snippets."""
+        from src.core.memory import MemoryManager, build_fts_query
+
+        assert build_fts_query('deploy "prod" db') == ('"deploy" AND """prod"""', ["db"])
+
+        manager = MemoryManager(db_path=tmp_path / "memory.db")
+        try:
+            await manager.remember(1, "language", "我最喜歡的語言是 Python")
+            await manager.remember(1, "editor", "uses neovim daily")
+            await manager.remember(1, "editor", "uses helix daily")
+            await manager.remember(2, "editor", "python everywhere")
+
+            results = await manager.search_memories(1, "python")
+            assert [r["key"] for r in results] == ["language"]
+            assert results[0]["snippet"].endswith("[Python]")
+
+            # Updated and deleted rows leave the index
+            assert await manager.search_memories(1, "neovim") == []
+            await manager.forget(1, "language")
+            assert await manager.search_memories(1, "python") == []
+
+            # Two-character CJK terms and typos
+            await manager.remember(1, "food", "喜歡拉麵")
+            assert [r["key"] for r in await manager.search_memories(1, "喜歡")] == ["food"]
+            assert await manager.search_memories(1, "helx") == []
+            fuzzy = await manager.search_memories(1, "helx", fuzzy=True)
+            assert fuzzy[0]["key"] == "editor"
+            assert fuzzy[0]["snippet"] == "uses [hel]ix daily"
+
+            await manager.add_message(1, 5, "user", "how do I deploy the kubernetes cluster")
+            await manager.add_message(1, 5, "assistant", "Use kubectl apply")
+            await manager.add_message(1, 6, "user", "kubectl in another chat")
+            hits = await manager.search_history(1, "kubectl", chat_id=5)
+            assert [h["content"] for h in hits] == ["Use kubectl apply"]
+            assert hits[0]["snippet"] == "Use [kubectl] apply"
+            assert len(await manager.search_history(1, "kubectl")) == 2
+
+            await manager.clear_conversation_history(1, 5)
+            assert await manager.search_history(1, "kubectl", chat_id=5) == []
+        finally:
+            await manager.close()
+
 
 # ============================================
 # I18n Tests
@@ -605,5 +1688,386 @@ class TestHealthCheck:
         assert result.timestamp is not None
 
 
+# ============================================
+# RAG Vector Store Tests
+# ============================================
+
+class TestRAGVectorStores:
+    """Test RAG vector store backends."""
+    
+    @pytest.mark.asyncio
+    async def test_numpy_store_matches_brute_force(self):
+        """Test NumpyVectorStore ranks like InMemoryVectorStore."""
+        import random
+        from src.core.rag import Document, InMemoryVectorStore, NumpyVectorStore
+        
+        rng = random.Random(42)
+        docs = [
+            Document(id=f"doc{i}", content=f"content {i}",
+                     embedding=[rng.uniform(-1, 1) for _ in range(16)])
+            for i in range(200)
+        ]
+        query = [rng.uniform(-1, 1) for _ in range(16)]
+        
+        reference = InMemoryVectorStore()
+        store = NumpyVectorStore(initial_capacity=8)
+        await reference.add(docs)
+        await store.add(docs)
+        
+        expected = await reference.search(query, top_k=10)
+        results = await store.search(query, top_k=10)
+        
+        assert [r.document.id for r in results] == [r.document.id for r in expected]
+        assert results[0].rank == 1
+        assert abs(results[0].score - expected[0].score) < 1e-4
+    
+    @pytest.mark.asyncio
+    async def test_numpy_store_delete_and_clear(self):
+        """Test NumpyVectorStore keeps rows in sync on delete and clear."""
+        from src.core.rag import Document, NumpyVectorStore
+        
+        store = NumpyVectorStore()
+        await store.add([
+            Document(id="a", content="a", embedding=[1.0, 0.0]),
+            Document(id="b", content="b", embedding=[0.0, 1.0]),
+            Document(id="c", content="c", embedding=[0.7, 0.7]),
+        ])
+        
+        await store.delete(["a", "missing"])
+        assert store.count() == 2
+        
+        results = await store.search([1.0, 0.0], top_k=5)
+        assert [r.document.id for r in results] == ["c", "b"]
+        
+        # Re-adding an existing ID updates it in place
+        await store.add([Document(id="b", content="b2", embedding=[1.0, 0.0])])
+        assert store.count() == 2
+        results = await store.search([1.0, 0.0], top_k=1)
+        assert results[0].document.content == "b2"
+        
+        await store.clear()
+        assert store.count() == 0
+        assert await store.search([1.0, 0.0]) == []
+    
+    @pytest.mark.asyncio
+    async def test_mmap_store_persists_and_compacts(self, tmp_path):
+        """Test MmapVectorStore survives reopen, tombstones and compaction."""
+        from src.core.rag import Document, MmapVectorStore
+        
+        store = MmapVectorStore(str(tmp_path), initial_capacity=2)
+        await store.add([
+            Document(id="a", content="alpha", metadata={"n": 1}, embedding=[1.0, 0.0]),
+            Document(id="b", content="beta", embedding=[0.0, 1.0]),
+            Document(id="c", content="gamma", embedding=[0.6, 0.8]),
+        ])
+        await store.delete(["b"])
+        
+        reopened = MmapVectorStore(str(tmp_path))
+        assert reopened.count() == 2
+        assert reopened.tombstone_count() == 1
+        
+        results = await reopened.search([1.0, 0.0], top_k=5)
+        assert [r.document.id for r in results] == ["a", "c"]
+        assert results[0].document.metadata == {"n": 1}
+        
+        assert await reopened.compact() == 1
+        assert reopened.tombstone_count() == 0
+        
+        compacted = MmapVectorStore(str(tmp_path))
+        results = await compacted.search([0.0, 1.0], top_k=1)
+        assert results[0].document.content == "gamma"
+        # Only the new generation's files remain
+        assert sorted(p.name for p in tmp_path.iterdir()) == [
+            "documents.1.jsonl", "header.json", "index.1.jsonl", "vectors.1.f32",
+        ]
+        
+        # A compaction that crashed before switching the header leaves the
+        # store on its last generation; the partial files are discarded
+        (tmp_path / "vectors.2.f32").write_bytes(b"\0" * 8)
+        (tmp_path / "index.2.jsonl").write_text('{"id": "x", "row": 0, "offset": 0}\n')
+        interrupted = MmapVectorStore(str(tmp_path))
+        assert interrupted.count() == 2
+        assert not (tmp_path / "vectors.2.f32").exists()
+        results = await interrupted.search([0.0, 1.0], top_k=1)
+        assert results[0].document.content == "gamma"
+        
+        await compacted.clear()
+        assert MmapVectorStore(str(tmp_path)).count() == 0
+    
+    @pytest.mark.asyncio
+    async def test_mmap_store_compacts_in_background(self, tmp_path):
+        """Test deletes trigger compaction that keeps writes made while it copies."""
+        from src.core.rag import Document, MmapVectorStore
+        
+        store = MmapVectorStore(str(tmp_path), compact_ratio=0.5, compact_min_rows=2)
+        await store.add([
+            Document(id=f"d{i}", content=f"doc {i}", embedding=[1.0, float(i)])
+            for i in range(4)
+        ])
+        
+        # Writers keep going while the live rows are copied
+        copy_rows = store._copy_rows
+        
+        def copy_with_concurrent_writes(*args):
+            if not hasattr(copy_with_concurrent_writes, "done"):
+                copy_with_concurrent_writes.done = True
+                store._add_sync([Document(id="new", content="new", embedding=[0.0, 1.0])])
+                store._delete_sync(["d3"])
+            return copy_rows(*args)
+        
+        store._copy_rows = copy_with_concurrent_writes
+        await store.delete(["d0", "d1"])
+        await store._compact_task
+        
+        assert store.count() == 2
+        reopened = MmapVectorStore(str(tmp_path))
+        assert sorted(reopened._entries) == ["d2", "new"]
+        assert reopened.tombstone_count() == 1  # d3 was deleted mid-copy
+        results = await reopened.search([0.0, 1.0], top_k=1)
+        assert results[0].document.content == "new"
+    
+    @pytest.mark.asyncio
+    async def test_mmap_store_skips_garbled_index_records(self, tmp_path):
+        """Test a bad index line neither hides later records nor breaks appends."""
+        from src.core.rag import Document, MmapVectorStore
+        
+        store = MmapVectorStore(str(tmp_path))
+        await store.add([Document(id="a", content="alpha", embedding=[1.0, 0.0])])
+        index = tmp_path / MmapVectorStore.INDEX_FILE
+        with open(index, "a", encoding="utf-8") as f:
+            f.write('{"id": "x", "row": \n')
+        await store.add([Document(id="b", content="beta", embedding=[0.0, 1.0])])
+        
+        # Garbled line in the middle, then a torn tail from a crash
+        with open(index, "a", encoding="utf-8") as f:
+            f.write('{"id": "y", "ro')
+        reopened = MmapVectorStore(str(tmp_path))
+        assert reopened.count() == 2
+        assert index.read_text(encoding="utf-8").endswith("\n")
+        
+        await reopened.add([Document(id="c", content="gamma", embedding=[0.6, 0.8])])
+        again = MmapVectorStore(str(tmp_path))
+        assert again.count() == 3
+        results = await again.search([0.0, 1.0], top_k=1)
+        assert results[0].document.content == "beta"
+    
+    @pytest.mark.asyncio
+    async def test_ivf_index_recall_and_sync(self):
+        """Test IVF search matches brute force at full probe and tracks deletes."""
+        import random
+        from src.core.rag import Document, IVFIndex, NumpyVectorStore
+        
+        rng = random.Random(7)
+        store = NumpyVectorStore(ann_index=IVFIndex(nlist=8, min_train_size=100))
+        await store.add([
+            Document(id=f"doc{i}", content=str(i),
+                     embedding=[rng.uniform(-1, 1) for _ in range(8)])
+            for i in range(300)
+        ])
+        queries = [[rng.uniform(-1, 1) for _ in range(8)] for _ in range(10)]
+        
+        # Training runs in the background; searches meanwhile use brute force
+        assert store._train_task is not None
+        assert not store.ann_index.is_trained
+        exact = await store.search(queries[0], top_k=5)
+        await store.add([Document(id="late", content="late", embedding=queries[1])])
+        await store._train_task
+        assert store.ann_index.is_trained
+        assert [r.document.id for r in await store.search(queries[0], top_k=5)] == [
+            r.document.id for r in exact
+        ]
+        # A row added mid-training was synced into the fitted index
+        late = await store.search(queries[1], top_k=1)
+        assert late[0].document.id == "late"
+        await store.delete(["late"])
+        
+        report = await store.benchmark_recall(queries, top_k=5, nprobe_values=[1, 8])
+        assert report[-1]["recall"] == 1.0
+        assert report[0]["recall"] <= report[-1]["recall"]
+        
+        results = await store.search(queries[0], top_k=5)
+        await store.delete([results[0].document.id])
+        assert store.count() == 299
+        
+        # Every remaining row is still reachable through the index
+        assert len(store.ann_index.candidates(store._matrix[0], nprobe=8)) == 299
+        after = await store.search(queries[0], top_k=5)
+        assert results[0].document.id not in [r.document.id for r in after]
+    
+    def test_ann_index_on_unsupported_store_warns(self, tmp_path):
+        """Test RAG_ANN_INDEX on a store without ANN support is reported."""
+        from src.core.rag import RAGConfig, RAGManager
+        from src.utils.logger import logger
+        
+        warnings = []
+        handler = logger.add(lambda message: warnings.append(str(message)), level="WARNING")
+        try:
+            RAGManager(RAGConfig(vector_store="memory", ann_index="ivf"))._get_vector_store()
+            RAGManager(RAGConfig(vector_store="numpy", ann_index="ivf"))._get_vector_store()
+            RAGManager(RAGConfig(vector_store="memory"))._get_vector_store()
+        finally:
+            logger.remove(handler)
+        
+        assert len(warnings) == 1
+        assert "InMemoryVectorStore" in warnings[0]
+    
+    @pytest.mark.asyncio
+    async def test_embedding_cache_hits_and_eviction(self, tmp_path):
+        """Test CachedEmbedding skips repeat API calls and evicts LRU entries."""
+        from src.core.rag import CachedEmbedding, EmbeddingCache, EmbeddingProviderBase
+        
+        class CountingEmbedding(EmbeddingProviderBase):
+            model = "fake-model"
+            
+            def __init__(self):
+                self.calls = []
+            
+            def get_dimensions(self) -> int:
+                return 2
+            
+            async def embed(self, texts):
+                self.calls.append(list(texts))
+                return [[float(len(t)), 1.0] for t in texts]
+        
+        inner = CountingEmbedding()
+        cache = EmbeddingCache(db_path=str(tmp_path / "cache.db"), max_entries=10)
+        provider = CachedEmbedding(inner, cache)
+        
+        first = await provider.embed(["a", "bb", "a"])
+        assert first == [[1.0, 1.0], [2.0, 1.0], [1.0, 1.0]]
+        assert inner.calls == [["a", "bb"]]
+        
+        second = await provider.embed(["bb", "ccc"])
+        assert second == [[2.0, 1.0], [3.0, 1.0]]
+        assert inner.calls[-1] == ["ccc"]
+        
+        stats = cache.get_stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 4
+        
+        await provider.embed([f"text-{i}" for i in range(20)])
+        assert cache.get_stats()["entries"] <= 10
+        assert cache.get_stats()["evictions"] > 0
+        
+        # Cache I/O runs in worker threads, not on the event loop thread
+        import threading
+        threads = []
+        get_many = cache.get_many
+        
+        def recording_get_many(*args):
+            threads.append(threading.get_ident())
+            return get_many(*args)
+        
+        cache.get_many = recording_get_many
+        await provider.embed(["a"])
+        assert threads and threading.get_ident() not in threads
+        cache.close()
+    
+    @pytest.mark.asyncio
+    async def test_incremental_index_directory(self, tmp_path):
+        """Test index_directory only re-indexes changed files and drops removed ones."""
+        import os
+        from src.core.rag import EmbeddingProviderBase, RAGConfig, RAGManager
+        
+        class CountingEmbedding(EmbeddingProviderBase):
+            def __init__(self):
+                self.texts = 0
+            
+            def get_dimensions(self) -> int:
+                return 2
+            
+            async def embed(self, texts):
+                self.texts += len(texts)
+                return [[1.0, float(len(t))] for t in texts]
+        
+        docs = tmp_path / "docs"
+        docs.mkdir()
+        (docs / "a.txt").write_text("alpha document")
+        (docs / "b.txt").write_text("beta document")
+        
+        def make_manager():
+            manager = RAGManager(RAGConfig(
+                vector_store="mmap",
+                persist_directory=str(tmp_path / "rag"),
+                embedding_cache=False,
+            ))
+            manager._embedding_provider = CountingEmbedding()
+            return manager
+        
+        manager = make_manager()
+        assert (await manager.index_directory(str(docs))).chunks_indexed == 2
+        
+        # A fresh manager (simulated restart) skips unchanged files
+        manager = make_manager()
+        result = await manager.index_directory(str(docs))
+        assert result.chunks_indexed == 0
+        assert result.files_unchanged == 2
+        assert manager._embedding_provider.texts == 0
+        
+        (docs / "a.txt").write_text("alpha document, revised")
+        os.remove(docs / "b.txt")
+        result = await manager.index_directory(str(docs))
+        assert result.chunks_indexed == 1
+        assert result.files_removed == 1
+        assert manager._get_vector_store().count() == 1
+        
+        result = await manager.index_directory(str(docs), force=True)
+        assert result.chunks_indexed == 1
+
+        # A narrower re-index leaves files outside its filters indexed
+        (docs / "notes.md").write_text("gamma notes")
+        (docs / "sub").mkdir()
+        (docs / "sub" / "c.txt").write_text("delta document")
+        assert (await manager.index_directory(str(docs))).chunks_indexed == 2
+        result = await manager.index_directory(str(docs), extensions={".md"}, recursive=False)
+        assert result.files_scanned == 1 and result.files_removed == 0
+        assert manager._get_vector_store().count() == 3
+
+    @pytest.mark.asyncio
+    async def test_pipelined_index_directory_batches_across_files(self, tmp_path):
+        """Test index_directory batches embeddings across files and reports progress."""
+        from src.core.rag import EmbeddingProviderBase, RAGConfig, RAGManager
+        
+        class RecordingEmbedding(EmbeddingProviderBase):
+            max_batch_size = 4
+            
+            def __init__(self):
+                self.batches = []
+            
+            def get_dimensions(self) -> int:
+                return 2
+            
+            async def embed(self, texts):
+                self.batches.append(len(texts))
+                return [[1.0, float(len(t))] for t in texts]
+        
+        docs = tmp_path / "docs"
+        docs.mkdir()
+        for i in range(10):
+            (docs / f"note{i}.txt").write_text(f"note number {i}")
+        (docs / "broken.json").write_text("{not json")
+        
+        manager = RAGManager(RAGConfig(
+            vector_store="numpy",
+            embedding_cache=False,
+            embedding_batch_size=100,
+            store_batch_size=3,
+        ))
+        manager._embedding_provider = RecordingEmbedding()
+        
+        progress = []
+        result = await manager.index_directory(str(docs), progress_callback=progress.append)
+        
+        assert result.files_scanned == 11
+        assert result.files_indexed == 11
+        assert result.chunks_indexed == 11
+        assert result.chunks_per_second > 0
+        assert manager._get_vector_store().count() == 11
+        # Batches are capped by the provider limit, not split per file
+        assert max(manager._embedding_provider.batches) == 4
+        assert len(manager._embedding_provider.batches) == 3
+        assert progress and progress[-1] is result
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
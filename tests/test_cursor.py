@@ -191,3 +191,341 @@ class TestCursorAgent:
                 assert "project1" in result
                 assert "project2" in result
                 assert ".hidden" not in result
+
+
+class TestCodeSearchIndex:
+    """Tests for the trigram code search index."""
+
+    def test_required_literals(self):
+        """Test mandatory literal extraction from regexes."""
+        from src.cursor.code_index import required_literals
+
+        assert required_literals("def handle_\\w+") == ["def handle_"]
+        assert required_literals("(foo|bar)baz") == ["baz"]
+        assert required_literals("ab?c") == []
+
+    def test_search_incremental_and_paginated(self, tmp_path):
+        """Test search results, ranking, pagination, and incremental refresh."""
+        import os
+        from src.cursor.code_index import CodeSearchIndex
+
+        workspace = tmp_path / "ws"
+        (workspace / "node_modules" / "pkg").mkdir(parents=True)
+        (workspace / "node_modules" / "pkg" / "index.js").write_text("const needle = 1;\n")
+        (workspace / "src").mkdir()
+        (workspace / "src" / "needle.py").write_text("def find_needle():\n    return 'needle'\n")
+        (workspace / "src" / "other.py").write_text("x = 'haystack needles'\nprint(x)\n")
+        (workspace / "notes.txt").write_text("needle\n")
+
+        index_dir = tmp_path / "index"
+        index = CodeSearchIndex(str(workspace), index_dir=str(index_dir))
+        assert index.refresh(force=True) == {"added": 2, "updated": 0, "removed": 0}
+
+        page = index.search("needle", limit=2)
+        assert page.total == 3
+        assert page.has_more
+        # The file named after the query ranks first; excluded dirs and types never appear
+        assert page.matches[0].file == "src/needle.py"
+        assert all("node_modules" not in m.file and m.file.endswith(".py") for m in page.matches)
+        assert index.search("needle", offset=2, limit=2).matches[0].file == "src/other.py"
+
+        regex_page = index.search(r"def \w+_needle", regex=True)
+        assert [(m.file, m.line) for m in regex_page.matches] == [("src/needle.py", 1)]
+        assert index.search("NEEDLE", case_sensitive=True).total == 0
+
+        # Incremental: change one file, delete another, reload from disk
+        other = workspace / "src" / "other.py"
+        other.write_text("nothing to see\n")
+        os.utime(other, ns=(1, 1))
+        (workspace / "src" / "needle.py").unlink()
+        assert index.refresh(force=True) == {"added": 0, "updated": 1, "removed": 1}
+
+        reloaded = CodeSearchIndex(str(workspace), index_dir=str(index_dir))
+        assert reloaded.get_stats()["files"] == 1
+        assert reloaded.search("needle").total == 0
+        assert reloaded.search("nothing to").total == 1
+
+        # A file that is not UTF-8 is recorded once, not re-added on every refresh
+        (workspace / "src" / "latin.py").write_bytes("caf\xe9 = 1\n".encode("latin-1"))
+        assert reloaded.refresh(force=True)["added"] == 1
+        saved = {p: p.stat().st_mtime_ns for p in index_dir.rglob("*") if p.is_file()}
+        assert reloaded.refresh(force=True) == {"added": 0, "updated": 0, "removed": 0}
+        assert {p: p.stat().st_mtime_ns for p in index_dir.rglob("*") if p.is_file()} == saved
+        assert reloaded.search("caf").total == 0
+        again = CodeSearchIndex(str(workspace), index_dir=str(index_dir))
+        assert again.refresh(force=True) == {"added": 0, "updated": 0, "removed": 0}
+
+    def test_search_ranks_before_truncating(self, tmp_path):
+        """Test the match cap keeps the best matches, not the first ones scanned."""
+        from src.cursor.code_index import CodeSearchIndex
+
+        workspace = tmp_path / "ws"
+        workspace.mkdir()
+        for name in ("a.py", "b.py", "c.py"):
+            (workspace / name).write_text("needles\n" * 3)
+        (workspace / "needle.py").write_text("needle = 1\n")
+
+        index = CodeSearchIndex(str(workspace), index_dir=str(tmp_path / "index"), max_matches=2)
+        index.refresh(force=True)
+        page = index.search("needle", limit=1)
+        assert page.truncated and page.total == 2
+        assert page.matches[0].file == "needle.py"
+
+
+
+FAKE_CLI = '''#!/usr/bin/env python3
+import os, sys
+args = sys.argv[1:]
+if args == ["create-chat"]:
+    print(f"chat-{os.getpid()}")
+    sys.exit(0)
+opts, prompt, i = {}, None, 0
+while i < len(args):
+    if args[i] in ("--print", "--stream-partial-output"):
+        i += 1
+    elif args[i].startswith("--"):
+        opts[args[i]] = args[i + 1]
+        i += 2
+    else:
+        prompt = args[i]
+        i += 1
+if prompt is None:
+    prompt = sys.stdin.read()
+    if os.getenv("FAKE_CLI_IGNORE_STDIN"):
+        sys.exit(2)
+    if os.getenv("FAKE_CLI_STDIN_ERROR"):
+        print("Error: authentication expired", file=sys.stderr)
+        sys.exit(1)
+if opts.get("--output-format") == "stream-json":
+    import json
+    def emit(**event):
+        print(json.dumps(event), flush=True)
+    def text(t):
+        emit(type="assistant", message={"role": "assistant", "content": [{"type": "text", "text": t}]})
+    def tool(subtype, call, **result):
+        body = {"args": {"path": os.path.join(os.getcwd(), call[1])}}
+        if result:
+            body["result"] = {"success": {"path": body["args"]["path"], **result}}
+        emit(type="tool_call", subtype=subtype, call_id=call[1], tool_call={call[0]: body})
+    emit(type="system", subtype="init", session_id="s1", model="fake")
+    print("warning: not json")
+    text("Reading "); text("file."); text("Reading file.")
+    tool("started", ("readToolCall", "a.py")); tool("completed", ("readToolCall", "a.py"), content="x")
+    tool("started", ("editToolCall", "a.py")); tool("completed", ("editToolCall", "a.py"), linesAdded=3, linesRemoved=1)
+    tool("completed", ("writeToolCall", "new.txt"), linesCreated=5)
+    text("Done.")
+    emit(type="result", subtype="success", is_error=False, result="Reading file.Done.", duration_ms=5)
+    sys.exit(0)
+print(f"resume={opts.get('--resume')} model={opts.get('--model')} prompt={prompt}")
+'''
+
+
+class TestCLIWorkerPool:
+    """Tests for warm Cursor CLI workers."""
+
+    @pytest.mark.asyncio
+    async def test_warm_workers_reserve_chats_and_affinity(self, tmp_path, monkeypatch):
+        """Test warm starts, user affinity, reserve chats, cold fallback and reaping."""
+        import asyncio
+        import os
+        import sys
+        from src.cursor.cli_agent import CLIConfig, CLIPoolConfig, CursorCLIAgent
+
+        script = tmp_path / "agent"
+        script.write_text(FAKE_CLI.replace("/usr/bin/env python3", sys.executable))
+        os.chmod(script, 0o755)
+        monkeypatch.delenv("CLI_DISABLE_RESUME", raising=False)
+
+        agent = CursorCLIAgent(
+            CLIConfig(cli_path=str(script), working_directory=str(tmp_path)),
+            CLIPoolConfig(warm_workers=1, reserve_chats=1, max_concurrent=2, idle_timeout=60),
+        )
+        # Keep chat sessions in memory only
+        agent.get_user_chat_id = agent._user_chat_sessions.get
+        agent.set_user_chat_id = agent._user_chat_sessions.__setitem__
+        pool = agent._pool
+
+        async def settle():
+            while pool._background:
+                await asyncio.gather(*pool._background, return_exceptions=True)
+
+        try:
+            await agent.warm_pool()
+            stats = agent.get_pool_stats()
+            assert stats["idle_workers"] == 1 and stats["reserve_chats"] == 1
+
+            # First-time user gets the generic worker and its pre-created chat
+            first = await agent.run("hello", user_id="u1")
+            chat_id = agent._user_chat_sessions["u1"]
+            assert first.success and first.warm_start
+            assert first.output.strip() == f"resume={chat_id} model=None prompt=hello"
+            assert first.startup_time + first.execution_time == pytest.approx(first.duration, abs=0.01)
+
+            # Their follow-up hits the worker re-warmed for their chat
+            await settle()
+            assert agent.get_pool_stats()["affinity_workers"] == 1
+            second = await agent.run("again", user_id="u1")
+            assert second.warm_start and f"resume={chat_id}" in second.output
+
+            # No matching worker: cold start, chat taken from the reserve
+            await settle()
+            cold = await agent.run("x", user_id="u2", model="other")
+            assert cold.success and not cold.warm_start
+            assert "model=other prompt=x" in cold.output
+            assert agent.get_pool_stats()["chats_from_reserve"] >= 1
+
+            # Idle workers are reaped, unused fresh chats go back to the reserve
+            await settle()
+            pool.config.idle_timeout = 0
+            reserve = agent.get_pool_stats()["reserve_chats"]
+            assert pool.reap() >= 2
+            stats = agent.get_pool_stats()
+            assert stats["idle_workers"] == 0 and stats["reserve_chats"] == reserve + 1
+            assert stats["warm_starts"] == 2 and stats["cold_starts"] == 1
+
+            # Reaped generic workers are replaced until the refill budget runs out
+            await settle()
+            assert agent.get_pool_stats()["idle_workers"] == pool.config.warm_workers
+            for _ in range(pool.config.idle_refills):
+                pool.reap()
+                await settle()
+            assert agent.get_pool_stats()["idle_workers"] == 0
+        finally:
+            await agent.aclose()
+
+    @pytest.mark.asyncio
+    async def test_warm_worker_failing_without_running_retries_cold(self, tmp_path, monkeypatch):
+        """Test a warm worker that takes the prompt but exits without running it."""
+        import os
+        import sys
+        from src.cursor import cli_agent
+        from src.cursor.cli_agent import CLIConfig, CLIPoolConfig, CursorCLIAgent
+
+        script = tmp_path / "agent"
+        script.write_text(FAKE_CLI.replace("/usr/bin/env python3", sys.executable))
+        os.chmod(script, 0o755)
+        monkeypatch.setenv("CLI_DISABLE_RESUME", "1")
+        monkeypatch.setenv("FAKE_CLI_IGNORE_STDIN", "1")
+
+        agent = CursorCLIAgent(
+            CLIConfig(cli_path=str(script), working_directory=str(tmp_path), stream_output=False),
+            CLIPoolConfig(warm_workers=1, idle_timeout=60),
+        )
+        await agent.warm_pool()
+        assert agent.get_pool_stats()["idle_workers"] == 1
+
+        result = await agent.run("hello")
+        assert result.success and not result.warm_start
+        assert result.output.strip() == "resume=None model=None prompt=hello"
+        stats = agent.get_pool_stats()
+        assert stats["workers_dead"] == 1 and stats["cold_starts"] == 1
+        # Counted once, as the cold start, with the wait for the failed worker included
+        assert stats["warm_starts"] == 0
+        assert stats["avg_cold_startup_seconds"] == pytest.approx(result.startup_time, abs=0.001)
+        assert result.startup_time + result.execution_time == pytest.approx(result.duration, abs=0.01)
+
+        # A warm run that fails with an error on stderr really ran: no cold retry
+        monkeypatch.delenv("FAKE_CLI_IGNORE_STDIN")
+        monkeypatch.setenv("FAKE_CLI_STDIN_ERROR", "1")
+        await agent.warm_pool()
+        failed = await agent.run("hello")
+        assert not failed.success and failed.warm_start
+        assert "authentication expired" in failed.error
+        stats = agent.get_pool_stats()
+        assert stats["workers_dead"] == 1 and stats["cold_starts"] == 1
+
+        # Resetting the global agent keeps its close task referenced until done
+        monkeypatch.setattr(cli_agent, "_cli_agent", agent)
+        cli_agent.reset_cli_agent()
+        closing = list(cli_agent._closing)
+        assert len(closing) == 1
+        await closing[0]
+        assert not cli_agent._closing
+
+
+class TestCLIStreaming:
+    """Tests for stream-json Cursor CLI output."""
+
+    @pytest.mark.asyncio
+    async def test_stream_events_diff_summary_and_live_task_output(self, tmp_path, monkeypatch):
+        """Test parsed events, file changes, task streaming and output spill."""
+        import os
+        import sys
+        import time
+        from src.core.async_tasks import AsyncTaskManager, TaskStatus
+        from src.cursor import cli_agent
+        from src.cursor.cli_agent import CLIConfig, CLIPoolConfig, CursorCLIAgent
+        from src.cursor.cli_stream import CLIOutputBuffer
+
+        script = tmp_path / "agent"
+        script.write_text(FAKE_CLI.replace("/usr/bin/env python3", sys.executable))
+        os.chmod(script, 0o755)
+        monkeypatch.setenv("CLI_DISABLE_RESUME", "1")
+
+        agent = CursorCLIAgent(
+            CLIConfig(cli_path=str(script), working_directory=str(tmp_path), stream_output=True),
+            CLIPoolConfig(warm_workers=0),
+        )
+        events, deltas = [], []
+
+        async def on_event(event):
+            events.append(event)
+
+        result = await agent.run("go", on_event=on_event, on_output=deltas.append)
+        assert result.success and result.output == "Reading file.Done."
+        # The repeated full segment adds nothing; non-JSON lines pass through as text
+        assert "".join(deltas) == "warning: not json\nReading file.Done."
+        assert [e.progress_line() for e in events if e.progress_line()] == [
+            "🔧 Read a.py", "✏️ Edited a.py (+3 -1)", "✏️ Created new.txt (+5)",
+        ]
+        assert result.files_modified == ["a.py", "new.txt"] and result.tool_calls == 2
+        assert result.diff_summary.splitlines() == [
+            "📁 2 files changed, +8 -1", "  M a.py (+3 -1)", "  A new.txt (+5)",
+        ]
+
+        # Background CLI task streams text, tool lines and the summary
+        monkeypatch.setattr(cli_agent, "_cli_agent", agent)
+        manager = AsyncTaskManager(max_concurrent=1)
+        tokens = []
+        task_id = await manager.submit_cli_task("u1", "c1", "telegram", "go", on_token=tokens.append)
+        task = manager._tasks[task_id]
+        await task._task
+        assert task.status == TaskStatus.COMPLETED
+        streamed = "".join(tokens)
+        assert "Reading file.\n🔧 Read a.py\n✏️ Edited a.py (+3 -1)\n" in streamed
+        assert streamed.endswith("Done.\n\n" + result.diff_summary)
+        assert task.result == "Reading file.Done.\n\n" + result.diff_summary
+
+        # A cancelled task still reaches on_error so its stream is completed
+        errors = []
+        task_id = await manager.submit_cli_task(
+            "u1", "c1", "telegram", "go", on_token=tokens.append, on_error=errors.append,
+        )
+        assert await manager.cancel_task(task_id)
+        assert [t.status for t in errors] == [TaskStatus.CANCELLED]
+
+        # Output past the cap spills to a file; memory keeps head and tail
+        buffer = CLIOutputBuffer(max_chars=10, spill_dir=str(tmp_path / "spill"))
+        for chunk in ("abcdefgh", "ijklmnop", "qrstuvwxyz"):
+            buffer.append(chunk)
+        buffer.close()
+        assert buffer.truncated and buffer.total_chars == 26
+        with open(buffer.path) as f:
+            assert f.read() == "abcdefghijklmnopqrstuvwxyz"
+        assert buffer.text().startswith("abcde\n\n… [16 chars omitted")
+        assert buffer.text().endswith("vwxyz")
+        assert buffer.path not in buffer.text()
+
+        # Each spill prunes the directory to keep_files newest and drops old ones
+        spill_dir = tmp_path / "spill"
+        stale = spill_dir / "cli-stale.log"
+        stale.write_text("old")
+        os.utime(stale, (time.time() - 3600, time.time() - 3600))
+        paths = [buffer.path]
+        for _ in range(3):
+            time.sleep(0.02)  # distinct mtimes on coarse filesystem clocks
+            extra = CLIOutputBuffer(max_chars=2, spill_dir=str(spill_dir), keep_files=2, max_age=60)
+            extra.append("spill")
+            extra.close()
+            paths.append(extra.path)
+        assert sorted(os.listdir(spill_dir)) == sorted(os.path.basename(p) for p in paths[-2:])
@@ -180,9 +180,164 @@ class TestAnalytics:
             input_tokens=1000,
             output_tokens=500,
         )
-        
+
         assert cost >= 0
 
+    def test_batched_ingestion(self):
+        """Test events are queued, written in batches and flushed on close."""
+        import time
+        from src.core.analytics import (
+            AnalyticsManager, DropPolicy, EventType, IngestionConfig,
+        )
+
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = os.path.join(tmp, "analytics.db")
+            config = IngestionConfig(batch_size=50, flush_interval=0.05)
+            manager = AnalyticsManager(db_path, ingestion=config)
+
+            for i in range(120):
+                manager.track(EventType.MESSAGE, user_id=f"user{i % 3}", platform="telegram")
+
+            # Reads flush the queue first
+            assert len(manager.get_events(limit=1000)) == 120
+            stats = manager.get_ingestion_stats()
+            assert stats["written"] == 120
+            assert stats["queued"] == 0
+            assert stats["batches"] < 120
+
+            manager.track(EventType.COMMAND, user_id="user0")
+            manager.close()
+            reopened = AnalyticsManager(db_path, ingestion=IngestionConfig(enabled=False))
+            assert len(reopened.get_events(limit=1000)) == 121
+
+            # A full buffer drops the oldest events instead of growing
+            config = IngestionConfig(max_queue=10, batch_size=1000, flush_interval=60)
+            bounded = AnalyticsManager(os.path.join(tmp, "bounded.db"), ingestion=config)
+            for i in range(25):
+                bounded.track(EventType.MESSAGE, user_id="user", data={"i": i})
+            assert bounded.get_ingestion_stats()["dropped"] == 15
+            bounded.close()
+            events = bounded.get_events(limit=100)
+            assert sorted(e.data["i"] for e in events) == list(range(15, 25))
+            assert config.drop_policy == DropPolicy.DROP_OLDEST
+
+            # A read flushes a partial batch at once, not after flush_interval
+            config = IngestionConfig(batch_size=1000, flush_interval=30)
+            slow = AnalyticsManager(os.path.join(tmp, "slow.db"), ingestion=config)
+            slow.track(EventType.MESSAGE, user_id="warmup")
+            slow.get_events(limit=10)
+            for i in range(5):
+                slow.track(EventType.MESSAGE, user_id="user")
+            started = time.monotonic()
+            assert len(slow.get_events(limit=100)) == 6
+            assert time.monotonic() - started < 2
+            slow.close()
+
+    def test_rollups_and_retention(self):
+        """Test dashboards read rollups that outlive pruned raw events."""
+        import sqlite3
+        from datetime import timedelta
+        from src.core.analytics import (
+            AnalyticsManager, Event, EventType, IngestionConfig, RollupConfig,
+        )
+
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = os.path.join(tmp, "analytics.db")
+            manager = AnalyticsManager(
+                db_path,
+                ingestion=IngestionConfig(enabled=False),
+                rollup=RollupConfig(raw_retention_days=7, hourly_retention_days=7),
+            )
+
+            for i in range(6):
+                manager.track_llm_request(f"user{i % 2}", "gpt-4o", 100, 50, duration_ms=200 * i)
+            manager.track(EventType.ERROR, user_id="user0")
+
+            # An old event, stored directly as if ingested weeks ago
+            old = Event(
+                id="old-1", type=EventType.MESSAGE,
+                timestamp=datetime.now() - timedelta(days=20), user_id="user9",
+            )
+            storage = manager._storage
+            conn = storage.connect()
+            try:
+                with conn:
+                    storage.save_events([old], conn)
+            finally:
+                conn.close()
+
+            today = manager.get_daily_stats(30)[0]
+            assert today.total_llm_requests == 6
+            assert today.total_tokens == 900
+            assert today.unique_users == 2
+            assert today.errors == 1
+            assert today.avg_response_time_ms == 500
+
+            summary = manager.get_summary()["last_30_days"]
+            assert summary["total_users"] == 3
+            assert summary["latency"]["total"] == 6
+            assert summary["latency"]["p50_ms"] == 500
+            assert summary["latency"]["overflow"] == []
+
+            deleted = storage.apply_retention()
+            assert deleted["events"] == 1
+            assert manager.get_events(user_id="user9") == []
+            assert len(manager.get_daily_stats(30)) == 2
+
+            # Rollups are rebuilt from raw events for databases that predate them
+            conn = sqlite3.connect(db_path)
+            conn.execute("DROP TABLE rollup_daily")
+            conn.commit()
+            conn.close()
+            rebuilt = AnalyticsManager(db_path, ingestion=IngestionConfig(enabled=False))
+            assert rebuilt.get_daily_stats(30)[0].total_tokens == 900
+
+            # Percentiles slower than the last bucket report its bound, flagged
+            slow = AnalyticsManager(os.path.join(tmp, "slow.db"), ingestion=IngestionConfig(enabled=False))
+            for duration_ms in (100, 200, 300, 60000):
+                slow.track_llm_request("user0", "gpt-4o", 1, 1, duration_ms=duration_ms)
+            latency = slow.get_summary()["last_30_days"]["latency"]
+            assert latency["p50_ms"] == 250
+            assert latency["p95_ms"] == latency["bounds_ms"][-1]
+            assert latency["overflow"] == ["p95_ms", "p99_ms"]
+
+    def test_streaming_and_columnar_export(self):
+        """Test exports stream events in pages and write Parquet/Arrow files."""
+        import json
+        from src.core.analytics import AnalyticsManager, IngestionConfig
+
+        with tempfile.TemporaryDirectory() as tmp:
+            manager = AnalyticsManager(
+                os.path.join(tmp, "analytics.db"), ingestion=IngestionConfig(enabled=False)
+            )
+            for i in range(25):
+                manager.track_llm_request(f"user{i % 3}", "gpt-4o", 10, 5, duration_ms=100)
+
+            # Keyset pages cover every event exactly once, oldest first
+            events = list(manager._storage.iter_events(batch_size=4))
+            assert len({e.id for e in events}) == 25
+            assert events == sorted(events, key=lambda e: (e.timestamp, e.id))
+
+            path = asyncio.run(manager.export_to_file(format="json", output_dir=tmp))
+            with open(path) as f:
+                data = json.load(f)
+            assert data["total_events"] == 25
+            assert not os.path.exists(path + ".tmp")
+            assert asyncio.run(manager.export_to_file(format="xml", output_dir=tmp)) is None
+
+            pa = pytest.importorskip("pyarrow")
+            import pyarrow.parquet as pq
+
+            path = asyncio.run(manager.export_to_file(format="parquet", output_dir=tmp))
+            table = pq.read_table(path)
+            assert table.num_rows == 25
+            assert pa.types.is_dictionary(table.schema.field("user_id").type)
+            assert set(table.column("model").to_pylist()) == {"gpt-4o"}
+
+            path = manager.export_to_columnar(os.path.join(tmp, "events.arrow"), format="arrow", batch_size=10)
+            with pa.ipc.open_stream(path) as reader:
+                assert reader.read_all().num_rows == 25
+
 
 # ============================================
 # Code Review Tests
@@ -330,6 +485,80 @@ class TestConversationExport:
         assert "# Conversation Export" in result
         assert "Hello!" in result
         assert "Hi there!" in result
+    
+    def test_streaming_export(self):
+        """Test exporters stream chunks and export_to_file pages through history."""
+        import json
+        from datetime import timedelta
+        from src.core import memory
+        from src.core.conversation_export import (
+            ConversationExporter, CSVExporter, ExportConfig, ExportFormat, ExportMessage,
+            HTMLExporter, JSONExporter, MarkdownExporter, TxtExporter,
+        )
+        from src.core.memory import MemoryManager
+        
+        start = datetime(2024, 1, 1)
+        messages = [
+            ExportMessage(
+                id=str(i),
+                role="user" if i % 2 else "assistant",
+                content=f"message {i}",
+                timestamp=start + timedelta(hours=i),
+            )
+            for i in range(5)
+        ]
+        
+        for exporter_class in (JSONExporter, MarkdownExporter, HTMLExporter, TxtExporter, CSVExporter):
+            exporter = exporter_class()
+            chunks = list(exporter.iter_export(iter(messages), total=5))
+            # Header, one chunk per message, footer
+            assert len(chunks) == 7
+            assert "message 3" in chunks[4]
+        
+        data = json.loads(JSONExporter().export(messages))
+        assert data["message_count"] == 5
+        assert [m["content"] for m in data["messages"]] == [m.content for m in messages]
+        
+        async def run(tmp):
+            manager = MemoryManager(db_path=Path(tmp) / "memory.db")
+            previous, memory._memory_manager = memory._memory_manager, manager
+            try:
+                for i in range(30):
+                    await manager.add_message(42, 7, "user", f"hello {i}")
+                await manager.add_message(42, 8, "user", "other chat")
+                
+                pages = [r async for r in manager.iter_conversation_history(42, 7, page_size=7)]
+                assert [r["content"] for r in pages] == [f"hello {i}" for i in range(30)]
+                
+                exporter = ConversationExporter()
+                result = await exporter.export_to_file("42", "7", ExportFormat.JSON, output_dir=tmp)
+                assert result.success and result.message_count == 30
+                assert result.content == ""
+                with open(result.file_path, encoding="utf-8") as f:
+                    assert len(json.load(f)["messages"]) == 30
+                
+                chunks = [c async for c in exporter.export_stream("42", "7", ExportFormat.CSV)]
+                assert len(chunks) == 32
+                
+                pytest.importorskip("pyarrow")
+                import pyarrow.parquet as pq
+                
+                result = await exporter.export_to_file("42", "7", ExportFormat.PARQUET, output_dir=tmp)
+                assert result.success, result.error
+                table = pq.read_table(result.file_path)
+                assert table.num_rows == 30
+                assert table.column("content").to_pylist()[-1] == "hello 29"
+                assert "metadata" not in table.column_names
+                
+                with_metadata = ConversationExporter(ExportConfig(include_metadata=True))
+                result = await with_metadata.export_to_file("42", "7", ExportFormat.PARQUET, output_dir=tmp)
+                assert "metadata" in pq.read_table(result.file_path).column_names
+            finally:
+                memory._memory_manager = previous
+                await manager.close()
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            asyncio.run(run(tmp))
 
 
 # ============================================